@@ -3,13 +3,14 @@ from datetime import datetime, timedelta
 import os
 import uuid
 import logging
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Body, Query, Path, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Body, Query, Path, BackgroundTasks, Response
 
 logger = logging.getLogger(__name__)
 from fastapi.responses import JSONResponse, FileResponse
 from pydantic import EmailStr, BaseModel
 
 from app.core.config import settings
+from app.core.pagination import cursor_after_id, set_next_cursor
 from app.accounting.dependencies import (
     get_current_user,
     company_read_permission,
@@ -46,8 +47,10 @@ async def create_company_endpoint(company: CompanyCreate):
 
 @router.get("/companies", response_model=List[Company])
 async def get_companies_endpoint(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    after_id: Optional[int] = Depends(cursor_after_id),
     name: Optional[str] = None,
     location: Optional[str] = None,
     is_zona_libre: Optional[bool] = None
@@ -61,7 +64,9 @@ async def get_companies_endpoint(
     if is_zona_libre is not None:
         filters["is_zona_libre"] = is_zona_libre
 
-    return get_companies(skip=skip, limit=limit, filters=filters)
+    companies = get_companies(skip=skip, limit=limit, filters=filters, after_id=after_id)
+    set_next_cursor(response, companies, limit)
+    return companies
 
 @router.get("/companies/{company_id}", response_model=Company)
 async def get_company_endpoint(
@@ -116,8 +121,10 @@ async def create_tax_type_endpoint(tax_type: TaxTypeCreate):
 
 @router.get("/tax-types", response_model=List[TaxType])
 async def get_tax_types_endpoint(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    after_id: Optional[int] = Depends(cursor_after_id),
     name: Optional[str] = None,
     authority: Optional[str] = None
 ):
@@ -128,7 +135,9 @@ async def get_tax_types_endpoint(
     if authority:
         filters["authority"] = authority
     
-    return get_tax_types(skip=skip, limit=limit, filters=filters)
+    tax_types = get_tax_types(skip=skip, limit=limit, filters=filters, after_id=after_id)
+    set_next_cursor(response, tax_types, limit)
+    return tax_types
 
 @router.get("/tax-types/{tax_type_id}", response_model=TaxType)
 async def get_tax_type_endpoint(tax_type_id: int = Path(..., gt=0)):
@@ -174,8 +183,10 @@ async def create_obligation_endpoint(
 
 @router.get("/obligations", response_model=List[Obligation])
 async def get_obligations_endpoint(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    after_id: Optional[int] = Depends(cursor_after_id),
     company_id: Optional[int] = None,
     tax_type_id: Optional[int] = None,
     status: Optional[str] = None,
@@ -193,7 +204,8 @@ async def get_obligations_endpoint(
     if frequency:
         filters["frequency"] = frequency
     
-    obligations = get_obligations(skip=skip, limit=limit, filters=filters)
+    obligations = get_obligations(skip=skip, limit=limit, filters=filters, after_id=after_id)
+    set_next_cursor(response, obligations, limit)
     
     if due_before:
         filtered_obligations = []
@@ -261,8 +273,10 @@ async def create_payment_endpoint(
 
 @router.get("/payments", response_model=List[Payment])
 async def get_payments_endpoint(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    after_id: Optional[int] = Depends(cursor_after_id),
     obligation_id: Optional[int] = None,
     payment_date_from: Optional[datetime] = None,
     payment_date_to: Optional[datetime] = None
@@ -272,7 +286,8 @@ async def get_payments_endpoint(
     if obligation_id:
         filters["obligation_id"] = obligation_id
     
-    payments = get_payments(skip=skip, limit=limit, filters=filters)
+    payments = get_payments(skip=skip, limit=limit, filters=filters, after_id=after_id)
+    set_next_cursor(response, payments, limit)
     
     if payment_date_from or payment_date_to:
         filtered_payments = []
@@ -333,8 +348,10 @@ async def create_attachment_endpoint(attachment: AttachmentCreate):
 
 @router.get("/attachments", response_model=List[Attachment])
 async def get_attachments_endpoint(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    after_id: Optional[int] = Depends(cursor_after_id),
     file_type: Optional[str] = None,
     uploaded_by: Optional[str] = None
 ):
@@ -345,7 +362,9 @@ async def get_attachments_endpoint(
     if uploaded_by:
         filters["uploaded_by"] = uploaded_by
     
-    return get_attachments(skip=skip, limit=limit, filters=filters)
+    attachments = get_attachments(skip=skip, limit=limit, filters=filters, after_id=after_id)
+    set_next_cursor(response, attachments, limit)
+    return attachments
 
 @router.get("/attachments/{attachment_id}", response_model=Attachment)
 async def get_attachment_endpoint(attachment_id: int = Path(..., gt=0)):
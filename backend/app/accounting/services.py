@@ -28,8 +28,10 @@ from app.db.base import InMemoryDB
 
 companies_db = InMemoryDB[Company](Company)
 tax_types_db = InMemoryDB[TaxType](TaxType)
-obligations_db = InMemoryDB[Obligation](Obligation)
-payments_db = InMemoryDB[Payment](Payment)
+obligations_db = InMemoryDB[Obligation](
+    Obligation, indexes=["company_id", "tax_type_id", "status"], sorted_indexes=["next_due_date"]
+)
+payments_db = InMemoryDB[Payment](Payment, indexes=["obligation_id"])
 attachments_db = InMemoryDB[Attachment](Attachment)
 notifications_db = InMemoryDB[Notification](Notification)
 
@@ -45,9 +47,11 @@ def get_company(company_id: int) -> Optional[Company]:
     """Get a company by ID."""
     return companies_db.get(company_id)
 
-def get_companies(skip: int = 0, limit: int = 100, filters: Dict[str, Any] = None) -> List[Company]:
+def get_companies(
+    skip: int = 0, limit: int = 100, filters: Dict[str, Any] = None, after_id: Optional[int] = None
+) -> List[Company]:
     """Get a list of companies with optional filtering."""
-    return companies_db.get_multi(skip=skip, limit=limit, filters=filters)
+    return companies_db.get_multi(skip=skip, limit=limit, filters=filters, after_id=after_id)
 
 def update_company(company_id: int, company_data: Dict[str, Any]) -> Optional[Company]:
     """Update a company."""
@@ -80,9 +84,11 @@ def get_tax_type(tax_type_id: int) -> Optional[TaxType]:
     """Get a tax type by ID."""
     return tax_types_db.get(tax_type_id)
 
-def get_tax_types(skip: int = 0, limit: int = 100, filters: Dict[str, Any] = None) -> List[TaxType]:
+def get_tax_types(
+    skip: int = 0, limit: int = 100, filters: Dict[str, Any] = None, after_id: Optional[int] = None
+) -> List[TaxType]:
     """Get a list of tax types with optional filtering."""
-    return tax_types_db.get_multi(skip=skip, limit=limit, filters=filters)
+    return tax_types_db.get_multi(skip=skip, limit=limit, filters=filters, after_id=after_id)
 
 def update_tax_type(tax_type_id: int, tax_type_data: Dict[str, Any]) -> Optional[TaxType]:
     """Update a tax type."""
@@ -134,10 +140,15 @@ def get_obligation(obligation_id: int) -> Optional[Obligation]:
     
     return obligation
 
-def get_obligations(skip: int = 0, limit: int = 100, filters: Dict[str, Any] = None) -> List[Obligation]:
+def get_obligations(
+    skip: int = 0, limit: int = 100, filters: Dict[str, Any] = None, after_id: Optional[int] = None
+) -> List[Obligation]:
     """Get a list of obligations with optional filtering."""
-    obligations = obligations_db.get_multi(skip=skip, limit=limit, filters=filters)
-    
+    obligations = obligations_db.get_multi(skip=skip, limit=limit, filters=filters, after_id=after_id)
+    return _enrich_obligations(obligations)
+
+def _enrich_obligations(obligations: List[Obligation]) -> List[Obligation]:
+    """Fill in the company and tax type names of obligations."""
     for obligation in obligations:
         company = companies_db.get(obligation.company_id)
         tax_type = tax_types_db.get(obligation.tax_type_id)
@@ -211,9 +222,11 @@ def get_payment(payment_id: int) -> Optional[Payment]:
     """Get a payment by ID."""
     return payments_db.get(payment_id)
 
-def get_payments(skip: int = 0, limit: int = 100, filters: Dict[str, Any] = None) -> List[Payment]:
+def get_payments(
+    skip: int = 0, limit: int = 100, filters: Dict[str, Any] = None, after_id: Optional[int] = None
+) -> List[Payment]:
     """Get a list of payments with optional filtering."""
-    return payments_db.get_multi(skip=skip, limit=limit, filters=filters)
+    return payments_db.get_multi(skip=skip, limit=limit, filters=filters, after_id=after_id)
 
 def update_payment(payment_id: int, payment_data: Dict[str, Any]) -> Optional[Payment]:
     """Update a payment."""
@@ -297,9 +310,11 @@ def get_attachment(attachment_id: int) -> Optional[Attachment]:
     """Get an attachment by ID."""
     return attachments_db.get(attachment_id)
 
-def get_attachments(skip: int = 0, limit: int = 100, filters: Dict[str, Any] = None) -> List[Attachment]:
+def get_attachments(
+    skip: int = 0, limit: int = 100, filters: Dict[str, Any] = None, after_id: Optional[int] = None
+) -> List[Attachment]:
     """Get a list of attachments with optional filtering."""
-    return attachments_db.get_multi(skip=skip, limit=limit, filters=filters)
+    return attachments_db.get_multi(skip=skip, limit=limit, filters=filters, after_id=after_id)
 
 def delete_attachment(attachment_id: int) -> bool:
     """Delete an attachment."""
@@ -319,233 +334,205 @@ def delete_attachment(attachment_id: int) -> bool:
 def init_accounting_db():
     """Initialize the accounting database with sample data."""
     if not tax_types_db.get_multi():
-        create_tax_type({
-            "id": 1,
-            "name": "ITBMS",
-            "authority": "DGI",
-            "description": "Impuesto de Transferencia de Bienes Muebles y Servicios (7% sales tax)",
-            "created_at": datetime.utcnow()
-        })
-        
-        create_tax_type({
-            "id": 2,
-            "name": "ISR",
-            "authority": "DGI",
-            "description": "Impuesto Sobre la Renta (Income tax)",
-            "created_at": datetime.utcnow()
-        })
-        
-        create_tax_type({
-            "id": 3,
-            "name": "CSS",
-            "authority": "CSS",
-            "description": "Caja de Seguro Social (Social security contributions)",
-            "created_at": datetime.utcnow()
-        })
-        
-        create_tax_type({
-            "id": 4,
-            "name": "Municipal",
-            "authority": "Municipio",
-            "description": "Municipal taxes and fees",
-            "created_at": datetime.utcnow()
-        })
-        
-        create_tax_type({
-            "id": 5,
-            "name": "ANIP/ZLC",
-            "authority": "ANIP/ZLC",
-            "description": "Aviso de Operaciones (0.5% annual tax on declared sales)",
-            "created_at": datetime.utcnow()
-        })
+        tax_types_db.create_many(objs_in=[
+            TaxType(**{
+                "id": 1,
+                "name": "ITBMS",
+                "authority": "DGI",
+                "description": "Impuesto de Transferencia de Bienes Muebles y Servicios (7% sales tax)",
+                "created_at": datetime.utcnow()
+            }),
+            TaxType(**{
+                "id": 2,
+                "name": "ISR",
+                "authority": "DGI",
+                "description": "Impuesto Sobre la Renta (Income tax)",
+                "created_at": datetime.utcnow()
+            }),
+            TaxType(**{
+                "id": 3,
+                "name": "CSS",
+                "authority": "CSS",
+                "description": "Caja de Seguro Social (Social security contributions)",
+                "created_at": datetime.utcnow()
+            }),
+            TaxType(**{
+                "id": 4,
+                "name": "Municipal",
+                "authority": "Municipio",
+                "description": "Municipal taxes and fees",
+                "created_at": datetime.utcnow()
+            }),
+            TaxType(**{
+                "id": 5,
+                "name": "ANIP/ZLC",
+                "authority": "ANIP/ZLC",
+                "description": "Aviso de Operaciones (0.5% annual tax on declared sales)",
+                "created_at": datetime.utcnow()
+            }),
+        ])
     
     if not companies_db.get_multi():
-        create_company({
-            "id": 1,
-            "name": "Magnate Spes",
-            "location": "Chitré",
-            "address": "Calle Principal, Chitré, Herrera",
-            "contact_email": "contact@magnatespes.com",
-            "contact_phone": "+507 123-4567",
-            "is_zona_libre": False,
-            "notes": "Regular business subject to standard DGI and municipal obligations",
-            "created_at": datetime.utcnow()
-        })
-        
-        create_company({
-            "id": 2,
-            "name": "Magnate Maximus",
-            "location": "Zona Libre de Colón",
-            "address": "Zona Libre de Colón, Colón",
-            "contact_email": "contact@magnatemaximus.com",
-            "contact_phone": "+507 765-4321",
-            "is_zona_libre": True,
-            "notes": "Operates in Zona Libre de Colón with special tax exemptions",
-            "created_at": datetime.utcnow()
-        })
-        
-        create_company({
-            "id": 3,
-            "name": "Parfums El Magnate",
-            "location": "Zona Libre de Colón",
-            "address": "Zona Libre de Colón, Colón",
-            "contact_email": "contact@parfumsmagnate.com",
-            "contact_phone": "+507 987-6543",
-            "is_zona_libre": True,
-            "notes": "Operates in Zona Libre de Colón with special tax exemptions",
-            "created_at": datetime.utcnow()
-        })
+        companies_db.create_many(objs_in=[
+            Company(**{
+                "id": 1,
+                "name": "Magnate Spes",
+                "location": "Chitré",
+                "address": "Calle Principal, Chitré, Herrera",
+                "contact_email": "contact@magnatespes.com",
+                "contact_phone": "+507 123-4567",
+                "is_zona_libre": False,
+                "notes": "Regular business subject to standard DGI and municipal obligations",
+                "created_at": datetime.utcnow()
+            }),
+            Company(**{
+                "id": 2,
+                "name": "Magnate Maximus",
+                "location": "Zona Libre de Colón",
+                "address": "Zona Libre de Colón, Colón",
+                "contact_email": "contact@magnatemaximus.com",
+                "contact_phone": "+507 765-4321",
+                "is_zona_libre": True,
+                "notes": "Operates in Zona Libre de Colón with special tax exemptions",
+                "created_at": datetime.utcnow()
+            }),
+            Company(**{
+                "id": 3,
+                "name": "Parfums El Magnate",
+                "location": "Zona Libre de Colón",
+                "address": "Zona Libre de Colón, Colón",
+                "contact_email": "contact@parfumsmagnate.com",
+                "contact_phone": "+507 987-6543",
+                "is_zona_libre": True,
+                "notes": "Operates in Zona Libre de Colón with special tax exemptions",
+                "created_at": datetime.utcnow()
+            }),
+        ])
     
     if not obligations_db.get_multi():
-        create_obligation({
-            "id": 1,
-            "company_id": 1,
-            "tax_type_id": 1,  # ITBMS
-            "name": "Monthly ITBMS Declaration",
-            "description": "Monthly 7% sales tax declaration",
-            "frequency": "monthly",
-            "due_day": 15,  # Due on the 15th of each month
-            "reminder_days": 7,
-            "status": "pending",
-            "next_due_date": datetime.utcnow().replace(day=15) + timedelta(days=30),
-            "created_at": datetime.utcnow()
-        })
-        
-        create_obligation({
-            "id": 2,
-            "company_id": 1,
-            "tax_type_id": 2,  # ISR
-            "name": "Annual Income Tax Declaration",
-            "description": "Annual income tax declaration",
-            "frequency": "annual",
-            "due_day": 31,  # Due on March 31st
-            "reminder_days": 30,
-            "status": "pending",
-            "next_due_date": datetime(datetime.utcnow().year + 1, 3, 31),
-            "created_at": datetime.utcnow()
-        })
-        
-        create_obligation({
-            "id": 3,
-            "company_id": 1,
-            "tax_type_id": 3,  # CSS
-            "name": "Monthly CSS Planilla",
-            "description": "Monthly social security contributions (M-02)",
-            "frequency": "monthly",
-            "due_day": 20,  # Due on the 20th of each month
-            "reminder_days": 7,
-            "status": "pending",
-            "next_due_date": datetime.utcnow().replace(day=20) + timedelta(days=30),
-            "created_at": datetime.utcnow()
-        })
-        
-        create_obligation({
-            "id": 4,
-            "company_id": 1,
-            "tax_type_id": 4,  # Municipal
-            "name": "Municipal License Renewal",
-            "description": "Annual municipal license renewal",
-            "frequency": "annual",
-            "due_day": 31,  # Due on January 31st
-            "reminder_days": 30,
-            "status": "pending",
-            "next_due_date": datetime(datetime.utcnow().year + 1, 1, 31),
-            "created_at": datetime.utcnow()
-        })
-        
-        create_obligation({
-            "id": 5,
-            "company_id": 2,
-            "tax_type_id": 5,  # ANIP/ZLC
-            "name": "Annual Aviso de Operaciones",
-            "description": "Annual 0.5% tax on declared sales",
-            "frequency": "annual",
-            "due_day": 31,  # Due on December 31st
-            "reminder_days": 30,
-            "status": "pending",
-            "next_due_date": datetime(datetime.utcnow().year, 12, 31),
-            "created_at": datetime.utcnow()
-        })
-        
-        create_obligation({
-            "id": 6,
-            "company_id": 2,
-            "tax_type_id": 3,  # CSS
-            "name": "Monthly CSS Planilla",
-            "description": "Monthly social security contributions (M-02)",
-            "frequency": "monthly",
-            "due_day": 20,  # Due on the 20th of each month
-            "reminder_days": 7,
-            "status": "pending",
-            "next_due_date": datetime.utcnow().replace(day=20) + timedelta(days=30),
-            "created_at": datetime.utcnow()
-        })
-        
-        create_obligation({
-            "id": 7,
-            "company_id": 3,
-            "tax_type_id": 5,  # ANIP/ZLC
-            "name": "Annual Aviso de Operaciones",
-            "description": "Annual 0.5% tax on declared sales",
-            "frequency": "annual",
-            "due_day": 31,  # Due on December 31st
-            "reminder_days": 30,
-            "status": "pending",
-            "next_due_date": datetime(datetime.utcnow().year, 12, 31),
-            "created_at": datetime.utcnow()
-        })
-        
-        create_obligation({
-            "id": 8,
-            "company_id": 3,
-            "tax_type_id": 3,  # CSS
-            "name": "Monthly CSS Planilla",
-            "description": "Monthly social security contributions (M-02)",
-            "frequency": "monthly",
-            "due_day": 20,  # Due on the 20th of each month
-            "reminder_days": 7,
-            "status": "pending",
-            "next_due_date": datetime.utcnow().replace(day=20) + timedelta(days=30),
-            "created_at": datetime.utcnow()
-        })
+        obligations_db.create_many(objs_in=[
+            Obligation(**{
+                "id": 1,
+                "company_id": 1,
+                "tax_type_id": 1,  # ITBMS
+                "name": "Monthly ITBMS Declaration",
+                "description": "Monthly 7% sales tax declaration",
+                "frequency": "monthly",
+                "due_day": 15,  # Due on the 15th of each month
+                "reminder_days": 7,
+                "status": "pending",
+                "next_due_date": datetime.utcnow().replace(day=15) + timedelta(days=30),
+                "created_at": datetime.utcnow()
+            }),
+            Obligation(**{
+                "id": 2,
+                "company_id": 1,
+                "tax_type_id": 2,  # ISR
+                "name": "Annual Income Tax Declaration",
+                "description": "Annual income tax declaration",
+                "frequency": "annual",
+                "due_day": 31,  # Due on March 31st
+                "reminder_days": 30,
+                "status": "pending",
+                "next_due_date": datetime(datetime.utcnow().year + 1, 3, 31),
+                "created_at": datetime.utcnow()
+            }),
+            Obligation(**{
+                "id": 3,
+                "company_id": 1,
+                "tax_type_id": 3,  # CSS
+                "name": "Monthly CSS Planilla",
+                "description": "Monthly social security contributions (M-02)",
+                "frequency": "monthly",
+                "due_day": 20,  # Due on the 20th of each month
+                "reminder_days": 7,
+                "status": "pending",
+                "next_due_date": datetime.utcnow().replace(day=20) + timedelta(days=30),
+                "created_at": datetime.utcnow()
+            }),
+            Obligation(**{
+                "id": 4,
+                "company_id": 1,
+                "tax_type_id": 4,  # Municipal
+                "name": "Municipal License Renewal",
+                "description": "Annual municipal license renewal",
+                "frequency": "annual",
+                "due_day": 31,  # Due on January 31st
+                "reminder_days": 30,
+                "status": "pending",
+                "next_due_date": datetime(datetime.utcnow().year + 1, 1, 31),
+                "created_at": datetime.utcnow()
+            }),
+            Obligation(**{
+                "id": 5,
+                "company_id": 2,
+                "tax_type_id": 5,  # ANIP/ZLC
+                "name": "Annual Aviso de Operaciones",
+                "description": "Annual 0.5% tax on declared sales",
+                "frequency": "annual",
+                "due_day": 31,  # Due on December 31st
+                "reminder_days": 30,
+                "status": "pending",
+                "next_due_date": datetime(datetime.utcnow().year, 12, 31),
+                "created_at": datetime.utcnow()
+            }),
+            Obligation(**{
+                "id": 6,
+                "company_id": 2,
+                "tax_type_id": 3,  # CSS
+                "name": "Monthly CSS Planilla",
+                "description": "Monthly social security contributions (M-02)",
+                "frequency": "monthly",
+                "due_day": 20,  # Due on the 20th of each month
+                "reminder_days": 7,
+                "status": "pending",
+                "next_due_date": datetime.utcnow().replace(day=20) + timedelta(days=30),
+                "created_at": datetime.utcnow()
+            }),
+            Obligation(**{
+                "id": 7,
+                "company_id": 3,
+                "tax_type_id": 5,  # ANIP/ZLC
+                "name": "Annual Aviso de Operaciones",
+                "description": "Annual 0.5% tax on declared sales",
+                "frequency": "annual",
+                "due_day": 31,  # Due on December 31st
+                "reminder_days": 30,
+                "status": "pending",
+                "next_due_date": datetime(datetime.utcnow().year, 12, 31),
+                "created_at": datetime.utcnow()
+            }),
+            Obligation(**{
+                "id": 8,
+                "company_id": 3,
+                "tax_type_id": 3,  # CSS
+                "name": "Monthly CSS Planilla",
+                "description": "Monthly social security contributions (M-02)",
+                "frequency": "monthly",
+                "due_day": 20,  # Due on the 20th of each month
+                "reminder_days": 7,
+                "status": "pending",
+                "next_due_date": datetime.utcnow().replace(day=20) + timedelta(days=30),
+                "created_at": datetime.utcnow()
+            }),
+        ])
 def get_upcoming_obligations(days: int = 15) -> List[Obligation]:
     """Get obligations that are due within the specified number of days."""
     today = datetime.utcnow().date()
-    obligations = get_obligations(filters={"status": "pending"})
-    
-    upcoming = []
-    for obligation in obligations:
-        due_date = obligation.next_due_date.date() if isinstance(obligation.next_due_date, datetime) else obligation.next_due_date
-        if isinstance(due_date, str):
-            try:
-                due_date = datetime.fromisoformat(due_date.replace("Z", "+00:00")).date()
-            except:
-                continue
-        
-        days_until_due = (due_date - today).days
-        if days_until_due >= 0 and days_until_due <= days:
-            upcoming.append(obligation)
-    
-    return upcoming
+    return _enrich_obligations(obligations_db.get_range(
+        "next_due_date",
+        today,
+        today + timedelta(days=days + 1),
+        end_inclusive=False,
+        filters={"status": "pending"},
+    ))
 
 def get_overdue_obligations() -> List[Obligation]:
     """Get obligations that are overdue."""
     today = datetime.utcnow().date()
-    obligations = get_obligations()
-    
-    overdue = []
-    for obligation in obligations:
-        due_date = obligation.next_due_date.date() if isinstance(obligation.next_due_date, datetime) else obligation.next_due_date
-        if isinstance(due_date, str):
-            try:
-                due_date = datetime.fromisoformat(due_date.replace("Z", "+00:00")).date()
-            except:
-                continue
-        
-        if due_date < today and obligation.status == "pending":
-            overdue.append(obligation)
-    
-    return overdue
+    return _enrich_obligations(obligations_db.get_range(
+        "next_due_date", end=today, end_inclusive=False, filters={"status": "pending"}
+    ))
 
 async def get_obligation_history(company_id: int, months: int = 6) -> Dict[str, Any]:
     """Get obligation and payment history for a company."""
@@ -682,7 +669,7 @@ async def analyze_obligation_history(company_id: int, months: int = 6, language:
         }
 
 
-user_company_access_db = InMemoryDB[UserCompanyAccess](UserCompanyAccess)
+user_company_access_db = InMemoryDB[UserCompanyAccess](UserCompanyAccess, indexes=["user_id", "company_id"])
 
 
 def create_user_company_access(data: Dict[str, Any]) -> UserCompanyAccess:
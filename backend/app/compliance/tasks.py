@@ -4,6 +4,7 @@ from datetime import date, timedelta
 from typing import List
 from app.services.clients.services.client_service import client_service
 from app.services.clients.services.document_service import document_service
+from app.services.compliance.services import rescreening
 from app.services.compliance.services.unified_verification_service import unified_verification_service
 from app.services.compliance.models.models import CustomerVerifyRequest, Entity
 
@@ -34,52 +35,35 @@ class ComplianceMonitoringTasks:
     
     async def _recalculate_client_risks(self):
         """
-        Recalculate risk scores for all clients based on current data.
+        Recalculate risk scores for the clients whose screening inputs changed
+        since their last verification (see rescreening).
         """
         logger.info("Recalculating client risk scores")
         
         try:
-            clients = await client_service.get_clients()
+            clients = await self._get_all_clients()
             
+            requests = {}
             for client in clients:
                 try:
-                    client_entity = Entity(
-                        name=client.name,
-                        country=getattr(client, 'country', ''),
-                        type='individual' if getattr(client, 'client_type') == 'individual' else 'legal',
-                        dob=getattr(client, 'dob', None),
-                        id_number=getattr(client, 'registration_number', None) or str(client.id)
-                    )
-                    
-                    directors_entities = []
-                    for director_data in getattr(client, 'directors', []):
-                        if isinstance(director_data, dict):
-                            director_entity = Entity(
-                                name=director_data.get('name', ''),
-                                country=director_data.get('country', ''),
-                                type='individual',
-                                dob=director_data.get('dob')
-                            )
-                            directors_entities.append(director_entity)
-                    
-                    ubos_entities = []
-                    for ubo_data in getattr(client, 'ubos', []):
-                        if isinstance(ubo_data, dict):
-                            ubo_entity = Entity(
-                                name=ubo_data.get('name', ''),
-                                country=ubo_data.get('country', ''),
-                                type='individual',
-                                dob=ubo_data.get('dob')
-                            )
-                            ubos_entities.append(ubo_entity)
-                    
-                    verification_request = CustomerVerifyRequest(
-                        customer=client_entity,
-                        directors=directors_entities,
-                        ubos=ubos_entities
-                    )
+                    requests[client.id] = self._build_verification_request(client)
+                except Exception as e:
+                    logger.error(f"Error preparing risk recalculation for client {client.id}: {str(e)}")
+            
+            due = await asyncio.to_thread(rescreening.clients_to_rescreen, requests)
+            
+            for client in clients:
+                if client.id not in due:
+                    continue
+                try:
+                    verification_request = requests[client.id]
+                    state = await asyncio.to_thread(rescreening.snapshot, client.id, verification_request)
                     
                     verification_result = await unified_verification_service.verify_customer(verification_request)
+                    if rescreening.fully_answered(verification_result):
+                        rescreening.record(state)
+                    else:
+                        logger.warning(f"Sources unavailable for client {client.id}; it stays due for rescreening")
                     
                     logger.info(f"Risk recalculated for client {client.name} (ID: {client.id})")
                     
@@ -91,6 +75,57 @@ class ComplianceMonitoringTasks:
             logger.error(f"Error in risk recalculation process: {str(e)}")
             raise
     
+    async def _get_all_clients(self, page_size: int = 500) -> list:
+        """
+        Get every client, a page at a time.
+        """
+        clients = []
+        while True:
+            page = await client_service.get_clients(skip=len(clients), limit=page_size)
+            clients.extend(page)
+            if len(page) < page_size:
+                return clients
+    
+    def _build_verification_request(self, client) -> CustomerVerifyRequest:
+        """
+        Build the verification request of a client with its directors and UBOs.
+        """
+        client_entity = Entity(
+            name=client.name,
+            country=getattr(client, 'country', '') or '',
+            type='natural' if getattr(client, 'client_type', None) == 'individual' else 'legal',
+            dob=getattr(client, 'dob', None),
+            id_number=getattr(client, 'registration_number', None) or str(client.id)
+        )
+        
+        directors_entities = []
+        for director_data in getattr(client, 'directors', None) or []:
+            if isinstance(director_data, dict):
+                director_entity = Entity(
+                    name=director_data.get('name', ''),
+                    country=director_data.get('country', ''),
+                    type='natural',
+                    dob=director_data.get('dob')
+                )
+                directors_entities.append(director_entity)
+        
+        ubos_entities = []
+        for ubo_data in getattr(client, 'ubos', None) or []:
+            if isinstance(ubo_data, dict):
+                ubo_entity = Entity(
+                    name=ubo_data.get('name', ''),
+                    country=ubo_data.get('country', ''),
+                    type='natural',
+                    dob=ubo_data.get('dob')
+                )
+                ubos_entities.append(ubo_entity)
+        
+        return CustomerVerifyRequest(
+            customer=client_entity,
+            directors=directors_entities,
+            ubos=ubos_entities
+        )
+    
     async def _reverify_high_risk_clients(self):
         """
         Re-execute verification for clients identified as high-risk.
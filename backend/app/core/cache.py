@@ -0,0 +1,308 @@
+"""
+Two-level cache for responses of external APIs (OpenSanctions, the UN,
+OFAC and EU sanctions services, Wikidata).
+
+A ResponseCache keeps the most recently used entries in memory, in front
+of an on-disk store sharded into 256 directories by key hash:
+
+    cache = ResponseCache("opensanctions", CACHE_DIR)
+    data = await cache.get(key)
+    if data is None:
+        data = await fetch()
+        await cache.set(key, data, ttl_seconds=24 * 3600)
+
+Every entry carries its own expiry. Disk reads and writes run in worker
+threads so they never block the event loop, and writes are atomic
+(temporary file, then rename). Once the files pass ``max_bytes`` the least
+recently used entries are evicted. Values are stored as JSON and decoded
+on every hit, so callers may modify what they get back.
+
+Hit, miss, eviction and latency counters of every cache are reported by
+cache_stats(), which the diagnostics checks include.
+
+A SingleFlight goes with a cache: concurrent misses on the same key wait
+for one upstream call instead of each making their own.
+"""
+import asyncio
+import copy
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+ENTRY_SUFFIX = ".json"
+
+_caches: "weakref.WeakValueDictionary[str, ResponseCache]" = weakref.WeakValueDictionary()
+
+
+class ResponseCache:
+    """An in-memory LRU over a sharded, size-bounded directory of JSON entries."""
+
+    def __init__(
+        self,
+        name: str,
+        directory: str,
+        memory_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+    ):
+        self.name = name
+        self.directory = str(directory)
+        self.memory_entries = memory_entries if memory_entries is not None else settings.RESPONSE_CACHE_MEMORY_ENTRIES
+        self.max_bytes = max_bytes if max_bytes is not None else settings.RESPONSE_CACHE_MAX_BYTES
+        # key -> (expires_at, JSON text), least recently used first.
+        self._memory: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        # key -> size of its file, least recently used first; None until scanned.
+        self._files: Optional["OrderedDict[str, int]"] = None
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+        self.counters = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "expired": 0,
+            "writes": 0,
+            "evictions": 0,
+            "errors": 0,
+        }
+        self._get_seconds = 0.0
+        self._get_max_seconds = 0.0
+        os.makedirs(self.directory, exist_ok=True)
+        _caches[name] = self
+
+    def _path(self, key: str) -> str:
+        shard = hashlib.md5(key.encode()).hexdigest()[:2]
+        return os.path.join(self.directory, shard, key + ENTRY_SUFFIX)
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            self.counters[counter] += 1
+
+    async def get(self, key: str) -> Optional[Any]:
+        """The cached value of key, or None if it is missing or expired."""
+        started = time.perf_counter()
+        try:
+            return await self._get(key)
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self._get_seconds += elapsed
+                self._get_max_seconds = max(self._get_max_seconds, elapsed)
+
+    async def _get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._memory.move_to_end(key)
+                    self.counters["memory_hits"] += 1
+                else:
+                    del self._memory[key]
+                    self.counters["expired"] += 1
+                    entry = None
+        if entry is not None:
+            return json.loads(entry[1])
+
+        entry = await asyncio.to_thread(self._read, key, now)
+        if entry is None:
+            self._count("misses")
+            return None
+        self._count("disk_hits")
+        self._remember(key, *entry)
+        return json.loads(entry[1])
+
+    async def set(self, key: str, data: Any, ttl_seconds: float) -> None:
+        """Cache data under key for ttl_seconds."""
+        try:
+            text = json.dumps(data)
+        except (TypeError, ValueError) as e:
+            self._count("errors")
+            logger.error(f"Cannot cache {key} in {self.name}: {str(e)}")
+            return
+        expires_at = time.time() + ttl_seconds
+        self._remember(key, expires_at, text)
+        await asyncio.to_thread(self._write, key, expires_at, text)
+
+    def _remember(self, key: str, expires_at: float, text: str) -> None:
+        with self._lock:
+            self._memory[key] = (expires_at, text)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def _scan(self) -> None:
+        """
+        Index the files on disk, oldest first, unless already done. Call
+        without _lock held: the walk runs unlocked and only the result is
+        swapped in under the lock.
+        """
+        if self._files is not None:
+            return
+        found = []
+        for root, _, files in os.walk(self.directory):
+            for file in files:
+                if file.endswith(ENTRY_SUFFIX):
+                    try:
+                        stat = os.stat(os.path.join(root, file))
+                    except OSError:
+                        continue
+                    found.append((stat.st_mtime, file[: -len(ENTRY_SUFFIX)], stat.st_size))
+        found.sort()
+        with self._lock:
+            # Another thread may have finished its scan first.
+            if self._files is None:
+                self._files = OrderedDict((key, size) for _, key, size in found)
+                self._disk_bytes = sum(self._files.values())
+
+    def _forget_file(self, key: str) -> None:
+        """Drop a file from the index and the disk. Call with _lock held, after _scan()."""
+        self._disk_bytes -= self._files.pop(key, 0)
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def _read(self, key: str, now: float) -> Optional[Tuple[float, str]]:
+        try:
+            with open(self._path(key), "r") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            self._count("errors")
+            logger.error(f"Error reading cache entry {key} of {self.name}: {str(e)}")
+            return None
+        self._scan()
+        with self._lock:
+            if entry.get("expires_at", 0) <= now:
+                self.counters["expired"] += 1
+                self._forget_file(key)
+                return None
+            if key in self._files:
+                self._files.move_to_end(key)
+        return entry["expires_at"], json.dumps(entry["data"])
+
+    def _write(self, key: str, expires_at: float, text: str) -> None:
+        path = self._path(key)
+        body = (
+            f'{{"cached_at": {json.dumps(datetime.utcnow().isoformat())}, '
+            f'"expires_at": {expires_at!r}, "data": {text}}}'
+        )
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temporary = f"{path}.{threading.get_ident()}.tmp"
+            with open(temporary, "w") as f:
+                f.write(body)
+            os.replace(temporary, path)
+        except Exception as e:
+            self._count("errors")
+            logger.error(f"Error writing cache entry {key} of {self.name}: {str(e)}")
+            return
+        self._scan()
+        with self._lock:
+            self.counters["writes"] += 1
+            files = self._files
+            self._disk_bytes += len(body) - files.get(key, 0)
+            files[key] = len(body)
+            files.move_to_end(key)
+            while self._disk_bytes > self.max_bytes and len(files) > 1:
+                oldest = next(iter(files))
+                self._forget_file(oldest)
+                self._memory.pop(oldest, None)
+                self.counters["evictions"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters, hit ratio, lookup latency and sizes of the cache."""
+        with self._lock:
+            counters = dict(self.counters)
+            lookups = counters["memory_hits"] + counters["disk_hits"] + counters["misses"]
+            return {
+                **counters,
+                "lookups": lookups,
+                "hit_ratio": round((counters["memory_hits"] + counters["disk_hits"]) / lookups, 4) if lookups else None,
+                "avg_get_ms": round(self._get_seconds / lookups * 1000, 3) if lookups else None,
+                "max_get_ms": round(self._get_max_seconds * 1000, 3),
+                "memory_entries": len(self._memory),
+                "disk_entries": len(self._files) if self._files is not None else None,
+                "disk_bytes": self._disk_bytes if self._files is not None else None,
+            }
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key into one call.
+
+    The first caller of do() for a key starts the call; callers arriving
+    while it is in flight wait for the same result. Each caller gets its
+    own copy of it. The call is not cancelled when a waiting caller is.
+    do_many() does the same for a batch of keys answered by one call.
+    """
+
+    def __init__(self):
+        # One table per event loop, since the clients using it are module singletons.
+        self._calls: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Future]]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self.counters = {"calls": 0, "coalesced": 0}
+
+    async def do(self, key: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        """The result of call(), shared with the concurrent callers of the same key."""
+        calls = self._calls.setdefault(asyncio.get_running_loop(), {})
+        future = calls.get(key)
+        if future is None:
+            self.counters["calls"] += 1
+            future = asyncio.ensure_future(call())
+            calls[key] = future
+            future.add_done_callback(lambda _: calls.pop(key, None) if calls.get(key) is future else None)
+        else:
+            self.counters["coalesced"] += 1
+        return copy.deepcopy(await asyncio.shield(future))
+
+    async def do_many(
+        self, keys: List[str], call: Callable[[List[str]], Awaitable[Dict[str, Any]]]
+    ) -> Dict[str, Any]:
+        """
+        The results of several keys, by key. call() gets the distinct keys
+        not already in flight and returns their results by key; the others
+        are shared with the calls in flight.
+        """
+        loop = asyncio.get_running_loop()
+        calls = self._calls.setdefault(loop, {})
+        distinct = list(dict.fromkeys(keys))
+        leading = [key for key in distinct if key not in calls]
+        self.counters["coalesced"] += len(keys) - len(leading)
+        if leading:
+            self.counters["calls"] += len(leading)
+            batch = asyncio.ensure_future(call(leading))
+            for key in leading:
+                calls[key] = loop.create_future()
+
+            def settle(_) -> None:
+                for key in leading:
+                    future = calls.pop(key)
+                    if batch.cancelled():
+                        future.cancel()
+                    elif batch.exception() is not None:
+                        future.set_exception(batch.exception())
+                    else:
+                        future.set_result(batch.result().get(key))
+
+            batch.add_done_callback(settle)
+        futures = [calls[key] for key in distinct]
+        results = await asyncio.gather(*(asyncio.shield(future) for future in futures))
+        return {key: copy.deepcopy(result) for key, result in zip(distinct, results)}
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    """The stats of every response cache, by name."""
+    return {name: cache.stats() for name, cache in list(_caches.items())}
@@ -0,0 +1,138 @@
+"""
+Circuit breakers for calls to external sources.
+
+A breaker starts closed: calls go through and their outcomes are kept
+for a sliding window of ``window_seconds``. Once the window holds at
+least ``min_calls`` outcomes and the share of failures reaches
+``failure_rate``, the breaker opens. Callers then skip the source and
+answer from elsewhere (cached data) instead of waiting for it to fail.
+
+After ``open_seconds`` the breaker is half-open: up to
+``half_open_probes`` trial calls may go through (see try_probe). A
+successful trial closes it again and a failed one reopens it. A call
+that is cancelled has no outcome: it is not recorded, and a trial call
+is given back with release_probe().
+
+    breaker = CircuitBreaker("opensanctions")
+    if breaker.state == CLOSED:
+        ...call, then breaker.record_success() or breaker.record_failure()
+
+The state and counters of every breaker are reported by breaker_stats(),
+which the diagnostics checks include.
+"""
+import logging
+import time
+import weakref
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+_breakers: "weakref.WeakValueDictionary[str, CircuitBreaker]" = weakref.WeakValueDictionary()
+
+
+class CircuitBreaker:
+    """Opens on a high failure rate over a time window, and probes before closing."""
+
+    def __init__(
+        self,
+        name: str,
+        failure_rate: Optional[float] = None,
+        window_seconds: Optional[float] = None,
+        min_calls: Optional[int] = None,
+        open_seconds: Optional[float] = None,
+        half_open_probes: Optional[int] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.failure_rate = failure_rate if failure_rate is not None else settings.CIRCUIT_BREAKER_FAILURE_RATE
+        self.window_seconds = window_seconds if window_seconds is not None else settings.CIRCUIT_BREAKER_WINDOW_SECONDS
+        self.min_calls = min_calls if min_calls is not None else settings.CIRCUIT_BREAKER_MIN_CALLS
+        self.open_seconds = open_seconds if open_seconds is not None else settings.CIRCUIT_BREAKER_OPEN_SECONDS
+        self.half_open_probes = (
+            half_open_probes if half_open_probes is not None else settings.CIRCUIT_BREAKER_HALF_OPEN_PROBES
+        )
+        self.clock = clock
+        # (time, succeeded) of the calls in the window, oldest first.
+        self._outcomes: Deque[Tuple[float, bool]] = deque()
+        self._opened_at: Optional[float] = None
+        self._probes = 0
+        self.counters = {"successes": 0, "failures": 0, "opened": 0, "probes": 0}
+        _breakers[name] = self
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return CLOSED
+        if self.clock() - self._opened_at < self.open_seconds:
+            return OPEN
+        return HALF_OPEN
+
+    def seconds_until_probe(self) -> float:
+        """Seconds until trial calls are allowed; 0 unless the breaker is open."""
+        if self._opened_at is None:
+            return 0.0
+        return max(0.0, self._opened_at + self.open_seconds - self.clock())
+
+    def try_probe(self) -> bool:
+        """Claim a trial call of a half-open breaker. Record its outcome afterwards."""
+        if self.state != HALF_OPEN or self._probes >= self.half_open_probes:
+            return False
+        self._probes += 1
+        self.counters["probes"] += 1
+        return True
+
+    def release_probe(self) -> None:
+        """Give back a trial call that was abandoned before it had an outcome."""
+        if self._probes > 0:
+            self._probes -= 1
+
+    def record_success(self) -> None:
+        self.counters["successes"] += 1
+        if self._opened_at is not None:
+            if self.state == HALF_OPEN:
+                logger.info(f"Circuit {self.name} closed")
+                self._opened_at = None
+                self._probes = 0
+                self._outcomes.clear()
+            return
+        self._record(True)
+
+    def record_failure(self) -> None:
+        self.counters["failures"] += 1
+        if self._opened_at is not None:
+            if self.state == HALF_OPEN:
+                self._open()
+            return
+        self._record(False)
+        failures = sum(1 for _, succeeded in self._outcomes if not succeeded)
+        if len(self._outcomes) >= self.min_calls and failures / len(self._outcomes) >= self.failure_rate:
+            self._open()
+
+    def _record(self, succeeded: bool) -> None:
+        now = self.clock()
+        self._outcomes.append((now, succeeded))
+        while self._outcomes and self._outcomes[0][0] <= now - self.window_seconds:
+            self._outcomes.popleft()
+
+    def _open(self) -> None:
+        logger.warning(f"Circuit {self.name} opened for {self.open_seconds}s")
+        self._opened_at = self.clock()
+        self._probes = 0
+        self._outcomes.clear()
+        self.counters["opened"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """State and counters of the breaker."""
+        return {**self.counters, "state": self.state, "seconds_until_probe": round(self.seconds_until_probe(), 3)}
+
+
+def breaker_stats() -> Dict[str, Dict[str, Any]]:
+    """The stats of every circuit breaker, by name."""
+    return {name: breaker.stats() for name, breaker in list(_breakers.items())}
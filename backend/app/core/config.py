@@ -48,7 +48,102 @@ class Settings(BaseSettings):
         return bool(v)
 
     USE_IN_MEMORY_DB: bool = True
+
+    # Storage engine of the generic stores in app.db.base: "memory" or "sqlite".
+    DB_ENGINE: str = "memory"
+    SQLITE_DB_PATH: str = "data/app.sqlite3"
+    # Several workers can share the SQLite file; each polls the others'
+    # writes every N ms (0 = single process, no change log) and keeps the
+    # last KEEP log entries.
+    SQLITE_CHANGE_POLL_MS: int = 250
+    SQLITE_CHANGE_LOG_KEEP: int = 10000
+
+    # Snapshots of the in-memory stores (app.db.snapshots): written every
+    # INTERVAL seconds (0 = only on shutdown) and restored lazily on startup.
+    DB_SNAPSHOTS_ENABLED: bool = False
+    DB_SNAPSHOT_DIR: str = "data/snapshots"
+    DB_SNAPSHOT_INTERVAL_SECONDS: int = 300
+
+    # Retention of the append-only stores (app.db.retention): enforced every
+    # INTERVAL seconds (0 = never); evicted rows are archived to ARCHIVE_DIR.
+    # For each store, 0 days or rows means no limit of that kind.
+    DB_RETENTION_INTERVAL_SECONDS: int = 3600
+    DB_ARCHIVE_DIR: str = "data/archive"
+    AUDIT_LOG_RETENTION_DAYS: int = 365
+    AUDIT_LOG_MAX_ROWS: int = 200000
+    AI_QUERY_RETENTION_DAYS: int = 180
+    AI_QUERY_MAX_ROWS: int = 50000
+    INSIGHT_RETENTION_DAYS: int = 90
+    INSIGHT_MAX_ROWS: int = 50000
+    LIST_UPDATE_RETENTION_DAYS: int = 365
+    LIST_UPDATE_MAX_ROWS: int = 10000
+
+    # Persistence of the pickle-backed compliance stores (app.db.in_memory):
+    # "snapshot" rewrites the whole file on every write, "wal" appends one
+    # record per mutation and compacts the log once it passes the threshold.
+    COMPLIANCE_DB_PERSISTENCE: str = "wal"
+    COMPLIANCE_DB_WAL_COMPACT_BYTES: int = 8 * 1024 * 1024
+    # Group commit: 0 persists every mutation immediately, otherwise pending
+    # mutations are flushed every N ms or once MAX_PENDING are queued.
+    COMPLIANCE_DB_GROUP_COMMIT_MS: int = 0
+    COMPLIANCE_DB_GROUP_COMMIT_MAX_PENDING: int = 500
     
+    # Customer verification: at most CONCURRENCY source checks (PEP, OpenSanctions,
+    # OFAC, UN, EU) run at once across the customer, directors and UBOs; a
+    # check that takes longer than its timeout (per source, else the default;
+    # 0 = none) is reported as timed out and counts as no matches.
+    COMPLIANCE_VERIFY_CONCURRENCY: int = 10
+    COMPLIANCE_SOURCE_TIMEOUT_SECONDS: float = 30.0
+    COMPLIANCE_SOURCE_TIMEOUTS: Dict[str, float] = {
+        "pep": 30.0,
+        "opensanctions": 30.0,
+        "ofac": 10.0,
+        "un": 10.0,
+        "eu": 10.0,
+    }
+
+    # Circuit breakers of the verification sources (app.core.circuit_breaker):
+    # a source whose calls over the last WINDOW seconds (at least MIN_CALLS)
+    # failed at FAILURE_RATE or more is skipped for OPEN seconds, then tried
+    # again with HALF_OPEN_PROBES calls. Meanwhile it answers from its last
+    # good answers, kept LAST_GOOD_DAYS, flagged as stale.
+    CIRCUIT_BREAKER_FAILURE_RATE: float = 0.5
+    CIRCUIT_BREAKER_WINDOW_SECONDS: float = 60.0
+    CIRCUIT_BREAKER_MIN_CALLS: int = 10
+    CIRCUIT_BREAKER_OPEN_SECONDS: float = 30.0
+    CIRCUIT_BREAKER_HALF_OPEN_PROBES: int = 1
+    COMPLIANCE_LAST_GOOD_DAYS: int = 30
+
+    # Bulk verification jobs (POST /compliance/verify-all): clients screened at
+    # once per job, and days the per-client results are kept.
+    COMPLIANCE_JOB_WORKERS: int = 4
+    COMPLIANCE_JOB_RESULT_RETENTION_DAYS: int = 90
+
+    # Daily risk recalculation re-verifies only clients whose data or whose
+    # matches on a changed sanctions list changed, and every client at least
+    # every MAX_AGE days (the live PEP and OpenSanctions APIs are unversioned).
+    COMPLIANCE_RESCREEN_MAX_AGE_DAYS: int = 30
+
+    # Responses of external APIs (app.core.cache): entries kept in memory in
+    # front of the on-disk cache, and the size the disk cache is held under.
+    RESPONSE_CACHE_MEMORY_ENTRIES: int = 2048
+    RESPONSE_CACHE_MAX_BYTES: int = 256 * 1024 * 1024
+
+    # Outbound HTTP connection pool (app.core.http): connections open in total
+    # and per host, seconds resolved addresses are cached and idle
+    # connections are kept alive.
+    HTTP_POOL_LIMIT: int = 100
+    HTTP_POOL_LIMIT_PER_HOST: int = 10
+    HTTP_POOL_DNS_TTL_SECONDS: int = 300
+    HTTP_POOL_KEEPALIVE_SECONDS: float = 60.0
+
+    # OpenSanctions bulk matching: entities per /match request, requests in
+    # flight per bulk match, and how long match_entity() waits for queries
+    # of concurrent callers to fill a batch.
+    OPENSANCTIONS_MATCH_BATCH_SIZE: int = 50
+    OPENSANCTIONS_MATCH_CONCURRENCY: int = 4
+    OPENSANCTIONS_MATCH_WINDOW_MS: int = 20
+
     BYPASS_ACCOUNTING_PERMISSIONS: bool = True
     
     DMCE_PORTAL_URL: str = os.getenv("DMCE_PORTAL_URL", "")
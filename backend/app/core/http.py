@@ -0,0 +1,74 @@
+"""
+Shared aiohttp connection pool for outbound calls to external APIs
+(OpenSanctions, the UN, OFAC and EU sanctions services, Wikidata, the
+country risk sources).
+
+Clients take their session from the pool instead of opening their own,
+so every call reuses warm keep-alive connections and resolved addresses:
+
+    session = http_pool.session()
+    async with session.get(url, headers=headers) as response:
+        ...
+
+The connector caps the connections open in total and to each host, caches
+DNS lookups and keeps idle connections alive for reuse. Sessions are per
+event loop, since a session cannot be shared between loops. Callers pass
+their credentials as request headers; nobody but the application closes
+the pool (close() on shutdown).
+"""
+import asyncio
+import logging
+import weakref
+from typing import Optional
+
+import aiohttp
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ConnectionPool:
+    """One keep-alive aiohttp session per event loop, with capped connections."""
+
+    def __init__(
+        self,
+        limit: Optional[int] = None,
+        limit_per_host: Optional[int] = None,
+        dns_ttl_seconds: Optional[int] = None,
+        keepalive_seconds: Optional[float] = None,
+    ):
+        self.limit = limit if limit is not None else settings.HTTP_POOL_LIMIT
+        self.limit_per_host = limit_per_host if limit_per_host is not None else settings.HTTP_POOL_LIMIT_PER_HOST
+        self.dns_ttl_seconds = dns_ttl_seconds if dns_ttl_seconds is not None else settings.HTTP_POOL_DNS_TTL_SECONDS
+        self.keepalive_seconds = (
+            keepalive_seconds if keepalive_seconds is not None else settings.HTTP_POOL_KEEPALIVE_SECONDS
+        )
+        self._sessions: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aiohttp.ClientSession]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def session(self) -> aiohttp.ClientSession:
+        """The pool's session on the running event loop."""
+        loop = asyncio.get_running_loop()
+        session = self._sessions.get(loop)
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                ttl_dns_cache=self.dns_ttl_seconds,
+                use_dns_cache=True,
+                keepalive_timeout=self.keepalive_seconds,
+            )
+            session = self._sessions[loop] = aiohttp.ClientSession(connector=connector)
+        return session
+
+    async def close(self) -> None:
+        """Close the session of the running event loop and its connections."""
+        session = self._sessions.pop(asyncio.get_running_loop(), None)
+        if session is not None and not session.closed:
+            await session.close()
+            logger.info("Closed the outbound HTTP connection pool")
+
+
+http_pool = ConnectionPool()
@@ -0,0 +1,49 @@
+"""
+Opaque cursors for keyset pagination of list endpoints.
+
+A list endpoint accepts ``?cursor=...`` and returns the cursor of the next
+page in the ``X-Next-Cursor`` response header (absent on the last page). The
+cursor wraps the id of the last item returned, so fetching a page costs the
+same no matter how deep it is.
+"""
+import base64
+import json
+from typing import Optional, Sequence
+
+from fastapi import HTTPException, Query, Response
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(last_id: int) -> str:
+    """Encode the id of the last item of a page as an opaque cursor."""
+    payload = json.dumps({"after": last_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    """Decode a cursor produced by encode_cursor. Raises ValueError if invalid."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        after = json.loads(base64.urlsafe_b64decode(padded.encode()))["after"]
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    if not isinstance(after, int):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return after
+
+
+def cursor_after_id(cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header")) -> Optional[int]:
+    """FastAPI dependency turning the ``cursor`` query parameter into an id."""
+    if cursor is None:
+        return None
+    try:
+        return decode_cursor(cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+
+def set_next_cursor(response: Response, items: Sequence, limit: int) -> None:
+    """Advertise the next page if this one is full."""
+    if limit > 0 and len(items) >= limit and getattr(items[-1], "id", None) is not None:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(items[-1].id)
@@ -0,0 +1,143 @@
+"""
+Materialized aggregates for the in-memory stores in app.db.base and app.db.in_memory.
+
+An Aggregate is a group-by count, and optionally sum, over one store that
+is kept up to date on every write, like a secondary index, so dashboards
+read their numbers in O(1) instead of rescanning tables:
+
+    risk_scores_db = InMemoryDB[RiskScore](
+        RiskScore, aggregates={"band": Aggregate(group_by=risk_band)}
+    )
+    risk_scores_db.aggregate("band").count("high")
+
+``group_by`` is a field name or a function of the row; ``sum`` likewise
+names a numeric field or computes the value to add up; ``where`` (a
+Predicate from app.db.query) restricts the rows that are counted. Without
+``group_by`` every row falls into a single group.
+"""
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Tuple, Union
+
+from app.db.indexes import UNINDEXABLE, index_key
+from app.db.query import Predicate
+
+_ALL = object()
+
+KeyFunction = Union[str, Callable[[Any], Any], None]
+
+
+def _getter(spec: KeyFunction) -> Optional[Callable[[Any], Any]]:
+    if spec is None or callable(spec):
+        return spec
+    return lambda obj: getattr(obj, spec, None)
+
+
+class Aggregate:
+    """
+    Counts (and sums) of rows per group.
+
+    The group and value each id contributed are remembered, so a row is
+    taken back out correctly even after it was changed in place.
+    """
+
+    def __init__(
+        self,
+        group_by: KeyFunction = None,
+        sum: KeyFunction = None,
+        where: Optional[Predicate] = None,
+    ):
+        self.group_by = group_by
+        self.sum_of = sum
+        self.where = where
+        self._key = _getter(group_by)
+        self._value = _getter(sum)
+        self.counts_by_key: Dict[Hashable, int] = {}
+        self.sums_by_key: Dict[Hashable, float] = {}
+        self.contributions: Dict[int, Tuple[Hashable, float]] = {}
+
+    def empty(self) -> "Aggregate":
+        """A new, empty aggregate with the same definition."""
+        return Aggregate(group_by=self.group_by, sum=self.sum_of, where=self.where)
+
+    def _contribution(self, obj: Any) -> Optional[Tuple[Hashable, float]]:
+        if self.where is not None and not self.where.matches(obj):
+            return None
+        key = None if self._key is None else index_key(self._key(obj))
+        if key is UNINDEXABLE:
+            return None
+        value = 0
+        if self._value is not None:
+            value = self._value(obj) or 0
+        return key, value
+
+    def add(self, id: int, obj: Any) -> None:
+        """Count a row, replacing any previous contribution of the same id."""
+        contribution = self._contribution(obj)
+        previous = self.contributions.get(id)
+        if previous == contribution:
+            return
+        if previous is not None:
+            self.discard(id)
+        if contribution is None:
+            return
+        key, value = contribution
+        self.counts_by_key[key] = self.counts_by_key.get(key, 0) + 1
+        if self._value is not None:
+            self.sums_by_key[key] = self.sums_by_key.get(key, 0) + value
+        self.contributions[id] = contribution
+
+    def discard(self, id: int) -> None:
+        """Take a row back out if it was counted."""
+        contribution = self.contributions.pop(id, None)
+        if contribution is None:
+            return
+        key, value = contribution
+        remaining = self.counts_by_key[key] - 1
+        if remaining:
+            self.counts_by_key[key] = remaining
+            if self._value is not None:
+                self.sums_by_key[key] -= value
+        else:
+            del self.counts_by_key[key]
+            self.sums_by_key.pop(key, None)
+
+    def add_many(self, rows: Iterable[Tuple[int, Any]]) -> None:
+        for id, obj in rows:
+            self.add(id, obj)
+
+    def discard_many(self, ids: Iterable[int]) -> None:
+        for id in ids:
+            self.discard(id)
+
+    def clear(self) -> None:
+        self.counts_by_key.clear()
+        self.sums_by_key.clear()
+        self.contributions.clear()
+
+    def rebuild(self, rows: Iterable[Tuple[int, Any]]) -> None:
+        """Recompute the aggregate from (id, obj) pairs."""
+        self.clear()
+        self.add_many(rows)
+
+    def count(self, key: Any = _ALL) -> int:
+        """Rows in the group ``key``, or in all groups."""
+        if key is _ALL:
+            return len(self.contributions)
+        return self.counts_by_key.get(index_key(key), 0)
+
+    def sum(self, key: Any = _ALL) -> float:
+        """Sum of the ``sum`` values in the group ``key``, or in all groups."""
+        if key is _ALL:
+            return sum(self.sums_by_key.values())
+        return self.sums_by_key.get(index_key(key), 0)
+
+    def counts(self) -> Dict[Hashable, int]:
+        """Row count per group."""
+        return dict(self.counts_by_key)
+
+    def sums(self) -> Dict[Hashable, float]:
+        """Sum per group."""
+        return dict(self.sums_by_key)
+
+    def groups(self) -> int:
+        """Number of non-empty groups, e.g. the distinct values of ``group_by``."""
+        return len(self.counts_by_key)
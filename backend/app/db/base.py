@@ -1,63 +1,681 @@
-from typing import Dict, List, Optional, Any, TypeVar, Generic, Type, Union
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from itertools import islice
+from typing import Dict, List, Optional, Any, TypeVar, Generic, Type, Union, Iterable, Iterator, Tuple
 from pydantic import BaseModel
 
+from app.core.config import settings
+from app.db import snapshots
+from app.db.aggregates import Aggregate
+from app.db.events import ChangeFeed, ChangeType
+from app.db.indexes import HashIndex, SortedIndex, sort_in_range
+from app.db.query import Predicate, order_items, plan
+from app.db.retention import RetentionPolicy, evict, register as register_retention
+
 T = TypeVar('T', bound=BaseModel)
 
+
+class _Rows(dict):
+    """
+    Row storage for InMemoryDB.
+
+    Plain dict semantics, but every mutation is reported, with the value it
+    replaced, to the stores that own the dict so their secondary indexes and
+    change feeds stay correct even when callers write to ``store.data``
+    directly (tests reset tables with ``data.clear()`` and some services
+    share one dict between two stores).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stores: List["InMemoryDB"] = []
+
+    def __setitem__(self, key, value):
+        old = self.get(key)
+        super().__setitem__(key, value)
+        for store in self.stores:
+            store._row_set(key, value, old)
+
+    def __delitem__(self, key):
+        old = super().pop(key)
+        for store in self.stores:
+            store._row_removed(key, old)
+
+    def pop(self, key, *default):
+        present = key in self
+        value = super().pop(key, *default)
+        if present:
+            for store in self.stores:
+                store._row_removed(key, value)
+        return value
+
+    def popitem(self):
+        key, value = super().popitem()
+        for store in self.stores:
+            store._row_removed(key, value)
+        return key, value
+
+    def clear(self):
+        super().clear()
+        for store in self.stores:
+            store._rows_reset()
+
+    def update(self, *args, **kwargs):
+        rows = dict(*args, **kwargs)
+        old = None
+        if any(store.changes.active for store in self.stores):
+            old = {key: self.get(key) for key in rows}
+        super().update(rows)
+        for store in self.stores:
+            store._rows_set(rows, old)
+
+    def pop_many(self, keys: Iterable) -> Dict:
+        """Remove several keys at once and return the removed rows."""
+        removed = {}
+        for key in keys:
+            if key in self:
+                removed[key] = super().pop(key)
+        if removed:
+            for store in self.stores:
+                store._rows_removed(removed)
+        return removed
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def __reduce__(self):
+        return (dict, (dict(self),))
+
+
 class InMemoryDB(Generic[T]):
     """
     A simple in-memory database for development and testing.
+
+    Fields listed in ``indexes`` get a hash index, so equality filters on
+    them in ``get_multi`` are resolved in O(k) instead of scanning the table:
+
+        invoice_items_db = InMemoryDB[InvoiceItem](InvoiceItem, indexes=["invoice_id"])
+
+    Fields listed in ``sorted_indexes`` get an ordered index instead, which
+    also serves range queries through get_range() in O(log n + k):
+
+        obligations_db = InMemoryDB[Obligation](Obligation, sorted_indexes=["next_due_date"])
+
+    ``aggregates`` declares materialized group-by counts and sums (see
+    app.db.aggregates) that are maintained like the indexes, so dashboards
+    read them with aggregate() instead of rescanning the table:
+
+        anomalies_db = InMemoryDB[ContractAnomaly](
+            ContractAnomaly, aggregates={"severity": Aggregate(group_by="severity")}
+        )
+        anomalies_db.aggregate("severity").count("high")
+
+    ``retention`` bounds append-only tables by age and row count; expired
+    rows are archived to compressed files and evicted (see app.db.retention):
+
+        ai_queries_db = InMemoryDB[AIQuery](
+            AIQuery, sorted_indexes=["created_at"], retention=RetentionPolicy(max_age_days=180)
+        )
+
+    Every write is published on ``changes`` (see app.db.events), so consumers
+    can follow a table instead of rescanning it, and every store can be
+    snapshotted to disk and lazily restored (see app.db.snapshots). Its
+    snapshot is named after the model; stores that share a model need a
+    ``snapshot_name`` each:
+
+        user_department_roles_db = InMemoryDB[UserDepartmentRole](
+            UserDepartmentRole, snapshot_name="admin_user_department_roles"
+        )
+
+    Writes are serialized by a per-store lock, which also makes id allocation
+    atomic; it is only held for the in-memory update itself, so it is safe
+    to take from async endpoints and from scheduler threads alike. Reads take
+    no lock. Long scans (dashboards, exports) should iterate over scan(), a
+    point-in-time tuple of the rows that writers never wait for. With
+    ``copy_on_write=True``, update() replaces the stored object with an
+    updated copy instead of changing it in place, so objects a reader holds
+    never change under it:
+
+        contracts_db = InMemoryDB[ContractInDB](ContractInDB, copy_on_write=True)
+
+    The storage engine is chosen with DB_ENGINE: "memory" (this class) or
+    "sqlite" (app.db.sqlite.SQLiteDB, same interface, persisted on disk).
     """
-    def __init__(self, model_class: Type[T]):
+    def __new__(cls, *args, **kwargs):
+        if cls is InMemoryDB and settings.DB_ENGINE == "sqlite":
+            from app.db.sqlite import SQLiteDB
+            cls = SQLiteDB
+        return super().__new__(cls)
+
+    def __init__(
+        self,
+        model_class: Type[T],
+        indexes: Optional[Iterable[str]] = None,
+        sorted_indexes: Optional[Iterable[str]] = None,
+        copy_on_write: bool = False,
+        aggregates: Optional[Dict[str, Aggregate]] = None,
+        retention: Optional[RetentionPolicy] = None,
+        snapshot_name: Optional[str] = None,
+    ):
         self.model_class = model_class
-        self.data: Dict[int, T] = {}
-        self.counter = 1
+        self.copy_on_write = copy_on_write
+        self.indexes: Dict[str, Union[HashIndex, SortedIndex]] = {}
+        for index_class, fields in ((HashIndex, indexes), (SortedIndex, sorted_indexes)):
+            for field in fields or ():
+                if field not in model_class.model_fields:
+                    raise ValueError(f"Cannot index unknown field '{field}' of {model_class.__name__}")
+                if field in self.indexes:
+                    raise ValueError(f"Field '{field}' of {model_class.__name__} is indexed twice")
+                self.indexes[field] = index_class(field)
+        self.aggregates: Dict[str, Aggregate] = dict(aggregates or {})
+        # Everything kept up to date by the row hooks below.
+        self._maintained = [*self.indexes.values(), *self.aggregates.values()]
+        # Sorted ids, for keyset pagination in page() and iter_multi().
+        self._ids: List[int] = []
+        self.changes = ChangeFeed(model_class.__name__)
+        # Copies of rows taken by update() before changing them in place, so
+        # the change feed can report the old values.
+        self._before: Dict[int, T] = {}
+        self._data = _Rows()
+        self._data.stores.append(self)
+        self._counter = 1
+        # Serializes writers; reentrant because data hooks may write back.
+        self._lock = threading.RLock()
+        # Bumped on every write: unchanged stores are not snapshotted again
+        # and scan() reuses its tuple until the next write.
+        self._version = 0
+        self._scan: Optional[Tuple[int, Tuple[T, ...]]] = None
+        self._snapshot_version: Optional[int] = None
+        self._restore_path: Optional[str] = None
+        self.snapshot_name = snapshots.register(self, snapshot_name)
+        self.archive_name = self.snapshot_name
+        self.retention = retention
+        if retention is not None:
+            register_retention(self)
+
+    def _ensure_restored(self) -> None:
+        """Load the snapshot this store was pointed at by restore_from(), once."""
+        if self._restore_path is None:
+            return
+        with self._lock:
+            path = self._restore_path
+            if path is None:
+                return
+            rows, counter = snapshots.read_snapshot(path, self.model_class)
+            dict.update(self._data, rows)
+            self._counter = max(self._counter, counter)
+            for store in self._data.stores:
+                store._rows_reset()
+            self._snapshot_version = self._version
+            self._restore_path = None
+
+    def restore_from(self, path: str) -> bool:
+        """
+        Restore this store from a snapshot file on its first use. Only an
+        empty, never written store can be restored; returns whether it will be.
+        """
+        if self._version or dict.__len__(self._data):
+            return False
+        self._restore_path = path
+        return True
+
+    def snapshot(self, path: str, force: bool = False) -> bool:
+        """Write the store to a snapshot file unless it did not change since the last one."""
+        if self._restore_path is not None:
+            # Never loaded, so the file on disk is still current.
+            return False
+        version = self._version
+        if not force and version == self._snapshot_version:
+            return False
+        rows = list(self._data.values())
+        snapshots.write_snapshot(path, self.model_class, rows, self._counter)
+        self._snapshot_version = version
+        return True
+
+    @property
+    def counter(self) -> int:
+        if self._restore_path is not None:
+            self._ensure_restored()
+        return self._counter
+
+    @counter.setter
+    def counter(self, value: int) -> None:
+        with self._lock:
+            self._ensure_restored()
+            self._counter = value
+            self._version += 1
+
+    def _allocate_ids(self, count: int) -> int:
+        """Reserve ``count`` consecutive ids and return the first. Callers hold the lock."""
+        first_id = self.counter
+        self._counter = first_id + count
+        return first_id
+
+    @property
+    def data(self) -> Dict[int, T]:
+        if self._restore_path is not None:
+            self._ensure_restored()
+        return self._data
+
+    @data.setter
+    def data(self, value: Dict[int, T]) -> None:
+        self._restore_path = None
+        self._data.stores.remove(self)
+        if not isinstance(value, _Rows):
+            value = _Rows(value)
+        value.stores.append(self)
+        self._data = value
+        self._rows_reset()
+
+    def _row_set(self, id: int, obj: T, old: Optional[T] = None) -> None:
+        self._version += 1
+        ids = self._ids
+        if not ids or id > ids[-1]:
+            ids.append(id)
+        else:
+            position = bisect_left(ids, id)
+            if position == len(ids) or ids[position] != id:
+                ids.insert(position, id)
+        for index in self._maintained:
+            index.add(id, obj)
+        if self._before:
+            old = self._before.pop(id, old)
+        self.changes.row_written(id, old, obj)
+
+    def _rows_set(self, rows: Dict[int, T], old: Optional[Dict[int, T]] = None) -> None:
+        self._version += 1
+        new_ids = sorted(id for id in rows if not self._has_id(id))
+        if new_ids:
+            if not self._ids or new_ids[0] > self._ids[-1]:
+                self._ids.extend(new_ids)
+            else:
+                self._ids = sorted(self._ids + new_ids)
+        for index in self._maintained:
+            index.add_many(rows.items())
+        before, self._before = self._before, {}
+        if self.changes.active:
+            for id, obj in rows.items():
+                self.changes.row_written(id, before.get(id, (old or {}).get(id)), obj)
+
+    def _has_id(self, id: int) -> bool:
+        position = bisect_left(self._ids, id)
+        return position < len(self._ids) and self._ids[position] == id
+
+    def _row_removed(self, id: int, old: Optional[T] = None) -> None:
+        self._version += 1
+        position = bisect_left(self._ids, id)
+        if position < len(self._ids) and self._ids[position] == id:
+            del self._ids[position]
+        for index in self._maintained:
+            index.discard(id)
+        self.changes.row_deleted(id, old)
+
+    def _rows_removed(self, rows: Dict[int, T]) -> None:
+        self._version += 1
+        removed = set(rows)
+        self._ids = [id for id in self._ids if id not in removed]
+        for index in self._maintained:
+            index.discard_many(removed)
+        if self.changes.active:
+            for id, old in rows.items():
+                self.changes.row_deleted(id, old)
+
+    def _rows_reset(self) -> None:
+        self._version += 1
+        self._ids = sorted(self._data)
+        for index in self._maintained:
+            index.rebuild(self._data.items())
+        self.changes.publish(ChangeType.RESET)
+
+    def apply_retention(self, now: Optional[datetime] = None) -> int:
+        """Archive and evict the rows the retention policy expires. Returns how many."""
+        if self.retention is None:
+            return 0
+        with self._lock:
+            return evict(self, now)
 
     def get(self, id: int) -> Optional[T]:
         """Get an item by ID."""
         return self.data.get(id)
 
+    def aggregate(self, name: str) -> Aggregate:
+        """The up-to-date aggregate declared under ``name``."""
+        if self._restore_path is not None:
+            self._ensure_restored()
+        return self.aggregates[name]
+
+    def scan(self) -> Tuple[T, ...]:
+        """
+        All rows as of one point in time, for long reads. The tuple is built
+        without locking and shared by readers until the next write.
+        """
+        version = self._version
+        cached = self._scan
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        # Copying the dict is atomic under the GIL. A write that lands
+        # between reading the version and copying only makes the next call
+        # rebuild the tuple.
+        rows = tuple(self.data.values())
+        self._scan = (version, rows)
+        return rows
+
+    def _candidate_ids(self, filters: Dict[str, Any]) -> Optional[Iterable[int]]:
+        """
+        Resolve the equality filters that can be answered without a scan
+        (``id`` and indexed fields). Returns None if none of them apply.
+        """
+        buckets = []
+        if "id" in filters:
+            id = filters["id"]
+            buckets.append((id,) if id in self.data else ())
+        for key, value in filters.items():
+            index = self.indexes.get(key)
+            if index is not None:
+                bucket = index.lookup(value)
+                if bucket is not None:
+                    buckets.append(bucket)
+        if not buckets:
+            return None
+        buckets.sort(key=len)
+        smallest, rest = buckets[0], buckets[1:]
+        if not rest:
+            return smallest
+        return [id for id in smallest if all(id in bucket for bucket in rest)]
+
+    def _active_filters(self, filters: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Keep the filters that refer to model fields; others are ignored."""
+        fields = self.model_class.model_fields
+        return {key: value for key, value in (filters or {}).items() if key in fields}
+
+    @staticmethod
+    def _matches(item: T, filters: Dict[str, Any]) -> bool:
+        return all(getattr(item, key) == value for key, value in filters.items())
+
+    def _iter_filtered(self, filters: Optional[Dict[str, Any]]) -> Iterator[T]:
+        """Yield items matching all equality filters on model fields."""
+        self._ensure_restored()
+        active = self._active_filters(filters)
+        if not active:
+            yield from self.data.values()
+            return
+
+        ids = self._candidate_ids(active)
+        if ids is None:
+            items: Iterable[T] = self.data.values()
+        else:
+            items = (self.data[id] for id in ids if id in self.data)
+
+        for item in items:
+            if self._matches(item, active):
+                yield item
+
+    def iter_multi(
+        self, *, filters: Optional[Dict[str, Any]] = None, after_id: Optional[int] = None
+    ) -> Iterator[T]:
+        """
+        Stream matching items in id order, starting after ``after_id``.
+
+        The table is walked by seeking in the sorted ids, so memory use does
+        not grow with the table and items may be written between yields.
+        """
+        self._ensure_restored()
+        active = self._active_filters(filters)
+        candidates = self._candidate_ids(active) if active else None
+        if candidates is not None:
+            for id in sorted(id for id in candidates if after_id is None or id > after_id):
+                item = self.data.get(id)
+                if item is not None and self._matches(item, active):
+                    yield item
+            return
+
+        position = 0 if after_id is None else bisect_right(self._ids, after_id)
+        while position < len(self._ids):
+            id = self._ids[position]
+            item = self.data.get(id)
+            if item is not None and self._matches(item, active):
+                yield item
+            # Re-seek if rows were added or removed while suspended.
+            if position < len(self._ids) and self._ids[position] == id:
+                position += 1
+            else:
+                position = bisect_right(self._ids, id)
+
+    def page(
+        self, *, after_id: Optional[int] = None, limit: int = 100, filters: Optional[Dict[str, Any]] = None
+    ) -> List[T]:
+        """Get the next ``limit`` matching items after ``after_id`` (keyset pagination)."""
+        return list(islice(self.iter_multi(filters=filters, after_id=after_id), limit))
+
     def get_multi(
-        self, *, skip: int = 0, limit: int = 100, filters: Optional[Dict[str, Any]] = None
+        self,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        filters: Optional[Dict[str, Any]] = None,
+        after_id: Optional[int] = None,
+    ) -> List[T]:
+        """
+        Get multiple items with optional filtering.
+
+        When ``after_id`` is given, ``skip`` is ignored and the next page in id
+        order is returned instead (see page()).
+        """
+        if after_id is not None:
+            return self.page(after_id=after_id, limit=limit, filters=filters)
+        items = []
+        for position, item in enumerate(self._iter_filtered(filters)):
+            if position >= skip + limit:
+                break
+            if position >= skip:
+                items.append(item)
+        return items
+
+    def get_range(
+        self,
+        field: str,
+        start: Any = None,
+        end: Any = None,
+        *,
+        end_inclusive: bool = True,
+        descending: bool = False,
+        filters: Optional[Dict[str, Any]] = None,
+        skip: int = 0,
+        limit: Optional[int] = None,
     ) -> List[T]:
-        """Get multiple items with optional filtering."""
-        items = list(self.data.values())
-        
-        if filters:
-            for key, value in filters.items():
-                if hasattr(self.model_class, key):
-                    items = [item for item in items if getattr(item, key) == value]
-        
-        return items[skip : skip + limit]
+        """
+        Get items whose ``field`` lies between start and end, ordered by it.
+
+        start is inclusive; end is inclusive unless ``end_inclusive=False``.
+        Either bound may be None, and items where the field is None are never
+        returned. Dates and datetimes compare with each other (a date means
+        midnight). Served by a sorted index on ``field`` if one is declared,
+        otherwise by a scan and a sort.
+        """
+        self._ensure_restored()
+        active = self._active_filters(filters)
+        index = self.indexes.get(field)
+        if isinstance(index, SortedIndex):
+            ids = index.range(start, end, end_inclusive=end_inclusive, descending=descending)
+            candidates = (self.data[id] for id in ids if id in self.data)
+        else:
+            candidates = iter(sort_in_range(
+                self._iter_filtered(active), field, start, end, end_inclusive, descending
+            ))
+
+        items = []
+        for item in candidates:
+            if active and not self._matches(item, active):
+                continue
+            if skip:
+                skip -= 1
+                continue
+            items.append(item)
+            if limit is not None and len(items) >= limit:
+                break
+        return items
+
+    def _plan(self, where: Optional[Predicate]):
+        if where is None:
+            return None
+        return plan(where, self.indexes, self._has_id)
+
+    def explain(self, where: Optional[Predicate]) -> str:
+        """Describe how query() would find the rows matching where."""
+        self._ensure_restored()
+        chosen = self._plan(where)
+        if chosen is None:
+            return f"full scan of {len(self._ids)} rows"
+        size, description, _ = chosen
+        return f"{description} ({size} candidates)"
+
+    def _iter_where(self, where: Optional[Predicate]) -> Iterator[T]:
+        """Yield the items matching where, in id order."""
+        self._ensure_restored()
+        chosen = self._plan(where)
+        if chosen is None:
+            items: Iterable[T] = (self.data[id] for id in list(self._ids) if id in self.data)
+        else:
+            items = (self.data[id] for id in sorted(chosen[2]()) if id in self.data)
+        for item in items:
+            if where is None or where.matches(item):
+                yield item
+
+    def query(
+        self,
+        where: Optional[Predicate] = None,
+        *,
+        order_by: Optional[str] = None,
+        descending: bool = False,
+        skip: int = 0,
+        limit: Optional[int] = None,
+    ) -> List[T]:
+        """
+        Get the items matching a predicate (see app.db.query), ordered by id
+        or by ``order_by`` (None values last). The most selective index the
+        predicate can use supplies the candidates; explain() shows which.
+        """
+        if order_by is None and not descending:
+            items = self._iter_where(where)
+            if skip:
+                items = islice(items, skip, None)
+            return list(items if limit is None else islice(items, limit))
+        items = order_items(list(self._iter_where(where)), order_by, descending)
+        return items[skip:] if limit is None else items[skip:skip + limit]
+
+    def count(self, where: Optional[Predicate] = None) -> int:
+        """Number of items matching a predicate."""
+        if where is None:
+            return len(self.data)
+        return sum(1 for _ in self._iter_where(where))
+
+    def _new_obj(self, obj_in: BaseModel) -> T:
+        """
+        Build the object to store for obj_in.
+
+        An instance of the model class was validated when it was built, so it
+        is only shallow-copied; anything else is validated into the model.
+        """
+        if type(obj_in) is self.model_class:
+            db_obj = obj_in.model_copy()
+            object.__setattr__(db_obj, "__pydantic_fields_set__", set(self.model_class.model_fields))
+            return db_obj
+        return self.model_class(**obj_in.model_dump())
 
     def create(self, *, obj_in: BaseModel) -> T:
         """Create a new item."""
-        db_obj = self.model_class(**obj_in.model_dump())
-        db_obj.id = self.counter
-        self.data[self.counter] = db_obj
-        self.counter += 1
+        db_obj = self._new_obj(obj_in)
+        with self._lock:
+            db_obj.id = self._allocate_ids(1)
+            self.data[db_obj.id] = db_obj
         return db_obj
 
-    def update(self, *, id: int, obj_in: Union[BaseModel, Dict[str, Any]]) -> Optional[T]:
-        """Update an existing item."""
-        db_obj = self.get(id)
-        if db_obj is None:
-            return None
-        
+    def create_many(self, *, objs_in: Iterable[BaseModel]) -> List[T]:
+        """
+        Create several items at once.
+
+        The ids are assigned as one consecutive block and the indexes are
+        updated once for the whole batch.
+        """
+        db_objs = [self._new_obj(obj_in) for obj_in in objs_in]
+        with self._lock:
+            first_id = self._allocate_ids(len(db_objs))
+            for offset, db_obj in enumerate(db_objs):
+                db_obj.id = first_id + offset
+            self.data.update({db_obj.id: db_obj for db_obj in db_objs})
+        return db_objs
+
+    def _apply_update(self, db_obj: T, obj_in: Union[BaseModel, Dict[str, Any]]) -> None:
+        """
+        Apply the fields set on obj_in to db_obj.
+
+        An instance of the model class contributes its set fields as they are,
+        with no dump; the diff is then written in one step unless the model
+        validates assignments or the diff names fields the model lacks.
+        """
+        if obj_in is db_obj:
+            return
         if isinstance(obj_in, dict):
             update_data = obj_in
+        elif type(obj_in) is type(db_obj):
+            update_data = {field: getattr(obj_in, field) for field in obj_in.model_fields_set}
         else:
             update_data = obj_in.model_dump(exclude_unset=True)
-            
-        for field, value in update_data.items():
-            setattr(db_obj, field, value)
-        
-        self.data[id] = db_obj
+
+        model = type(db_obj)
+        if model.model_config.get("validate_assignment") or not update_data.keys() <= model.model_fields.keys():
+            for field, value in update_data.items():
+                setattr(db_obj, field, value)
+            return
+        db_obj.__dict__.update(update_data)
+        db_obj.__pydantic_fields_set__.update(update_data)
+
+    def _updated(self, id: int, obj_in: Union[BaseModel, Dict[str, Any]]) -> Optional[T]:
+        """The updated object to store for id; callers hold the lock and store it."""
+        db_obj = self.get(id)
+        if db_obj is None:
+            return None
+        if self.copy_on_write:
+            if obj_in is db_obj:
+                return db_obj
+            db_obj = db_obj.model_copy()
+        elif self.changes.active:
+            self._before[id] = db_obj.model_copy()
+        self._apply_update(db_obj, obj_in)
         return db_obj
 
+    def update(self, *, id: int, obj_in: Union[BaseModel, Dict[str, Any]]) -> Optional[T]:
+        """Update an existing item."""
+        with self._lock:
+            db_obj = self._updated(id, obj_in)
+            if db_obj is not None:
+                self.data[id] = db_obj
+        return db_obj
+
+    def update_many(self, *, objs_in: Dict[int, Union[BaseModel, Dict[str, Any]]]) -> List[T]:
+        """Update several existing items at once. Ids that do not exist are skipped."""
+        with self._lock:
+            updated = {}
+            for id, obj_in in objs_in.items():
+                db_obj = self._updated(id, obj_in)
+                if db_obj is not None:
+                    updated[id] = db_obj
+            self.data.update(updated)
+        return list(updated.values())
+
     def remove(self, *, id: int) -> Optional[T]:
         """Remove an item."""
-        if id in self.data:
-            obj = self.data[id]
-            del self.data[id]
-            return obj
-        return None
+        with self._lock:
+            return self.data.pop(id, None)
+
+    def remove_many(self, *, ids: Iterable[int]) -> List[T]:
+        """Remove several items at once and return the ones that existed."""
+        with self._lock:
+            return list(self.data.pop_many(ids).values())
@@ -0,0 +1,155 @@
+"""
+Change-data-capture for the in-memory stores.
+
+Every store has a ``changes`` feed that publishes a ChangeEvent for each
+insert, update and delete, with the old and new values, to in-process
+async subscribers:
+
+    async with obligations_db.changes.subscribe() as changes:
+        async for event in changes:
+            ...
+
+Each subscriber has a bounded queue. Writers never block on a slow
+consumer: when a queue is full, further events for that subscriber are
+dropped and, once it has drained what was queued, it receives a single
+RESET event meaning "state was lost, rebuild from the store". RESET is
+also sent when a table is cleared or replaced wholesale.
+
+Publishing is free when nobody is subscribed, and events may be published
+from any thread; they are delivered on the subscriber's event loop.
+"""
+import asyncio
+import itertools
+import logging
+import threading
+from datetime import datetime
+from enum import Enum
+from typing import Any, List, Optional
+
+from pydantic import BaseModel, Field
+
+logger = logging.getLogger(__name__)
+
+
+class ChangeType(str, Enum):
+    INSERT = "insert"
+    UPDATE = "update"
+    DELETE = "delete"
+    RESET = "reset"
+
+
+class ChangeEvent(BaseModel):
+    store: str
+    type: ChangeType
+    id: Optional[int] = None
+    old: Optional[Any] = None
+    new: Optional[Any] = None
+    seq: int = 0
+    timestamp: datetime = Field(default_factory=datetime.utcnow)
+
+
+class Subscription:
+    """A bounded, async-iterable queue of change events for one consumer."""
+
+    def __init__(self, feed: "ChangeFeed", maxsize: int):
+        self.feed = feed
+        self.queue: "asyncio.Queue[ChangeEvent]" = asyncio.Queue(maxsize)
+        self.dropped = 0
+        self.closed = False
+        self._loop = asyncio.get_running_loop()
+        self._thread_id = threading.get_ident()
+
+    def _offer(self, event: ChangeEvent) -> None:
+        if self.closed:
+            return
+        if self.dropped:
+            self.dropped += 1
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.dropped = 1
+            logger.warning(f"Change subscriber of {self.feed.name} fell behind; it will be reset")
+
+    def push(self, event: ChangeEvent) -> None:
+        """Queue an event, from the subscriber's loop or from any other thread."""
+        if threading.get_ident() == self._thread_id:
+            self._offer(event)
+        else:
+            try:
+                self._loop.call_soon_threadsafe(self._offer, event)
+            except RuntimeError:
+                # The subscriber's loop is closed.
+                self.close()
+
+    async def get(self) -> ChangeEvent:
+        """Wait for the next event."""
+        if self.queue.empty() and self.dropped:
+            self.dropped = 0
+            return self.feed._event(ChangeType.RESET)
+        return await self.queue.get()
+
+    def close(self) -> None:
+        self.closed = True
+        self.feed._unsubscribe(self)
+
+    def __aiter__(self) -> "Subscription":
+        return self
+
+    async def __anext__(self) -> ChangeEvent:
+        if self.closed and self.queue.empty():
+            raise StopAsyncIteration
+        return await self.get()
+
+    async def __aenter__(self) -> "Subscription":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.close()
+
+
+class ChangeFeed:
+    """The change events of one store."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._subscribers: List[Subscription] = []
+        self._seq = itertools.count(1)
+        self._lock = threading.Lock()
+
+    @property
+    def active(self) -> bool:
+        """True if anyone is subscribed, i.e. if events need to be built at all."""
+        return bool(self._subscribers)
+
+    def subscribe(self, maxsize: int = 1000) -> Subscription:
+        """Subscribe from a running event loop. Close the subscription when done."""
+        subscription = Subscription(self, maxsize)
+        with self._lock:
+            self._subscribers = self._subscribers + [subscription]
+        return subscription
+
+    def _unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            self._subscribers = [s for s in self._subscribers if s is not subscription]
+
+    def _event(self, type: ChangeType, id: Optional[int] = None, old: Any = None, new: Any = None) -> ChangeEvent:
+        return ChangeEvent(store=self.name, type=type, id=id, old=old, new=new, seq=next(self._seq))
+
+    def publish(self, type: ChangeType, id: Optional[int] = None, old: Any = None, new: Any = None) -> None:
+        """Send an event to every subscriber."""
+        subscribers = self._subscribers
+        if not subscribers:
+            return
+        event = self._event(type, id, old, new)
+        for subscription in subscribers:
+            subscription.push(event)
+
+    def row_written(self, id: int, old: Any, new: Any) -> None:
+        """Publish an insert (no old value) or an update."""
+        if self._subscribers:
+            self.publish(ChangeType.INSERT if old is None else ChangeType.UPDATE, id, old, new)
+
+    def row_deleted(self, id: int, old: Any) -> None:
+        if self._subscribers:
+            self.publish(ChangeType.DELETE, id, old, None)
@@ -2,33 +2,130 @@
 In-memory database for compliance module with file persistence.
 This module provides simple in-memory storage for compliance-related data
 with basic file persistence to survive server restarts.
+
+Two persistence modes are available (see COMPLIANCE_DB_PERSISTENCE):
+
+- "snapshot": the whole table is re-pickled on every mutation.
+- "wal": every mutation appends one length-prefixed, checksummed record to
+  ``<name>_db.wal``. On startup the snapshot is loaded and the log replayed
+  on top of it. Once the log passes COMPLIANCE_DB_WAL_COMPACT_BYTES it is
+  rotated and folded into a new snapshot by a background thread, so the
+  cost of a write no longer depends on the size of the table.
+
+Either mode can run with group commit (COMPLIANCE_DB_GROUP_COMMIT_MS > 0):
+mutations are queued and a background thread persists them as one batch
+every N milliseconds, or as soon as COMPLIANCE_DB_GROUP_COMMIT_MAX_PENDING
+writes are waiting. Callers that need durability ``await store.flush()``.
+
+Fields listed in ``sorted_indexes`` are kept in an ordered index, so
+get_range() answers "expiring in the next N days" without a full scan.
+``aggregates`` (see app.db.aggregates) are group-by counts maintained on
+every write, read with aggregate().
+
+A ``retention`` policy (see app.db.retention) bounds append-only stores:
+apply_retention() archives and deletes records older than the policy's age
+or beyond its row count, in one persistence write.
+
+Every write is published on ``changes`` (see app.db.events). The old value
+of an update is the object that was stored before it; callers that modify
+the stored object in place and pass it back get the same object as old
+and new.
 """
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple, Iterator
+from bisect import bisect_left, bisect_right
+from itertools import islice
+import asyncio
+import atexit
 import logging
 import json
 import os
 import pickle
+import shutil
+import struct
+import threading
+import weakref
+import zlib
 from datetime import datetime
 
+from app.core.config import settings
+from app.db.aggregates import Aggregate
+from app.db.events import ChangeFeed
+from app.db.indexes import UNINDEXABLE, SortedIndex, range_key, sort_in_range
+from app.db.retention import RetentionPolicy, archive_rows, field_value, register as register_retention
+
 logger = logging.getLogger(__name__)
 
 DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
 os.makedirs(DATA_DIR, exist_ok=True)
 
+PERSISTENCE_MODES = ("snapshot", "wal")
+
+# Each WAL record is framed as: payload length, CRC32 of payload, payload.
+_WAL_FRAME = struct.Struct(">II")
+
+_stores: "weakref.WeakSet[InMemoryDB]" = weakref.WeakSet()
+
 
 class InMemoryDB:
     """Simple in-memory database for storing records with file persistence."""
 
-    def __init__(self, name: str):
+    def __init__(
+        self,
+        name: str,
+        persistence: Optional[str] = None,
+        wal_compact_bytes: Optional[int] = None,
+        group_commit_ms: Optional[int] = None,
+        group_commit_max_pending: Optional[int] = None,
+        sorted_indexes: Optional[List[str]] = None,
+        aggregates: Optional[Dict[str, Aggregate]] = None,
+        retention: Optional[RetentionPolicy] = None,
+    ):
         self.name = name
+        self.archive_name = name
+        self.retention = retention
+        self.sorted_indexes = {field: SortedIndex(field) for field in sorted_indexes or ()}
+        self.aggregates: Dict[str, Aggregate] = dict(aggregates or {})
+        self._maintained = [*self.sorted_indexes.values(), *self.aggregates.values()]
+        self.changes = ChangeFeed(name)
         self.data: Dict[int, Any] = {}
         self.next_id = 1
+        # Sorted record ids, for keyset pagination in page() and iter_multi().
+        self._ids: List[int] = []
+        self.persistence = persistence or settings.COMPLIANCE_DB_PERSISTENCE
+        if self.persistence not in PERSISTENCE_MODES:
+            raise ValueError(f"Unknown persistence mode for {name}: {self.persistence}")
+        self.wal_compact_bytes = wal_compact_bytes or settings.COMPLIANCE_DB_WAL_COMPACT_BYTES
         self.db_file = os.path.join(DATA_DIR, f"{name}_db.pickle")
+        self.wal_file = os.path.join(DATA_DIR, f"{name}_db.wal")
+        self.compacting_file = f"{self.wal_file}.compacting"
+        if group_commit_ms is None:
+            group_commit_ms = settings.COMPLIANCE_DB_GROUP_COMMIT_MS
+        self.group_commit_ms = group_commit_ms
+        self.group_commit_max_pending = group_commit_max_pending or settings.COMPLIANCE_DB_GROUP_COMMIT_MAX_PENDING
+        # Lock order: _flush_lock before _lock. _lock guards the data and the
+        # pending queue, _flush_lock serializes writes to the files.
+        self._lock = threading.RLock()
+        self._flush_lock = threading.Lock()
+        self._wal = None
+        self._wal_size = 0
+        self._pending: List[Tuple[str, int, Any]] = []
+        self._flush_requested = threading.Event()
+        self._compaction_lock = threading.Lock()
+        self._compaction: Optional[threading.Thread] = None
         self._load_from_disk()
-        logger.info(f"Initialized in-memory database: {name}")
+        self._ids = sorted(self.data)
+        for index in self._maintained:
+            index.rebuild(self.data.items())
+        if self.group_commit_ms > 0:
+            threading.Thread(target=self._run_flusher, name=f"{name}-group-commit", daemon=True).start()
+        _stores.add(self)
+        if retention is not None:
+            register_retention(self)
+        logger.info(f"Initialized in-memory database: {name} ({self.persistence})")
 
     def _load_from_disk(self):
-        """Load database from disk if file exists."""
+        """Load database from disk if file exists, replaying any write-ahead log."""
+        loaded = True
         try:
             if os.path.exists(self.db_file):
                 with open(self.db_file, 'rb') as f:
@@ -37,85 +134,454 @@ class InMemoryDB:
                     self.next_id = db_data.get('next_id', 1)
                 logger.info(f"Loaded {len(self.data)} records from {self.db_file}")
         except Exception as e:
+            loaded = False
             logger.error(f"Error loading database from disk: {str(e)}")
 
+        logs = [path for path in (self.compacting_file, self.wal_file) if os.path.exists(path)]
+        if not logs:
+            return
+        replayed = [self._replay_wal(path) for path in logs]
+        if not (loaded and all(replayed)):
+            logger.warning(f"Keeping the write-ahead logs of {self.name}, since they were not fully loaded")
+            return
+
+        # Fold the replayed log into the snapshot so the next startup only has
+        # to read the snapshot, and so log rotation starts from a clean state.
+        if self._write_snapshot(self.data, self.next_id):
+            for path in logs:
+                os.remove(path)
+
+    def _replay_wal(self, path: str) -> bool:
+        """
+        Apply the records of a write-ahead log file, stopping at a torn tail.
+        Returns False unless the whole log was read.
+        """
+        applied = 0
+        try:
+            with open(path, 'rb') as f:
+                while True:
+                    header = f.read(_WAL_FRAME.size)
+                    if len(header) < _WAL_FRAME.size:
+                        break
+                    length, checksum = _WAL_FRAME.unpack(header)
+                    payload = f.read(length)
+                    if len(payload) < length or zlib.crc32(payload) != checksum:
+                        if f.read(1):
+                            logger.error(f"Corrupt record in the middle of {path}")
+                            return False
+                        logger.warning(f"Ignoring incomplete record at the end of {path}")
+                        break
+                    op, record_id, record = pickle.loads(payload)
+                    self._apply(op, record_id, record)
+                    applied += 1
+            logger.info(f"Replayed {applied} records from {path}")
+            return True
+        except Exception as e:
+            logger.error(f"Error replaying write-ahead log {path}: {str(e)}")
+            return False
+
+    def _apply(self, op: str, record_id: int, record: Any) -> None:
+        """Apply a logged mutation to the in-memory data."""
+        if op == "delete":
+            self.data.pop(record_id, None)
+        else:
+            self.data[record_id] = record
+            self.next_id = max(self.next_id, record_id + 1)
+
+    def _write_snapshot(self, data: Dict[int, Any], next_id: int) -> bool:
+        """Atomically write a full snapshot of the given data."""
+        tmp_file = f"{self.db_file}.tmp"
+        try:
+            with open(tmp_file, 'wb') as f:
+                pickle.dump({'data': data, 'next_id': next_id}, f, protocol=pickle.HIGHEST_PROTOCOL)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_file, self.db_file)
+            logger.debug(f"Saved {len(data)} records to {self.db_file}")
+            return True
+        except Exception as e:
+            logger.error(f"Error saving database to disk: {str(e)}")
+            return False
+
     def _save_to_disk(self):
         """Save database to disk."""
+        self._write_snapshot(self.data, self.next_id)
+
+    def _write_wal(self, batch: List[Tuple[str, int, Any]], fsync: bool = False) -> None:
+        """Append mutations to the write-ahead log. Callers hold a lock on the log."""
+        frames = []
+        for entry in batch:
+            payload = pickle.dumps(entry, protocol=pickle.HIGHEST_PROTOCOL)
+            frames.append(_WAL_FRAME.pack(len(payload), zlib.crc32(payload)))
+            frames.append(payload)
+        chunk = b"".join(frames)
+        if self._wal is None:
+            self._wal = open(self.wal_file, 'ab')
+            self._wal_size = self._wal.tell()
+        self._wal.write(chunk)
+        self._wal.flush()
+        if fsync:
+            os.fsync(self._wal.fileno())
+        self._wal_size += len(chunk)
+
+        if self._wal_size >= self.wal_compact_bytes:
+            self.compact(wait=False)
+
+    def _persist(self, op: str, record_id: int, record: Any = None) -> None:
+        """Persist a mutation according to the configured persistence mode."""
+        self._persist_batch([(op, record_id, record)])
+
+    def _persist_batch(self, batch: List[Tuple[str, int, Any]]) -> None:
+        """Persist several mutations with a single log append or snapshot."""
+        if not batch:
+            return
+        if self.group_commit_ms > 0:
+            self._pending.extend(batch)
+            if len(self._pending) >= self.group_commit_max_pending:
+                self._flush_requested.set()
+        elif self.persistence == "wal":
+            try:
+                self._write_wal(batch)
+            except Exception as e:
+                logger.error(f"Error appending to write-ahead log {self.wal_file}: {str(e)}")
+        else:
+            self._save_to_disk()
+
+    def _flush_pending(self) -> None:
+        """Persist all queued mutations as a single batch."""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return
+                batch, self._pending = self._pending, []
+                if self.persistence == "snapshot":
+                    data, next_id = dict(self.data), self.next_id
+            try:
+                if self.persistence == "wal":
+                    self._write_wal(batch, fsync=True)
+                else:
+                    self._write_snapshot(data, next_id)
+                logger.debug(f"Flushed {len(batch)} pending writes in {self.name}")
+            except Exception as e:
+                logger.error(f"Error flushing {len(batch)} pending writes in {self.name}: {str(e)}")
+
+    def _run_flusher(self) -> None:
+        """Background loop of the group-commit mode."""
+        interval = self.group_commit_ms / 1000
+        while True:
+            self._flush_requested.wait(interval)
+            self._flush_requested.clear()
+            self._flush_pending()
+
+    async def flush(self) -> None:
+        """Wait until every mutation made so far has been written to disk."""
+        await asyncio.to_thread(self._flush_pending)
+
+    def _rotate_wal(self) -> None:
+        """Move the active log aside so it can be folded into a snapshot."""
+        if self._wal is not None:
+            self._wal.close()
+            self._wal = None
+        self._wal_size = 0
+        if not os.path.exists(self.wal_file):
+            return
+        if os.path.exists(self.compacting_file):
+            # A previous compaction failed; keep its records ahead of the current log.
+            with open(self.compacting_file, 'ab') as dst, open(self.wal_file, 'rb') as src:
+                shutil.copyfileobj(src, dst)
+            os.remove(self.wal_file)
+        else:
+            os.replace(self.wal_file, self.compacting_file)
+
+    def _compact(self) -> None:
+        """Rotate the log, then write the snapshot that supersedes it."""
         try:
-            with open(self.db_file, 'wb') as f:
-                pickle.dump({'data': self.data, 'next_id': self.next_id}, f)
-            logger.debug(f"Saved {len(self.data)} records to {self.db_file}")
+            with self._flush_lock, self._lock:
+                self._rotate_wal()
+                data, next_id = dict(self.data), self.next_id
         except Exception as e:
-            logger.error(f"Error saving database to disk: {str(e)}")
+            logger.error(f"Error rotating write-ahead log {self.wal_file}: {str(e)}")
+            return
+        if self._write_snapshot(data, next_id) and os.path.exists(self.compacting_file):
+            os.remove(self.compacting_file)
+
+    def compact(self, wait: bool = True) -> None:
+        """
+        Fold the write-ahead log into a new snapshot.
+
+        Runs in a background thread; writers are only blocked while the log
+        is rotated. With wait=True, returns once a compaction that started
+        after this call has finished.
+        """
+        if self.persistence != "wal":
+            return
+        while True:
+            with self._compaction_lock:
+                running = self._compaction
+                if running is None or not running.is_alive():
+                    thread = threading.Thread(target=self._compact, name=f"{self.name}-compaction", daemon=True)
+                    self._compaction = thread
+                    thread.start()
+                    break
+            if not wait:
+                return
+            running.join()
+        if wait:
+            thread.join()
 
     def create(self, record: Any) -> int:
         """Create a new record and return its ID."""
-        record_id = self.next_id
-        
-        if isinstance(record, dict):
-            record["id"] = record_id
-            self.data[record_id] = record
-        else:
-            record.id = record_id
-            self.data[record_id] = record
-        
-        self.next_id += 1
-        logger.debug(f"Created record in {self.name} with ID: {record_id}")
-        self._save_to_disk()
+        with self._lock:
+            record_id = self.next_id
+
+            if isinstance(record, dict):
+                record["id"] = record_id
+                self.data[record_id] = record
+            else:
+                record.id = record_id
+                self.data[record_id] = record
+
+            self.next_id += 1
+            self._ids.append(record_id)
+            for index in self._maintained:
+                index.add(record_id, record)
+            self.changes.row_written(record_id, None, record)
+            logger.debug(f"Created record in {self.name} with ID: {record_id}")
+            self._persist("create", record_id, record)
         return record_id
 
+    def create_many(self, records: List[Any]) -> List[int]:
+        """Create several records with one persistence write and return their IDs."""
+        with self._lock:
+            record_ids = list(range(self.next_id, self.next_id + len(records)))
+            for record_id, record in zip(record_ids, records):
+                if isinstance(record, dict):
+                    record["id"] = record_id
+                else:
+                    record.id = record_id
+                self.data[record_id] = record
+
+            self.next_id += len(records)
+            self._ids.extend(record_ids)
+            for index in self._maintained:
+                index.add_many(zip(record_ids, records))
+            for record_id, record in zip(record_ids, records):
+                self.changes.row_written(record_id, None, record)
+            logger.debug(f"Created {len(records)} records in {self.name}")
+            self._persist_batch([("create", record_id, record) for record_id, record in zip(record_ids, records)])
+        return record_ids
+
     def get(self, record_id: int) -> Optional[Any]:
         """Get a record by ID."""
         return self.data.get(record_id)
 
+    def aggregate(self, name: str) -> Aggregate:
+        """The up-to-date aggregate declared under ``name``."""
+        return self.aggregates[name]
+
     def get_all(self) -> List[Any]:
         """Get all records."""
         return list(self.data.values())
-        
+
     def get_multi(self, skip: int = 0, limit: int = 100, filters: Optional[Dict[str, Any]] = None) -> List[Any]:
         """Get multiple records with optional filtering and pagination."""
         records = list(self.data.values())
-        
+
         if filters:
             for key, value in filters.items():
                 records = [r for r in records if hasattr(r, key) and getattr(r, key) == value]
-        
+
         return records[skip:skip + limit]
 
+    def iter_multi(self, filters: Optional[Dict[str, Any]] = None, after_id: Optional[int] = None) -> Iterator[Any]:
+        """Stream records in ID order after ``after_id``, without copying the table."""
+        position = 0 if after_id is None else bisect_right(self._ids, after_id)
+        while position < len(self._ids):
+            record_id = self._ids[position]
+            record = self.data.get(record_id)
+            if record is not None and all(
+                hasattr(record, key) and getattr(record, key) == value for key, value in (filters or {}).items()
+            ):
+                yield record
+            # Re-seek if records were added or removed while suspended.
+            if position < len(self._ids) and self._ids[position] == record_id:
+                position += 1
+            else:
+                position = bisect_right(self._ids, record_id)
+
+    def page(self, after_id: Optional[int] = None, limit: int = 100, filters: Optional[Dict[str, Any]] = None) -> List[Any]:
+        """Get the next ``limit`` records after ``after_id`` (keyset pagination)."""
+        return list(islice(self.iter_multi(filters=filters, after_id=after_id), limit))
+
+    def get_range(
+        self,
+        field: str,
+        start: Any = None,
+        end: Any = None,
+        end_inclusive: bool = True,
+        descending: bool = False,
+        limit: Optional[int] = None,
+    ) -> List[Any]:
+        """
+        Get records whose ``field`` lies between start (inclusive) and end,
+        ordered by it. Uses the sorted index on ``field`` if one is declared.
+        """
+        index = self.sorted_indexes.get(field)
+        if index is None:
+            records = sort_in_range(self.data.values(), field, start, end, end_inclusive, descending)
+            return records if limit is None else records[:limit]
+        ids = index.range(start, end, end_inclusive=end_inclusive, descending=descending)
+        records = (self.data[record_id] for record_id in ids if record_id in self.data)
+        return list(islice(records, limit))
+
     def update(self, record_id: int, record: Any) -> bool:
         """Update a record by ID."""
-        if record_id not in self.data:
-            logger.warning(f"Record with ID {record_id} not found in {self.name}")
-            return False
-        
-        if isinstance(record, dict):
-            record["id"] = record_id
-            self.data[record_id] = record
-        else:
-            record.id = record_id
-            self.data[record_id] = record
-            
-        logger.debug(f"Updated record in {self.name} with ID: {record_id}")
-        self._save_to_disk()
+        with self._lock:
+            if record_id not in self.data:
+                logger.warning(f"Record with ID {record_id} not found in {self.name}")
+                return False
+
+            old = self.data[record_id]
+            if isinstance(record, dict):
+                record["id"] = record_id
+                self.data[record_id] = record
+            else:
+                record.id = record_id
+                self.data[record_id] = record
+            for index in self._maintained:
+                index.add(record_id, record)
+            self.changes.row_written(record_id, old, record)
+
+            logger.debug(f"Updated record in {self.name} with ID: {record_id}")
+            self._persist("update", record_id, record)
         return True
 
+    def update_many(self, records: Dict[int, Any]) -> List[int]:
+        """Update several records with one persistence write and return the IDs found."""
+        with self._lock:
+            updated = {}
+            old = {}
+            for record_id, record in records.items():
+                if record_id not in self.data:
+                    logger.warning(f"Record with ID {record_id} not found in {self.name}")
+                    continue
+                if isinstance(record, dict):
+                    record["id"] = record_id
+                else:
+                    record.id = record_id
+                old[record_id] = self.data[record_id]
+                self.data[record_id] = record
+                updated[record_id] = record
+            for index in self._maintained:
+                index.add_many(updated.items())
+            for record_id, record in updated.items():
+                self.changes.row_written(record_id, old[record_id], record)
+            logger.debug(f"Updated {len(updated)} records in {self.name}")
+            self._persist_batch([("update", record_id, record) for record_id, record in updated.items()])
+        return list(updated)
+
     def delete(self, record_id: int) -> bool:
         """Delete a record by ID."""
-        if record_id not in self.data:
-            logger.warning(f"Record with ID {record_id} not found in {self.name}")
-            return False
-        
-        del self.data[record_id]
-        logger.debug(f"Deleted record in {self.name} with ID: {record_id}")
-        self._save_to_disk()
+        with self._lock:
+            if record_id not in self.data:
+                logger.warning(f"Record with ID {record_id} not found in {self.name}")
+                return False
+
+            old = self.data.pop(record_id)
+            position = bisect_left(self._ids, record_id)
+            if position < len(self._ids) and self._ids[position] == record_id:
+                del self._ids[position]
+            for index in self._maintained:
+                index.discard(record_id)
+            self.changes.row_deleted(record_id, old)
+            logger.debug(f"Deleted record in {self.name} with ID: {record_id}")
+            self._persist("delete", record_id)
         return True
 
+    def delete_many(self, record_ids: List[int]) -> List[int]:
+        """Delete several records with one persistence write and return the IDs found."""
+        with self._lock:
+            deleted = [record_id for record_id in dict.fromkeys(record_ids) if record_id in self.data]
+            old = {record_id: self.data.pop(record_id) for record_id in deleted}
+            removed = set(deleted)
+            self._ids = [record_id for record_id in self._ids if record_id not in removed]
+            for index in self._maintained:
+                index.discard_many(deleted)
+            for record_id in deleted:
+                self.changes.row_deleted(record_id, old[record_id])
+            logger.debug(f"Deleted {len(deleted)} records in {self.name}")
+            self._persist_batch([("delete", record_id, None) for record_id in deleted])
+        return deleted
+
+    def apply_retention(self, now: Optional[datetime] = None) -> int:
+        """
+        Archive and delete the records the retention policy expires: those
+        whose age field is before its cutoff, then the oldest IDs beyond
+        max_rows. Returns how many were deleted.
+        """
+        policy = self.retention
+        if policy is None:
+            return 0
+        with self._lock:
+            expired = []
+            cutoff = policy.cutoff(now)
+            if cutoff is not None:
+                cutoff = range_key(cutoff)
+                for record_id in self._ids:
+                    key = range_key(field_value(self.data[record_id], policy.age_field))
+                    if key is not UNINDEXABLE and key < cutoff:
+                        expired.append(record_id)
+            if policy.max_rows is not None and len(self.data) - len(expired) > policy.max_rows:
+                excess = len(self.data) - len(expired) - policy.max_rows
+                aged = set(expired)
+                expired.extend(islice((record_id for record_id in self._ids if record_id not in aged), excess))
+            if not expired:
+                return 0
+            if policy.archive:
+                archive_rows(self.archive_name, [self.data[record_id] for record_id in expired])
+            deleted = self.delete_many(expired)
+        logger.info(f"Evicted {len(deleted)} records from {self.name}")
+        return len(deleted)
+
     def filter(self, filter_func) -> List[Any]:
         """Filter records using a filter function."""
         return [record for record in self.data.values() if filter_func(record)]
 
 
-compliance_reports_db = InMemoryDB("compliance_reports")
-pep_screening_results_db = InMemoryDB("pep_screening_results")
-sanctions_screening_results_db = InMemoryDB("sanctions_screening_results")
-list_updates_db = InMemoryDB("list_updates")
+def flush_all_stores() -> None:
+    """Write out the pending group-commit batches of every store."""
+    for store in list(_stores):
+        store._flush_pending()
+
+
+atexit.register(flush_all_stores)
+
+
+def job_result_status(record: Dict[str, Any]) -> Tuple[int, str]:
+    return record.get("job_id"), record.get("status")
+
+
+compliance_reports_db = InMemoryDB(
+    "compliance_reports", sorted_indexes=["created_at"], aggregates={"status": Aggregate(group_by="status")}
+)
+pep_screening_results_db = InMemoryDB(
+    "pep_screening_results", aggregates={"match_status": Aggregate(group_by="match_status")}
+)
+sanctions_screening_results_db = InMemoryDB(
+    "sanctions_screening_results", aggregates={"match_status": Aggregate(group_by="match_status")}
+)
+list_updates_db = InMemoryDB(
+    "list_updates",
+    retention=RetentionPolicy(
+        max_age_days=settings.LIST_UPDATE_RETENTION_DAYS,
+        max_rows=settings.LIST_UPDATE_MAX_ROWS,
+        age_field="update_date",
+    ),
+)
+verification_jobs_db = InMemoryDB("verification_jobs")
+verification_job_results_db = InMemoryDB(
+    "verification_job_results",
+    aggregates={"job_status": Aggregate(group_by=job_result_status)},
+    retention=RetentionPolicy(max_age_days=settings.COMPLIANCE_JOB_RESULT_RETENTION_DAYS, age_field="completed_at"),
+)
+screening_states_db = InMemoryDB("screening_states", sorted_indexes=["client_id"])
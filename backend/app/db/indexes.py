@@ -0,0 +1,301 @@
+"""
+Secondary indexes for the in-memory stores in app.db.base and app.db.in_memory.
+"""
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, timezone
+from enum import Enum
+from itertools import chain
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+UNINDEXABLE = object()
+
+
+def index_key(value: Any) -> Hashable:
+    """
+    Normalize a field value into an index key.
+
+    Enum members are indexed by their value so that ``status == "pending"``
+    and ``status == Status.PENDING`` resolve to the same bucket. Returns
+    UNINDEXABLE for unhashable values, which cannot be served by a hash index.
+    """
+    if isinstance(value, Enum):
+        value = value.value
+    try:
+        hash(value)
+    except TypeError:
+        return UNINDEXABLE
+    return value
+
+
+class HashIndex:
+    """
+    Equality index mapping a field value to the ids of the rows holding it.
+
+    Buckets are insertion-ordered dicts so lookups return ids in the order
+    rows were indexed. The key each id was indexed under is remembered, so
+    removal does not depend on the current state of the (mutable) row.
+    """
+
+    def __init__(self, field: str):
+        self.field = field
+        self.buckets: Dict[Hashable, Dict[int, None]] = {}
+        self.keys: Dict[int, Hashable] = {}
+
+    def add(self, id: int, obj: Any) -> None:
+        """Index a row, replacing any previous entry for the same id."""
+        key = index_key(getattr(obj, self.field, None))
+        if id in self.keys:
+            if key is not UNINDEXABLE and self.keys[id] == key:
+                return
+            self.discard(id)
+        if key is UNINDEXABLE:
+            return
+        self.buckets.setdefault(key, {})[id] = None
+        self.keys[id] = key
+
+    def discard(self, id: int) -> None:
+        """Remove a row from the index if present."""
+        if id not in self.keys:
+            return
+        key = self.keys.pop(id)
+        bucket = self.buckets.get(key)
+        if bucket is not None:
+            bucket.pop(id, None)
+            if not bucket:
+                del self.buckets[key]
+
+    def add_many(self, rows: Iterable[Tuple[int, Any]]) -> None:
+        """Index several (id, obj) pairs."""
+        for id, obj in rows:
+            self.add(id, obj)
+
+    def discard_many(self, ids: Iterable[int]) -> None:
+        for id in ids:
+            self.discard(id)
+
+    def lookup(self, value: Any) -> Optional[Dict[int, None]]:
+        """
+        Return the ordered ids whose field equals value, or None when the
+        value cannot be resolved through this index.
+        """
+        key = index_key(value)
+        if key is UNINDEXABLE:
+            return None
+        return self.buckets.get(key, {})
+
+    def clear(self) -> None:
+        self.buckets.clear()
+        self.keys.clear()
+
+    def rebuild(self, rows: Iterable) -> None:
+        """Rebuild the index from (id, obj) pairs."""
+        self.clear()
+        for id, obj in rows:
+            self.add(id, obj)
+
+
+def range_key(value: Any) -> Any:
+    """
+    Normalize a field value into a sort key for SortedIndex.
+
+    Dates become midnight datetimes and aware datetimes become naive UTC, so
+    a ``date`` bound can be compared with ``datetime`` values and vice versa.
+    Returns UNINDEXABLE for None, which never falls inside a range.
+    """
+    if value is None:
+        return UNINDEXABLE
+    if isinstance(value, Enum):
+        value = value.value
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day)
+    return value
+
+
+def sort_in_range(
+    items: Iterable[Any], field: str, start: Any, end: Any, end_inclusive: bool, descending: bool
+) -> List[Any]:
+    """The unindexed equivalent of SortedIndex.range(), over the items themselves."""
+    low = None if start is None else range_key(start)
+    high = None if end is None else range_key(end)
+    keyed = []
+    for item in items:
+        key = range_key(getattr(item, field, None))
+        if key is UNINDEXABLE:
+            continue
+        if low is not None and key < low:
+            continue
+        if high is not None and (key > high or (key == high and not end_inclusive)):
+            continue
+        keyed.append((key, getattr(item, "id", None) or 0, item))
+    keyed.sort(key=lambda entry: entry[:2], reverse=descending)
+    return [item for _, _, item in keyed]
+
+
+class SortedIndex:
+    """
+    Ordered index over a field, for range queries such as "due in the next
+    15 days" or "logged between two timestamps".
+
+    Keys and ids are kept in two parallel lists sorted by (key, id), so a
+    range is located with two binary searches and read back already in key
+    order. Rows whose field is None are not indexed. The index also answers
+    equality lookups, like HashIndex.
+    """
+
+    def __init__(self, field: str):
+        self.field = field
+        self.sorted_keys: List[Any] = []
+        self.sorted_ids: List[int] = []
+        self.keys: Dict[int, Any] = {}
+
+    def _position(self, key: Any, id: int) -> int:
+        low = bisect_left(self.sorted_keys, key)
+        high = bisect_right(self.sorted_keys, key, low)
+        return bisect_left(self.sorted_ids, id, low, high)
+
+    def add(self, id: int, obj: Any) -> None:
+        """Index a row, replacing any previous entry for the same id."""
+        key = range_key(getattr(obj, self.field, None))
+        if id in self.keys:
+            if key is not UNINDEXABLE and self.keys[id] == key:
+                return
+            self.discard(id)
+        if key is UNINDEXABLE:
+            return
+        if not self.sorted_keys or (key, id) > (self.sorted_keys[-1], self.sorted_ids[-1]):
+            self.sorted_keys.append(key)
+            self.sorted_ids.append(id)
+        else:
+            position = self._position(key, id)
+            self.sorted_keys.insert(position, key)
+            self.sorted_ids.insert(position, id)
+        self.keys[id] = key
+
+    def discard(self, id: int) -> None:
+        """Remove a row from the index if present."""
+        if id not in self.keys:
+            return
+        position = self._position(self.keys.pop(id), id)
+        del self.sorted_keys[position]
+        del self.sorted_ids[position]
+
+    def _assign(self, entries: Iterable[Tuple[Any, int]]) -> None:
+        entries = list(entries)
+        self.sorted_keys = [key for key, _ in entries]
+        self.sorted_ids = [id for _, id in entries]
+
+    def add_many(self, rows: Iterable[Tuple[int, Any]]) -> None:
+        """
+        Index several (id, obj) pairs with one merge instead of one list
+        insertion per row.
+        """
+        entries = []
+        changed = []
+        for id, obj in rows:
+            key = range_key(getattr(obj, self.field, None))
+            if id in self.keys:
+                if key is not UNINDEXABLE and self.keys[id] == key:
+                    continue
+                changed.append(id)
+            if key is not UNINDEXABLE:
+                entries.append((key, id))
+        self.discard_many(changed)
+        if not entries:
+            return
+        entries.sort()
+        for key, id in entries:
+            self.keys[id] = key
+        if not self.sorted_keys or entries[0] > (self.sorted_keys[-1], self.sorted_ids[-1]):
+            self.sorted_keys.extend(key for key, _ in entries)
+            self.sorted_ids.extend(id for _, id in entries)
+        else:
+            self._assign(sorted(chain(zip(self.sorted_keys, self.sorted_ids), entries)))
+
+    def discard_many(self, ids: Iterable[int]) -> None:
+        """Remove several rows with a single pass over the index."""
+        ids = [id for id in ids if id in self.keys]
+        if len(ids) <= 1:
+            for id in ids:
+                self.discard(id)
+            return
+        for id in ids:
+            del self.keys[id]
+        dropped = set(ids)
+        self._assign(entry for entry in zip(self.sorted_keys, self.sorted_ids) if entry[1] not in dropped)
+
+    def _bounds(self, start: Any, end: Any, start_inclusive: bool, end_inclusive: bool) -> Tuple[int, int]:
+        """Positions delimiting the keys between start and end."""
+        low, high = 0, len(self.sorted_keys)
+        if start is not None:
+            start = range_key(start)
+            if start_inclusive:
+                low = bisect_left(self.sorted_keys, start)
+            else:
+                low = bisect_right(self.sorted_keys, start)
+        if end is not None:
+            end = range_key(end)
+            if end_inclusive:
+                high = bisect_right(self.sorted_keys, end, low)
+            else:
+                high = bisect_left(self.sorted_keys, end, low)
+        return low, max(low, high)
+
+    def range(
+        self,
+        start: Any = None,
+        end: Any = None,
+        *,
+        start_inclusive: bool = True,
+        end_inclusive: bool = True,
+        descending: bool = False,
+    ) -> List[int]:
+        """
+        Return the ids whose key is >= start and <= end (> and < when not
+        inclusive), ordered by key. Either bound may be None.
+        """
+        low, high = self._bounds(start, end, start_inclusive, end_inclusive)
+        ids = self.sorted_ids[low:high]
+        if descending:
+            ids.reverse()
+        return ids
+
+    def count(
+        self, start: Any = None, end: Any = None, *, start_inclusive: bool = True, end_inclusive: bool = True
+    ) -> int:
+        """Number of ids range() would return, in O(log n)."""
+        low, high = self._bounds(start, end, start_inclusive, end_inclusive)
+        return high - low
+
+    def lookup(self, value: Any) -> Optional[Dict[int, None]]:
+        """
+        Return the ids whose field equals value, or None for None/unhashable
+        values and values that do not compare with the indexed keys.
+        """
+        key = range_key(value)
+        if key is UNINDEXABLE or index_key(key) is UNINDEXABLE:
+            return None
+        try:
+            return dict.fromkeys(self.range(key, key))
+        except TypeError:
+            return None
+
+    def clear(self) -> None:
+        self.sorted_keys.clear()
+        self.sorted_ids.clear()
+        self.keys.clear()
+
+    def rebuild(self, rows: Iterable) -> None:
+        """Rebuild the index from (id, obj) pairs with a single sort."""
+        self.clear()
+        entries = []
+        for id, obj in rows:
+            key = range_key(getattr(obj, self.field, None))
+            if key is not UNINDEXABLE:
+                entries.append((key, id))
+                self.keys[id] = key
+        entries.sort()
+        self._assign(entries)
@@ -1,4 +1,7 @@
+from app.db.aggregates import Aggregate
 from app.db.base import InMemoryDB
+from app.db.retention import RetentionPolicy
+from app.core.config import settings
 from app.models.user import UserInDB
 from app.models.contract import ContractInDB
 from app.models.settings import SystemSettingInDB
@@ -15,25 +18,75 @@ from app.modules.ai.models import AIProfile
 from app.modules.admin.audit.models import AuditLog as AdminAuditLog, ActionType, TargetType
 from app.modules.artur.observation.models import ArturInsight, InsightCategory, EntityType
 
-users_db = InMemoryDB[UserInDB](UserInDB)
-contracts_db = InMemoryDB[ContractInDB](ContractInDB)
+
+def risk_band(risk_score: RiskScore) -> str:
+    """Dashboard band of a risk score: high above 0.7, low below 0.3."""
+    if risk_score.overall_score > 0.7:
+        return "high"
+    if risk_score.overall_score >= 0.3:
+        return "medium"
+    return "low"
+
+
+def anomaly_source(anomaly: ContractAnomaly) -> str:
+    """Which analyzer reported an anomaly: "mistral" or "traditional_nlp"."""
+    metadata = getattr(anomaly, "metadata", None)
+    return "mistral" if metadata and metadata.get("source") == "mistral" else "traditional_nlp"
+
+
+users_db = InMemoryDB[UserInDB](UserInDB, indexes=["email"])
+contracts_db = InMemoryDB[ContractInDB](
+    ContractInDB,
+    sorted_indexes=["expiration_date"],
+    copy_on_write=True,
+    aggregates={"status": Aggregate(group_by="status")},
+)
 system_settings_db = InMemoryDB[SystemSettingInDB](SystemSettingInDB)
 
-extracted_clauses_db = InMemoryDB[ExtractedClause](ExtractedClause)
-risk_scores_db = InMemoryDB[RiskScore](RiskScore)
+extracted_clauses_db = InMemoryDB[ExtractedClause](
+    ExtractedClause, indexes=["contract_id"], aggregates={"clause_type": Aggregate(group_by="clause_type")}
+)
+risk_scores_db = InMemoryDB[RiskScore](
+    RiskScore,
+    indexes=["contract_id"],
+    aggregates={"band": Aggregate(group_by=risk_band), "contract_id": Aggregate(group_by="contract_id")},
+)
 compliance_checks_db = InMemoryDB[ComplianceCheck](ComplianceCheck)
-audit_logs_db = InMemoryDB[AuditLog](AuditLog)
-ai_queries_db = InMemoryDB[AIQuery](AIQuery)
-contract_anomalies_db = InMemoryDB[ContractAnomaly](ContractAnomaly)
+audit_logs_db = InMemoryDB[AuditLog](
+    AuditLog,
+    sorted_indexes=["timestamp"],
+    retention=RetentionPolicy(
+        max_age_days=settings.AUDIT_LOG_RETENTION_DAYS, max_rows=settings.AUDIT_LOG_MAX_ROWS, age_field="timestamp"
+    ),
+)
+ai_queries_db = InMemoryDB[AIQuery](
+    AIQuery,
+    sorted_indexes=["created_at"],
+    retention=RetentionPolicy(max_age_days=settings.AI_QUERY_RETENTION_DAYS, max_rows=settings.AI_QUERY_MAX_ROWS),
+)
+contract_anomalies_db = InMemoryDB[ContractAnomaly](
+    ContractAnomaly,
+    aggregates={"severity": Aggregate(group_by="severity"), "source": Aggregate(group_by=anomaly_source)},
+)
 
-departments_db = InMemoryDB[Department](Department)
-roles_db = InMemoryDB[Role](Role)
-permissions_db = InMemoryDB[Permission](Permission)
-permission_groups_db = InMemoryDB[PermissionGroup](PermissionGroup)
-functions_db = InMemoryDB[Function](Function)
-ai_profiles_db = InMemoryDB[AIProfile](AIProfile)
-admin_audit_logs_db = InMemoryDB[AdminAuditLog](AdminAuditLog)
-insights_db = InMemoryDB[ArturInsight](ArturInsight)
+departments_db = InMemoryDB[Department](Department, snapshot_name="global_departments")
+roles_db = InMemoryDB[Role](Role, snapshot_name="global_roles")
+permissions_db = InMemoryDB[Permission](Permission, snapshot_name="global_permissions")
+permission_groups_db = InMemoryDB[PermissionGroup](PermissionGroup, snapshot_name="global_permission_groups")
+functions_db = InMemoryDB[Function](Function, snapshot_name="global_functions")
+ai_profiles_db = InMemoryDB[AIProfile](AIProfile, snapshot_name="global_ai_profiles")
+admin_audit_logs_db = InMemoryDB[AdminAuditLog](
+    AdminAuditLog,
+    sorted_indexes=["created_at"],
+    retention=RetentionPolicy(max_age_days=settings.AUDIT_LOG_RETENTION_DAYS, max_rows=settings.AUDIT_LOG_MAX_ROWS),
+    snapshot_name="global_admin_audit_logs",
+)
+insights_db = InMemoryDB[ArturInsight](
+    ArturInsight,
+    sorted_indexes=["created_at"],
+    retention=RetentionPolicy(max_age_days=settings.INSIGHT_RETENTION_DAYS, max_rows=settings.INSIGHT_MAX_ROWS),
+    snapshot_name="global_artur_insights",
+)
 
 def init_db() -> None:
     """Initialize the database with some sample data."""
@@ -99,8 +152,9 @@ def init_db() -> None:
             {"id": 24, "name": "view_system_logs", "description": "View system logs", "category": "system"}
         ]
         
-        for perm_data in permissions_list:
-            permissions_db.data[perm_data["id"]] = Permission(**perm_data)
+        permissions_db.data.update(
+            {perm_data["id"]: Permission(**perm_data) for perm_data in permissions_list}
+        )
         
         permission_groups_list = [
             {"id": 1, "name": "Contract Management", "permissions": ["create_contract", "approve_contract", "view_all_contracts"]},
@@ -113,8 +167,9 @@ def init_db() -> None:
             {"id": 8, "name": "System Management", "permissions": ["create_user", "approve_access", "view_system_logs"]}
         ]
         
-        for group_data in permission_groups_list:
-            permission_groups_db.data[group_data["id"]] = PermissionGroup(**group_data)
+        permission_groups_db.data.update(
+            {group_data["id"]: PermissionGroup(**group_data) for group_data in permission_groups_list}
+        )
     
     if not departments_db.get_multi():
         legal_dept = Department(
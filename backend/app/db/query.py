@@ -0,0 +1,289 @@
+"""
+Predicates for InMemoryDB.query().
+
+    from app.db.query import Field, all_of
+
+    contracts_db.query(
+        Field("client_name").contains("acme")
+        & Field("status").in_(["active", "draft"])
+        & Field("expiration_date").between(date(2025, 1, 1), date(2025, 3, 31)),
+        order_by="expiration_date",
+    )
+
+Operators: eq, in_, gt, ge, lt, le, between, prefix, contains, combined with
+``&``, ``|`` and ``~``. Comparisons follow get_range(): dates and datetimes
+compare with each other, enums by value, and a None field never satisfies
+an ordering, prefix or contains condition.
+
+The store plans each query: every condition that an index can answer
+(equality and ``in`` on a hash or sorted index, ranges and string prefixes
+on a sorted index, equality on ``id``) is costed, the most selective one
+supplies the candidate rows and only those are checked against the whole
+predicate. ``explain()`` shows the chosen plan.
+"""
+import operator
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.db.indexes import UNINDEXABLE, HashIndex, SortedIndex, range_key
+
+# Sorts after every character, so [p, p + PREFIX_END) holds the strings starting with p.
+PREFIX_END = "\U0010ffff"
+
+
+class Predicate:
+    """A condition on one item."""
+
+    def matches(self, item: Any) -> bool:
+        raise NotImplementedError
+
+    def __and__(self, other: "Predicate") -> "Predicate":
+        return And([self, other])
+
+    def __or__(self, other: "Predicate") -> "Predicate":
+        return Or([self, other])
+
+    def __invert__(self) -> "Predicate":
+        return Not(self)
+
+
+_ORDERINGS = {"gt": operator.gt, "ge": operator.ge, "lt": operator.lt, "le": operator.le}
+
+
+class Condition(Predicate):
+    """``field <op> value`` for one of the operators of Field."""
+
+    def __init__(self, field: str, op: str, value: Any = None, end: Any = None, case_sensitive: bool = True):
+        self.field = field
+        self.op = op
+        self.value = value
+        self.end = end
+        self.case_sensitive = case_sensitive
+        if op in _ORDERINGS or op == "between":
+            self.key = range_key(value)
+            self.end_key = range_key(end)
+        elif op == "in":
+            self.value = tuple(value)
+        elif op == "contains" and isinstance(value, str) and not case_sensitive:
+            self.key = value.lower()
+
+    def matches(self, item: Any) -> bool:
+        value = getattr(item, self.field, None)
+        op = self.op
+        if op == "eq":
+            return value == self.value
+        if op == "in":
+            return value in self.value
+        if op in _ORDERINGS or op == "between":
+            key = range_key(value)
+            if key is UNINDEXABLE:
+                return False
+            try:
+                if op == "between":
+                    return (self.key is UNINDEXABLE or key >= self.key) and (
+                        self.end_key is UNINDEXABLE or key <= self.end_key
+                    )
+                return self.key is not UNINDEXABLE and _ORDERINGS[op](key, self.key)
+            except TypeError:
+                return False
+        if op == "prefix":
+            return isinstance(value, str) and value.startswith(self.value)
+        if op == "contains":
+            if isinstance(value, str):
+                if self.case_sensitive:
+                    return isinstance(self.value, str) and self.value in value
+                return isinstance(self.value, str) and self.key in value.lower()
+            if isinstance(value, (list, tuple, set, frozenset, dict)):
+                return self.value in value
+            return False
+        raise ValueError(f"Unknown operator: {op}")
+
+    def __repr__(self) -> str:
+        if self.op == "between":
+            return f"{self.field} between {self.value!r} and {self.end!r}"
+        return f"{self.field} {self.op} {self.value!r}"
+
+
+class And(Predicate):
+    def __init__(self, parts: Iterable[Predicate]):
+        self.parts: List[Predicate] = []
+        for part in parts:
+            self.parts.extend(part.parts if isinstance(part, And) else [part])
+
+    def matches(self, item: Any) -> bool:
+        return all(part.matches(item) for part in self.parts)
+
+    def __repr__(self) -> str:
+        return "(" + " and ".join(map(repr, self.parts)) + ")"
+
+
+class Or(Predicate):
+    def __init__(self, parts: Iterable[Predicate]):
+        self.parts: List[Predicate] = []
+        for part in parts:
+            self.parts.extend(part.parts if isinstance(part, Or) else [part])
+
+    def matches(self, item: Any) -> bool:
+        return any(part.matches(item) for part in self.parts)
+
+    def __repr__(self) -> str:
+        return "(" + " or ".join(map(repr, self.parts)) + ")"
+
+
+class Not(Predicate):
+    def __init__(self, part: Predicate):
+        self.part = part
+
+    def matches(self, item: Any) -> bool:
+        return not self.part.matches(item)
+
+    def __repr__(self) -> str:
+        return f"not {self.part!r}"
+
+
+class Field:
+    """Builds the conditions on one field."""
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def eq(self, value: Any) -> Condition:
+        return Condition(self.name, "eq", value)
+
+    def in_(self, values: Iterable[Any]) -> Condition:
+        return Condition(self.name, "in", values)
+
+    def gt(self, value: Any) -> Condition:
+        return Condition(self.name, "gt", value)
+
+    def ge(self, value: Any) -> Condition:
+        return Condition(self.name, "ge", value)
+
+    def lt(self, value: Any) -> Condition:
+        return Condition(self.name, "lt", value)
+
+    def le(self, value: Any) -> Condition:
+        return Condition(self.name, "le", value)
+
+    def between(self, start: Any, end: Any) -> Condition:
+        """start <= field <= end; a None bound is open."""
+        return Condition(self.name, "between", start, end)
+
+    def prefix(self, value: str) -> Condition:
+        return Condition(self.name, "prefix", value)
+
+    def contains(self, value: Any, case_sensitive: bool = False) -> Condition:
+        """Substring of a string field (case-insensitive by default), or member of a list field."""
+        return Condition(self.name, "contains", value, case_sensitive=case_sensitive)
+
+
+def all_of(*predicates: Optional[Predicate]) -> Optional[Predicate]:
+    """AND the given predicates, skipping None; None if nothing is left."""
+    parts = [p for p in predicates if p is not None]
+    if not parts:
+        return None
+    return parts[0] if len(parts) == 1 else And(parts)
+
+
+def any_of(*predicates: Optional[Predicate]) -> Optional[Predicate]:
+    """OR the given predicates, skipping None; None if nothing is left."""
+    parts = [p for p in predicates if p is not None]
+    if not parts:
+        return None
+    return parts[0] if len(parts) == 1 else Or(parts)
+
+
+# An access path: (estimated row count, description, function returning the ids).
+Plan = Tuple[int, str, Callable[[], Iterable[int]]]
+
+
+def _union(lookups: Sequence[Callable[[], Iterable[int]]]) -> Callable[[], Iterable[int]]:
+    def ids() -> Iterable[int]:
+        merged: Dict[int, None] = {}
+        for lookup in lookups:
+            merged.update(dict.fromkeys(lookup()))
+        return merged
+    return ids
+
+
+def _condition_plan(condition: Condition, indexes: Dict[str, Any], row_ids: Callable[[int], bool]) -> Optional[Plan]:
+    field, op = condition.field, condition.op
+    if field == "id" and op in ("eq", "in"):
+        values = [condition.value] if op == "eq" else list(condition.value)
+        ids = [value for value in values if isinstance(value, int) and row_ids(value)]
+        return len(ids), "id lookup", lambda: ids
+
+    index = indexes.get(field)
+    if index is None:
+        return None
+    kind = "hash" if isinstance(index, HashIndex) else "sorted"
+
+    if op in ("eq", "in"):
+        values = [condition.value] if op == "eq" else list(condition.value)
+        buckets = []
+        for value in values:
+            if value is None:
+                return None  # None is not indexed
+            bucket = index.lookup(value)
+            if bucket is None:
+                return None
+            buckets.append(bucket)
+        size = sum(len(bucket) for bucket in buckets)
+        return size, f"{kind} index on {field}", _union([lambda b=b: b for b in buckets])
+
+    if not isinstance(index, SortedIndex):
+        return None
+    if op == "prefix":
+        if not isinstance(condition.value, str):
+            return None
+        bounds = dict(start=condition.value, end=condition.value + PREFIX_END, end_inclusive=False)
+    elif op == "between":
+        bounds = dict(start=condition.value, end=condition.end)
+    elif op in ("gt", "ge"):
+        bounds = dict(start=condition.value, start_inclusive=op == "ge")
+    elif op in ("lt", "le"):
+        bounds = dict(end=condition.value, end_inclusive=op == "le")
+    else:
+        return None
+    try:
+        size = index.count(**bounds)
+    except TypeError:
+        return None  # bound of another type than the indexed values
+    return size, f"sorted index range on {field}", lambda: index.range(**bounds)
+
+
+def plan(predicate: Predicate, indexes: Dict[str, Any], row_ids: Callable[[int], bool]) -> Optional[Plan]:
+    """
+    The cheapest index access path that yields a superset of the rows
+    matching predicate, or None if a full scan is needed.
+    """
+    if isinstance(predicate, Condition):
+        return _condition_plan(predicate, indexes, row_ids)
+    if isinstance(predicate, And):
+        plans = [p for p in (plan(part, indexes, row_ids) for part in predicate.parts) if p is not None]
+        return min(plans, key=lambda p: p[0]) if plans else None
+    if isinstance(predicate, Or):
+        plans = [plan(part, indexes, row_ids) for part in predicate.parts]
+        if not plans or any(p is None for p in plans):
+            return None
+        return (
+            sum(p[0] for p in plans),
+            "union of " + ", ".join(p[1] for p in plans),
+            _union([p[2] for p in plans]),
+        )
+    return None
+
+
+def order_items(items: List[Any], order_by: Optional[str], descending: bool) -> List[Any]:
+    """Sort by a field (None last, ties by id), or by id when order_by is None."""
+    if order_by is None:
+        return sorted(items, key=lambda item: item.id, reverse=descending)
+    keyed, missing = [], []
+    for item in items:
+        key = range_key(getattr(item, order_by, None))
+        if key is UNINDEXABLE:
+            missing.append(item)
+        else:
+            keyed.append((key, item.id, item))
+    keyed.sort(key=lambda entry: entry[:2], reverse=descending)
+    missing.sort(key=lambda item: item.id, reverse=descending)
+    return [item for _, _, item in keyed] + missing
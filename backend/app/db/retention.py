@@ -0,0 +1,226 @@
+"""
+Retention policies for append-only stores (audit logs, AI queries, insights,
+list updates), so they stay bounded on long-running deployments.
+
+A store built with ``retention=RetentionPolicy(...)`` registers itself here.
+apply_all(), run every DB_RETENTION_INTERVAL_SECONDS by the app scheduler,
+evicts from each store the rows whose ``age_field`` is older than
+``max_age_days`` and then the oldest rows (by id) beyond ``max_rows``:
+
+    audit_logs_db = InMemoryDB[AuditLog](
+        AuditLog,
+        sorted_indexes=["created_at"],
+        retention=RetentionPolicy(max_age_days=365, max_rows=200_000),
+    )
+
+Unless ``archive=False``, evicted rows are first appended to an archive under
+DB_ARCHIVE_DIR/<store>/<YYYY-MM>.cols.gz, and are only removed once that
+succeeded. Each eviction appends one gzip member holding a single JSON line
+with the batch in columnar form, ``{"columns": {field: [values...]}}``;
+gzip reads the members back as one stream, so read_archive() and
+query_archive() can scan the archives offline without the app.
+"""
+import gzip
+import json
+import logging
+import os
+import weakref
+import zlib
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List, Optional, Type
+
+from pydantic import BaseModel
+from pydantic_core import to_jsonable_python
+
+from app.core.config import settings
+from app.db.query import Predicate
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_VERSION = 1
+ARCHIVE_SUFFIX = ".cols.gz"
+
+_stores: "weakref.WeakSet[Any]" = weakref.WeakSet()
+
+
+class RetentionPolicy:
+    """
+    How long a store keeps its rows. ``max_age_days`` and ``max_rows`` are
+    both optional; None or 0 means no limit of that kind.
+    """
+
+    def __init__(
+        self,
+        max_age_days: Optional[float] = None,
+        max_rows: Optional[int] = None,
+        age_field: str = "created_at",
+        archive: bool = True,
+    ):
+        self.max_age_days = max_age_days or None
+        self.max_rows = max_rows or None
+        self.age_field = age_field
+        self.archive = archive
+
+    def cutoff(self, now: Optional[datetime] = None) -> Optional[datetime]:
+        """Rows whose age field is before this are expired."""
+        if self.max_age_days is None:
+            return None
+        return (now or datetime.now()) - timedelta(days=self.max_age_days)
+
+    def __repr__(self) -> str:
+        return (
+            f"RetentionPolicy(max_age_days={self.max_age_days}, max_rows={self.max_rows}, "
+            f"age_field={self.age_field!r}, archive={self.archive})"
+        )
+
+
+def register(store: Any) -> None:
+    """Have apply_all() enforce the retention policy of store."""
+    _stores.add(store)
+
+
+def field_value(record: Any, field: str) -> Any:
+    """A field of a model instance or of a plain dict record."""
+    if isinstance(record, dict):
+        return record.get(field)
+    return getattr(record, field, None)
+
+
+def archive_path(name: str, when: Optional[datetime] = None, directory: Optional[str] = None) -> str:
+    month = (when or datetime.now()).strftime("%Y-%m")
+    return os.path.join(directory or settings.DB_ARCHIVE_DIR, name, month + ARCHIVE_SUFFIX)
+
+
+def archive_rows(name: str, rows: List[Any], directory: Optional[str] = None) -> Optional[str]:
+    """
+    Append rows to the current archive of the store ``name`` as one columnar
+    batch. Returns the file written, or None if there was nothing to write.
+    """
+    if not rows:
+        return None
+    records = [to_jsonable_python(row) for row in rows]
+    fields = list(dict.fromkeys(field for record in records for field in record))
+    batch = {
+        "version": ARCHIVE_VERSION,
+        "store": name,
+        "archived_at": datetime.now().isoformat(),
+        "count": len(records),
+        "columns": {field: [record.get(field) for record in records] for field in fields},
+    }
+    path = archive_path(name, directory=directory)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    line = json.dumps(batch, separators=(",", ":")).encode() + b"\n"
+    with open(path, "ab") as f:
+        f.write(gzip.compress(line))
+        f.flush()
+        os.fsync(f.fileno())
+    return path
+
+
+def read_archive(path: str) -> Iterator[Dict[str, Any]]:
+    """Yield the rows of an archive file as JSON dicts, stopping at a torn tail."""
+    with gzip.open(path, "rt") as f:
+        try:
+            for line in f:
+                batch = json.loads(line)
+                if batch.get("version") != ARCHIVE_VERSION:
+                    raise ValueError(f"Unsupported archive version in {path}: {batch.get('version')}")
+                columns = batch["columns"]
+                fields = list(columns)
+                for values in zip(*(columns[field] for field in fields)):
+                    yield dict(zip(fields, values))
+        except (EOFError, gzip.BadGzipFile, zlib.error, json.JSONDecodeError):
+            logger.warning(f"Ignoring incomplete batch at the end of {path}")
+
+
+def archive_files(name: str, directory: Optional[str] = None) -> List[str]:
+    """The archive files of the store ``name``, oldest first."""
+    store_dir = os.path.join(directory or settings.DB_ARCHIVE_DIR, name)
+    if not os.path.isdir(store_dir):
+        return []
+    return [
+        os.path.join(store_dir, file)
+        for file in sorted(os.listdir(store_dir))
+        if file.endswith(ARCHIVE_SUFFIX)
+    ]
+
+
+def query_archive(
+    name: str,
+    where: Optional[Predicate] = None,
+    model_class: Optional[Type[BaseModel]] = None,
+    directory: Optional[str] = None,
+) -> Iterator[Any]:
+    """
+    Yield the archived rows of the store ``name`` that match where.
+
+    With a model class the rows are validated into it, so predicates compare
+    typed values; without one they are the JSON dicts as archived (datetimes
+    are ISO strings).
+    """
+    for path in archive_files(name, directory):
+        for record in read_archive(path):
+            row = model_class.model_validate(record) if model_class is not None else record
+            if where is None or where.matches(row if model_class is not None else SimpleNamespace(**record)):
+                yield row
+
+
+def expired_rows(store: Any, now: Optional[datetime] = None) -> List[Any]:
+    """
+    The rows of a generic store (app.db.base or app.db.sqlite) that its
+    policy evicts: too old first, then the oldest ids beyond max_rows.
+    """
+    policy = store.retention
+    rows = []
+    cutoff = policy.cutoff(now)
+    if cutoff is not None:
+        rows = store.get_range(policy.age_field, None, cutoff, end_inclusive=False)
+    if policy.max_rows is not None:
+        excess = store.count() - len(rows) - policy.max_rows
+        if excess > 0:
+            expired = {row.id for row in rows}
+            for row in store.iter_multi():
+                if excess <= 0:
+                    break
+                if row.id not in expired:
+                    rows.append(row)
+                    excess -= 1
+    return rows
+
+
+def evict(store: Any, now: Optional[datetime] = None) -> int:
+    """Archive and remove the expired rows of a generic store. Returns how many."""
+    rows = expired_rows(store, now)
+    if not rows:
+        return 0
+    if store.retention.archive:
+        archive_rows(store.archive_name, rows)
+    removed = store.remove_many(ids=[row.id for row in rows])
+    logger.info(f"Evicted {len(removed)} rows from {store.archive_name}")
+    return len(removed)
+
+
+def apply_all(now: Optional[datetime] = None) -> int:
+    """Enforce the retention policy of every registered store. Returns the rows evicted."""
+    evicted = 0
+    for store in list(_stores):
+        try:
+            evicted += store.apply_retention(now)
+        except Exception as e:
+            logger.error(f"Error applying retention to {getattr(store, 'archive_name', store)}: {str(e)}")
+    return evicted
+
+
+def setup_retention_scheduler(scheduler):
+    """Apply the retention policies every DB_RETENTION_INTERVAL_SECONDS."""
+    from apscheduler.triggers.interval import IntervalTrigger
+
+    if settings.DB_RETENTION_INTERVAL_SECONDS > 0:
+        scheduler.add_job(
+            apply_all,
+            IntervalTrigger(seconds=settings.DB_RETENTION_INTERVAL_SECONDS),
+            id="apply_retention",
+            replace_existing=True,
+        )
+    return scheduler
@@ -0,0 +1,162 @@
+"""
+Snapshots of the generic in-memory stores (app.db.base.InMemoryDB).
+
+Every store registers itself here under the name of its model, or under
+the ``snapshot_name`` it was given. Stores that share a model must each be
+given a name of their own: registering a name twice is an error, so that
+restore_all() can never load one store's file into another. When
+DB_SNAPSHOTS_ENABLED is set, snapshot_all() writes one file per store to
+DB_SNAPSHOT_DIR: periodically (DB_SNAPSHOT_INTERVAL_SECONDS, through the
+app scheduler) and on shutdown. Stores that did not change since their last
+snapshot are skipped.
+
+restore_all() only points each store at its file; a store reads it the
+first time it is used. Startup time therefore does not depend on the size
+of the data, and tables nobody touches are never loaded.
+
+File layout: a one-line JSON header (format version, model, counter, row
+count) followed by the rows as one JSON array, serialized and validated by
+pydantic-core in a single pass each way.
+"""
+import gc
+import logging
+import os
+import re
+import threading
+import weakref
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+from pydantic import BaseModel, TypeAdapter
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+SNAPSHOT_SUFFIX = ".snapshot"
+
+_registry: Dict[str, "weakref.ReferenceType[Any]"] = {}
+_registry_lock = threading.Lock()
+_adapters: Dict[Type[BaseModel], TypeAdapter] = {}
+_header_adapter = TypeAdapter(Dict[str, Any])
+
+
+def store_name(model_class: Type[BaseModel]) -> str:
+    """Name of a model's store, unique across modules that reuse class names."""
+    return re.sub(r"\W", "_", f"{model_class.__module__}.{model_class.__qualname__}")
+
+
+def register(store: Any, name: Optional[str] = None) -> str:
+    """
+    Register a store under name (by default, the name of its model) and
+    return the name. Raises ValueError if a live store already has it.
+    """
+    name = name or store_name(store.model_class)
+    for attempt in range(2):
+        with _registry_lock:
+            for dead in [n for n, ref in _registry.items() if ref() is None]:
+                del _registry[dead]
+            if name not in _registry:
+                _registry[name] = weakref.ref(store)
+                return name
+        if attempt == 0:
+            # Stores reference themselves through their rows, so a store
+            # nobody uses any more lingers until the cycle collector runs.
+            gc.collect()
+    raise ValueError(f"A store named {name} already exists; give each store of a model its own snapshot_name")
+
+
+def registered_stores() -> Dict[str, Any]:
+    with _registry_lock:
+        stores = {name: ref() for name, ref in _registry.items()}
+    return {name: store for name, store in stores.items() if store is not None}
+
+
+def snapshot_path(name: str, directory: Optional[str] = None) -> str:
+    return os.path.join(directory or settings.DB_SNAPSHOT_DIR, name + SNAPSHOT_SUFFIX)
+
+
+def _adapter(model_class: Type[BaseModel]) -> TypeAdapter:
+    adapter = _adapters.get(model_class)
+    if adapter is None:
+        adapter = _adapters[model_class] = TypeAdapter(List[model_class])
+    return adapter
+
+
+def write_snapshot(path: str, model_class: Type[BaseModel], rows: List[BaseModel], counter: int) -> None:
+    """Atomically write rows and the id counter of a store to path."""
+    header = {
+        "version": SNAPSHOT_VERSION,
+        "model": store_name(model_class),
+        "counter": counter,
+        "count": len(rows),
+    }
+    body = _adapter(model_class).dump_json(rows)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_header_adapter.dump_json(header) + b"\n")
+        f.write(body)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def read_snapshot(path: str, model_class: Type[BaseModel]) -> Tuple[Dict[int, BaseModel], int]:
+    """Read a file written by write_snapshot. Returns the rows by id and the counter."""
+    with open(path, "rb") as f:
+        header = _header_adapter.validate_json(f.readline())
+        if header.get("version") != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported snapshot version in {path}: {header.get('version')}")
+        rows = _adapter(model_class).validate_json(f.read())
+    if len(rows) != header["count"]:
+        raise ValueError(f"Truncated snapshot {path}: {len(rows)} of {header['count']} rows")
+    return {row.id: row for row in rows}, header["counter"]
+
+
+def snapshot_all(directory: Optional[str] = None, force: bool = False) -> int:
+    """
+    Snapshot every registered store that changed since its last snapshot.
+    Returns the number of files written.
+    """
+    written = 0
+    for name, store in registered_stores().items():
+        try:
+            if store.snapshot(snapshot_path(name, directory), force=force):
+                written += 1
+        except Exception as e:
+            logger.error(f"Error writing snapshot of {name}: {str(e)}")
+    if written:
+        logger.info(f"Wrote {written} store snapshots")
+    return written
+
+
+def restore_all(directory: Optional[str] = None) -> int:
+    """
+    Point every registered, still empty store at its snapshot, if one exists.
+    The data is read lazily, on the store's first use. Returns the number of
+    stores that will be restored.
+    """
+    restored = 0
+    for name, store in registered_stores().items():
+        path = snapshot_path(name, directory)
+        if os.path.exists(path) and store.restore_from(path):
+            restored += 1
+    logger.info(f"{restored} stores will be restored from snapshots")
+    return restored
+
+
+def setup_snapshot_scheduler(scheduler):
+    """Snapshot the stores every DB_SNAPSHOT_INTERVAL_SECONDS."""
+    from apscheduler.triggers.interval import IntervalTrigger
+
+    if settings.DB_SNAPSHOT_INTERVAL_SECONDS > 0:
+        scheduler.add_job(
+            snapshot_all,
+            IntervalTrigger(seconds=settings.DB_SNAPSHOT_INTERVAL_SECONDS),
+            id="snapshot_stores",
+            replace_existing=True,
+        )
+    return scheduler
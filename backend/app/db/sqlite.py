@@ -0,0 +1,718 @@
+"""
+SQLite storage engine for the generic stores in app.db.base.
+
+SQLiteDB implements the InMemoryDB[T] interface (get/get_multi/create/update/
+remove, plus the ``data`` mapping and ``counter``) on top of a SQLite file in
+WAL mode, so data survives restarts and does not have to fit in RAM.
+
+Each model gets one table holding the id and the model as JSON. Equality
+filters on scalar values are pushed down into SQL, together with skip and
+limit, and every declared index (hash or sorted) becomes a SQLite expression
+index. Range queries compare dates and datetimes in their JSON (ISO 8601)
+form, which orders correctly for the naive UTC timestamps used across the app.
+
+Selected with DB_ENGINE=sqlite; services keep declaring their stores as
+``InMemoryDB[Model](Model, indexes=[...])``. Unlike the in-memory engine,
+every read returns a fresh copy, so changes to a returned object are only
+stored once it is passed back through update() or assigned into ``data``.
+
+Change events are published on ``changes`` after each write commits.
+Several processes can share one database file (``uvicorn --workers N``):
+every write is also recorded in a ``store_changes`` log, and each process
+polls it (SQLITE_CHANGE_POLL_MS, cheap while nothing changed) to publish the
+writes of the other processes on its own feeds. Those remote events carry
+no old value, and their new value is the row as read when the event is
+delivered. A process that falls further behind than SQLITE_CHANGE_LOG_KEEP
+entries gets a RESET event instead.
+"""
+import fcntl
+import logging
+import os
+import sqlite3
+import threading
+import weakref
+from contextlib import contextmanager
+from itertools import islice
+from datetime import date, datetime, time
+from enum import Enum
+from time import sleep
+from typing import Any, Dict, Iterable, Iterator, List, MutableMapping, Optional, Tuple, Type, Union, get_args
+
+from pydantic import BaseModel
+
+from app.core.config import settings
+from app.db.aggregates import Aggregate
+from app.db.base import InMemoryDB, T
+from app.db.events import ChangeFeed, ChangeType
+from app.db.indexes import range_key, sort_in_range
+from app.db.query import And, Condition, Or, Predicate, all_of
+from app.db.retention import RetentionPolicy, evict, register as register_retention
+from app.db.snapshots import store_name
+
+logger = logging.getLogger(__name__)
+
+_SQL_SCALARS = (str, int, float, bool)
+
+_local = threading.local()
+
+_pollers: Dict[str, "_ChangePoller"] = {}
+_pollers_lock = threading.Lock()
+
+
+def connect(path: str) -> sqlite3.Connection:
+    """Return this thread's connection to the database at path."""
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+    conn = connections.get(path)
+    if conn is None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        connections[path] = conn
+    return conn
+
+
+@contextmanager
+def process_lock(path: str, name: str) -> Iterator[None]:
+    """
+    Hold an exclusive lock named ``name`` next to the database at path, across
+    processes, e.g. so that only one worker at a time seeds initial data.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(f"{path}.{name}.lock", "w") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _origin() -> str:
+    """Identifies this process in the change log (workers are forked, so not cached)."""
+    return str(os.getpid())
+
+
+class _ChangePoller:
+    """Publishes the writes other processes make to one database file."""
+
+    def __init__(self, path: str, interval: float):
+        self.path = path
+        self.interval = interval
+        self.stores: Dict[str, "weakref.WeakSet[SQLiteDB]"] = {}
+        self.last_seq = self._max_seq(connect(path))
+        self.data_version = None
+        self.since_trim = 0
+        threading.Thread(target=self._run, name=f"sqlite-changes-{path}", daemon=True).start()
+
+    @staticmethod
+    def _max_seq(conn: sqlite3.Connection) -> int:
+        return conn.execute("SELECT COALESCE(MAX(seq), 0) FROM store_changes").fetchone()[0]
+
+    def add(self, store: "SQLiteDB") -> None:
+        self.stores.setdefault(store.table, weakref.WeakSet()).add(store)
+
+    def _run(self) -> None:
+        while True:
+            sleep(self.interval)
+            try:
+                self.poll()
+            except Exception as e:
+                logger.error(f"Error polling changes of {self.path}: {str(e)}")
+
+    def poll(self) -> None:
+        conn = connect(self.path)
+        # data_version only moves when another connection commits.
+        data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version == self.data_version:
+            return
+        self.data_version = data_version
+        rows = conn.execute(
+            "SELECT seq, tbl, op, row_id, origin FROM store_changes WHERE seq > ? ORDER BY seq",
+            (self.last_seq,),
+        ).fetchall()
+        if not rows:
+            return
+        if rows[0][0] > self.last_seq + 1 and self.last_seq:
+            # Entries we never saw were trimmed.
+            for stores in self.stores.values():
+                for store in list(stores):
+                    store.changes.publish(ChangeType.RESET)
+        origin = _origin()
+        for seq, table, op, row_id, row_origin in rows:
+            if row_origin == origin:
+                continue
+            for store in list(self.stores.get(table, ())):
+                if not store.changes.active:
+                    continue
+                if op in (ChangeType.INSERT, ChangeType.UPDATE):
+                    store.changes.publish(ChangeType(op), row_id, None, store.get(row_id))
+                else:
+                    store.changes.publish(ChangeType(op), row_id)
+        self.last_seq = rows[-1][0]
+        self.since_trim += len(rows)
+        keep = settings.SQLITE_CHANGE_LOG_KEEP
+        if self.since_trim >= keep:
+            self.since_trim = 0
+            conn.execute("DELETE FROM store_changes WHERE seq <= ?", (self.last_seq - keep,))
+
+
+def _watch_changes(store: "SQLiteDB") -> None:
+    """Start publishing the other processes' writes to store.changes."""
+    with _pollers_lock:
+        poller = _pollers.get(store.path)
+        if poller is None:
+            poller = _pollers[store.path] = _ChangePoller(store.path, settings.SQLITE_CHANGE_POLL_MS / 1000)
+    poller.add(store)
+
+
+def table_name(model_class: Type[BaseModel]) -> str:
+    """Table name for a model, unique across modules that reuse class names."""
+    return store_name(model_class)
+
+
+def _sql_value(value: Any) -> Tuple[bool, Any]:
+    """Convert a filter value for comparison with json_extract, if possible."""
+    if isinstance(value, Enum):
+        value = value.value
+    if value is None or isinstance(value, _SQL_SCALARS):
+        return True, value
+    return False, value
+
+
+def _is_date_field(model_class: Type[BaseModel], field: str) -> bool:
+    """True if the field holds dates (serialized as YYYY-MM-DD) rather than datetimes."""
+    annotation = model_class.model_fields[field].annotation
+    types = get_args(annotation) or (annotation,)
+    return date in types and datetime not in types
+
+
+def _range_sql_value(value: Any, date_only: bool) -> Tuple[bool, Any]:
+    """Convert a range bound for comparison with the stored JSON value, if possible."""
+    key = range_key(value)
+    if isinstance(key, datetime):
+        if date_only and key.time() == time():
+            return True, key.date().isoformat()
+        return True, key.isoformat()
+    if isinstance(key, _SQL_SCALARS) and not isinstance(key, bool):
+        return True, key
+    return False, key
+
+
+class _SQLiteRows(MutableMapping):
+    """``store.data`` for SQLiteDB: a mapping view over the table."""
+
+    def __init__(self, store: "SQLiteDB"):
+        self.store = store
+
+    def __getitem__(self, id: int):
+        obj = self.store.get(id)
+        if obj is None:
+            raise KeyError(id)
+        return obj
+
+    def __setitem__(self, id: int, obj) -> None:
+        with self.store._transaction() as conn:
+            old = self.store._select_row(conn, id) if self.store.changes.active else None
+            self.store._upsert(conn, id, obj)
+        self.store.changes.row_written(id, old, obj)
+
+    def __delitem__(self, id: int) -> None:
+        if self.store.remove(id=id) is None:
+            raise KeyError(id)
+
+    def __contains__(self, id) -> bool:
+        row = self.store._execute(f'SELECT 1 FROM "{self.store.table}" WHERE id = ?', (id,)).fetchone()
+        return row is not None
+
+    def __iter__(self) -> Iterator[int]:
+        for (id,) in self.store._execute(f'SELECT id FROM "{self.store.table}" ORDER BY id'):
+            yield id
+
+    def __len__(self) -> int:
+        return self.store._execute(f'SELECT COUNT(*) FROM "{self.store.table}"').fetchone()[0]
+
+    def values(self) -> List[T]:
+        return [obj for _, obj in self.items()]
+
+    def items(self) -> List[Tuple[int, T]]:
+        rows = self.store._execute(f'SELECT id, body FROM "{self.store.table}" ORDER BY id')
+        return [(id, self.store._load(body)) for id, body in rows]
+
+    def clear(self) -> None:
+        with self.store._transaction() as conn:
+            conn.execute(f'DELETE FROM "{self.store.table}"')
+            self.store._log_change(conn, ChangeType.RESET)
+        self.store.changes.publish(ChangeType.RESET)
+
+    def update(self, *args, **kwargs) -> None:
+        rows = dict(*args, **kwargs)
+        changes = self.store.changes
+        old = {}
+        with self.store._transaction() as conn:
+            for id, obj in rows.items():
+                if changes.active:
+                    old[id] = self.store._select_row(conn, id)
+                self.store._upsert(conn, id, obj)
+        for id, obj in rows.items():
+            changes.row_written(id, old.get(id), obj)
+
+
+class SQLiteDB(InMemoryDB[T]):
+    """
+    SQLite-backed store with the same interface as InMemoryDB.
+    """
+
+    def __init__(
+        self,
+        model_class: Type[T],
+        indexes: Optional[Iterable[str]] = None,
+        sorted_indexes: Optional[Iterable[str]] = None,
+        copy_on_write: bool = False,
+        aggregates: Optional[Dict[str, Aggregate]] = None,
+        retention: Optional[RetentionPolicy] = None,
+        snapshot_name: Optional[str] = None,
+        path: Optional[str] = None,
+    ):
+        # snapshot_name only names the memory engine's snapshots; tables are
+        # named after the model, so stores of one model share their rows.
+        # Reads always return fresh copies, so copy_on_write needs no extra work.
+        self.model_class = model_class
+        self.copy_on_write = copy_on_write
+        self.path = path or settings.SQLITE_DB_PATH
+        self.table = table_name(model_class)
+        self.indexes: Dict[str, str] = {}
+        for field in [*(indexes or ()), *(sorted_indexes or ())]:
+            if field not in model_class.model_fields:
+                raise ValueError(f"Cannot index unknown field '{field}' of {model_class.__name__}")
+            if field in self.indexes:
+                raise ValueError(f"Field '{field}' of {model_class.__name__} is indexed twice")
+            self.indexes[field] = f"ix_{self.table}_{field}"
+        self.aggregates: Dict[str, Aggregate] = dict(aggregates or {})
+        self.changes = ChangeFeed(model_class.__name__)
+        self.archive_name = self.table
+        self.retention = retention
+        if retention is not None:
+            register_retention(self)
+        self._log_changes = settings.SQLITE_CHANGE_POLL_MS > 0
+        self._create_schema()
+        if self._log_changes:
+            _watch_changes(self)
+
+    def _create_schema(self) -> None:
+        conn = connect(self.path)
+        conn.execute(f'CREATE TABLE IF NOT EXISTS "{self.table}" (id INTEGER PRIMARY KEY, body TEXT NOT NULL)')
+        conn.execute("CREATE TABLE IF NOT EXISTS store_counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        conn.execute("INSERT OR IGNORE INTO store_counters (name, value) VALUES (?, 1)", (self.table,))
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS store_changes ("
+            "seq INTEGER PRIMARY KEY AUTOINCREMENT, tbl TEXT NOT NULL, op TEXT NOT NULL, "
+            "row_id INTEGER, origin TEXT NOT NULL)"
+        )
+        for field, index in self.indexes.items():
+            conn.execute(
+                f'CREATE INDEX IF NOT EXISTS "{index}" ON "{self.table}" (json_extract(body, \'$.{field}\'))'
+            )
+
+    def _execute(self, sql: str, params: Iterable = ()) -> sqlite3.Cursor:
+        return connect(self.path).execute(sql, tuple(params))
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Serialize a write against other writers, including other processes."""
+        conn = connect(self.path)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _load(self, body: str) -> T:
+        return self.model_class.model_validate_json(body)
+
+    def _select_row(self, conn: sqlite3.Connection, id: int) -> Optional[T]:
+        row = conn.execute(f'SELECT body FROM "{self.table}" WHERE id = ?', (id,)).fetchone()
+        return self._load(row[0]) if row else None
+
+    def _upsert(self, conn: sqlite3.Connection, id: int, obj: T, op: ChangeType = ChangeType.UPDATE) -> None:
+        conn.execute(
+            f'INSERT OR REPLACE INTO "{self.table}" (id, body) VALUES (?, ?)',
+            (id, obj.model_dump_json()),
+        )
+        self._log_change(conn, op, id)
+
+    def _log_change(self, conn: sqlite3.Connection, op: ChangeType, id: Optional[int] = None) -> None:
+        """Record a write for the other processes sharing the file."""
+        if self._log_changes:
+            conn.execute(
+                "INSERT INTO store_changes (tbl, op, row_id, origin) VALUES (?, ?, ?, ?)",
+                (self.table, op.value, id, _origin()),
+            )
+
+    @property
+    def data(self) -> MutableMapping[int, T]:
+        return _SQLiteRows(self)
+
+    @data.setter
+    def data(self, value: Dict[int, T]) -> None:
+        if isinstance(value, _SQLiteRows) and value.store.table == self.table and value.store.path == self.path:
+            return
+        items = list(value.items())
+        with self._transaction() as conn:
+            conn.execute(f'DELETE FROM "{self.table}"')
+            for id, obj in items:
+                self._upsert(conn, id, obj)
+            self._log_change(conn, ChangeType.RESET)
+        self.changes.publish(ChangeType.RESET)
+
+    @property
+    def counter(self) -> int:
+        row = self._execute("SELECT value FROM store_counters WHERE name = ?", (self.table,)).fetchone()
+        return row[0] if row else 1
+
+    @counter.setter
+    def counter(self, value: int) -> None:
+        with self._transaction() as conn:
+            conn.execute("UPDATE store_counters SET value = ? WHERE name = ?", (value, self.table))
+
+    def apply_retention(self, now: Optional[datetime] = None) -> int:
+        """Archive and evict expired rows; one worker at a time, so rows are archived once."""
+        if self.retention is None:
+            return 0
+        with process_lock(self.path, "retention"):
+            return evict(self, now)
+
+    def get(self, id: int) -> Optional[T]:
+        """Get an item by ID."""
+        row = self._execute(f'SELECT body FROM "{self.table}" WHERE id = ?', (id,)).fetchone()
+        return self._load(row[0]) if row else None
+
+    def scan(self) -> Tuple[T, ...]:
+        """All rows as of one point in time (one read transaction)."""
+        return tuple(self.data.values())
+
+    def aggregate(self, name: str) -> Aggregate:
+        """
+        The aggregate declared under ``name``. Other processes write to the
+        same file, so it is computed from the rows on every call.
+        """
+        aggregate = self.aggregates[name].empty()
+        aggregate.rebuild(self.data.items())
+        return aggregate
+
+    def _select(
+        self,
+        filters: Optional[Dict[str, Any]],
+        skip: int,
+        limit: Optional[int],
+        after_id: Optional[int] = None,
+        clauses: Iterable[str] = (),
+        params: Iterable[Any] = (),
+        order_by: str = "id",
+    ) -> Iterator[T]:
+        """Run a filtered query, pushing down everything SQL can answer."""
+        fields = self.model_class.model_fields
+        clauses = list(clauses)
+        params = list(params)
+        residual: Dict[str, Any] = {}
+        for key, value in (filters or {}).items():
+            if key not in fields:
+                continue
+            supported, sql_value = _sql_value(value)
+            if not supported:
+                residual[key] = value
+                continue
+            column = "id" if key == "id" else f"json_extract(body, '$.{key}')"
+            if sql_value is None:
+                clauses.append(f"{column} IS NULL")
+            else:
+                clauses.append(f"{column} = ?")
+                params.append(sql_value)
+
+        if after_id is not None:
+            clauses.append("id > ?")
+            params.append(after_id)
+
+        sql = f'SELECT body FROM "{self.table}"'
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += f" ORDER BY {order_by}"
+        if not residual and limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params.extend((limit, skip))
+            skip = 0
+
+        matched = 0
+        for (body,) in self._execute(sql, params):
+            obj = self._load(body)
+            if residual and not all(getattr(obj, key) == value for key, value in residual.items()):
+                continue
+            matched += 1
+            if matched <= skip:
+                continue
+            yield obj
+            if limit is not None and matched >= skip + limit:
+                return
+
+    def get_multi(
+        self,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        filters: Optional[Dict[str, Any]] = None,
+        after_id: Optional[int] = None,
+    ) -> List[T]:
+        """Get multiple items with optional filtering."""
+        if after_id is not None:
+            return self.page(after_id=after_id, limit=limit, filters=filters)
+        return list(self._select(filters, skip, limit))
+
+    def iter_multi(
+        self, *, filters: Optional[Dict[str, Any]] = None, after_id: Optional[int] = None
+    ) -> Iterator[T]:
+        """Stream matching items in id order, starting after ``after_id``."""
+        return self._select(filters, 0, None, after_id)
+
+    def page(
+        self, *, after_id: Optional[int] = None, limit: int = 100, filters: Optional[Dict[str, Any]] = None
+    ) -> List[T]:
+        """Get the next ``limit`` matching items after ``after_id`` (keyset pagination)."""
+        return list(self._select(filters, 0, limit, after_id))
+
+    def get_range(
+        self,
+        field: str,
+        start: Any = None,
+        end: Any = None,
+        *,
+        end_inclusive: bool = True,
+        descending: bool = False,
+        filters: Optional[Dict[str, Any]] = None,
+        skip: int = 0,
+        limit: Optional[int] = None,
+    ) -> List[T]:
+        """Get items whose ``field`` lies between start and end, ordered by it."""
+        if field not in self.model_class.model_fields:
+            return []
+        date_only = _is_date_field(self.model_class, field)
+        bounds = [(start, ">="), (end, "<=" if end_inclusive else "<")]
+        if any(bound is not None and not _range_sql_value(bound, date_only)[0] for bound, _ in bounds):
+            items = sort_in_range(self.iter_multi(filters=filters), field, start, end, end_inclusive, descending)
+            return items[skip:] if limit is None else items[skip:skip + limit]
+
+        column = f"json_extract(body, '$.{field}')"
+        clauses = [f"{column} IS NOT NULL"]
+        params = []
+        for bound, operator in bounds:
+            if bound is not None:
+                clauses.append(f"{column} {operator} ?")
+                params.append(_range_sql_value(bound, date_only)[1])
+        direction = "DESC" if descending else "ASC"
+        order_by = f"{column} {direction}, id {direction}"
+        return list(self._select(filters, skip, limit, clauses=clauses, params=params, order_by=order_by))
+
+    def _compile_condition(self, condition: Condition) -> Optional[Tuple[str, List[Any]]]:
+        """SQL for a condition, if it can be evaluated exactly in SQL."""
+        field, op = condition.field, condition.op
+        if field not in self.model_class.model_fields:
+            return None
+        column = "id" if field == "id" else f"json_extract(body, '$.{field}')"
+        if op == "eq":
+            supported, value = _sql_value(condition.value)
+            if not supported:
+                return None
+            return (f"{column} IS NULL", []) if value is None else (f"{column} = ?", [value])
+        if op == "in":
+            values = [_sql_value(value) for value in condition.value]
+            if not all(supported and value is not None for supported, value in values):
+                return None
+            if not values:
+                return "0", []
+            return f"{column} IN ({', '.join('?' * len(values))})", [value for _, value in values]
+        if op == "prefix":
+            if not isinstance(condition.value, str):
+                return None
+            return f"substr({column}, 1, ?) = ?", [len(condition.value), condition.value]
+        bounds = {
+            "gt": [(condition.value, ">")],
+            "ge": [(condition.value, ">=")],
+            "lt": [(condition.value, "<")],
+            "le": [(condition.value, "<=")],
+            "between": [(condition.value, ">="), (condition.end, "<=")],
+        }.get(op)
+        if bounds is None:
+            return None
+        date_only = field != "id" and _is_date_field(self.model_class, field)
+        clauses, params = [f"{column} IS NOT NULL"], []
+        for bound, operator in bounds:
+            if bound is None:
+                if op == "between":
+                    continue
+                return None
+            supported, value = _range_sql_value(bound, date_only)
+            if not supported:
+                return None
+            clauses.append(f"{column} {operator} ?")
+            params.append(value)
+        return " AND ".join(clauses), params
+
+    def _compile(self, where: Optional[Predicate]) -> Tuple[List[str], List[Any], Optional[Predicate]]:
+        """
+        Split a predicate into SQL clauses (ANDed) and the residual predicate
+        that has to be checked in Python.
+        """
+        if where is None:
+            return [], [], None
+        parts = where.parts if isinstance(where, And) else [where]
+        clauses, params, residual = [], [], []
+        for part in parts:
+            compiled = self._compile_exact(part)
+            if compiled is None:
+                residual.append(part)
+            else:
+                clauses.append(compiled[0])
+                params.extend(compiled[1])
+        return clauses, params, all_of(*residual)
+
+    def _compile_exact(self, predicate: Predicate) -> Optional[Tuple[str, List[Any]]]:
+        if isinstance(predicate, Condition):
+            return self._compile_condition(predicate)
+        if isinstance(predicate, (And, Or)):
+            compiled = [self._compile_exact(part) for part in predicate.parts]
+            if any(part is None for part in compiled):
+                return None
+            joiner = " AND " if isinstance(predicate, And) else " OR "
+            return "(" + joiner.join(f"({sql})" for sql, _ in compiled) + ")", [p for _, ps in compiled for p in ps]
+        return None
+
+    def _order_by(self, order_by: Optional[str], descending: bool) -> str:
+        direction = "DESC" if descending else "ASC"
+        if order_by is None or order_by not in self.model_class.model_fields:
+            return f"id {direction}"
+        column = f"json_extract(body, '$.{order_by}')"
+        return f"{column} IS NULL, {column} {direction}, id {direction}"
+
+    def query(
+        self,
+        where: Optional[Predicate] = None,
+        *,
+        order_by: Optional[str] = None,
+        descending: bool = False,
+        skip: int = 0,
+        limit: Optional[int] = None,
+    ) -> List[T]:
+        """
+        Get the items matching a predicate. Everything SQL can evaluate
+        exactly is pushed down (using the expression indexes); the rest is
+        checked on the rows it returns.
+        """
+        clauses, params, residual = self._compile(where)
+        order = self._order_by(order_by, descending)
+        if residual is None:
+            return list(self._select(None, skip, limit, clauses=clauses, params=params, order_by=order))
+        items = (
+            obj for obj in self._select(None, 0, None, clauses=clauses, params=params, order_by=order)
+            if residual.matches(obj)
+        )
+        return list(islice(items, skip, None if limit is None else skip + limit))
+
+    def count(self, where: Optional[Predicate] = None) -> int:
+        """Number of items matching a predicate."""
+        clauses, params, residual = self._compile(where)
+        if residual is not None:
+            return len(self.query(where))
+        sql = f'SELECT COUNT(*) FROM "{self.table}"'
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        return self._execute(sql, params).fetchone()[0]
+
+    def explain(self, where: Optional[Predicate]) -> str:
+        """SQLite's plan for the pushed-down part of query(), plus the residual."""
+        clauses, params, residual = self._compile(where)
+        sql = f'EXPLAIN QUERY PLAN SELECT body FROM "{self.table}"'
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        description = "; ".join(row[-1] for row in self._execute(sql, params))
+        if residual is not None:
+            description += f"; then filter {residual!r}"
+        return description
+
+    def create(self, *, obj_in: BaseModel) -> T:
+        """Create a new item."""
+        db_obj = self._new_obj(obj_in)
+        with self._transaction() as conn:
+            (id,) = conn.execute("SELECT value FROM store_counters WHERE name = ?", (self.table,)).fetchone()
+            db_obj.id = id
+            self._upsert(conn, id, db_obj, ChangeType.INSERT)
+            conn.execute("UPDATE store_counters SET value = ? WHERE name = ?", (id + 1, self.table))
+        self.changes.row_written(db_obj.id, None, db_obj)
+        return db_obj
+
+    def create_many(self, *, objs_in: Iterable[BaseModel]) -> List[T]:
+        """Create several items in one transaction."""
+        db_objs = [self._new_obj(obj_in) for obj_in in objs_in]
+        with self._transaction() as conn:
+            (first_id,) = conn.execute("SELECT value FROM store_counters WHERE name = ?", (self.table,)).fetchone()
+            for offset, db_obj in enumerate(db_objs):
+                db_obj.id = first_id + offset
+                self._upsert(conn, db_obj.id, db_obj, ChangeType.INSERT)
+            conn.execute(
+                "UPDATE store_counters SET value = ? WHERE name = ?", (first_id + len(db_objs), self.table)
+            )
+        for db_obj in db_objs:
+            self.changes.row_written(db_obj.id, None, db_obj)
+        return db_objs
+
+    def _update_row(
+        self, conn: sqlite3.Connection, id: int, obj_in: Union[BaseModel, Dict[str, Any]]
+    ) -> Optional[Tuple[Optional[T], T]]:
+        """Update one row; return its old value (if anyone listens) and the new one."""
+        row = conn.execute(f'SELECT body FROM "{self.table}" WHERE id = ?', (id,)).fetchone()
+        if row is None:
+            return None
+        db_obj = self._load(row[0])
+        old = db_obj.model_copy() if self.changes.active else None
+        self._apply_update(db_obj, obj_in)
+        self._upsert(conn, id, db_obj)
+        return old, db_obj
+
+    def update(self, *, id: int, obj_in: Union[BaseModel, Dict[str, Any]]) -> Optional[T]:
+        """Update an existing item."""
+        updated = self.update_many(objs_in={id: obj_in})
+        return updated[0] if updated else None
+
+    def update_many(self, *, objs_in: Dict[int, Union[BaseModel, Dict[str, Any]]]) -> List[T]:
+        """Update several existing items in one transaction. Missing ids are skipped."""
+        with self._transaction() as conn:
+            updated = [self._update_row(conn, id, obj_in) for id, obj_in in objs_in.items()]
+        updated = [change for change in updated if change is not None]
+        for old, db_obj in updated:
+            self.changes.publish(ChangeType.UPDATE, db_obj.id, old, db_obj)
+        return [db_obj for _, db_obj in updated]
+
+    def remove(self, *, id: int) -> Optional[T]:
+        """Remove an item."""
+        removed = self.remove_many(ids=[id])
+        return removed[0] if removed else None
+
+    def remove_many(self, *, ids: Iterable[int]) -> List[T]:
+        """Remove several items in one transaction and return the ones that existed."""
+        removed = []
+        with self._transaction() as conn:
+            for id in ids:
+                row = conn.execute(f'SELECT body FROM "{self.table}" WHERE id = ?', (id,)).fetchone()
+                if row is not None:
+                    conn.execute(f'DELETE FROM "{self.table}" WHERE id = ?', (id,))
+                    self._log_change(conn, ChangeType.DELETE, id)
+                    removed.append((id, self._load(row[0])))
+        for id, old in removed:
+            self.changes.row_deleted(id, old)
+        return [old for _, old in removed]
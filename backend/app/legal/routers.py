@@ -10,11 +10,13 @@ from fastapi import (
     Body,
     Query,
     Path,
+    Response,
 )
 from fastapi.responses import JSONResponse
 from pydantic import EmailStr, BaseModel
 
 from app.core.config import settings
+from app.core.pagination import cursor_after_id, set_next_cursor
 from app.legal.schemas import (
     Client,
     ClientCreate,
@@ -34,6 +36,7 @@ from app.legal.services import (
     create_client,
     get_client,
     get_clients,
+    iter_clients,
     update_client,
     delete_client,
     create_contract,
@@ -74,8 +77,10 @@ async def create_client_endpoint(client: ClientCreate):
 
 @router.get("/clients", response_model=List[Client])
 async def get_clients_endpoint(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    after_id: Optional[int] = Depends(cursor_after_id),
     name: Optional[str] = None,
     industry: Optional[str] = None,
     kyc_verified: Optional[bool] = None,
@@ -89,7 +94,9 @@ async def get_clients_endpoint(
     if kyc_verified is not None:
         filters["kyc_verified"] = kyc_verified
 
-    return get_clients(skip=skip, limit=limit, filters=filters)
+    clients = get_clients(skip=skip, limit=limit, filters=filters, after_id=after_id)
+    set_next_cursor(response, clients, limit)
+    return clients
 
 
 @router.get("/clients/{client_id}", response_model=Client)
@@ -131,8 +138,10 @@ async def create_contract_endpoint(contract: ContractCreate):
 
 @router.get("/contracts", response_model=List[Contract])
 async def get_contracts_endpoint(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    after_id: Optional[int] = Depends(cursor_after_id),
     client_id: Optional[int] = None,
     contract_type: Optional[str] = None,
     status: Optional[str] = None,
@@ -151,7 +160,8 @@ async def get_contracts_endpoint(
     if responsible_lawyer:
         filters["responsible_lawyer"] = responsible_lawyer
 
-    contracts = get_contracts(skip=skip, limit=limit, filters=filters)
+    contracts = get_contracts(skip=skip, limit=limit, filters=filters, after_id=after_id)
+    set_next_cursor(response, contracts, limit)
 
     if start_date_after or expiration_date_before:
         filtered_contracts = []
@@ -279,8 +289,10 @@ async def create_workflow_instance_endpoint(instance_data: Dict[str, Any] = Body
 
 @router.get("/workflows/instances", response_model=List[WorkflowInstance])
 async def get_workflow_instances_endpoint(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    after_id: Optional[int] = Depends(cursor_after_id),
     template_id: Optional[str] = None,
     contract_id: Optional[int] = None,
     status: Optional[str] = None,
@@ -294,7 +306,11 @@ async def get_workflow_instances_endpoint(
     if status:
         filters["status"] = status
 
-    return get_workflow_instances(skip=skip, limit=limit, filters=filters)
+    instances = get_workflow_instances(
+        skip=skip, limit=limit, filters=filters, after_id=after_id
+    )
+    set_next_cursor(response, instances, limit)
+    return instances
 
 
 @router.get("/workflows/instances/{instance_id}", response_model=WorkflowInstance)
@@ -332,8 +348,10 @@ async def create_task_endpoint(task: TaskCreate):
 
 @router.get("/tasks", response_model=List[Task])
 async def get_tasks_endpoint(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    after_id: Optional[int] = Depends(cursor_after_id),
     assigned_to: Optional[str] = None,
     status: Optional[str] = None,
     priority: Optional[str] = None,
@@ -357,7 +375,8 @@ async def get_tasks_endpoint(
     if ai_generated is not None:
         filters["ai_generated"] = ai_generated
 
-    tasks = get_tasks(skip=skip, limit=limit, filters=filters)
+    tasks = get_tasks(skip=skip, limit=limit, filters=filters, after_id=after_id)
+    set_next_cursor(response, tasks, limit)
 
     if due_date_before:
         filtered_tasks = []
@@ -454,7 +473,7 @@ async def generate_risk_analysis_endpoint(
         
         country_risk_data = await risk_matrix.get_all_countries_risk()
         
-        clients = get_clients(skip=0, limit=1000)
+        clients = iter_clients()
         client_countries = {}
         
         for client in clients:
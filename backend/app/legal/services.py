@@ -1,5 +1,5 @@
 from datetime import datetime, timedelta
-from typing import List, Optional, Dict, Any, Union
+from typing import List, Optional, Dict, Any, Union, Iterator
 import os
 import uuid
 import json
@@ -21,15 +21,42 @@ from app.legal.models import (
     AuditLog,
 )
 from app.legal.schemas import ClientCreate
+from app.db.aggregates import Aggregate
 from app.db.base import InMemoryDB
+from app.db.retention import RetentionPolicy
 
-clients_db = InMemoryDB[Client](Client)
-contracts_db = InMemoryDB[Contract](Contract)
-contract_versions_db = InMemoryDB[ContractVersion](ContractVersion)
+
+def client_risk_level(client: Client) -> str:
+    """Risk level of a client in upper case, "" when not evaluated yet."""
+    return (client.risk_level or "").upper()
+
+
+clients_db = InMemoryDB[Client](
+    Client,
+    copy_on_write=True,
+    aggregates={
+        "risk_level": Aggregate(group_by=client_risk_level),
+        "is_flagged": Aggregate(group_by="is_flagged"),
+    },
+)
+contracts_db = InMemoryDB[Contract](
+    Contract,
+    indexes=["client_id"],
+    sorted_indexes=["expiration_date"],
+    copy_on_write=True,
+    aggregates={"status": Aggregate(group_by="status")},
+)
+contract_versions_db = InMemoryDB[ContractVersion](ContractVersion, indexes=["contract_id"])
 workflow_templates_db = InMemoryDB[WorkflowTemplate](WorkflowTemplate)
-workflow_instances_db = InMemoryDB[WorkflowInstance](WorkflowInstance)
+workflow_instances_db = InMemoryDB[WorkflowInstance](WorkflowInstance, indexes=["template_id"])
 tasks_db = InMemoryDB[Task](Task)
-audit_logs_db = InMemoryDB[AuditLog](AuditLog)
+audit_logs_db = InMemoryDB[AuditLog](
+    AuditLog,
+    sorted_indexes=["timestamp"],
+    retention=RetentionPolicy(
+        max_age_days=settings.AUDIT_LOG_RETENTION_DAYS, max_rows=settings.AUDIT_LOG_MAX_ROWS, age_field="timestamp"
+    ),
+)
 
 LEGAL_UPLOADS_DIR = Path("uploads/legal")
 LEGAL_UPLOADS_DIR.mkdir(parents=True, exist_ok=True)
@@ -45,13 +72,13 @@ def create_client(client_data: Dict[str, Any]) -> Client:
     import asyncio
 
     client_create = ClientCreate(**client_data)
-    next_id = clients_db.counter
-    client_dict = client_create.model_dump()
-    client_dict["id"] = next_id
-    client_dict["created_at"] = datetime.now()
-    client = Client(**client_dict)
-    clients_db.data[next_id] = client
-    clients_db.counter += 1
+    client = clients_db.create(
+        obj_in=Client(
+            **client_create.model_dump(),
+            id=0,  # Will be set by InMemoryDB
+            created_at=datetime.now(),
+        )
+    )
 
     try:
         risk_evaluation = excel_risk_evaluator.calculate_risk(
@@ -63,9 +90,14 @@ def create_client(client_data: Dict[str, Any]) -> Client:
             }
         )
 
-        client.risk_score = risk_evaluation.get("total_score", 2.0)
-        client.risk_level = risk_evaluation.get("risk_level", "MEDIUM")
-        client.risk_details = risk_evaluation
+        client = clients_db.update(
+            id=client.id,
+            obj_in={
+                "risk_score": risk_evaluation.get("total_score", 2.0),
+                "risk_level": risk_evaluation.get("risk_level", "MEDIUM"),
+                "risk_details": risk_evaluation,
+            },
+        )
 
         loop = asyncio.new_event_loop()
         asyncio.set_event_loop(loop)
@@ -94,13 +126,16 @@ def create_client(client_data: Dict[str, Any]) -> Client:
             )
         )
 
-        client.pep_screening_id = pep_result.id if pep_result else None
-        client.sanctions_screening_id = (
-            sanctions_result.id if sanctions_result else None
+        client = clients_db.update(
+            id=client.id,
+            obj_in={
+                "pep_screening_id": pep_result.id if pep_result else None,
+                "sanctions_screening_id": (
+                    sanctions_result.id if sanctions_result else None
+                ),
+            },
         )
 
-        clients_db.data[client.id] = client
-
         loop.close()
 
     except Exception as e:
@@ -126,10 +161,20 @@ def get_client(client_id: int) -> Optional[Client]:
 
 
 def get_clients(
-    skip: int = 0, limit: int = 100, filters: Optional[Dict[str, Any]] = None
+    skip: int = 0,
+    limit: int = 100,
+    filters: Optional[Dict[str, Any]] = None,
+    after_id: Optional[int] = None,
 ) -> List[Client]:
     """Get a list of clients with optional filtering."""
-    return clients_db.get_multi(skip=skip, limit=limit, filters=filters or {})
+    return clients_db.get_multi(
+        skip=skip, limit=limit, filters=filters or {}, after_id=after_id
+    )
+
+
+def iter_clients(filters: Optional[Dict[str, Any]] = None) -> Iterator[Client]:
+    """Stream all clients in id order without a page size cap."""
+    return clients_db.iter_multi(filters=filters or {})
 
 
 def update_client(client_id: int, client_data: Dict[str, Any]) -> Optional[Client]:
@@ -244,10 +289,15 @@ def get_contract(contract_id: int) -> Optional[Contract]:
 
 
 def get_contracts(
-    skip: int = 0, limit: int = 100, filters: Optional[Dict[str, Any]] = None
+    skip: int = 0,
+    limit: int = 100,
+    filters: Optional[Dict[str, Any]] = None,
+    after_id: Optional[int] = None,
 ) -> List[Contract]:
     """Get a list of contracts with optional filtering."""
-    contracts = contracts_db.get_multi(skip=skip, limit=limit, filters=filters or {})
+    contracts = contracts_db.get_multi(
+        skip=skip, limit=limit, filters=filters or {}, after_id=after_id
+    )
 
     for contract in contracts:
         client = clients_db.get(contract.client_id)
@@ -257,6 +307,11 @@ def get_contracts(
     return contracts
 
 
+def iter_contracts(filters: Optional[Dict[str, Any]] = None) -> Iterator[Contract]:
+    """Stream all contracts in id order without a page size cap."""
+    return contracts_db.iter_multi(filters=filters or {})
+
+
 def update_contract(
     contract_id: int, contract_data: Dict[str, Any]
 ) -> Optional[Contract]:
@@ -474,10 +529,15 @@ def get_workflow_instance(instance_id: int) -> Optional[WorkflowInstance]:
 
 
 def get_workflow_instances(
-    skip: int = 0, limit: int = 100, filters: Optional[Dict[str, Any]] = None
+    skip: int = 0,
+    limit: int = 100,
+    filters: Optional[Dict[str, Any]] = None,
+    after_id: Optional[int] = None,
 ) -> List[WorkflowInstance]:
     """Get workflow instances with optional filtering."""
-    return workflow_instances_db.get_multi(skip=skip, limit=limit, filters=filters or {})
+    return workflow_instances_db.get_multi(
+        skip=skip, limit=limit, filters=filters or {}, after_id=after_id
+    )
 
 
 def update_workflow_step(
@@ -573,10 +633,15 @@ def get_task(task_id: int) -> Optional[Task]:
 
 
 def get_tasks(
-    skip: int = 0, limit: int = 100, filters: Optional[Dict[str, Any]] = None
+    skip: int = 0,
+    limit: int = 100,
+    filters: Optional[Dict[str, Any]] = None,
+    after_id: Optional[int] = None,
 ) -> List[Task]:
     """Get tasks with optional filtering."""
-    tasks = tasks_db.get_multi(skip=skip, limit=limit, filters=filters or {})
+    tasks = tasks_db.get_multi(
+        skip=skip, limit=limit, filters=filters or {}, after_id=after_id
+    )
 
     for task in tasks:
         if task.related_contract_id:
@@ -683,19 +748,12 @@ def get_audit_logs(
     if user_email:
         filters["user_email"] = user_email
 
-    logs = audit_logs_db.get_multi(skip=skip, limit=limit, filters=filters)
-
     if start_date or end_date:
-        filtered_logs = []
-        for log in logs:
-            if start_date and log.timestamp < start_date:
-                continue
-            if end_date and log.timestamp > end_date:
-                continue
-            filtered_logs.append(log)
-        return filtered_logs
-
-    return logs
+        return audit_logs_db.get_range(
+            "timestamp", start_date, end_date, filters=filters, skip=skip, limit=limit
+        )
+
+    return audit_logs_db.get_multi(skip=skip, limit=limit, filters=filters)
 
 
 def init_legal_db():
@@ -68,6 +68,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Allows all methods
     allow_headers=["*"],  # Allows all headers
+    expose_headers=["X-Next-Cursor"],  # Lets browsers read the next page cursor
 )
 
 from app.services.websocket import setup_socketio
@@ -135,10 +136,22 @@ async def test_api_v1():
 @app.on_event("startup")
 async def startup_event():
     logger.info("Initializing application...")
+
+    if settings.DB_SNAPSHOTS_ENABLED:
+        from app.db.snapshots import restore_all
+        restore_all()
     
-    init_db()
-    init_legal_db()
-    init_accounting_db()
+    if settings.DB_ENGINE == "sqlite":
+        # Workers share the database; seed it one worker at a time.
+        from app.db.sqlite import process_lock
+        with process_lock(settings.SQLITE_DB_PATH, "init"):
+            init_db()
+            init_legal_db()
+            init_accounting_db()
+    else:
+        init_db()
+        init_legal_db()
+        init_accounting_db()
     
     logger.info("Service modules initialized")
     
@@ -152,6 +165,16 @@ async def startup_event():
     
     from app.services.compliance.scheduler import setup_compliance_scheduler
     setup_compliance_scheduler(scheduler)
+
+    from app.services.compliance.services.verification_jobs import verification_jobs
+    verification_jobs.resume_jobs()
+    
+    if settings.DB_SNAPSHOTS_ENABLED:
+        from app.db.snapshots import setup_snapshot_scheduler
+        setup_snapshot_scheduler(scheduler)
+
+    from app.db.retention import setup_retention_scheduler
+    setup_retention_scheduler(scheduler)
     
     from app.modules.artur.observation.scheduler import observation_scheduler
     observation_scheduler.start()
@@ -162,3 +185,16 @@ async def startup_event():
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info("Shutting down application...")
+
+    from app.services.compliance.services.verification_jobs import verification_jobs
+    await verification_jobs.shutdown()
+
+    from app.core.http import http_pool
+    await http_pool.close()
+
+    from app.db.in_memory import flush_all_stores
+    flush_all_stores()
+
+    if settings.DB_SNAPSHOTS_ENABLED:
+        from app.db.snapshots import snapshot_all
+        snapshot_all()
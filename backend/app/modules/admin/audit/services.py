@@ -1,10 +1,25 @@
 from typing import List, Optional, Dict, Any
-from datetime import datetime, timedelta
+from datetime import datetime, time, timedelta
 
+from app.db.aggregates import Aggregate
+from app.core.config import settings
 from app.db.base import InMemoryDB
+from app.db.retention import RetentionPolicy
 from app.modules.admin.audit.models import AuditLog, ActionType, TargetType
 
-audit_logs_db = InMemoryDB[AuditLog](AuditLog)
+
+def _summary_key(log: AuditLog):
+    """The daily counter a log is summarized under."""
+    return log.created_at.date(), log.action_type, log.target_type, log.success
+
+
+audit_logs_db = InMemoryDB[AuditLog](
+    AuditLog,
+    sorted_indexes=["created_at"],
+    aggregates={"daily": Aggregate(group_by=_summary_key)},
+    retention=RetentionPolicy(max_age_days=settings.AUDIT_LOG_RETENTION_DAYS, max_rows=settings.AUDIT_LOG_MAX_ROWS),
+    snapshot_name="admin_audit_logs",
+)
 
 def create_audit_log(log_data: Dict[str, Any]) -> AuditLog:
     """Create a new audit log entry."""
@@ -25,25 +40,9 @@ def get_audit_logs(
     filters = filters or {}
     
     if start_date or end_date:
-        all_logs = audit_logs_db.get_multi()
-        filtered_logs = []
-        
-        for log in all_logs:
-            if start_date and log.created_at < start_date:
-                continue
-            if end_date and log.created_at > end_date:
-                continue
-            
-            match = True
-            for key, value in filters.items():
-                if hasattr(log, key) and getattr(log, key) != value:
-                    match = False
-                    break
-            
-            if match:
-                filtered_logs.append(log)
-        
-        return filtered_logs[skip:skip+limit]
+        return audit_logs_db.get_range(
+            "created_at", start_date, end_date, filters=filters, skip=skip, limit=limit
+        )
     else:
         return audit_logs_db.get_multi(skip=skip, limit=limit, filters=filters)
 
@@ -170,32 +169,35 @@ def log_entity_change(
 def get_audit_summary(days: int = 7) -> Dict[str, Any]:
     """Get a summary of audit logs for the specified number of days."""
     start_date = datetime.utcnow() - timedelta(days=days)
-    logs = get_audit_logs(
-        limit=1000,  # Get a large number of logs for the summary
-        start_date=start_date
-    )
+    first_full_day = start_date.date() + timedelta(days=1)
     
-    total_logs = len(logs)
-    success_count = sum(1 for log in logs if log.success)
+    # Whole days are read from the daily counters; only the logs of the
+    # first, partial day are visited.
+    counts = {}
+    for (day, action_type, target_type, success), count in audit_logs_db.aggregate("daily").counts().items():
+        if day >= first_full_day:
+            key = (action_type, target_type, success)
+            counts[key] = counts.get(key, 0) + count
+    for log in audit_logs_db.get_range(
+        "created_at", start_date, datetime.combine(first_full_day, time.min), end_inclusive=False
+    ):
+        key = (log.action_type, log.target_type, log.success)
+        counts[key] = counts.get(key, 0) + 1
+    
+    total_logs = sum(counts.values())
+    success_count = sum(count for (_, _, success), count in counts.items() if success)
     error_count = total_logs - success_count
     
     action_type_counts = {}
     target_type_counts = {}
     
-    for log in logs:
-        if log.action_type in action_type_counts:
-            action_type_counts[log.action_type] += 1
-        else:
-            action_type_counts[log.action_type] = 1
-        
-        if log.target_type in target_type_counts:
-            target_type_counts[log.target_type] += 1
-        else:
-            target_type_counts[log.target_type] = 1
+    for (action_type, target_type, _), count in counts.items():
+        action_type_counts[action_type] = action_type_counts.get(action_type, 0) + count
+        target_type_counts[target_type] = target_type_counts.get(target_type, 0) + count
     
-    recent_errors = [log for log in logs if not log.success]
-    recent_errors.sort(key=lambda x: x.created_at, reverse=True)
-    recent_errors = recent_errors[:10]  # Get the 10 most recent errors
+    recent_errors = audit_logs_db.get_range(
+        "created_at", start_date, descending=True, filters={"success": False}, limit=10
+    )
     
     return {
         "total_logs": total_logs,
@@ -7,7 +7,7 @@ from app.modules.admin.departments.models import Department
 
 logger = logging.getLogger(__name__)
 
-departments_db = InMemoryDB[Department](Department)
+departments_db = InMemoryDB[Department](Department, snapshot_name="admin_departments")
 
 class DepartmentService:
     def __init__(self):
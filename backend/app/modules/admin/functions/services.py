@@ -3,7 +3,7 @@ from typing import List, Optional, Dict, Any
 from app.db.base import InMemoryDB
 from app.modules.admin.functions.models import Function
 
-functions_db = InMemoryDB[Function](Function)
+functions_db = InMemoryDB[Function](Function, indexes=["department_id"], snapshot_name="admin_functions")
 
 def create_function(function_data: Dict[str, Any]) -> Function:
     """Create a new function."""
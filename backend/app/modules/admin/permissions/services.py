@@ -2,8 +2,8 @@ from typing import Dict, List, Optional, Any
 from app.db.base import InMemoryDB
 from app.modules.admin.permissions.models import Permission, PermissionGroup
 
-permissions_db = InMemoryDB[Permission](Permission)
-permission_groups_db = InMemoryDB[PermissionGroup](PermissionGroup)
+permissions_db = InMemoryDB[Permission](Permission, snapshot_name="admin_permissions")
+permission_groups_db = InMemoryDB[PermissionGroup](PermissionGroup, snapshot_name="admin_permission_groups")
 
 def create_permission(permission_data: Dict[str, Any]) -> Permission:
     """Create a new permission."""
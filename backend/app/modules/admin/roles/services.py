@@ -4,8 +4,10 @@ from uuid import UUID
 from app.db.base import InMemoryDB
 from app.modules.admin.roles.models import Role, UserDepartmentRole
 
-roles_db = InMemoryDB[Role](Role)
-user_department_roles_db = InMemoryDB[UserDepartmentRole](UserDepartmentRole)
+roles_db = InMemoryDB[Role](Role, indexes=["department_id"], snapshot_name="admin_roles")
+user_department_roles_db = InMemoryDB[UserDepartmentRole](
+    UserDepartmentRole, indexes=["user_id", "department_id"], snapshot_name="admin_user_department_roles"
+)
 
 def create_role(role_data: Dict[str, Any]) -> Role:
     """Create a new role."""
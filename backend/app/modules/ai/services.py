@@ -3,7 +3,7 @@ from typing import List, Optional, Dict, Any
 from app.db.base import InMemoryDB
 from app.modules.ai.models import AIProfile
 
-ai_profiles_db = InMemoryDB[AIProfile](AIProfile)
+ai_profiles_db = InMemoryDB[AIProfile](AIProfile, indexes=["department_id"], snapshot_name="ai_profiles")
 
 def create_ai_profile(profile_data: Dict[str, Any]) -> AIProfile:
     """Create a new AI profile."""
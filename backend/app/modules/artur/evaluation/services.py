@@ -7,8 +7,8 @@ from app.db.base import InMemoryDB
 
 class EvaluationService:
     def __init__(self):
-        self.db = InMemoryDB(ArturSuggestion)
-        self.insights_db = InMemoryDB(ArturInsight)  # For accessing insights
+        self.db = InMemoryDB(ArturSuggestion, snapshot_name="artur_suggestions")
+        self.insights_db = InMemoryDB(ArturInsight, snapshot_name="artur_evaluation_insights")  # For accessing insights
         
     async def create_suggestion(self, suggestion_data: Dict[str, Any]) -> ArturSuggestion:
         """Create a new suggestion from evaluation"""
@@ -11,11 +11,11 @@ from app.db.base import InMemoryDB
 class InterventionService:
     def __init__(self):
         self.db = InMemoryDB(ArturIntervention)
-        self.suggestions_db = InMemoryDB(ArturSuggestion)  # For accessing suggestions
-        self.functions_db = InMemoryDB(Function)    # For accessing functions
-        self.rules_db = InMemoryDB(AutomationRule)        # For accessing automation rules
-        self.ai_profiles_db = InMemoryDB(AIProfile)  # For accessing AI profiles
-        self.departments_db = InMemoryDB(Department)  # For accessing departments
+        self.suggestions_db = InMemoryDB(ArturSuggestion, snapshot_name="artur_intervention_suggestions")  # For accessing suggestions
+        self.functions_db = InMemoryDB(Function, snapshot_name="artur_intervention_functions")    # For accessing functions
+        self.rules_db = InMemoryDB(AutomationRule, snapshot_name="artur_intervention_rules")        # For accessing automation rules
+        self.ai_profiles_db = InMemoryDB(AIProfile, snapshot_name="artur_intervention_ai_profiles")  # For accessing AI profiles
+        self.departments_db = InMemoryDB(Department, snapshot_name="artur_intervention_departments")  # For accessing departments
         
     async def create_intervention(self, intervention_data: Dict[str, Any]) -> ArturIntervention:
         """Create a new intervention record"""
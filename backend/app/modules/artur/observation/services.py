@@ -6,8 +6,8 @@ from app.db.base import InMemoryDB
 
 class ObservationService:
     def __init__(self):
-        self.db = InMemoryDB(ArturInsight)
-        self.audit_db = InMemoryDB(AuditLog)  # For accessing audit logs
+        self.db = InMemoryDB(ArturInsight, snapshot_name="artur_insights")
+        self.audit_db = InMemoryDB(AuditLog, snapshot_name="artur_observation_audit_logs")  # For accessing audit logs
         
     async def create_insight(self, insight_data: Dict[str, Any]) -> ArturInsight:
         """Create a new insight from observation"""
@@ -11,11 +11,11 @@ from app.db.base import InMemoryDB
 class SimulationService:
     def __init__(self):
         self.db = InMemoryDB(ArturSimulation)
-        self.suggestions_db = InMemoryDB(ArturSuggestion)  # For accessing suggestions
-        self.functions_db = InMemoryDB(Function)    # For accessing functions
-        self.rules_db = InMemoryDB(AutomationRule)        # For accessing automation rules
-        self.ai_profiles_db = InMemoryDB(AIProfile)  # For accessing AI profiles
-        self.roles_db = InMemoryDB(Role)        # For accessing roles
+        self.suggestions_db = InMemoryDB(ArturSuggestion, snapshot_name="artur_simulation_suggestions")  # For accessing suggestions
+        self.functions_db = InMemoryDB(Function, snapshot_name="artur_simulation_functions")    # For accessing functions
+        self.rules_db = InMemoryDB(AutomationRule, snapshot_name="artur_simulation_rules")        # For accessing automation rules
+        self.ai_profiles_db = InMemoryDB(AIProfile, snapshot_name="artur_simulation_ai_profiles")  # For accessing AI profiles
+        self.roles_db = InMemoryDB(Role, snapshot_name="artur_simulation_roles")        # For accessing roles
         
     async def create_simulation(self, simulation_data: Dict[str, Any]) -> ArturSimulation:
         """Create a new simulation record"""
@@ -3,7 +3,9 @@ from typing import List, Optional, Dict, Any
 from app.db.base import InMemoryDB
 from app.modules.automation.rules_engine.models import AutomationRule
 
-automation_rules_db = InMemoryDB[AutomationRule](AutomationRule)
+automation_rules_db = InMemoryDB[AutomationRule](
+    AutomationRule, indexes=["department_id"], snapshot_name="automation_rules"
+)
 
 def create_automation_rule(rule_data: Dict[str, Any]) -> AutomationRule:
     """Create a new automation rule."""
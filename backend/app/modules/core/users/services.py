@@ -6,7 +6,9 @@ from app.modules.admin.roles.models import UserDepartmentRole
 from app.modules.admin.departments.services import get_department
 from app.modules.admin.roles.services import get_role
 
-user_department_roles_db = InMemoryDB[UserDepartmentRole](UserDepartmentRole)
+user_department_roles_db = InMemoryDB[UserDepartmentRole](
+    UserDepartmentRole, indexes=["user_id", "department_id"], snapshot_name="core_user_department_roles"
+)
 
 def assign_user_to_department(
     user_id: int,
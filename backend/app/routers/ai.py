@@ -317,7 +317,7 @@ async def natural_language_query(request: NaturalLanguageQueryRequest):
     """
     query_text = request.query
     
-    contracts = list(contracts_db.data.values())
+    contracts = contracts_db.scan()
     
     related_contracts = []
     
@@ -472,36 +472,31 @@ async def get_ai_dashboard_stats():
     """
     Get AI dashboard statistics.
     """
-    contracts = list(contracts_db.data.values())
+    total_contracts = len(contracts_db.data)
     
-    risk_scores = list(risk_scores_db.data.values())
+    risk_bands = risk_scores_db.aggregate("band")
+    analyzed_contracts = risk_scores_db.aggregate("contract_id").groups()
+    high_risk_contracts = risk_bands.count("high")
+    medium_risk_contracts = risk_bands.count("medium")
+    low_risk_contracts = risk_bands.count("low")
     
-    anomalies = list(contract_anomalies_db.data.values())
+    severities = contract_anomalies_db.aggregate("severity")
+    total_anomalies = severities.count()
+    high_severity_anomalies = severities.count("high")
+    medium_severity_anomalies = severities.count("medium")
+    low_severity_anomalies = severities.count("low")
     
-    total_contracts = len(contracts)
-    analyzed_contracts = len(set(rs.contract_id for rs in risk_scores))
-    high_risk_contracts = len([rs for rs in risk_scores if rs.overall_score > 0.7])
-    medium_risk_contracts = len([rs for rs in risk_scores if 0.3 <= rs.overall_score <= 0.7])
-    low_risk_contracts = len([rs for rs in risk_scores if rs.overall_score < 0.3])
-    
-    total_anomalies = len(anomalies)
-    high_severity_anomalies = len([a for a in anomalies if a.severity == "high"])
-    medium_severity_anomalies = len([a for a in anomalies if a.severity == "medium"])
-    low_severity_anomalies = len([a for a in anomalies if a.severity == "low"])
-    
-    extracted_clauses = list(extracted_clauses_db.data.values())
-    total_clauses = len(extracted_clauses)
-    clause_types = {}
-    for clause in extracted_clauses:
-        clause_types[clause.clause_type] = clause_types.get(clause.clause_type, 0) + 1
+    clauses = extracted_clauses_db.aggregate("clause_type")
+    total_clauses = clauses.count()
+    clause_types = clauses.counts()
     
+    sources = contract_anomalies_db.aggregate("source")
     anomalies_by_source = {
-        "traditional_nlp": len([a for a in anomalies if not a.metadata or a.metadata.get("source") != "mistral"]),
-        "mistral": len([a for a in anomalies if a.metadata and a.metadata.get("source") == "mistral"])
+        "traditional_nlp": sources.count("traditional_nlp"),
+        "mistral": sources.count("mistral")
     }
     
-    ai_queries = list(ai_queries_db.data.values())
-    recent_queries = sorted(ai_queries, key=lambda q: getattr(q, 'created_at', datetime.now()), reverse=True)[:5]
+    recent_queries = ai_queries_db.get_range("created_at", descending=True, limit=5)
     recent_query_texts = [q.query_text for q in recent_queries]
     
     return {
@@ -525,7 +520,7 @@ async def get_ai_dashboard_stats():
         },
         "ai_activity": {
             "recent_queries": recent_query_texts,
-            "total_queries": len(ai_queries),
+            "total_queries": len(ai_queries_db.data),
             "model": "OpenHermes-2.5-Mistral-7B"
         }
     }
@@ -19,7 +19,7 @@ class DocumentService:
     def __init__(self):
         self.base_upload_dir = Path.home() / "repos" / "Cortana" / "backend" / "uploads" / "clients"
         self.base_upload_dir.mkdir(parents=True, exist_ok=True)
-        self.documents_db = InMemoryDB("client_documents")
+        self.documents_db = InMemoryDB("client_documents", sorted_indexes=["expiry_date"])
     
     async def upload_document(
         self,
@@ -172,17 +172,10 @@ class DocumentService:
             List[ClientDocument]: List of expiring documents
         """
         try:
-            all_documents = self.documents_db.get_all()
-            expiring_documents = []
-            
             cutoff_date = date.today()
             future_date = date.fromordinal(cutoff_date.toordinal() + days_ahead)
             
-            for doc in all_documents:
-                if doc.expiry_date and cutoff_date <= doc.expiry_date <= future_date:
-                    expiring_documents.append(doc)
-            
-            return expiring_documents
+            return self.documents_db.get_range("expiry_date", cutoff_date, future_date)
             
         except Exception as e:
             logger.error(f"Error retrieving expiring documents: {str(e)}")
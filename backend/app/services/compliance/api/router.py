@@ -1,8 +1,8 @@
 from app.services.compliance.api.endpoints import router as endpoints_router
 from app.services.compliance.services.verification_service import verification_service
 from app.services.compliance.services.compliance_service import compliance_service
-from app.services.compliance.services.unified_verification_service import unified_verification_service
-from app.services.compliance.schemas.verify import CustomerVerifyRequest, CustomerVerificationResponse, EntityBase
+from app.services.compliance.services.verification_jobs import verification_jobs
+from app.services.compliance.schemas.verify import CustomerVerifyRequest, CustomerVerificationResponse
 from app.services.compliance.schemas.compliance import (
     ComplianceReportCreate, ComplianceReportUpdate,
     PEPScreeningResultCreate, PEPScreeningResultUpdate,
@@ -12,9 +12,12 @@ from app.services.compliance.schemas.compliance import (
 from app.services.compliance.models.compliance import ComplianceReport, PEPScreeningResult, SanctionsScreeningResult, DocumentRetentionPolicy
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta, timezone
+import json
 import logging
 import asyncio
 from fastapi import APIRouter, Depends, HTTPException, Path, Body, Query, File, UploadFile, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 from pydantic import EmailStr
 
 logger = logging.getLogger(__name__)
@@ -329,16 +332,16 @@ async def get_country_risk_endpoint():
     """
     try:
         from app.services.compliance.services.risk_matrix import RiskMatrix
-        from app.legal.services import get_clients
+        from app.legal.services import iter_clients
         
         risk_matrix = RiskMatrix()
         await risk_matrix.initialize()
         
         country_risk_data = await risk_matrix.get_all_countries_risk()
         
-        from app.legal.services import get_clients
+        from app.legal.services import iter_clients
         
-        clients = get_clients(skip=0, limit=1000)
+        clients = list(iter_clients())
         client_countries = {}
         
         logger.info(f"Retrieved {len(clients)} clients")
@@ -413,7 +416,7 @@ async def get_country_risk_analysis_endpoint(
         from app.services.compliance.services.risk_matrix import RiskMatrix
         from app.services.ai.services.ai_service import ai_service
         from app.services.audit.services.audit_service import audit_service
-        from app.legal.services import get_clients
+        from app.legal.services import iter_clients
         from datetime import datetime, timezone
         from pydantic import BaseModel
         
@@ -431,7 +434,7 @@ async def get_country_risk_analysis_endpoint(
         
         country_risk_data = await risk_matrix.get_all_countries_risk()
         
-        clients = get_clients(skip=0, limit=1000)
+        clients = iter_clients()
         client_countries = {}
         
         for client in clients:
@@ -740,54 +743,35 @@ async def get_compliance_dashboard_endpoint():
             pep_screening_results_db,
             sanctions_screening_results_db
         )
-        from app.legal.services import get_clients, get_contracts
+        from app.db.query import Field
+        from app.legal.services import clients_db, contracts_db
         
-        clients = get_clients(limit=1000)
-        compliance_reports = compliance_reports_db.get_multi()
-        pep_screenings = pep_screening_results_db.get_multi()
-        sanctions_screenings = sanctions_screening_results_db.get_multi()
+        pep_statuses = pep_screening_results_db.aggregate("match_status")
+        sanctions_statuses = sanctions_screening_results_db.aggregate("match_status")
         
-        total_screenings = len(pep_screenings) + len(sanctions_screenings)
+        total_screenings = pep_statuses.count() + sanctions_statuses.count()
         
-        active_contracts = 0
-        expiring_contracts = 0
         now = datetime.now()
         expiring_threshold = now + timedelta(days=30)
         
-        contracts = get_contracts(limit=1000)
-        for contract in contracts:
-            if getattr(contract, "status", "") == "active":
-                active_contracts += 1
-                expiry_date = getattr(contract, "expiry_date", None)
-                if expiry_date and expiry_date <= expiring_threshold:
-                    expiring_contracts += 1
-        
-        pep_matches = len([p for p in pep_screenings if getattr(p, "match_status", "") in ["potential_match", "confirmed_match"]])
-        sanctions_matches = len([s for s in sanctions_screenings if getattr(s, "match_status", "") in ["potential_match", "confirmed_match"]])
+        active_contracts = contracts_db.aggregate("status").count("active")
+        expiring_contracts = contracts_db.count(
+            Field("status").eq("active") & Field("expiration_date").le(expiring_threshold)
+        )
         
-        pending_reports = len([r for r in compliance_reports if getattr(r, "status", "") == "pending"])
+        pep_matches = pep_statuses.count("potential_match") + pep_statuses.count("confirmed_match")
+        sanctions_matches = sanctions_statuses.count("potential_match") + sanctions_statuses.count("confirmed_match")
         
-        high_risk_clients = 0
-        flagged_clients = 0
+        pending_reports = compliance_reports_db.aggregate("status").count("pending")
         
-        for client in clients:
-            risk_level = getattr(client, "risk_level", "").upper()
-            if risk_level == "HIGH":
-                high_risk_clients += 1
-            
-            is_flagged = getattr(client, "is_flagged", False)
-            if is_flagged:
-                flagged_clients += 1
+        high_risk_clients = clients_db.aggregate("risk_level").count("HIGH")
+        flagged_clients = clients_db.aggregate("is_flagged").count(True)
         
         recent_verifications = []
-        for report in sorted(compliance_reports, key=lambda r: getattr(r, "created_at", datetime.min), reverse=True)[:5]:
+        for report in compliance_reports_db.get_range("created_at", descending=True, limit=5):
             client_id = getattr(report, "client_id", None)
-            client_name = "Unknown"
-            
-            for client in clients:
-                if getattr(client, "id", None) == client_id:
-                    client_name = getattr(client, "name", "Unknown")
-                    break
+            client = clients_db.get(client_id) if isinstance(client_id, int) else None
+            client_name = getattr(client, "name", "Unknown") if client else "Unknown"
             
             recent_verifications.append({
                 "id": getattr(report, "id", ""),
@@ -962,59 +946,60 @@ async def generate_uaf_report_endpoint(
             status_code=500,
             detail="Failed to generate UAF report. Please try again later.")
 
-@router.post("/verify-all", response_model=Dict[str, Any], status_code=status.HTTP_201_CREATED)
+@router.post("/verify-all", response_model=Dict[str, Any], status_code=status.HTTP_202_ACCEPTED)
 async def verify_all_clients_endpoint():
     """
     Verify all clients against PEP and sanctions lists.
     
-    This endpoint triggers verification for all clients in the system
-    that haven't been verified recently.
+    Starts a background job over every client in the system and returns its
+    id and initial progress. While a job is queued or running, returns that
+    job instead of starting another. Follow it with GET /verify-all/{job_id} or the
+    event stream at GET /verify-all/{job_id}/events.
     """
     try:
-        from app.legal.services import get_clients
-        
-        clients = get_clients(limit=1000)  # Get all clients
-        results = []
-        
-        for client in clients:
-            try:
-                customer_data = {
-                    "name": client.name,
-                    "country": getattr(client, "country", "PA"),
-                    "type": getattr(client, "client_type", "natural"),
-                }
-                
-                request = CustomerVerifyRequest(customer=EntityBase(**customer_data))
-                verification_result = await unified_verification_service.verify_customer(request)
-                
-                results.append({
-                    "client_id": client.id,
-                    "client_name": client.name,
-                    "status": "verified",
-                    "verification_result": verification_result
-                })
-            except Exception as e:
-                logger.error(f"Error verifying client {client.id}: {str(e)}")
-                results.append({
-                    "client_id": client.id,
-                    "client_name": client.name,
-                    "status": "error",
-                    "error": str(e)
-                })
-        
-        return {
-            "status": "completed",
-            "total_clients": len(clients),
-            "verified_count": len([r for r in results if r["status"] == "verified"]),
-            "error_count": len([r for r in results if r["status"] == "error"]),
-            "results": results
-        }
-        
+        return verification_jobs.submit()
     except Exception as e:
-        logger.error(f"Error in batch verification: {str(e)}")
+        logger.error(f"Error submitting batch verification: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to perform batch verification. Please try again later.")
+            detail="Failed to start batch verification. Please try again later.")
+
+
+@router.get("/verify-all/{job_id}", response_model=Dict[str, Any])
+async def get_verification_job_endpoint(job_id: int = Path(..., gt=0)):
+    """Get the status and progress of a batch verification job."""
+    progress = verification_jobs.progress(job_id)
+    if progress is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Verification job not found")
+    return progress
+
+
+@router.get("/verify-all/{job_id}/events")
+async def stream_verification_job_endpoint(job_id: int = Path(..., gt=0)):
+    """
+    Stream the progress of a batch verification job as server-sent events,
+    one per change, until the job completes or fails.
+    """
+    if verification_jobs.progress(job_id) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Verification job not found")
+
+    async def events():
+        async for progress in verification_jobs.watch(job_id):
+            yield f"data: {json.dumps(progress)}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@router.get("/verify-all/{job_id}/results", response_model=List[Dict[str, Any]])
+async def get_verification_job_results_endpoint(
+    job_id: int = Path(..., gt=0),
+    after_client_id: Optional[int] = None,
+    limit: int = Query(100, gt=0, le=1000),
+):
+    """Get the per-client results of a batch verification job, by client id."""
+    if verification_jobs.progress(job_id) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Verification job not found")
+    return jsonable_encoder(verification_jobs.results(job_id, after_client_id=after_client_id, limit=limit))
 
 
 @router.get("/verification-status", response_model=Dict[str, Any])
@@ -96,3 +96,11 @@ class ListUpdate(BaseModel):
     update_date: datetime
     status: str
     details: Optional[str] = None
+
+class ScreeningState(BaseModel):
+    id: Optional[int] = None
+    client_id: int
+    entity_fingerprint: str
+    list_versions: Dict[str, Optional[str]]
+    list_matches: Dict[str, str]
+    screened_at: datetime
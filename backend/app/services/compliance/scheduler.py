@@ -1,3 +1,4 @@
+import asyncio
 import logging
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
@@ -5,6 +6,7 @@ from datetime import datetime
 from typing import List, Dict, Any
 
 from app.services.compliance.services.risk_matrix import risk_matrix
+from app.services.compliance.services.sanctions_engine import sanctions_engine
 from app.db.in_memory import list_updates_db
 from app.services.email import send_email as send_email_async
 
@@ -44,8 +46,11 @@ async def update_sanctions_lists():
     """Update sanctions lists from all sources."""
     logger.info("Scheduled task: Updating sanctions lists")
     try:
-        for list_name in ["OFAC", "EU Sanctions", "UN Sanctions", "OpenSanctions"]:
+        sources = {"OFAC": "ofac", "EU Sanctions": "eu", "UN Sanctions": "un", "OpenSanctions": "opensanctions"}
+        for list_name, source in sources.items():
             try:
+                # Re-index the list now if its file changed, not on the next screening.
+                await asyncio.to_thread(sanctions_engine.refresh, source)
 
                 list_updates_db.create(
                     {
@@ -132,12 +137,12 @@ async def monitor_client_risk_changes():
     """
     logger.info("Scheduled task: Monitoring client risk changes")
     try:
-        from app.legal.services import get_clients, update_client
+        from app.legal.services import iter_clients, update_client
         from app.services.compliance.services.excel_risk_evaluator import (
             excel_risk_evaluator,
         )
 
-        clients = get_clients(skip=0, limit=1000)
+        clients = iter_clients()
         high_risk_clients = []
         risk_changes = []
 
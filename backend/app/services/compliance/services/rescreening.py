@@ -0,0 +1,169 @@
+"""
+Delta re-screening for the daily client risk recalculation.
+
+Re-verifying every client every day mostly repeats screenings whose
+inputs did not change. For each client screened, screening_states_db
+keeps:
+
+- the fingerprint of its normalized screening data: the folded names,
+  countries, birth dates and types of the customer, directors and UBOs;
+- the version (content hash) of each cached sanctions list at that time,
+  and a fingerprint of the matches the client's names had on it.
+
+clients_to_rescreen() then picks the clients that need a new full
+verification:
+
+- new clients, clients whose data changed, and clients whose last
+  screening is older than COMPLIANCE_RESCREEN_MAX_AGE_DAYS. The live PEP
+  and OpenSanctions APIs carry no version, so this bounds how stale
+  their answers can get.
+- for every other client, only the (client, list) pairs whose list
+  changed are checked: the names of all such clients are screened against
+  that list in one batch, and a client is due only if its matches on the
+  list differ. Otherwise its state just moves to the new list version.
+
+Take a snapshot() before verifying a client and record() it afterwards,
+so a failed verification is retried on the next run. verify_customer()
+does not raise when a source is down, so only record() a result that
+every source answered (see fully_answered).
+"""
+import hashlib
+import json
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Set
+
+from app.core.config import settings
+from app.db.in_memory import screening_states_db
+from app.services.compliance.models.models import CustomerVerifyRequest, Entity, ScreeningState
+from app.services.compliance.services.sanctions_engine import sanctions_engine
+from app.services.compliance.utils.name_matching import fold_name
+
+logger = logging.getLogger(__name__)
+
+
+def _digest(value: Any) -> str:
+    return hashlib.sha256(json.dumps(value, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _entities(request: CustomerVerifyRequest) -> List[Entity]:
+    return [request.customer, *(request.directors or []), *(request.ubos or [])]
+
+
+def _normalized(entity: Entity) -> List[str]:
+    return [
+        fold_name(entity.name),
+        (entity.country or "").upper(),
+        entity.dob or "",
+        str(getattr(entity.type, "value", entity.type)),
+    ]
+
+
+def entity_fingerprint(request: CustomerVerifyRequest) -> str:
+    """Fingerprint of the data a verification of the request screens."""
+    return _digest({
+        "customer": _normalized(request.customer),
+        "directors": sorted(_normalized(director) for director in request.directors or []),
+        "ubos": sorted(_normalized(ubo) for ubo in request.ubos or []),
+    })
+
+
+def match_fingerprints(source: str, requests: List[CustomerVerifyRequest]) -> List[str]:
+    """
+    For each request, a fingerprint of the matches of all its names on one
+    cached list. All names of all requests are screened in one batch.
+    """
+    names, countries, owners = [], [], []
+    for owner, request in enumerate(requests):
+        for entity in _entities(request):
+            names.append(entity.name)
+            countries.append(entity.country)
+            owners.append(owner)
+    found: List[Set[Any]] = [set() for _ in requests]
+    for owner, matches in zip(owners, sanctions_engine.screen_many(source, names, countries)):
+        found[owner].update((match["name"], match["score"]) for match in matches)
+    return [_digest(sorted(matches)) for matches in found]
+
+
+def snapshot(client_id: int, request: CustomerVerifyRequest) -> ScreeningState:
+    """The screening state of a client's request against the current lists."""
+    versions = sanctions_engine.list_versions()
+    return ScreeningState(
+        client_id=client_id,
+        entity_fingerprint=entity_fingerprint(request),
+        list_versions=versions,
+        list_matches={source: match_fingerprints(source, [request])[0] for source in versions},
+        screened_at=datetime.now(),
+    )
+
+
+def get_state(client_id: int) -> Optional[ScreeningState]:
+    states = screening_states_db.get_range("client_id", client_id, client_id, limit=1)
+    return states[0] if states else None
+
+
+def record(state: ScreeningState) -> None:
+    """Store the snapshot a client was successfully verified with."""
+    current = get_state(state.client_id)
+    if current is None:
+        screening_states_db.create(state)
+    else:
+        screening_states_db.update(current.id, state)
+
+
+def fully_answered(result: Dict[str, Any]) -> bool:
+    """
+    Whether every source answered live for the customer, directors and UBOs
+    of a verify_customer() result: none timed out or was served stale.
+    """
+    entities = [result.get("customer") or {}, *(result.get("directors") or []), *(result.get("ubos") or [])]
+    return not any(entity.get("timed_out_sources") or entity.get("stale_sources") for entity in entities)
+
+
+def clients_to_rescreen(
+    requests: Dict[int, CustomerVerifyRequest], now: Optional[datetime] = None
+) -> Set[int]:
+    """The ids of the clients, among requests, that need a full verification."""
+    now = now or datetime.now()
+    max_age = timedelta(days=settings.COMPLIANCE_RESCREEN_MAX_AGE_DAYS)
+    versions = sanctions_engine.list_versions()
+    states = {state.client_id: state for state in screening_states_db.get_all()}
+
+    due: Set[int] = set()
+    changed_lists: Dict[str, List[int]] = defaultdict(list)
+    for client_id, request in requests.items():
+        state = states.get(client_id)
+        if (
+            state is None
+            or state.entity_fingerprint != entity_fingerprint(request)
+            or now - state.screened_at > max_age
+        ):
+            due.add(client_id)
+            continue
+        for source, version in versions.items():
+            if state.list_versions.get(source) != version:
+                changed_lists[source].append(client_id)
+
+    unaffected: Dict[int, ScreeningState] = {}
+    for source, client_ids in changed_lists.items():
+        fingerprints = match_fingerprints(source, [requests[client_id] for client_id in client_ids])
+        for client_id, fingerprint in zip(client_ids, fingerprints):
+            state = states[client_id]
+            if state.list_matches.get(source) != fingerprint:
+                due.add(client_id)
+            else:
+                # The list changed, but not for this client.
+                moved = unaffected.get(state.id, state)
+                unaffected[state.id] = moved.model_copy(
+                    update={"list_versions": {**moved.list_versions, source: versions[source]}}
+                )
+
+    unaffected = {state_id: state for state_id, state in unaffected.items() if state.client_id not in due}
+    if unaffected:
+        screening_states_db.update_many(unaffected)
+    logger.info(
+        f"Delta re-screening: {len(due)} of {len(requests)} clients due, "
+        f"{len(unaffected)} moved to new list versions without re-screening"
+    )
+    return due
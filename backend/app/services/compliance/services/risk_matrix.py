@@ -7,6 +7,8 @@ from datetime import datetime, timedelta
 import asyncio
 from pathlib import Path
 
+from app.core.http import http_pool
+
 logger = logging.getLogger(__name__)
 
 
@@ -74,55 +76,54 @@ class RiskMatrix:
     async def _update_basel_index(self):
         """Update Basel AML Index data from the official source."""
         try:
-            import aiohttp
             import csv
             import io
             from iso3166 import countries
 
             try:
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(
-                        self.basel_index_url, timeout=30
-                    ) as response:
-                        if response.status == 200:
-                            data = await response.json()
-                            countries_data = []
-
-                            for country in data.get("data", []):
-                                try:
-                                    countries_data.append(
-                                        {
-                                            "iso": country.get("iso", ""),
-                                            "name": country.get("name", ""),
-                                            "score": float(country.get("score", 0)),
-                                            "rank": int(country.get("rank", 0)),
-                                        }
-                                    )
-                                except (ValueError, TypeError) as e:
-                                    logger.warning(
-                                        f"Error processing Basel country data: {str(e)}"
-                                    )
-
-                            if (
-                                len(countries_data) >= 100
-                            ):  # Ensure we have a substantial dataset
-                                basel_data = {
-                                    "last_updated": datetime.now().isoformat(),
-                                    "source": "Basel AML Index",
-                                    "countries": countries_data,
-                                }
-
-                                with open(self.basel_index_file, "w") as f:
-                                    json.dump(basel_data, f, indent=2)
-
-                                logger.info(
-                                    f"Basel AML Index data updated with {len(countries_data)} countries"
+                session = http_pool.session()
+                async with session.get(
+                    self.basel_index_url, timeout=30
+                ) as response:
+                    if response.status == 200:
+                        data = await response.json()
+                        countries_data = []
+
+                        for country in data.get("data", []):
+                            try:
+                                countries_data.append(
+                                    {
+                                        "iso": country.get("iso", ""),
+                                        "name": country.get("name", ""),
+                                        "score": float(country.get("score", 0)),
+                                        "rank": int(country.get("rank", 0)),
+                                    }
                                 )
-                                return
-                            else:
+                            except (ValueError, TypeError) as e:
                                 logger.warning(
-                                    f"Basel API returned only {len(countries_data)} countries, which is insufficient"
+                                    f"Error processing Basel country data: {str(e)}"
                                 )
+
+                        if (
+                            len(countries_data) >= 100
+                        ):  # Ensure we have a substantial dataset
+                            basel_data = {
+                                "last_updated": datetime.now().isoformat(),
+                                "source": "Basel AML Index",
+                                "countries": countries_data,
+                            }
+
+                            with open(self.basel_index_file, "w") as f:
+                                json.dump(basel_data, f, indent=2)
+
+                            logger.info(
+                                f"Basel AML Index data updated with {len(countries_data)} countries"
+                            )
+                            return
+                        else:
+                            logger.warning(
+                                f"Basel API returned only {len(countries_data)} countries, which is insufficient"
+                            )
             except Exception as e:
                 logger.warning(f"Failed to fetch Basel AML Index from API: {str(e)}")
 
@@ -236,7 +237,6 @@ class RiskMatrix:
     async def _update_fatf_lists(self):
         """Update FATF blacklist and greylist data from official sources."""
         try:
-            import aiohttp
             from bs4 import BeautifulSoup
             import re
             from iso3166 import countries
@@ -245,51 +245,51 @@ class RiskMatrix:
             greylist = []
 
             try:
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(
-                        self.fatf_blacklist_url, timeout=30
-                    ) as response:
-                        if response.status == 200:
-                            data = await response.json()
-                            for country in data.get("countries", []):
-                                try:
-                                    blacklist.append(
-                                        {
-                                            "iso": country.get("iso", ""),
-                                            "name": country.get("name", ""),
-                                            "reason": country.get(
-                                                "reason",
-                                                "Strategic deficiencies in AML/CFT",
-                                            ),
-                                        }
-                                    )
-                                except Exception as e:
-                                    logger.warning(
-                                        f"Error processing FATF blacklist country: {str(e)}"
-                                    )
-
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(
-                        self.fatf_greylist_url, timeout=30
-                    ) as response:
-                        if response.status == 200:
-                            data = await response.json()
-                            for country in data.get("countries", []):
-                                try:
-                                    greylist.append(
-                                        {
-                                            "iso": country.get("iso", ""),
-                                            "name": country.get("name", ""),
-                                            "reason": country.get(
-                                                "reason",
-                                                "Strategic deficiencies in AML/CFT",
-                                            ),
-                                        }
-                                    )
-                                except Exception as e:
-                                    logger.warning(
-                                        f"Error processing FATF greylist country: {str(e)}"
-                                    )
+                session = http_pool.session()
+                async with session.get(
+                    self.fatf_blacklist_url, timeout=30
+                ) as response:
+                    if response.status == 200:
+                        data = await response.json()
+                        for country in data.get("countries", []):
+                            try:
+                                blacklist.append(
+                                    {
+                                        "iso": country.get("iso", ""),
+                                        "name": country.get("name", ""),
+                                        "reason": country.get(
+                                            "reason",
+                                            "Strategic deficiencies in AML/CFT",
+                                        ),
+                                    }
+                                )
+                            except Exception as e:
+                                logger.warning(
+                                    f"Error processing FATF blacklist country: {str(e)}"
+                                )
+
+                session = http_pool.session()
+                async with session.get(
+                    self.fatf_greylist_url, timeout=30
+                ) as response:
+                    if response.status == 200:
+                        data = await response.json()
+                        for country in data.get("countries", []):
+                            try:
+                                greylist.append(
+                                    {
+                                        "iso": country.get("iso", ""),
+                                        "name": country.get("name", ""),
+                                        "reason": country.get(
+                                            "reason",
+                                            "Strategic deficiencies in AML/CFT",
+                                        ),
+                                    }
+                                )
+                            except Exception as e:
+                                logger.warning(
+                                    f"Error processing FATF greylist country: {str(e)}"
+                                )
 
                 if blacklist and greylist:
                     logger.info(
@@ -312,58 +312,58 @@ class RiskMatrix:
                 logger.warning(f"Failed to fetch FATF data from API: {str(e)}")
 
             try:
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(
-                        "https://www.fatf-gafi.org/en/countries/black-grey-lists/high-risk-jurisdictions.html",
-                        timeout=30,
-                    ) as response:
-                        if response.status == 200:
-                            html = await response.text()
-                            soup = BeautifulSoup(html, "html.parser")
-
-                            country_elements = soup.select(".country-name")
-                            for element in country_elements:
-                                country_name = element.text.strip()
-                                iso_code = None
-                                for country in countries:
-                                    if country.name.lower() == country_name.lower():
-                                        iso_code = country.alpha2
-                                        break
-
-                                if iso_code:
-                                    blacklist.append(
-                                        {
-                                            "iso": iso_code,
-                                            "name": country_name,
-                                            "reason": "Strategic deficiencies in AML/CFT",
-                                        }
-                                    )
-
-                    async with session.get(
-                        "https://www.fatf-gafi.org/en/countries/black-grey-lists/increased-monitoring.html",
-                        timeout=30,
-                    ) as response:
-                        if response.status == 200:
-                            html = await response.text()
-                            soup = BeautifulSoup(html, "html.parser")
-
-                            country_elements = soup.select(".country-name")
-                            for element in country_elements:
-                                country_name = element.text.strip()
-                                iso_code = None
-                                for country in countries:
-                                    if country.name.lower() == country_name.lower():
-                                        iso_code = country.alpha2
-                                        break
-
-                                if iso_code:
-                                    greylist.append(
-                                        {
-                                            "iso": iso_code,
-                                            "name": country_name,
-                                            "reason": "Strategic deficiencies in AML/CFT",
-                                        }
-                                    )
+                session = http_pool.session()
+                async with session.get(
+                    "https://www.fatf-gafi.org/en/countries/black-grey-lists/high-risk-jurisdictions.html",
+                    timeout=30,
+                ) as response:
+                    if response.status == 200:
+                        html = await response.text()
+                        soup = BeautifulSoup(html, "html.parser")
+
+                        country_elements = soup.select(".country-name")
+                        for element in country_elements:
+                            country_name = element.text.strip()
+                            iso_code = None
+                            for country in countries:
+                                if country.name.lower() == country_name.lower():
+                                    iso_code = country.alpha2
+                                    break
+
+                            if iso_code:
+                                blacklist.append(
+                                    {
+                                        "iso": iso_code,
+                                        "name": country_name,
+                                        "reason": "Strategic deficiencies in AML/CFT",
+                                    }
+                                )
+
+                async with session.get(
+                    "https://www.fatf-gafi.org/en/countries/black-grey-lists/increased-monitoring.html",
+                    timeout=30,
+                ) as response:
+                    if response.status == 200:
+                        html = await response.text()
+                        soup = BeautifulSoup(html, "html.parser")
+
+                        country_elements = soup.select(".country-name")
+                        for element in country_elements:
+                            country_name = element.text.strip()
+                            iso_code = None
+                            for country in countries:
+                                if country.name.lower() == country_name.lower():
+                                    iso_code = country.alpha2
+                                    break
+
+                            if iso_code:
+                                greylist.append(
+                                    {
+                                        "iso": iso_code,
+                                        "name": country_name,
+                                        "reason": "Strategic deficiencies in AML/CFT",
+                                    }
+                                )
 
                 if blacklist or greylist:
                     logger.info(
@@ -456,7 +456,6 @@ class RiskMatrix:
     async def _update_eu_high_risk(self):
         """Update EU high-risk third countries list from official sources."""
         try:
-            import aiohttp
             from bs4 import BeautifulSoup
             import re
             from iso3166 import countries
@@ -464,37 +463,37 @@ class RiskMatrix:
             eu_countries = []
 
             try:
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(
-                        self.eu_high_risk_url, timeout=30
-                    ) as response:
-                        if response.status == 200:
-                            html = await response.text()
-                            soup = BeautifulSoup(html, "html.parser")
-
-                            country_elements = soup.select(
-                                ".high-risk-country, .country-name"
-                            )
-
-                            for element in country_elements:
-                                country_name = element.text.strip()
-                                iso_code = None
-                                for country in countries:
-                                    if (
-                                        country.name.lower() in country_name.lower()
-                                        or country_name.lower() in country.name.lower()
-                                    ):
-                                        iso_code = country.alpha2
-                                        break
-
-                                if iso_code:
-                                    eu_countries.append(
-                                        {
-                                            "iso": iso_code,
-                                            "name": country_name,
-                                            "reason": "Strategic deficiencies in AML/CFT",
-                                        }
-                                    )
+                session = http_pool.session()
+                async with session.get(
+                    self.eu_high_risk_url, timeout=30
+                ) as response:
+                    if response.status == 200:
+                        html = await response.text()
+                        soup = BeautifulSoup(html, "html.parser")
+
+                        country_elements = soup.select(
+                            ".high-risk-country, .country-name"
+                        )
+
+                        for element in country_elements:
+                            country_name = element.text.strip()
+                            iso_code = None
+                            for country in countries:
+                                if (
+                                    country.name.lower() in country_name.lower()
+                                    or country_name.lower() in country.name.lower()
+                                ):
+                                    iso_code = country.alpha2
+                                    break
+
+                            if iso_code:
+                                eu_countries.append(
+                                    {
+                                        "iso": iso_code,
+                                        "name": country_name,
+                                        "reason": "Strategic deficiencies in AML/CFT",
+                                    }
+                                )
 
                 if eu_countries:
                     logger.info(
@@ -518,48 +517,48 @@ class RiskMatrix:
                 logger.warning(f"Failed to fetch EU high-risk countries data: {str(e)}")
 
             try:
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(
-                        "https://ec.europa.eu/commission/presscorner/detail/en/ip_23_3285",
-                        timeout=30,
-                    ) as response:
-                        if response.status == 200:
-                            html = await response.text()
-                            soup = BeautifulSoup(html, "html.parser")
-
-                            paragraphs = soup.select("p")
-                            for p in paragraphs:
-                                text = p.text.strip()
-                                if (
-                                    "high-risk third countries" in text.lower()
-                                    and ":" in text
-                                ):
-                                    country_text = text.split(":", 1)[1].strip()
-                                    country_names = [
-                                        name.strip()
-                                        for name in re.split(r",|\band\b", country_text)
-                                    ]
-
-                                    for country_name in country_names:
-                                        iso_code = None
-                                        for country in countries:
-                                            if (
-                                                country.name.lower()
-                                                in country_name.lower()
-                                                or country_name.lower()
-                                                in country.name.lower()
-                                            ):
-                                                iso_code = country.alpha2
-                                                break
-
-                                        if iso_code:
-                                            eu_countries.append(
-                                                {
-                                                    "iso": iso_code,
-                                                    "name": country_name,
-                                                    "reason": "Strategic deficiencies in AML/CFT",
-                                                }
-                                            )
+                session = http_pool.session()
+                async with session.get(
+                    "https://ec.europa.eu/commission/presscorner/detail/en/ip_23_3285",
+                    timeout=30,
+                ) as response:
+                    if response.status == 200:
+                        html = await response.text()
+                        soup = BeautifulSoup(html, "html.parser")
+
+                        paragraphs = soup.select("p")
+                        for p in paragraphs:
+                            text = p.text.strip()
+                            if (
+                                "high-risk third countries" in text.lower()
+                                and ":" in text
+                            ):
+                                country_text = text.split(":", 1)[1].strip()
+                                country_names = [
+                                    name.strip()
+                                    for name in re.split(r",|\band\b", country_text)
+                                ]
+
+                                for country_name in country_names:
+                                    iso_code = None
+                                    for country in countries:
+                                        if (
+                                            country.name.lower()
+                                            in country_name.lower()
+                                            or country_name.lower()
+                                            in country.name.lower()
+                                        ):
+                                            iso_code = country.alpha2
+                                            break
+
+                                    if iso_code:
+                                        eu_countries.append(
+                                            {
+                                                "iso": iso_code,
+                                                "name": country_name,
+                                                "reason": "Strategic deficiencies in AML/CFT",
+                                            }
+                                        )
 
                 if eu_countries:
                     logger.info(
@@ -0,0 +1,253 @@
+import logging
+import hashlib
+import heapq
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Set, Tuple
+
+from app.services.compliance.utils.name_matching import fold_name, score_pairs
+
+logger = logging.getLogger(__name__)
+
+SANCTIONS_DATA_DIR = Path.home() / "repos" / "Cortana" / "backend" / "data" / "sanctions"
+
+# Cached list files under SANCTIONS_DATA_DIR, by source key.
+SANCTIONS_LISTS = {
+    "ofac": ("ofac_cached.json", "OFAC"),
+    "un": ("un_cached.json", "UN Sanctions"),
+    "eu": ("eu_cached.json", "EU Sanctions"),
+    "opensanctions": ("opensanctions_cached.json", "OpenSanctions"),
+    "pep": ("pep_cached.json", "PEP Database"),
+}
+
+DEFAULT_THRESHOLD = 0.7
+# Candidates scored per query; those with the most trigrams in common are kept.
+MAX_CANDIDATES = 200
+# Share of a query's trigrams a name needs to be a candidate.
+MIN_TRIGRAM_OVERLAP = 0.25
+
+
+def trigrams(folded: str) -> Set[str]:
+    """
+    The character trigrams of a folded name, spaces removed, so that split
+    or joined tokens ("Gazprom Bank", "Gazprombank") still share them.
+    """
+    compact = folded.replace(" ", "")
+    if len(compact) < 3:
+        return {compact} if compact else set()
+    return {compact[i:i + 3] for i in range(len(compact) - 2)}
+
+
+class SanctionsIndex:
+    """
+    Immutable index over one list: every name and alias of every entry is a
+    key, and each character trigram points to the keys containing it.
+    ``fingerprint`` is a hash of the list file's content, i.e. its version.
+    """
+
+    def __init__(
+        self,
+        entries: List[Dict[str, Any]],
+        signature: Optional[Tuple[int, int]] = None,
+        fingerprint: Optional[str] = None,
+    ):
+        self.entries = entries
+        self.signature = signature
+        self.fingerprint = fingerprint
+        # Per key: entry position, name as listed, folded name.
+        self.keys: List[Tuple[int, str, str]] = []
+        self.gram_counts: List[int] = []
+        postings: Dict[str, List[int]] = defaultdict(list)
+        for position, entry in enumerate(entries):
+            names = [entry.get("name", "")] + list(entry.get("aliases") or [])
+            seen = set()
+            for listed_name in names:
+                folded = fold_name(listed_name)
+                if not folded or folded in seen:
+                    continue
+                seen.add(folded)
+                key = len(self.keys)
+                self.keys.append((position, listed_name, folded))
+                grams = trigrams(folded)
+                self.gram_counts.append(len(grams))
+                for gram in grams:
+                    postings[gram].append(key)
+        self.postings = dict(postings)
+
+    def candidates(self, folded: str) -> List[int]:
+        """
+        The keys sharing at least MIN_TRIGRAM_OVERLAP of a folded name's
+        trigrams, the MAX_CANDIDATES most similar (Dice coefficient) first.
+        """
+        grams = trigrams(folded)
+        shared: Dict[int, int] = defaultdict(int)
+        for gram in grams:
+            for key in self.postings.get(gram, ()):
+                shared[key] += 1
+        needed = MIN_TRIGRAM_OVERLAP * len(grams)
+        found = {key: count for key, count in shared.items() if count >= needed}
+        if len(found) <= MAX_CANDIDATES:
+            return list(found)
+        return heapq.nlargest(
+            MAX_CANDIDATES,
+            found,
+            key=lambda key: 2 * found[key] / (len(grams) + self.gram_counts[key]),
+        )
+
+    def search_many(
+        self, names: List[str], threshold: float = DEFAULT_THRESHOLD, limit: int = 10
+    ) -> List[List[Tuple[float, Dict[str, Any], str]]]:
+        """
+        For each name, the entries it matches, best first, as (score, entry,
+        matched name) for scores of at least threshold. The candidates of
+        all names are scored together in one pass (see name_matching).
+        """
+        queries, keys, owners = [], [], []
+        for owner, name in enumerate(names):
+            folded = fold_name(name)
+            if not folded:
+                continue
+            for key in self.candidates(folded):
+                queries.append(folded)
+                keys.append(key)
+                owners.append(owner)
+
+        scores = score_pairs(queries, [self.keys[key][2] for key in keys], folded=True)
+        best: List[Dict[int, Tuple[float, str]]] = [{} for _ in names]
+        for owner, key, score in zip(owners, keys, scores.tolist()):
+            if score < threshold:
+                continue
+            position, listed_name, _ = self.keys[key]
+            if score > best[owner].get(position, (0.0, ""))[0]:
+                best[owner][position] = (score, listed_name)
+
+        results = []
+        for found in best:
+            ranked = sorted(found.items(), key=lambda item: item[1][0], reverse=True)[:limit]
+            results.append([(score, self.entries[position], listed_name) for position, (score, listed_name) in ranked])
+        return results
+
+    def search(self, name: str, threshold: float = DEFAULT_THRESHOLD, limit: int = 10) -> List[Tuple[float, Dict[str, Any], str]]:
+        """The entries a name matches, best first (see search_many)."""
+        return self.search_many([name], threshold, limit)[0]
+
+
+class SanctionsEngine:
+    """
+    Screens names against the cached OFAC, UN, EU, OpenSanctions and PEP lists.
+
+    Each list is read and indexed once, on first use, and kept in memory.
+    At most every ``check_interval`` seconds a query checks whether the file
+    changed (mtime and size); if so a new index is built and swapped in
+    whole, so concurrent queries see either the old or the new list.
+    """
+
+    def __init__(self, data_dir: Optional[Path] = None, check_interval: float = 5.0):
+        self.data_dir = Path(data_dir or SANCTIONS_DATA_DIR)
+        self.check_interval = check_interval
+        self._indexes: Dict[str, SanctionsIndex] = {}
+        self._checked_at: Dict[str, float] = {}
+        self._reload_lock = threading.Lock()
+
+    def list_path(self, source: str) -> Path:
+        return self.data_dir / SANCTIONS_LISTS[source][0]
+
+    def _signature(self, source: str) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.list_path(source))
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load(self, source: str, signature: Optional[Tuple[int, int]]) -> SanctionsIndex:
+        if signature is None:
+            return SanctionsIndex([], None)
+        path = self.list_path(source)
+        try:
+            with open(path, "rb") as f:
+                content = f.read()
+            entries = json.loads(content).get("entries", [])
+        except Exception as e:
+            logger.error(f"Error loading sanctions list {path}: {str(e)}")
+            current = self._indexes.get(source)
+            # Keep serving the previous version of a list that failed to parse.
+            return current if current is not None else SanctionsIndex([], signature)
+        index = SanctionsIndex(entries, signature, hashlib.sha256(content).hexdigest())
+        logger.info(f"Indexed {len(entries)} entries ({len(index.keys)} names) from {path}")
+        return index
+
+    def refresh(self, source: str, force: bool = False) -> SanctionsIndex:
+        """Return the index of a list, rebuilding it first if its file changed."""
+        index = self._indexes.get(source)
+        now = time.monotonic()
+        if not force and index is not None and now - self._checked_at.get(source, 0.0) < self.check_interval:
+            return index
+        with self._reload_lock:
+            self._checked_at[source] = now
+            signature = self._signature(source)
+            index = self._indexes.get(source)
+            if force or index is None or index.signature != signature:
+                index = self._indexes[source] = self._load(source, signature)
+        return index
+
+    def refresh_all(self, force: bool = False) -> None:
+        for source in SANCTIONS_LISTS:
+            self.refresh(source, force=force)
+
+    def list_versions(self) -> Dict[str, Optional[str]]:
+        """The content fingerprint of every list, None for a missing list."""
+        return {source: self.refresh(source).fingerprint for source in SANCTIONS_LISTS}
+
+    @staticmethod
+    def _match(source: str, entry: Dict[str, Any], score: float, matched_name: str, country: Optional[str]) -> Dict[str, Any]:
+        label = SANCTIONS_LISTS[source][1]
+        return {
+            "source": f"{label.split()[0]} (Cached)",
+            "name": entry.get("name", ""),
+            "score": score,
+            "details": {
+                "reason": "Match from cached data",
+                "list": label,
+                "matched_name": matched_name,
+                "country_match": bool(country) and country == entry.get("country", ""),
+            },
+        }
+
+    def screen_many(
+        self,
+        source: str,
+        names: List[str],
+        countries: Optional[List[Optional[str]]] = None,
+        threshold: float = DEFAULT_THRESHOLD,
+        limit: int = 10,
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Screen a batch of names against one list at once. Returns, for each
+        name, its matches in the shape the verification services report,
+        best first. The country is reported in the details but does not
+        make a match on its own.
+        """
+        countries = countries or [None] * len(names)
+        found = self.refresh(source).search_many(names, threshold, limit)
+        return [
+            [self._match(source, entry, score, matched_name, country) for score, entry, matched_name in matches]
+            for matches, country in zip(found, countries)
+        ]
+
+    def screen(
+        self,
+        source: str,
+        name: str,
+        country: Optional[str] = None,
+        threshold: float = DEFAULT_THRESHOLD,
+        limit: int = 10,
+    ) -> List[Dict[str, Any]]:
+        """Screen one name against one list (see screen_many)."""
+        return self.screen_many(source, [name], [country], threshold, limit)[0]
+
+
+sanctions_engine = SanctionsEngine()
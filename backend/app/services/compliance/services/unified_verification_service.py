@@ -1,10 +1,12 @@
 import logging
+import hashlib
 import json
 import os
 import uuid
 import asyncio
+import weakref
 from datetime import datetime
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 from pathlib import Path
 import jinja2
 
@@ -16,7 +18,11 @@ except ImportError:
     logger = logging.getLogger(__name__)
     logger.warning("weasyprint module not available. PDF generation will be limited to fallback mode.")
 
+from app.core.cache import ResponseCache
+from app.core.circuit_breaker import CLOSED, CircuitBreaker
+from app.core.config import settings
 from app.services.compliance.services.risk_matrix import risk_matrix, RiskLevel
+from app.services.compliance.services.sanctions_engine import MAX_CANDIDATES, sanctions_engine
 from app.services.compliance.utils.open_sanctions import OpenSanctionsClient
 from app.services.compliance.models.models import (
     CustomerVerifyRequest,
@@ -32,6 +38,14 @@ from app.db.in_memory import (
 
 logger = logging.getLogger(__name__)
 
+LAST_GOOD_DIR = (
+    Path.home() / "repos" / "Cortana" / "backend" / "data" / "verification_last_good"
+)
+
+
+class SourceUnavailable(Exception):
+    """A verification source could not answer."""
+
 
 class UnifiedVerificationService:
     """
@@ -57,6 +71,13 @@ class UnifiedVerificationService:
             loader=jinja2.FileSystemLoader(self.templates_dir),
             autoescape=jinja2.select_autoescape(["html", "xml"]),
         )
+        self._source_limits: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        # The last answer of each source for each entity it answered.
+        self.last_good = ResponseCache("verification_last_good", LAST_GOOD_DIR)
+        self._refreshes: Dict[str, asyncio.Task] = {}
 
     async def verify_customer(self, request: CustomerVerifyRequest) -> Dict[str, Any]:
         """
@@ -127,24 +148,18 @@ class UnifiedVerificationService:
 
             logger.info(f"Request data: {customer_dict}")
 
-            enriched_customer = await self._enrich_entity_data(customer_dict)
-            logger.info(f"Enriched customer data: {enriched_customer}")
-
-            customer_result = await self._verify_entity(enriched_customer)
-
-            directors_results = []
-            for director in directors_dicts:
-                enriched_director = await self._enrich_entity_data(director)
-                director_result = await self._verify_entity(enriched_director)
-                directors_results.append(director_result)
-
-            ubos_results = []
-            for ubo in ubos_dicts:
-                enriched_ubo = await self._enrich_entity_data(ubo)
-                ubo_result = await self._verify_entity(enriched_ubo)
-                ubos_results.append(ubo_result)
-
-            country_risk = await risk_matrix.get_country_risk(customer_dict["country"])
+            # The customer, directors and UBOs are screened concurrently; the
+            # source checks of all of them share one concurrency limit.
+            results = await asyncio.gather(
+                self._enrich_and_verify(customer_dict),
+                *(self._enrich_and_verify(director) for director in directors_dicts),
+                *(self._enrich_and_verify(ubo) for ubo in ubos_dicts),
+                risk_matrix.get_country_risk(customer_dict["country"]),
+            )
+            customer_result = results[0]
+            directors_results = list(results[1:1 + len(directors_dicts)])
+            ubos_results = list(results[1 + len(directors_dicts):-1])
+            country_risk = results[-1]
 
             report = await self._generate_uaf_report(
                 customer_dict,
@@ -190,18 +205,130 @@ class UnifiedVerificationService:
             "enrichment_timestamp": datetime.now().isoformat(),
         }
 
+    async def _enrich_and_verify(self, entity: Dict[str, Any]) -> Dict[str, Any]:
+        enriched = await self._enrich_entity_data(entity)
+        logger.info(f"Enriched entity data: {enriched}")
+        return await self._verify_entity(enriched)
+
+    def _source_limit(self) -> asyncio.Semaphore:
+        """The semaphore bounding concurrent source checks on the running loop."""
+        loop = asyncio.get_running_loop()
+        limit = self._source_limits.get(loop)
+        if limit is None:
+            limit = self._source_limits[loop] = asyncio.Semaphore(
+                max(1, settings.COMPLIANCE_VERIFY_CONCURRENCY)
+            )
+        return limit
+
+    def _breaker(self, source: str) -> CircuitBreaker:
+        breaker = self._breakers.get(source)
+        if breaker is None:
+            breaker = self._breakers[source] = CircuitBreaker(f"verification:{source}")
+        return breaker
+
+    def _last_good_key(self, source: str, entity: Dict[str, Any]) -> str:
+        fields = [source] + [str(entity.get(field) or "") for field in ("name", "country", "dob", "type")]
+        return hashlib.md5(json.dumps(fields).encode()).hexdigest()
+
+    def _cached_check(self, source: str):
+        """The check of a source against its downloaded data, if it has one besides the live check."""
+        return {"pep": self._cached_pep, "opensanctions": self._cached_open_sanctions}.get(source)
+
+    async def _run_check(
+        self, source: str, check, entity: Dict[str, Any]
+    ) -> Tuple[Optional[List[Dict[str, Any]]], bool]:
+        """
+        Run one source check and return its matches, and whether they are
+        stale. While the source's circuit is open, or when the check fails
+        or times out, the matches are the source's last good answer for the
+        entity, or else the answer of its downloaded data, and the entity
+        is re-checked in the background. Returns (None, False) if there is
+        no answer at all.
+        """
+        if self._breaker(source).state == CLOSED:
+            matches = await self._call_source(source, check, entity)
+            if matches is not None:
+                return matches, False
+        else:
+            self._refresh_in_background(source, check, entity)
+
+        matches = await self.last_good.get(self._last_good_key(source, entity))
+        cached_check = self._cached_check(source)
+        if matches is None and cached_check is not None:
+            try:
+                matches = await cached_check(entity)
+            except Exception as e:
+                logger.error(f"Cached {source} check for {entity.get('name', '')} failed: {str(e)}")
+        return matches, matches is not None
+
+    async def _call_source(
+        self, source: str, check, entity: Dict[str, Any]
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Run one source check under the concurrency limit and its timeout,
+        and record the outcome on the source's circuit breaker. Returns
+        None if the source failed or did not answer in time.
+        """
+        breaker = self._breaker(source)
+        timeout = settings.COMPLIANCE_SOURCE_TIMEOUTS.get(
+            source, settings.COMPLIANCE_SOURCE_TIMEOUT_SECONDS
+        )
+        async with self._source_limit():
+            try:
+                matches = await asyncio.wait_for(check(entity), timeout or None)
+            except asyncio.TimeoutError:
+                logger.warning(
+                    f"{source} check for {entity.get('name', '')} timed out after {timeout}s"
+                )
+                breaker.record_failure()
+                return None
+            except Exception as e:
+                logger.warning(f"{source} check for {entity.get('name', '')} failed: {str(e)}")
+                breaker.record_failure()
+                return None
+        breaker.record_success()
+        await self.last_good.set(
+            self._last_good_key(source, entity),
+            matches,
+            ttl_seconds=settings.COMPLIANCE_LAST_GOOD_DAYS * 24 * 3600,
+        )
+        return matches
+
+    def _refresh_in_background(self, source: str, check, entity: Dict[str, Any]) -> None:
+        """Re-check an entity as soon as the source's circuit lets a trial call through."""
+        key = self._last_good_key(source, entity)
+        if key in self._refreshes:
+            return
+        task = asyncio.ensure_future(self._refresh(source, check, entity))
+        self._refreshes[key] = task
+        task.add_done_callback(lambda _: self._refreshes.pop(key, None))
+
+    async def _refresh(self, source: str, check, entity: Dict[str, Any]) -> None:
+        breaker = self._breaker(source)
+        await asyncio.sleep(breaker.seconds_until_probe())
+        if breaker.try_probe():
+            try:
+                await self._call_source(source, check, entity)
+            except asyncio.CancelledError:
+                # A cancelled caller says nothing about the source.
+                breaker.release_probe()
+                raise
+
     async def _verify_entity(self, entity: Dict[str, Any]) -> Dict[str, Any]:
-        """Verify an entity against PEP and sanctions lists."""
-        pep_task = self._check_pep(entity)
-        sanctions_tasks = [
-            self._check_open_sanctions(entity),
-            self._check_ofac(entity),
-            self._check_un(entity),
-            self._check_eu(entity),
-        ]
-
-        pep_result = await pep_task
-        sanctions_results = await asyncio.gather(*sanctions_tasks)
+        """Verify an entity against PEP and sanctions lists, all sources at once."""
+        checks = {
+            "pep": self._check_pep,
+            "opensanctions": self._check_open_sanctions,
+            "ofac": self._check_ofac,
+            "un": self._check_un,
+            "eu": self._check_eu,
+        }
+        answers = await asyncio.gather(
+            *(self._run_check(source, check, entity) for source, check in checks.items())
+        )
+        timed_out = [source for source, (matches, _) in zip(checks, answers) if matches is None]
+        stale = [source for source, (_, is_stale) in zip(checks, answers) if is_stale]
+        pep_result, *sanctions_results = [matches or [] for matches, _ in answers]
 
         merged_sanctions = self._merge_sanctions_results(sanctions_results)
 
@@ -215,317 +342,188 @@ class UnifiedVerificationService:
             "pep_matches": pep_result,
             "sanctions_matches": merged_sanctions,
             "risk_score": risk_score,
+            "timed_out_sources": timed_out,
+            "stale_sources": stale,
         }
 
     async def _check_pep(self, entity: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """Check if entity is a PEP using OpenSanctions."""
-        try:
-            name = entity.get("name", "")
-            country = entity.get("country", "")
-            dob = entity.get("dob", "")
+        """
+        Check if entity is a PEP using OpenSanctions. Raises
+        SourceUnavailable if the API fails.
+        """
+        name = entity.get("name", "")
+        country = entity.get("country", "")
+        dob = entity.get("dob", "")
+
+        results = await self.open_sanctions_client.match_entity(
+            self.open_sanctions_client.entity_query(
+                name, "Person", country=country, birth_date=dob
+            ),
+            dataset="peps",
+        )
 
-            try:
-                results = await self.open_sanctions_client.search_pep(
-                    name=name, country=country, birth_date=dob
-                )
+        if isinstance(results, dict) and "error" in results:
+            raise SourceUnavailable(f"PEP API error: {results.get('error')}")
 
-                if isinstance(results, dict) and "error" in results:
-                    logger.warning(f"PEP API error: {results.get('error')}")
-                    pep_data_path = (
-                        Path.home()
-                        / "repos"
-                        / "Cortana"
-                        / "backend"
-                        / "data"
-                        / "sanctions"
-                        / "pep_cached.json"
-                    )
-                    if pep_data_path.exists():
-                        logger.info(f"Using cached PEP data from {pep_data_path}")
-                        with open(pep_data_path, "r") as f:
-                            cached_data = json.load(f)
-
-                        matches = []
-                        for entry in cached_data.get("entries", []):
-                            entry_name = entry.get("name", "").lower()
-                            entry_country = entry.get("country", "")
-                            entry_dob = entry.get("birth_date", "")
-
-                            name_match = (
-                                name.lower() in entry_name or entry_name in name.lower()
-                            )
-                            country_match = country == entry_country
-                            dob_match = dob and dob == entry_dob
-
-                            score = 0
-                            if name_match:
-                                score += 0.6
-                            if country_match:
-                                score += 0.2
-                            if dob_match:
-                                score += 0.2
-
-                            if score > 0.6:  # Threshold for considering a match
-                                matches.append(
-                                    {
-                                        "source": "OpenSanctions PEP (Cached)",
-                                        "name": entry.get("name", ""),
-                                        "score": score,
-                                        "details": {
-                                            "reason": "Match from cached data",
-                                            "list": "PEP Database",
-                                        },
-                                    }
-                                )
-
-                        if matches:
-                            logger.info(
-                                f"PEP check for {name} using cached data: {len(matches)} matches found"
-                            )
-                            return matches
-                    return []
-
-                if not isinstance(results, list):
-                    if isinstance(results, dict) and "results" in results:
-                        results = results.get("results", [])
-                    else:
-                        results = []
-
-                matches = []
-                for result in results:
-                    if not isinstance(result, dict):
-                        continue
-                        
-                    if (
-                        result.get("score", 0) > 0.6
-                    ):  # Threshold for considering a match
-                        matches.append(
-                            {
-                                "source": "OpenSanctions PEP",
-                                "name": result.get("name", ""),
-                                "score": result.get("score", 0),
-                                "details": result,
-                            }
-                        )
-
-                logger.info(f"PEP check for {name}: {len(matches)} matches found")
-                return matches
-            except Exception as e:
-                logger.warning(f"PEP check failed, trying cached data: {str(e)}")
-                pep_data_path = (
-                    Path.home()
-                    / "repos"
-                    / "Cortana"
-                    / "backend"
-                    / "data"
-                    / "sanctions"
-                    / "pep_cached.json"
+        if not isinstance(results, list):
+            if isinstance(results, dict) and "results" in results:
+                results = results.get("results", [])
+            else:
+                results = []
+
+        matches = []
+        for result in results:
+            if not isinstance(result, dict):
+                continue
+
+            if result.get("score", 0) > 0.6:  # Threshold for considering a match
+                matches.append(
+                    {
+                        "source": "OpenSanctions PEP",
+                        "name": result.get("caption") or result.get("name", ""),
+                        "score": result.get("score", 0),
+                        "details": result,
+                    }
                 )
-                if pep_data_path.exists():
-                    logger.info(f"Using cached PEP data from {pep_data_path}")
-                    with open(pep_data_path, "r") as f:
-                        cached_data = json.load(f)
-
-                    matches = []
-                    for entry in cached_data.get("entries", []):
-                        entry_name = entry.get("name", "").lower()
-                        entry_country = entry.get("country", "")
-                        entry_dob = entry.get("birth_date", "")
-
-                        name_match = (
-                            name.lower() in entry_name or entry_name in name.lower()
-                        )
-                        country_match = country == entry_country
-                        dob_match = dob and dob == entry_dob
-
-                        score = 0
-                        if name_match:
-                            score += 0.6
-                        if country_match:
-                            score += 0.2
-                        if dob_match:
-                            score += 0.2
-
-                        if score > 0.6:  # Threshold for considering a match
-                            matches.append(
-                                {
-                                    "source": "OpenSanctions PEP (Cached)",
-                                    "name": entry.get("name", ""),
-                                    "score": score,
-                                    "details": {
-                                        "reason": "Match from cached data",
-                                        "list": "PEP Database",
-                                    },
-                                }
-                            )
-
-                    if matches:
-                        logger.info(
-                            f"PEP check for {name} using cached data: {len(matches)} matches found"
-                        )
-                        return matches
-
-                if country == "VE" and "Maduro" in name:
-                    logger.warning("Using last-resort fallback for PEP check")
-                    return [
-                        {
-                            "source": "OpenSanctions PEP (Fallback)",
-                            "name": name,
-                            "score": 0.98,
-                            "details": {
-                                "reason": "Known PEP - President of Venezuela",
-                                "fallback": True,
-                            },
-                        }
-                    ]
-                return []
-        except Exception as e:
-            logger.error(f"Error checking PEP for {entity.get('name', '')}: {str(e)}")
+
+        logger.info(f"PEP check for {name}: {len(matches)} matches found")
+        return matches
+
+    async def _cached_pep(self, entity: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Check if entity is a PEP against the cached PEP list."""
+        name = entity.get("name", "")
+        country = entity.get("country", "")
+        dob = entity.get("dob", "")
+
+        matches = await asyncio.to_thread(self._match_cached_pep, name, country, dob)
+        if matches:
+            logger.info(
+                f"PEP check for {name} using cached data: {len(matches)} matches found"
+            )
+            return matches
+
+        if country == "VE" and "Maduro" in name:
+            logger.warning("Using last-resort fallback for PEP check")
+            return [
+                {
+                    "source": "OpenSanctions PEP (Fallback)",
+                    "name": name,
+                    "score": 0.98,
+                    "details": {
+                        "reason": "Known PEP - President of Venezuela",
+                        "fallback": True,
+                    },
+                }
+            ]
+        return []
+
+    def _match_cached_pep(self, name: str, country: str, dob: str) -> List[Dict[str, Any]]:
+        """
+        Match an entity against the cached PEP list. The fuzzy name score
+        weighs 0.6 and a matching country and birth date 0.2 each, so a
+        close name needs one of the two to count as a match.
+        """
+        bonus = 0.2 * bool(country) + 0.2 * bool(dob)
+        if bonus == 0:
             return []
+        # Names scoring lower cannot pass the threshold even with the bonuses.
+        min_name_score = (0.6 - bonus) / 0.6
+        candidates = sanctions_engine.refresh("pep").search(name, min_name_score, limit=MAX_CANDIDATES)
+
+        matches = []
+        for name_score, entry, _ in candidates:
+            country_match = bool(country) and country == entry.get("country", "")
+            dob_match = bool(dob) and dob == entry.get("birth_date", "")
+
+            score = round(name_score * 0.6 + 0.2 * country_match + 0.2 * dob_match, 4)
+            if score > 0.6:  # Threshold for considering a match
+                matches.append(
+                    {
+                        "source": "OpenSanctions PEP (Cached)",
+                        "name": entry.get("name", ""),
+                        "score": score,
+                        "details": {
+                            "reason": "Match from cached data",
+                            "list": "PEP Database",
+                            "name_score": name_score,
+                        },
+                    }
+                )
+        return sorted(matches, key=lambda match: match["score"], reverse=True)
 
     async def _check_open_sanctions(
         self, entity: Dict[str, Any]
     ) -> List[Dict[str, Any]]:
-        """Check if entity is in OpenSanctions."""
-        try:
-            name = entity.get("name", "")
-            country = entity.get("country", "")
-            entity_type = entity.get("type", "Person")
+        """
+        Check if entity is in OpenSanctions. Raises SourceUnavailable if
+        the API fails.
+        """
+        name = entity.get("name", "")
+        country = entity.get("country", "")
+        entity_type = entity.get("type", "Person")
+
+        results = await self.open_sanctions_client.match_entity(
+            self.open_sanctions_client.entity_query(
+                name, entity_type, country=country
+            ),
+            dataset="default",
+        )
 
-            try:
-                results = await self.open_sanctions_client.search_sanctions(
-                    name=name, country=country, entity_type=entity_type
-                )
+        if isinstance(results, dict) and "error" in results:
+            raise SourceUnavailable(f"Sanctions API error: {results.get('error')}")
 
-                if isinstance(results, dict) and "error" in results:
-                    logger.warning(f"Sanctions API error: {results.get('error')}")
-                    opensanctions_data_path = (
-                        Path.home()
-                        / "repos"
-                        / "Cortana"
-                        / "backend"
-                        / "data"
-                        / "sanctions"
-                        / "opensanctions_cached.json"
-                    )
-                    if opensanctions_data_path.exists():
-                        logger.info(
-                            f"Using cached OpenSanctions data from {opensanctions_data_path}"
-                        )
-                        with open(opensanctions_data_path, "r") as f:
-                            cached_data = json.load(f)
-
-                        matches = []
-                        for entry in cached_data.get("entries", []):
-                            if name.lower() in entry.get(
-                                "name", ""
-                            ).lower() or country == entry.get("country", ""):
-                                matches.append(
-                                    {
-                                        "source": "OpenSanctions (Cached)",
-                                        "name": entry.get("name", ""),
-                                        "score": 0.85,
-                                        "details": {
-                                            "reason": "Match from cached data",
-                                            "list": "OpenSanctions",
-                                        },
-                                    }
-                                )
-
-                        if matches:
-                            logger.info(
-                                f"OpenSanctions check for {name} using cached data: {len(matches)} matches found"
-                            )
-                            return matches
-                    return []
-
-                if not isinstance(results, list):
-                    if isinstance(results, dict) and "results" in results:
-                        results = results.get("results", [])
-                    else:
-                        results = []
-
-                matches = []
-                for result in results:
-                    if not isinstance(result, dict):
-                        continue
-                        
-                    if result.get("score", 0) > 0.7:  # Higher threshold for sanctions
-                        matches.append(
-                            {
-                                "source": "OpenSanctions",
-                                "name": result.get("name", ""),
-                                "score": result.get("score", 0),
-                                "details": result,
-                            }
-                        )
-
-                logger.info(
-                    f"OpenSanctions check for {name}: {len(matches)} matches found"
-                )
-                return matches
-            except Exception as e:
-                logger.warning(
-                    f"OpenSanctions check failed, trying cached data: {str(e)}"
-                )
-                opensanctions_data_path = (
-                    Path.home()
-                    / "repos"
-                    / "Cortana"
-                    / "backend"
-                    / "data"
-                    / "sanctions"
-                    / "opensanctions_cached.json"
+        if not isinstance(results, list):
+            if isinstance(results, dict) and "results" in results:
+                results = results.get("results", [])
+            else:
+                results = []
+
+        matches = []
+        for result in results:
+            if not isinstance(result, dict):
+                continue
+
+            if result.get("score", 0) > 0.7:  # Higher threshold for sanctions
+                matches.append(
+                    {
+                        "source": "OpenSanctions",
+                        "name": result.get("caption") or result.get("name", ""),
+                        "score": result.get("score", 0),
+                        "details": result,
+                    }
                 )
-                if opensanctions_data_path.exists():
-                    logger.info(
-                        f"Using cached OpenSanctions data from {opensanctions_data_path}"
-                    )
-                    with open(opensanctions_data_path, "r") as f:
-                        cached_data = json.load(f)
-
-                    matches = []
-                    for entry in cached_data.get("entries", []):
-                        if name.lower() in entry.get(
-                            "name", ""
-                        ).lower() or country == entry.get("country", ""):
-                            matches.append(
-                                {
-                                    "source": "OpenSanctions (Cached)",
-                                    "name": entry.get("name", ""),
-                                    "score": 0.85,
-                                    "details": {
-                                        "reason": "Match from cached data",
-                                        "list": "OpenSanctions",
-                                    },
-                                }
-                            )
-
-                    if matches:
-                        logger.info(
-                            f"OpenSanctions check for {name} using cached data: {len(matches)} matches found"
-                        )
-                        return matches
-
-                if country == "VE" and "Maduro" in name:
-                    logger.warning("Using last-resort fallback for OpenSanctions check")
-                    return [
-                        {
-                            "source": "OpenSanctions (Fallback)",
-                            "name": name,
-                            "score": 0.95,
-                            "details": {
-                                "reason": "Known sanctioned individual",
-                                "fallback": True,
-                            },
-                        }
-                    ]
-                return []
-        except Exception as e:
-            logger.error(
-                f"Error checking OpenSanctions for {entity.get('name', '')}: {str(e)}"
+
+        logger.info(f"OpenSanctions check for {name}: {len(matches)} matches found")
+        return matches
+
+    async def _cached_open_sanctions(
+        self, entity: Dict[str, Any]
+    ) -> List[Dict[str, Any]]:
+        """Check if entity is in the cached OpenSanctions list."""
+        name = entity.get("name", "")
+        country = entity.get("country", "")
+
+        matches = await asyncio.to_thread(sanctions_engine.screen, "opensanctions", name, country)
+        if matches:
+            logger.info(
+                f"OpenSanctions check for {name} using cached data: {len(matches)} matches found"
             )
-            return []
+            return matches
+
+        if country == "VE" and "Maduro" in name:
+            logger.warning("Using last-resort fallback for OpenSanctions check")
+            return [
+                {
+                    "source": "OpenSanctions (Fallback)",
+                    "name": name,
+                    "score": 0.95,
+                    "details": {
+                        "reason": "Known sanctioned individual",
+                        "fallback": True,
+                    },
+                }
+            ]
+        return []
 
     async def _check_ofac(self, entity: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Check if entity is in OFAC sanctions list."""
@@ -534,42 +532,12 @@ class UnifiedVerificationService:
             country = entity.get("country", "")
 
             try:
-                ofac_data_path = (
-                    Path.home()
-                    / "repos"
-                    / "Cortana"
-                    / "backend"
-                    / "data"
-                    / "sanctions"
-                    / "ofac_cached.json"
-                )
-                if ofac_data_path.exists():
-                    logger.info(f"Using cached OFAC data from {ofac_data_path}")
-                    with open(ofac_data_path, "r") as f:
-                        cached_data = json.load(f)
-
-                    matches = []
-                    for entry in cached_data.get("entries", []):
-                        if name.lower() in entry.get(
-                            "name", ""
-                        ).lower() or country == entry.get("country", ""):
-                            matches.append(
-                                {
-                                    "source": "OFAC (Cached)",
-                                    "name": entry.get("name", ""),
-                                    "score": 0.85,  # Estimated match score
-                                    "details": {
-                                        "reason": "Match from cached data",
-                                        "list": "OFAC",
-                                    },
-                                }
-                            )
-
-                    if matches:
-                        logger.info(
-                            f"OFAC check for {name} using cached data: {len(matches)} matches found"
-                        )
-                        return matches
+                matches = await asyncio.to_thread(sanctions_engine.screen, "ofac", name, country)
+                if matches:
+                    logger.info(
+                        f"OFAC check for {name} using cached data: {len(matches)} matches found"
+                    )
+                    return matches
             except Exception as e:
                 logger.warning(f"OFAC API and cached data check failed: {str(e)}")
 
@@ -600,42 +568,12 @@ class UnifiedVerificationService:
             country = entity.get("country", "")
 
             try:
-                un_data_path = (
-                    Path.home()
-                    / "repos"
-                    / "Cortana"
-                    / "backend"
-                    / "data"
-                    / "sanctions"
-                    / "un_cached.json"
-                )
-                if un_data_path.exists():
-                    logger.info(f"Using cached UN data from {un_data_path}")
-                    with open(un_data_path, "r") as f:
-                        cached_data = json.load(f)
-
-                    matches = []
-                    for entry in cached_data.get("entries", []):
-                        if name.lower() in entry.get(
-                            "name", ""
-                        ).lower() or country == entry.get("country", ""):
-                            matches.append(
-                                {
-                                    "source": "UN (Cached)",
-                                    "name": entry.get("name", ""),
-                                    "score": 0.85,  # Estimated match score
-                                    "details": {
-                                        "reason": "Match from cached data",
-                                        "list": "UN Sanctions",
-                                    },
-                                }
-                            )
-
-                    if matches:
-                        logger.info(
-                            f"UN check for {name} using cached data: {len(matches)} matches found"
-                        )
-                        return matches
+                matches = await asyncio.to_thread(sanctions_engine.screen, "un", name, country)
+                if matches:
+                    logger.info(
+                        f"UN check for {name} using cached data: {len(matches)} matches found"
+                    )
+                    return matches
             except Exception as e:
                 logger.warning(f"UN API and cached data check failed: {str(e)}")
 
@@ -666,42 +604,12 @@ class UnifiedVerificationService:
             country = entity.get("country", "")
 
             try:
-                eu_data_path = (
-                    Path.home()
-                    / "repos"
-                    / "Cortana"
-                    / "backend"
-                    / "data"
-                    / "sanctions"
-                    / "eu_cached.json"
-                )
-                if eu_data_path.exists():
-                    logger.info(f"Using cached EU data from {eu_data_path}")
-                    with open(eu_data_path, "r") as f:
-                        cached_data = json.load(f)
-
-                    matches = []
-                    for entry in cached_data.get("entries", []):
-                        if name.lower() in entry.get(
-                            "name", ""
-                        ).lower() or country == entry.get("country", ""):
-                            matches.append(
-                                {
-                                    "source": "EU (Cached)",
-                                    "name": entry.get("name", ""),
-                                    "score": 0.85,  # Estimated match score
-                                    "details": {
-                                        "reason": "Match from cached data",
-                                        "list": "EU Sanctions",
-                                    },
-                                }
-                            )
-
-                    if matches:
-                        logger.info(
-                            f"EU check for {name} using cached data: {len(matches)} matches found"
-                        )
-                        return matches
+                matches = await asyncio.to_thread(sanctions_engine.screen, "eu", name, country)
+                if matches:
+                    logger.info(
+                        f"EU check for {name} using cached data: {len(matches)} matches found"
+                    )
+                    return matches
             except Exception as e:
                 logger.warning(f"EU API and cached data check failed: {str(e)}")
 
@@ -740,16 +648,20 @@ class UnifiedVerificationService:
         sanctions_matches: List[Dict[str, Any]],
         country_code: str,
     ) -> float:
-        """Calculate risk score based on matches and country risk."""
+        """
+        Calculate risk score based on matches and country risk. The base
+        weight of PEP and sanctions matches scales with the best match
+        score, so a close fuzzy match counts for more than a weak one.
+        """
         score = 0.0
 
         if pep_matches:
-            score += 0.5
+            score += 0.5 * max(match.get("score", 0) for match in pep_matches)
             for match in pep_matches:
                 score += match.get("score", 0) * 0.2
 
         if sanctions_matches:
-            score += 0.8
+            score += 0.8 * max(match.get("score", 0) for match in sanctions_matches)
             for match in sanctions_matches:
                 score += match.get("score", 0) * 0.3
 
@@ -937,6 +849,14 @@ class UnifiedVerificationService:
             )
             sanctions_screening_results_db.create(sanctions_result)
 
+        # With group commit enabled the records above are only queued; make
+        # sure they are on disk before the report id is handed out.
+        await asyncio.gather(
+            compliance_reports_db.flush(),
+            pep_screening_results_db.flush(),
+            sanctions_screening_results_db.flush(),
+        )
+
         return report_id
 
     async def get_all_countries_risk(self) -> Dict[str, Any]:
@@ -0,0 +1,264 @@
+"""
+Bulk client verification jobs, behind POST /compliance/verify-all.
+
+submit() records a job and returns right away, or returns the job
+already queued or running if there is one. The job runs in the
+background: a producer streams every client in id order, with no page
+cap, into a bounded queue, and COMPLIANCE_JOB_WORKERS workers screen them
+with unified_verification_service.verify_customer().
+
+The outcome for each client, verified or error, is checkpointed as one
+record of verification_job_results_db as soon as it is known. If the
+process stops mid-job, resume_jobs() (run on startup) restarts every job
+that was queued or running and skips the clients that already have a
+result.
+
+progress() reports the counts of a job from an aggregate of the results
+store. watch() yields them each time they change until the job finishes,
+for the streaming status endpoint.
+"""
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional
+
+from app.core.config import settings
+from app.db.in_memory import verification_job_results_db, verification_jobs_db
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+ACTIVE_STATUSES = (JOB_QUEUED, JOB_RUNNING)
+
+RESULT_VERIFIED = "verified"
+RESULT_ERROR = "error"
+
+
+def _iter_all_clients() -> Iterator[Any]:
+    from app.legal.services import iter_clients
+
+    return iter_clients()
+
+
+def _count_clients() -> int:
+    from app.legal.services import clients_db
+
+    return clients_db.count()
+
+
+async def _verify_client(client: Any) -> Dict[str, Any]:
+    from app.services.compliance.schemas.verify import CustomerVerifyRequest, EntityBase
+    from app.services.compliance.services.unified_verification_service import unified_verification_service
+
+    customer_data = {
+        "name": client.name,
+        "country": getattr(client, "country", "PA"),
+        "type": getattr(client, "client_type", "natural"),
+    }
+    request = CustomerVerifyRequest(customer=EntityBase(**customer_data))
+    return await unified_verification_service.verify_customer(request)
+
+
+def _isoformat(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+class VerificationJobManager:
+    """Runs bulk verification jobs and reports their progress."""
+
+    def __init__(
+        self,
+        jobs_db=None,
+        results_db=None,
+        workers: Optional[int] = None,
+        clients: Callable[[], Iterator[Any]] = _iter_all_clients,
+        count_clients: Callable[[], int] = _count_clients,
+        verify: Callable[[Any], Any] = _verify_client,
+    ):
+        self.jobs_db = jobs_db or verification_jobs_db
+        self.results_db = results_db or verification_job_results_db
+        self.workers = workers
+        self.clients = clients
+        self.count_clients = count_clients
+        self.verify = verify
+        self._tasks: Dict[int, asyncio.Task] = {}
+
+    def submit(self) -> Dict[str, Any]:
+        """
+        Create a job over all clients and start it, unless a job is already
+        queued or running; then return that job instead. Call from the event
+        loop.
+        """
+        active = self.jobs_db.filter(lambda job: job["status"] in ACTIVE_STATUSES)
+        if active:
+            job_id = min(job["id"] for job in active)
+            logger.info(f"Verification job {job_id} is already active")
+            if job_id not in self._tasks:
+                self._start(job_id)
+            return self.progress(job_id)
+
+        job_id = self.jobs_db.create({
+            "status": JOB_QUEUED,
+            "total_clients": self.count_clients(),
+            "created_at": datetime.now(),
+            "started_at": None,
+            "finished_at": None,
+            "error": None,
+        })
+        logger.info(f"Submitted verification job {job_id}")
+        self._start(job_id)
+        return self.progress(job_id)
+
+    def resume_jobs(self) -> List[int]:
+        """Restart the jobs that were queued or running when the process stopped."""
+        resumed = []
+        for job in self.jobs_db.filter(lambda job: job["status"] in ACTIVE_STATUSES):
+            if job["id"] not in self._tasks:
+                logger.info(f"Resuming verification job {job['id']}")
+                self._start(job["id"])
+                resumed.append(job["id"])
+        return resumed
+
+    async def shutdown(self) -> None:
+        """Stop the running jobs; they stay active in the store and resume on startup."""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _start(self, job_id: int) -> None:
+        task = asyncio.get_running_loop().create_task(self._run(job_id))
+        self._tasks[job_id] = task
+        task.add_done_callback(lambda _: self._forget(job_id, task))
+
+    def _forget(self, job_id: int, task: asyncio.Task) -> None:
+        if self._tasks.get(job_id) is task:
+            del self._tasks[job_id]
+
+    def _update(self, job_id: int, **fields: Any) -> None:
+        self.jobs_db.update(job_id, {**self.jobs_db.get(job_id), **fields})
+
+    async def _run(self, job_id: int) -> None:
+        done = {
+            result["client_id"]
+            for result in self.results_db.filter(lambda result: result["job_id"] == job_id)
+        }
+        job = self.jobs_db.get(job_id)
+        self._update(
+            job_id,
+            status=JOB_RUNNING,
+            started_at=job["started_at"] or datetime.now(),
+            total_clients=self.count_clients(),
+        )
+
+        workers = max(1, self.workers or settings.COMPLIANCE_JOB_WORKERS)
+        queue: "asyncio.Queue[Any]" = asyncio.Queue(maxsize=workers * 2)
+        tasks = [asyncio.create_task(self._work(job_id, queue)) for _ in range(workers)]
+        try:
+            for client in self.clients():
+                if client.id not in done:
+                    await queue.put(client)
+            for _ in tasks:
+                await queue.put(None)
+            await asyncio.gather(*tasks)
+        except asyncio.CancelledError:
+            # Leave the job active so that resume_jobs() picks it up.
+            for task in tasks:
+                task.cancel()
+            raise
+        except Exception as e:
+            for task in tasks:
+                task.cancel()
+            logger.error(f"Verification job {job_id} failed: {str(e)}")
+            self._update(job_id, status=JOB_FAILED, error=str(e), finished_at=datetime.now())
+            return
+
+        counts = self.results_db.aggregate("job_status")
+        processed = counts.count((job_id, RESULT_VERIFIED)) + counts.count((job_id, RESULT_ERROR))
+        self._update(job_id, status=JOB_COMPLETED, total_clients=processed, finished_at=datetime.now())
+        logger.info(f"Verification job {job_id} completed: {processed} clients")
+
+    async def _work(self, job_id: int, queue: "asyncio.Queue[Any]") -> None:
+        while True:
+            client = await queue.get()
+            if client is None:
+                return
+            result = {"job_id": job_id, "client_id": client.id, "client_name": client.name}
+            try:
+                result["verification_result"] = await self.verify(client)
+                result["status"] = RESULT_VERIFIED
+            except Exception as e:
+                logger.error(f"Error verifying client {client.id}: {str(e)}")
+                result["status"] = RESULT_ERROR
+                result["error"] = str(e)
+            result["completed_at"] = datetime.now()
+            self.results_db.create(result)
+
+    def progress(self, job_id: int) -> Optional[Dict[str, Any]]:
+        """The status and counts of a job, or None if there is no such job."""
+        job = self.jobs_db.get(job_id)
+        if job is None:
+            return None
+        counts = self.results_db.aggregate("job_status")
+        verified = counts.count((job_id, RESULT_VERIFIED))
+        errors = counts.count((job_id, RESULT_ERROR))
+        return {
+            "job_id": job_id,
+            "status": job["status"],
+            "total_clients": job["total_clients"],
+            "processed": verified + errors,
+            "verified_count": verified,
+            "error_count": errors,
+            "created_at": _isoformat(job["created_at"]),
+            "started_at": _isoformat(job["started_at"]),
+            "finished_at": _isoformat(job["finished_at"]),
+            "error": job["error"],
+        }
+
+    def results(self, job_id: int, after_client_id: Optional[int] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """The checkpointed results of a job, by client id, after ``after_client_id``."""
+        results = self.results_db.filter(
+            lambda result: result["job_id"] == job_id
+            and (after_client_id is None or result["client_id"] > after_client_id)
+        )
+        results.sort(key=lambda result: result["client_id"])
+        return [
+            {**result, "completed_at": _isoformat(result["completed_at"])}
+            for result in results[:limit]
+        ]
+
+    async def watch(self, job_id: int, heartbeat: float = 15.0) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield the progress of a job whenever it changes, and at least every
+        ``heartbeat`` seconds, until the job is no longer active.
+        """
+        jobs = self.jobs_db.changes.subscribe()
+        results = self.results_db.changes.subscribe()
+        try:
+            last = None
+            while True:
+                progress = self.progress(job_id)
+                if progress is None:
+                    return
+                if progress != last:
+                    yield progress
+                    last = progress
+                if progress["status"] not in ACTIVE_STATUSES:
+                    return
+                waiters = [asyncio.ensure_future(jobs.get()), asyncio.ensure_future(results.get())]
+                done, pending = await asyncio.wait(
+                    waiters, timeout=heartbeat, return_when=asyncio.FIRST_COMPLETED
+                )
+                for waiter in pending:
+                    waiter.cancel()
+                if not done:
+                    last = None
+        finally:
+            jobs.close()
+            results.close()
+
+
+verification_jobs = VerificationJobManager()
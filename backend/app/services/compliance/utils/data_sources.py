@@ -4,9 +4,11 @@ import logging
 import json
 import aiohttp
 import asyncio
-from datetime import datetime, timedelta
 import hashlib
 
+from app.core.cache import ResponseCache
+from app.core.http import http_pool
+
 logger = logging.getLogger(__name__)
 
 UN_SANCTIONS_URL = "https://main.un.org/securitycouncil/api/consolidated-list"
@@ -21,7 +23,8 @@ EU_API_TOKEN = os.environ.get("EU_API_TOKEN", "")
 GLEIF_TOKEN = os.environ.get("GLEIF_TOKEN", "")
 
 CACHE_DIR = "data_sources_cache"
-os.makedirs(CACHE_DIR, exist_ok=True)
+# Shared by all data sources; their cache keys include the source name.
+response_cache = ResponseCache("data_sources", CACHE_DIR)
 
 class DataSourceClient:
     """Base class for data source clients"""
@@ -30,22 +33,19 @@ class DataSourceClient:
         self.source_name = source_name
         self.api_url = api_url
         self.api_key = api_key
-        self.session = None
         self.cache_ttl_hours = 24  # Default cache TTL
 
     async def _get_session(self) -> aiohttp.ClientSession:
-        """Get or create an aiohttp session"""
-        if self.session is None or self.session.closed:
-            headers = {}
-            if self.api_key:
-                headers["Authorization"] = f"Bearer {self.api_key}"
-            self.session = aiohttp.ClientSession(headers=headers)
-        return self.session
+        """Get the shared session of the application's connection pool"""
+        return http_pool.session()
 
-    async def close(self) -> None:
-        """Close the aiohttp session"""
-        if self.session and not self.session.closed:
-            await self.session.close()
+    def _headers(self, **extra: str) -> Dict[str, str]:
+        """Headers for a request: the API key as bearer token, then extra"""
+        headers = {}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        headers.update(extra)
+        return headers
 
     def _get_cache_key(self, endpoint: str, params: Dict[str, Any]) -> str:
         """Generate a cache key for a request"""
@@ -53,35 +53,16 @@ class DataSourceClient:
         key = f"{self.source_name}:{endpoint}:{params_str}"
         return hashlib.md5(key.encode()).hexdigest()
 
-    def _get_cached_response(self, cache_key: str) -> Optional[Dict[str, Any]]:
+    async def _get_cached_response(self, cache_key: str) -> Optional[Dict[str, Any]]:
         """Get a cached response if it exists and is not expired"""
-        cache_file = os.path.join(CACHE_DIR, f"{cache_key}.json")
-        if os.path.exists(cache_file):
-            try:
-                with open(cache_file, 'r') as f:
-                    cached_data = json.load(f)
-                
-                cached_time = datetime.fromisoformat(cached_data.get("cached_at", "2000-01-01T00:00:00"))
-                if datetime.utcnow() - cached_time < timedelta(hours=self.cache_ttl_hours):
-                    logger.info(f"Using cached response for {cache_key}")
-                    return cached_data.get("data")
-            except Exception as e:
-                logger.error(f"Error reading cache: {str(e)}")
-        
-        return None
+        cached = await response_cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"Using cached response for {cache_key}")
+        return cached
 
-    def _cache_response(self, cache_key: str, response: Dict[str, Any]) -> None:
-        """Cache a response"""
-        cache_file = os.path.join(CACHE_DIR, f"{cache_key}.json")
-        try:
-            with open(cache_file, 'w') as f:
-                json.dump({
-                    "cached_at": datetime.utcnow().isoformat(),
-                    "data": response
-                }, f)
-            logger.info(f"Cached response for {cache_key}")
-        except Exception as e:
-            logger.error(f"Error caching response: {str(e)}")
+    async def _cache_response(self, cache_key: str, response: Dict[str, Any]) -> None:
+        """Cache a response for cache_ttl_hours"""
+        await response_cache.set(cache_key, response, ttl_seconds=self.cache_ttl_hours * 3600)
 
     async def search_entity(self, name: str, **kwargs) -> Dict[str, Any]:
         """Search for an entity - to be implemented by subclasses"""
@@ -102,7 +83,7 @@ class UNSanctionsClient(DataSourceClient):
             params["nationality"] = country
         
         cache_key = self._get_cache_key("/search", params)
-        cached = self._get_cached_response(cache_key)
+        cached = await self._get_cached_response(cache_key)
         if cached:
             return cached
         
@@ -110,10 +91,10 @@ class UNSanctionsClient(DataSourceClient):
             session = await self._get_session()
             url = f"{self.api_url}/search"
             
-            async with session.get(url, params=params) as response:
+            async with session.get(url, params=params, headers=self._headers()) as response:
                 if response.status == 200:
                     result = await response.json()
-                    self._cache_response(cache_key, result)
+                    await self._cache_response(cache_key, result)
                     return result
                 else:
                     error_text = await response.text()
@@ -158,7 +139,7 @@ class OFACSanctionsClient(DataSourceClient):
         params = {"name": name, "type": entity_type}
         
         cache_key = self._get_cache_key("/sdn/search", params)
-        cached = self._get_cached_response(cache_key)
+        cached = await self._get_cached_response(cache_key)
         if cached:
             return cached
         
@@ -171,7 +152,7 @@ class OFACSanctionsClient(DataSourceClient):
         
         if matches:
             result = {"data": matches}
-            self._cache_response(cache_key, result)
+            await self._cache_response(cache_key, result)
             return result
         
         if self.api_key:
@@ -179,12 +160,12 @@ class OFACSanctionsClient(DataSourceClient):
                 session = await self._get_session()
                 url = f"{self.api_url}/sdn/search"
                 
-                headers = {"X-API-KEY": self.api_key}
+                headers = self._headers(**{"X-API-KEY": self.api_key})
                 
                 async with session.get(url, params=params, headers=headers) as response:
                     if response.status == 200:
                         result = await response.json()
-                        self._cache_response(cache_key, result)
+                        await self._cache_response(cache_key, result)
                         return result
                     else:
                         error_text = await response.text()
@@ -211,7 +192,7 @@ class EUSanctionsClient(DataSourceClient):
             params["country"] = country
         
         cache_key = self._get_cache_key("/sanctions/search", params)
-        cached = self._get_cached_response(cache_key)
+        cached = await self._get_cached_response(cache_key)
         if cached:
             return cached
         
@@ -219,14 +200,14 @@ class EUSanctionsClient(DataSourceClient):
             session = await self._get_session()
             url = f"{self.api_url}/sanctions/search"
             
-            headers = {}
+            headers = self._headers()
             if self.api_key:
                 headers["Authorization"] = f"Token {self.api_key}"
             
             async with session.get(url, params=params, headers=headers) as response:
                 if response.status == 200:
                     result = await response.json()
-                    self._cache_response(cache_key, result)
+                    await self._cache_response(cache_key, result)
                     return result
                 else:
                     error_text = await response.text()
@@ -274,22 +255,22 @@ class WikidataClient(DataSourceClient):
         params = {"query": query, "format": "json"}
         
         cache_key = self._get_cache_key("/sparql", params)
-        cached = self._get_cached_response(cache_key)
+        cached = await self._get_cached_response(cache_key)
         if cached:
             return cached
         
         try:
             session = await self._get_session()
             
-            headers = {
+            headers = self._headers(**{
                 "Accept": "application/sparql-results+json",
                 "User-Agent": "ComplianceServiceBot/1.0"
-            }
+            })
             
             async with session.post(self.api_url, data=params, headers=headers) as response:
                 if response.status == 200:
                     result = await response.json()
-                    self._cache_response(cache_key, result)
+                    await self._cache_response(cache_key, result)
                     return result
                 else:
                     error_text = await response.text()
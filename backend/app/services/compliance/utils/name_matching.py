@@ -0,0 +1,211 @@
+"""
+Fuzzy name matching for PEP and sanctions screening.
+
+Names are folded first: accents are stripped, common non-ASCII Latin and
+Cyrillic letters are transliterated, and case and punctuation are dropped,
+so "Nicolás MADURO-Moros" and "Николас Мадуро" compare as plain ASCII.
+
+A pair of names is scored in [0, 1] by pairing every token with its most
+similar token in the other name: Jaro-Winkler similarity, where anything
+below TOKEN_THRESHOLD counts as no match and an initial matches any token
+starting with it at INITIAL_SCORE. Token order does not matter. The share
+of the query that is covered weighs twice the share of the candidate that
+is covered, so "Maduro" scores high against "Nicolas Maduro Moros" but two
+people who only share a first name do not. Names that are equal once
+spaces are removed ("Mohammed Ali", "MohammedAli") score 1.
+
+Everything is computed on NumPy arrays for all pairs at once: score_pairs()
+scores a[i] against b[i], score_names() one query against a candidate
+block, and score_batch() every query of a batch against every candidate.
+"""
+import re
+import unicodedata
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+TOKEN_THRESHOLD = 0.8
+INITIAL_SCORE = 0.9
+PREFIX_SCALE = 0.1
+# Pairs scored per NumPy pass in score_batch(), to bound memory.
+BATCH_PAIRS = 20_000
+
+_SEPARATORS = re.compile(r"[^\w]+")
+
+_TRANSLITERATION = str.maketrans({
+    "ß": "ss", "æ": "ae", "œ": "oe", "ø": "o", "ł": "l", "đ": "d", "ð": "d", "þ": "th", "ı": "i",
+    "а": "a", "б": "b", "в": "v", "г": "g", "д": "d", "е": "e", "ё": "e", "ж": "zh", "з": "z",
+    "и": "i", "й": "i", "к": "k", "л": "l", "м": "m", "н": "n", "о": "o", "п": "p", "р": "r",
+    "с": "s", "т": "t", "у": "u", "ф": "f", "х": "kh", "ц": "ts", "ч": "ch", "ш": "sh",
+    "щ": "shch", "ъ": "", "ы": "y", "ь": "", "э": "e", "ю": "yu", "я": "ya", "і": "i", "ї": "i",
+    "є": "ie", "ґ": "g",
+})
+
+
+def fold_name(name: str) -> str:
+    """Transliterate, strip accents, lowercase and collapse punctuation and whitespace."""
+    folded = (name or "").lower()
+    if not folded.isascii():
+        folded = unicodedata.normalize("NFKD", folded.translate(_TRANSLITERATION))
+        folded = "".join(c for c in folded if not unicodedata.combining(c))
+    return " ".join(_SEPARATORS.sub(" ", folded).split())
+
+
+def _fold_all(names: Sequence[str]) -> List[str]:
+    """fold_name() of each name, folding repeated names once."""
+    folded = {name: fold_name(name) for name in set(names)}
+    return [folded[name] for name in names]
+
+
+def _encode(strings: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """Code points of strings as a zero-padded (n, width) matrix, and their lengths."""
+    lengths = np.fromiter((len(s) for s in strings), dtype=np.int64, count=len(strings))
+    width = max(int(lengths.max()) if len(strings) else 0, 1)
+    buffer = "".join(s.ljust(width, "\0") for s in strings).encode("utf-32-le")
+    return np.frombuffer(buffer, dtype=np.uint32).reshape(len(strings), width), lengths
+
+
+def jaro_winkler_pairs(a: Sequence[str], b: Sequence[str]) -> np.ndarray:
+    """Jaro-Winkler similarity of a[i] and b[i] for every i; 0 if either is empty."""
+    if len(a) != len(b):
+        raise ValueError("jaro_winkler_pairs needs two sequences of the same length")
+    n = len(a)
+    if n == 0:
+        return np.zeros(0)
+    a_codes, a_len = _encode(a)
+    b_codes, b_len = _encode(b)
+    rows = np.arange(n)
+    a_positions = np.arange(a_codes.shape[1])[None, :, None]
+    b_positions = np.arange(b_codes.shape[1])[None, None, :]
+    window = np.maximum(np.maximum(a_len, b_len) // 2 - 1, 0)[:, None, None]
+    # Every character pair of every name pair that may match: equal, within
+    # the window, and inside both names.
+    matchable = (
+        (a_codes[:, :, None] == b_codes[:, None, :])
+        & (np.abs(a_positions - b_positions) <= window)
+        & (a_positions < a_len[:, None, None])
+        & (b_positions < b_len[:, None, None])
+    )
+    open_b = np.ones(b_codes.shape, dtype=bool)
+    matched_a = np.zeros(a_codes.shape, dtype=bool)
+
+    # Walk the characters of a, matching each to the first unmatched
+    # matchable character of b, for all pairs at once.
+    for i in range(a_codes.shape[1]):
+        candidates = matchable[:, i, :] & open_b
+        found = candidates.any(axis=1)
+        if not found.any():
+            continue
+        first = candidates.argmax(axis=1)
+        open_b[rows[found], first[found]] = False
+        matched_a[found, i] = True
+
+    matched_b = ~open_b
+    matches = matched_a.sum(axis=1)
+    # Half the matched characters that appear in a different order.
+    width = min(a_codes.shape[1], b_codes.shape[1])
+    a_order = np.argsort(~matched_a, axis=1, kind="stable")[:, :width]
+    b_order = np.argsort(~matched_b, axis=1, kind="stable")[:, :width]
+    out_of_order = (
+        (np.take_along_axis(a_codes, a_order, axis=1) != np.take_along_axis(b_codes, b_order, axis=1))
+        & (np.arange(width)[None, :] < matches[:, None])
+    )
+    transpositions = out_of_order.sum(axis=1) / 2
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        jaro = np.where(
+            matches > 0,
+            (matches / a_len + matches / b_len + (matches - transpositions) / matches) / 3,
+            0.0,
+        )
+    prefix_width = min(4, width)
+    same_prefix = (a_codes[:, :prefix_width] == b_codes[:, :prefix_width]) & (
+        np.arange(prefix_width)[None, :] < np.minimum(a_len, b_len)[:, None]
+    )
+    prefix = np.cumprod(same_prefix, axis=1).sum(axis=1)
+    return np.where(jaro > 0.7, jaro + prefix * PREFIX_SCALE * (1 - jaro), jaro)
+
+
+def _token_similarity(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Similarity of token pairs, where a one-letter token is an initial."""
+    scores = jaro_winkler_pairs(a.tolist(), b.tolist())
+    first_a = np.fromiter((t[0] for t in a), dtype="<U1", count=len(a))
+    first_b = np.fromiter((t[0] for t in b), dtype="<U1", count=len(b))
+    single = (np.char.str_len(a) == 1) ^ (np.char.str_len(b) == 1)
+    scores[single] = np.where(first_a[single] == first_b[single], INITIAL_SCORE, 0.0)
+    return scores
+
+
+def _token_ids(tokenized: List[List[str]]) -> Tuple[np.ndarray, np.ndarray]:
+    """Tokens as a -1 padded matrix of ids into the returned vocabulary."""
+    vocabulary: Dict[str, int] = {}
+    width = max((len(tokens) for tokens in tokenized), default=0) or 1
+    ids = np.full((len(tokenized), width), -1, dtype=np.int64)
+    for row, tokens in enumerate(tokenized):
+        for column, token in enumerate(tokens):
+            ids[row, column] = vocabulary.setdefault(token, len(vocabulary))
+    return ids, np.array(list(vocabulary) or [""], dtype=object)
+
+
+def _token_set_scores(a_tokens: List[List[str]], b_tokens: List[List[str]]) -> np.ndarray:
+    a_ids, a_vocabulary = _token_ids(a_tokens)
+    b_ids, b_vocabulary = _token_ids(b_tokens)
+    valid = (a_ids[:, :, None] >= 0) & (b_ids[:, None, :] >= 0)
+    keys = a_ids[:, :, None] * len(b_vocabulary) + b_ids[:, None, :]
+    # Each distinct token pair is scored once.
+    unique_keys, inverse = np.unique(keys[valid], return_inverse=True)
+    similarity = np.zeros(keys.shape)
+    if len(unique_keys):
+        similarity[valid] = _token_similarity(
+            a_vocabulary[unique_keys // len(b_vocabulary)].astype(str),
+            b_vocabulary[unique_keys % len(b_vocabulary)].astype(str),
+        )[inverse]
+    similarity[similarity < TOKEN_THRESHOLD] = 0.0
+
+    a_count = (a_ids >= 0).sum(axis=1)
+    b_count = (b_ids >= 0).sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        a_covered = np.where(a_count > 0, similarity.max(axis=2).sum(axis=1) / a_count, 0.0)
+        b_covered = np.where(b_count > 0, similarity.max(axis=1).sum(axis=1) / b_count, 0.0)
+    return (2 * a_covered + b_covered) / 3
+
+
+def score_pairs(a: Sequence[str], b: Sequence[str], folded: bool = False) -> np.ndarray:
+    """
+    Score a[i] against b[i] for every i. Pass ``folded=True`` for names that
+    already went through fold_name().
+    """
+    if len(a) != len(b):
+        raise ValueError("score_pairs needs two sequences of the same length")
+    if not len(a):
+        return np.zeros(0)
+    if not folded:
+        a, b = _fold_all(a), _fold_all(b)
+    scores = _token_set_scores([name.split() for name in a], [name.split() for name in b])
+    joined_a = np.array([name.replace(" ", "") for name in a])
+    joined_b = np.array([name.replace(" ", "") for name in b])
+    scores[(joined_a == joined_b) & (joined_a != "")] = 1.0
+    return np.round(scores, 4)
+
+
+def score_names(query: str, candidates: Sequence[str], folded: bool = False) -> np.ndarray:
+    """Score one query against a block of candidate names."""
+    if not folded:
+        query, candidates = fold_name(query), _fold_all(candidates)
+    return score_pairs([query] * len(candidates), candidates, folded=True)
+
+
+def score_batch(queries: Sequence[str], candidates: Sequence[str], folded: bool = False) -> np.ndarray:
+    """Score every query against every candidate, as a (queries, candidates) matrix."""
+    if not folded:
+        queries, candidates = _fold_all(queries), _fold_all(candidates)
+    scores = np.zeros((len(queries), len(candidates)))
+    if not len(candidates):
+        return scores
+    step = max(1, BATCH_PAIRS // len(candidates))
+    for start in range(0, len(queries), step):
+        chunk = queries[start:start + step]
+        a = [query for query in chunk for _ in candidates]
+        b = list(candidates) * len(chunk)
+        scores[start:start + len(chunk)] = score_pairs(a, b, folded=True).reshape(len(chunk), len(candidates))
+    return scores
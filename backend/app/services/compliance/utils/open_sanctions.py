@@ -4,9 +4,13 @@ import os
 import json
 import aiohttp
 import asyncio
-from datetime import datetime, timedelta
+import weakref
 import hashlib
 
+from app.core.cache import ResponseCache, SingleFlight
+from app.core.config import settings
+from app.core.http import http_pool
+
 logger = logging.getLogger(__name__)
 
 OPENSANCTIONS_API_URL = "https://api.opensanctions.org"
@@ -18,7 +22,26 @@ CACHE_DIR = (
 )
 CACHE_TTL_HOURS = 24  # Cache results for 24 hours
 
-CACHE_DIR.mkdir(parents=True, exist_ok=True)
+# FollowTheMoney schemas of the entity types used by the compliance models.
+ENTITY_SCHEMAS = {"natural": "Person", "legal": "LegalEntity"}
+
+response_cache = ResponseCache("opensanctions", CACHE_DIR)
+# Concurrent identical searches and match queries share one upstream request.
+in_flight = SingleFlight()
+
+
+class MatchRequestError(Exception):
+    """The API answered a match request with an error status."""
+
+    def __init__(self, message: str, status: int):
+        super().__init__(message)
+        self.status = status
+
+
+# Statuses of a bulk match request that one bad query can cause. Only these
+# are retried entity by entity; on any other error (rate limits, server
+# errors), more requests would only add to the upstream's load.
+QUERY_ERROR_STATUSES = (400, 422)
 
 
 class OpenSanctionsClient:
@@ -44,29 +67,28 @@ class OpenSanctionsClient:
             self.is_test_mode = False
 
         self.api_url = api_url or OPENSANCTIONS_API_URL
-        self.session = None
+        # Queries waiting for match_entity() to send them, per event loop.
+        self._match_queues = weakref.WeakKeyDictionary()
+        self._match_tasks = set()
 
     async def _get_session(self) -> aiohttp.ClientSession:
         """
-        Get or create an aiohttp session.
+        Get the shared session of the application's connection pool.
 
         Returns:
             aiohttp.ClientSession
         """
-        if self.session is None or self.session.closed:
-            self.session = aiohttp.ClientSession(
-                headers=(
-                    {"Authorization": f"ApiKey {self.api_key}"} if self.api_key else {}
-                )
-            )
-        return self.session
+        return http_pool.session()
 
-    async def close(self) -> None:
+    @property
+    def headers(self) -> Dict[str, str]:
         """
-        Close the aiohttp session.
+        Headers to send with every request.
+
+        Returns:
+            Request headers
         """
-        if self.session and not self.session.closed:
-            await self.session.close()
+        return {"Authorization": f"ApiKey {self.api_key}"} if self.api_key else {}
 
     def _get_cache_key(self, endpoint: str, params: Dict[str, Any]) -> str:
         """
@@ -83,7 +105,7 @@ class OpenSanctionsClient:
         key = f"{endpoint}:{params_str}"
         return hashlib.md5(key.encode()).hexdigest()
 
-    def _get_cached_response(self, cache_key: str) -> Optional[Dict[str, Any]]:
+    async def _get_cached_response(self, cache_key: str) -> Optional[Dict[str, Any]]:
         """
         Get a cached response if it exists and is not expired.
 
@@ -93,40 +115,23 @@ class OpenSanctionsClient:
         Returns:
             Cached response or None
         """
-        cache_file = CACHE_DIR / f"{cache_key}.json"
-        if cache_file.exists():
-            try:
-                with open(cache_file, "r") as f:
-                    cached_data = json.load(f)
-
-                cached_time = datetime.fromisoformat(
-                    cached_data.get("cached_at", "2000-01-01T00:00:00")
-                )
-                if datetime.utcnow() - cached_time < timedelta(hours=CACHE_TTL_HOURS):
-                    logger.info(f"Using cached response for {cache_key}")
-                    return cached_data.get("data")
-            except Exception as e:
-                logger.error(f"Error reading cache: {str(e)}")
-
-        return None
-
-    def _cache_response(self, cache_key: str, response: Dict[str, Any]) -> None:
+        cached = await response_cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"Using cached response for {cache_key}")
+        return cached
+
+    async def _cache_response(
+        self, cache_key: str, response: Dict[str, Any], ttl_hours: float = CACHE_TTL_HOURS
+    ) -> None:
         """
         Cache a response.
 
         Args:
             cache_key: Cache key
             response: Response to cache
+            ttl_hours: Hours the response stays valid
         """
-        cache_file = CACHE_DIR / f"{cache_key}.json"
-        try:
-            with open(cache_file, "w") as f:
-                json.dump(
-                    {"cached_at": datetime.utcnow().isoformat(), "data": response}, f
-                )
-            logger.info(f"Cached response for {cache_key}")
-        except Exception as e:
-            logger.error(f"Error caching response: {str(e)}")
+        await response_cache.set(cache_key, response, ttl_seconds=ttl_hours * 3600)
 
     async def search_entities(
         self,
@@ -160,7 +165,7 @@ class OpenSanctionsClient:
 
         cache_key = self._get_cache_key(endpoint, params)
         if use_cache:
-            cached = self._get_cached_response(cache_key)
+            cached = await self._get_cached_response(cache_key)
             if cached:
                 return cached
 
@@ -168,12 +173,12 @@ class OpenSanctionsClient:
             session = await self._get_session()
             url = f"{self.api_url}{endpoint}"
 
-            async with session.get(url, params=params) as response:
+            async with session.get(url, params=params, headers=self.headers) as response:
                 if response.status == 200:
                     result = await response.json()
 
                     if use_cache:
-                        self._cache_response(cache_key, result)
+                        await self._cache_response(cache_key, result)
 
                     return result
                 else:
@@ -207,7 +212,7 @@ class OpenSanctionsClient:
 
         cache_key = self._get_cache_key(endpoint, params)
         if use_cache:
-            cached = self._get_cached_response(cache_key)
+            cached = await self._get_cached_response(cache_key)
             if cached:
                 return cached
 
@@ -215,12 +220,12 @@ class OpenSanctionsClient:
             session = await self._get_session()
             url = f"{self.api_url}{endpoint}"
 
-            async with session.get(url) as response:
+            async with session.get(url, headers=self.headers) as response:
                 if response.status == 200:
                     result = await response.json()
 
                     if use_cache:
-                        self._cache_response(cache_key, result)
+                        await self._cache_response(cache_key, result)
 
                     return result
                 else:
@@ -292,52 +297,21 @@ class OpenSanctionsClient:
         if country:
             params["filter:country"] = country
 
-        endpoint = "/search/default"
-        cache_key = self._get_cache_key(endpoint, params)
-        if use_cache:
-            cached = self._get_cached_response(cache_key)
-            if cached:
-                return cached
-
-        try:
-            session = await self._get_session()
-            url = f"{self.api_url}{endpoint}"
+        result = await self._search("/search/default", params, use_cache, "PEPs")
 
-            async with session.get(url, params=params) as response:
-                if response.status == 200:
-                    result = await response.json()
-
-                    if birth_date and "results" in result:
-                        filtered_results = []
-                        for entity in result["results"]:
-                            entity_birth_date = entity.get("properties", {}).get(
-                                "birthDate", []
-                            )
-                            if any(
-                                bd.get("value") == birth_date
-                                for bd in entity_birth_date
-                            ):
-                                filtered_results.append(entity)
-
-                        result["results"] = filtered_results
-                        result["total"] = len(filtered_results)
-
-                    if use_cache:
-                        self._cache_response(cache_key, result)
+        if birth_date and "results" in result:
+            filtered_results = [
+                entity
+                for entity in result["results"]
+                if any(
+                    bd.get("value") == birth_date
+                    for bd in entity.get("properties", {}).get("birthDate", [])
+                )
+            ]
+            result["results"] = filtered_results
+            result["total"] = len(filtered_results)
 
-                    return result
-                else:
-                    error_text = await response.text()
-                    logger.error(
-                        f"Error searching PEPs: {response.status} - {error_text}"
-                    )
-                    return {
-                        "error": f"API error: {response.status}",
-                        "message": error_text,
-                    }
-        except Exception as e:
-            logger.error(f"Error searching PEPs: {str(e)}")
-            return {"error": str(e)}
+        return result
 
     async def search_sanctions(
         self,
@@ -401,36 +375,66 @@ class OpenSanctionsClient:
         if datasets:
             params["dataset"] = ",".join(datasets)
 
-        endpoint = "/search/default"
+        return await self._search("/search/default", params, use_cache, "sanctions")
+
+    async def _search(
+        self, endpoint: str, params: Dict[str, Any], use_cache: bool, what: str
+    ) -> Dict[str, Any]:
+        """
+        Run a search, from the cache if possible. Concurrent identical
+        searches are coalesced into one upstream request.
+
+        Args:
+            endpoint: API endpoint
+            params: Request parameters
+            use_cache: Whether to use cached results
+            what: What is searched, for the logs
+
+        Returns:
+            Search results
+        """
         cache_key = self._get_cache_key(endpoint, params)
         if use_cache:
-            cached = self._get_cached_response(cache_key)
+            cached = await self._get_cached_response(cache_key)
             if cached:
                 return cached
 
+        return await in_flight.do(
+            cache_key,
+            lambda: self._fetch_search(endpoint, params, cache_key, use_cache, what),
+        )
+
+    async def _fetch_search(
+        self,
+        endpoint: str,
+        params: Dict[str, Any],
+        cache_key: str,
+        use_cache: bool,
+        what: str,
+    ) -> Dict[str, Any]:
         try:
             session = await self._get_session()
             url = f"{self.api_url}{endpoint}"
 
-            async with session.get(url, params=params) as response:
+            async with session.get(url, params=params, headers=self.headers) as response:
                 if response.status == 200:
                     result = await response.json()
 
                     if use_cache:
-                        self._cache_response(cache_key, result)
+                        await self._cache_response(cache_key, result)
 
                     return result
                 else:
                     error_text = await response.text()
                     logger.error(
-                        f"Error searching sanctions: {response.status} - {error_text}"
+                        f"Error searching {what}: {response.status} - {error_text}"
                     )
                     return {
                         "error": f"API error: {response.status}",
                         "message": error_text,
                     }
         except Exception as e:
-            logger.error(f"Error searching sanctions: {str(e)}")
+            logger.error(f"Error searching {what}: {str(e)}")
             return {"error": str(e)}
 
     async def get_datasets(self, use_cache: bool = True) -> Dict[str, Any]:
@@ -448,7 +452,7 @@ class OpenSanctionsClient:
 
         cache_key = self._get_cache_key(endpoint, params)
         if use_cache:
-            cached = self._get_cached_response(cache_key)
+            cached = await self._get_cached_response(cache_key)
             if cached:
                 return cached
 
@@ -456,12 +460,12 @@ class OpenSanctionsClient:
             session = await self._get_session()
             url = f"{self.api_url}{endpoint}"
 
-            async with session.get(url) as response:
+            async with session.get(url, headers=self.headers) as response:
                 if response.status == 200:
                     result = await response.json()
 
                     if use_cache:
-                        self._cache_response(cache_key, result)
+                        await self._cache_response(cache_key, result)
 
                     return result
                 else:
@@ -477,5 +481,228 @@ class OpenSanctionsClient:
             logger.error(f"Error getting datasets: {str(e)}")
             return {"error": str(e)}
 
+    @staticmethod
+    def entity_query(
+        name: str,
+        schema: str = "Person",
+        country: Optional[str] = None,
+        birth_date: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Build the match query of an entity.
+
+        Args:
+            name: Entity name
+            schema: Entity schema (Person, Company, etc.) or type (natural, legal)
+            country: Country code
+            birth_date: Birth date (YYYY-MM-DD)
+
+        Returns:
+            Match query
+        """
+        properties = {"name": [name]}
+        if country:
+            properties["country"] = [country]
+        if birth_date:
+            properties["birthDate"] = [birth_date]
+        return {"schema": ENTITY_SCHEMAS.get(schema, schema), "properties": properties}
+
+    async def match_entity(
+        self,
+        query: Dict[str, Any],
+        dataset: str = "default",
+        limit: int = 5,
+        use_cache: bool = True,
+    ) -> Dict[str, Any]:
+        """
+        Match one entity. The queries of concurrent callers are queued and
+        sent together by match_entities(), once a batch is full or
+        OPENSANCTIONS_MATCH_WINDOW_MS have passed.
+
+        Args:
+            query: Match query (see entity_query)
+            dataset: Dataset to match against (e.g., "default", "peps")
+            limit: Maximum number of results
+            use_cache: Whether to use cached results
+
+        Returns:
+            Match results, scored, or {"error": ...}
+        """
+        loop = asyncio.get_running_loop()
+        queues = self._match_queues.setdefault(loop, {})
+        batch = (dataset, limit, use_cache)
+        queue = queues.get(batch)
+        if queue is None:
+            queue = queues[batch] = []
+            loop.call_later(
+                settings.OPENSANCTIONS_MATCH_WINDOW_MS / 1000,
+                self._flush_matches, queues, batch, queue,
+            )
+        future = loop.create_future()
+        queue.append((query, future))
+        if len(queue) >= settings.OPENSANCTIONS_MATCH_BATCH_SIZE:
+            self._flush_matches(queues, batch, queue)
+        return await future
+
+    def _flush_matches(self, queues: Dict, batch: Tuple, queue: List) -> None:
+        if queues.get(batch) is not queue:
+            return  # Already sent.
+        del queues[batch]
+        task = asyncio.ensure_future(self._send_matches(batch, queue))
+        self._match_tasks.add(task)
+        task.add_done_callback(self._match_tasks.discard)
+
+    async def _send_matches(self, batch: Tuple, queue: List) -> None:
+        dataset, limit, use_cache = batch
+        try:
+            answers = await self.match_entities(
+                [query for query, _ in queue], dataset, limit, use_cache
+            )
+        except Exception as e:
+            answers = [{"error": str(e)}] * len(queue)
+        for (_, future), answer in zip(queue, answers):
+            if not future.done():
+                future.set_result(answer)
+
+    async def match_entities(
+        self,
+        queries: List[Dict[str, Any]],
+        dataset: str = "default",
+        limit: int = 5,
+        use_cache: bool = True,
+        batch_size: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Match many entities with bulk match requests. Entities the bulk
+        request does not answer, or all of them if it is rejected as
+        invalid (400 or 422), are matched one by one.
+
+        Args:
+            queries: Match queries (see entity_query)
+            dataset: Dataset to match against (e.g., "default", "peps")
+            limit: Maximum number of results per entity
+            use_cache: Whether to use cached results
+            batch_size: Entities per request (OPENSANCTIONS_MATCH_BATCH_SIZE by default)
+
+        Returns:
+            The match results of each query, in order, or {"error": ...}
+            for an entity that could not be matched
+        """
+        if self.is_test_mode:
+            return [self._mock_match(query) for query in queries]
+
+        endpoint = f"/match/{dataset}"
+        cache_keys = [
+            self._get_cache_key(endpoint, {"limit": limit, "query": query})
+            for query in queries
+        ]
+        answers: List[Optional[Dict[str, Any]]] = [None] * len(queries)
+        if use_cache:
+            answers = list(
+                await asyncio.gather(*(self._get_cached_response(key) for key in cache_keys))
+            )
+
+        # Identical queries, here or in flight elsewhere, go upstream once.
+        missing = {
+            cache_keys[index]: queries[index]
+            for index, answer in enumerate(answers)
+            if answer is None
+        }
+        size = max(1, batch_size or settings.OPENSANCTIONS_MATCH_BATCH_SIZE)
+        requests = asyncio.Semaphore(max(1, settings.OPENSANCTIONS_MATCH_CONCURRENCY))
+
+        async def post(keys: List[str]) -> Dict[str, Dict[str, Any]]:
+            async with requests:
+                return await self._post_match(
+                    endpoint, {key: missing[key] for key in keys}, limit
+                )
+
+        async def match_batch(keys: List[str]) -> Dict[str, Dict[str, Any]]:
+            try:
+                found = await post(keys)
+            except MatchRequestError as e:
+                logger.error(f"Error matching {len(keys)} entities: {str(e)}")
+                if len(keys) == 1 or e.status not in QUERY_ERROR_STATUSES:
+                    return {key: {"error": str(e)} for key in keys}
+                # One bad query can get the whole bulk request rejected.
+                found = {}
+            except Exception as e:
+                logger.error(f"Error matching {len(keys)} entities: {str(e)}")
+                return {key: {"error": str(e)} for key in keys}
+
+            failed = [key for key in keys if key not in found]
+            if failed and len(keys) > 1:
+                logger.warning(
+                    f"Bulk match answered {len(keys) - len(failed)} of {len(keys)} "
+                    f"entities, matching the rest one by one"
+                )
+                for answer in await asyncio.gather(*(match_batch([key]) for key in failed)):
+                    found.update(answer)
+            for key in keys:
+                found.setdefault(key, {"error": "No match response for entity"})
+            return found
+
+        async def fetch(keys: List[str]) -> Dict[str, Dict[str, Any]]:
+            results: Dict[str, Dict[str, Any]] = {}
+            for found in await asyncio.gather(
+                *(match_batch(keys[start:start + size]) for start in range(0, len(keys), size))
+            ):
+                results.update(found)
+            if use_cache:
+                for key, answer in results.items():
+                    if "error" not in answer:
+                        await self._cache_response(key, answer)
+            return results
+
+        if missing:
+            unanswered = [index for index, answer in enumerate(answers) if answer is None]
+            fetched = await in_flight.do_many([cache_keys[index] for index in unanswered], fetch)
+            for index in unanswered:
+                answers[index] = fetched[cache_keys[index]]
+        return answers
+
+    async def _post_match(
+        self, endpoint: str, queries: Dict[str, Dict[str, Any]], limit: int
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Send one bulk match request. Returns the results of the queries that
+        were answered, by query id; raises if the request fails.
+        """
+        session = await self._get_session()
+        url = f"{self.api_url}{endpoint}"
+
+        async with session.post(
+            url, params={"limit": limit}, json={"queries": queries}, headers=self.headers
+        ) as response:
+            if response.status != 200:
+                error_text = await response.text()
+                raise MatchRequestError(f"API error: {response.status} - {error_text}", response.status)
+            result = await response.json()
+
+        answers = {}
+        for query_id, answer in (result.get("responses") or {}).items():
+            if query_id in queries and answer.get("status", 200) == 200 and "results" in answer:
+                answers[query_id] = {"results": answer["results"], "total": answer.get("total")}
+        return answers
+
+    def _mock_match(self, query: Dict[str, Any]) -> Dict[str, Any]:
+        names = query.get("properties", {}).get("name") or [""]
+        name = names[0]
+        results = []
+        if "maduro" in name.lower() or "north korea" in name.lower():
+            results.append(
+                {
+                    "id": f"test-match-{name.lower().replace(' ', '-')}",
+                    "caption": name,
+                    "schema": query.get("schema", "Person"),
+                    "score": 0.99,
+                    "match": True,
+                    "properties": query.get("properties", {}),
+                    "datasets": ["test"],
+                }
+            )
+        logger.info(f"Using mock match data for testing: {name} ({len(results)} results)")
+        return {"results": results, "total": {"value": len(results), "relation": "eq"}}
+
 
 open_sanctions_client = OpenSanctionsClient()
@@ -1,4 +1,4 @@
-from datetime import date
+from datetime import date, timedelta
 from typing import Any, List, Optional
 import os
 import shutil
@@ -7,6 +7,7 @@ from pydantic import EmailStr
 
 from app.auth.token import get_current_active_user
 from app.db.init_db import contracts_db
+from app.db.query import Field, all_of
 from app.models.user import User
 from app.services.contracts.models.contract import Contract, ContractInDB
 from app.services.contracts.schemas.contract import ContractCreate, ContractUpdate
@@ -31,27 +32,17 @@ async def get_contracts(
     """
     Retrieve contracts with optional filtering.
     """
-    contracts = list(contracts_db.data.values())
-    
-    if client_name:
-        contracts = [c for c in contracts if client_name.lower() in c.client_name.lower()]
-    
-    if contract_type:
-        contracts = [c for c in contracts if contract_type.lower() in c.contract_type.lower()]
-    
-    if responsible_lawyer:
-        contracts = [c for c in contracts if responsible_lawyer.lower() in c.responsible_lawyer.lower()]
-    
-    if expiration_before:
-        contracts = [c for c in contracts if c.expiration_date <= expiration_before]
-    
-    if expiration_after:
-        contracts = [c for c in contracts if c.expiration_date >= expiration_after]
-    
-    if status:
-        contracts = [c for c in contracts if c.status == status]
-    
-    return contracts[skip : skip + limit]
+    by_expiration = bool(expiration_before or expiration_after)
+    where = all_of(
+        Field("expiration_date").between(expiration_after, expiration_before) if by_expiration else None,
+        Field("client_name").contains(client_name) if client_name else None,
+        Field("contract_type").contains(contract_type) if contract_type else None,
+        Field("responsible_lawyer").contains(responsible_lawyer) if responsible_lawyer else None,
+        Field("status").eq(status) if status else None,
+    )
+    return contracts_db.query(
+        where, order_by="expiration_date" if by_expiration else None, skip=skip, limit=limit
+    )
 
 
 @router.post("/", response_model=Contract)
@@ -143,24 +134,19 @@ async def get_dashboard_stats() -> Any:
     """
     Get dashboard statistics.
     """
-    contracts = list(contracts_db.data.values())
+    statuses = contracts_db.aggregate("status")
     today = date.today()
+    active = Field("status").eq("active")
     
-    active_contracts = [c for c in contracts if c.status == "active"]
-    
-    expiring_soon = [
-        c for c in active_contracts 
-        if (c.expiration_date - today).days <= 30 and (c.expiration_date - today).days > 0
-    ]
+    expiring_soon = contracts_db.count(
+        active & Field("expiration_date").between(today + timedelta(days=1), today + timedelta(days=30))
+    )
     
-    overdue_contracts = [
-        c for c in active_contracts 
-        if c.expiration_date < today
-    ]
+    overdue_contracts = contracts_db.count(active & Field("expiration_date").lt(today))
     
     return {
-        "total_active_contracts": len(active_contracts),
-        "contracts_expiring_soon": len(expiring_soon),
-        "overdue_contracts": len(overdue_contracts),
-        "total_contracts": len(contracts),
+        "total_active_contracts": statuses.count("active"),
+        "contracts_expiring_soon": expiring_soon,
+        "overdue_contracts": overdue_contracts,
+        "total_contracts": statuses.count(),
     }
@@ -5,6 +5,8 @@ import platform
 from datetime import datetime
 from typing import Dict, List, Any, Optional, Tuple
 
+from app.core.cache import cache_stats
+from app.core.circuit_breaker import CLOSED, breaker_stats
 from app.services.diagnostics.docker_monitor import get_container_status, check_model_container_health
 
 logger = logging.getLogger(__name__)
@@ -208,6 +210,64 @@ async def check_database() -> Dict[str, Any]:
             }
         }
 
+async def check_response_caches() -> Dict[str, Any]:
+    """
+    Report the hit/miss counters and lookup latency of the external API caches.
+    
+    Returns:
+        Dict[str, Any]: Response cache status
+    """
+    try:
+        stats = cache_stats()
+        errors = sum(cache["errors"] for cache in stats.values())
+        return {
+            "component": "response_cache",
+            "status": "warning" if errors else "healthy",
+            "description": "External API response caches",
+            "timestamp": datetime.utcnow(),
+            "details": stats
+        }
+    except Exception as e:
+        logger.error(f"Error checking response caches: {e}")
+        return {
+            "component": "response_cache",
+            "status": "error",
+            "description": "Response cache check failed",
+            "timestamp": datetime.utcnow(),
+            "error_details": {
+                "error": str(e)
+            }
+        }
+
+async def check_circuit_breakers() -> Dict[str, Any]:
+    """
+    Report the state of the circuit breakers of the external sources.
+    
+    Returns:
+        Dict[str, Any]: Circuit breaker status
+    """
+    try:
+        stats = breaker_stats()
+        tripped = [name for name, breaker in stats.items() if breaker["state"] != CLOSED]
+        return {
+            "component": "circuit_breakers",
+            "status": "warning" if tripped else "healthy",
+            "description": "External source circuit breakers",
+            "timestamp": datetime.utcnow(),
+            "details": {"not_closed": tripped, "breakers": stats}
+        }
+    except Exception as e:
+        logger.error(f"Error checking circuit breakers: {e}")
+        return {
+            "component": "circuit_breakers",
+            "status": "error",
+            "description": "Circuit breaker check failed",
+            "timestamp": datetime.utcnow(),
+            "error_details": {
+                "error": str(e)
+            }
+        }
+
 async def run_all_checks() -> List[Dict[str, Any]]:
     """
     Run all diagnostic checks.
@@ -220,8 +280,10 @@ async def run_all_checks() -> List[Dict[str, Any]]:
         docker_checks = await check_docker_services()
         ai_check = await check_ai_service()
         db_check = await check_database()
+        cache_check = await check_response_caches()
+        breaker_check = await check_circuit_breakers()
         
-        results = [resources_check, ai_check, db_check] + docker_checks
+        results = [resources_check, ai_check, db_check, cache_check, breaker_check] + docker_checks
         return results
     except Exception as e:
         logger.error(f"Error running all checks: {e}")
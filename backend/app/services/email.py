@@ -84,14 +84,11 @@ async def check_expiring_contracts() -> None:
     logger.info("Checking for expiring contracts...")
     today = date.today()
     
-    contracts = [c for c in contracts_db.data.values() if c.status == "active"]
-    
     for days in [30, 15, 5]:
         target_date = today + timedelta(days=days)
-        expiring_contracts = [
-            c for c in contracts 
-            if c.expiration_date == target_date
-        ]
+        expiring_contracts = contracts_db.get_range(
+            "expiration_date", target_date, target_date, filters={"status": "active"}
+        )
         
         for contract in expiring_contracts:
             await send_contract_expiration_reminder(
@@ -1,5 +1,7 @@
 from typing import List, Dict, Any, Optional
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+
+from app.core.pagination import cursor_after_id, set_next_cursor
 
 from app.services.traffic.interface import TrafficInterface
 from app.services.traffic.schemas.traffic import (
@@ -55,16 +57,22 @@ async def consolidate_invoices(
 
 @router.get("/records", response_model=List[InvoiceRecordResponse])
 async def get_records(
+    response: Response,
+    limit: int = 100,
+    after_id: Optional[int] = Depends(cursor_after_id),
     current_user: Optional[User] = None
 ):
     """
     List currently loaded records.
     
-    This endpoint returns all pending traffic records (uploaded but not yet submitted)
-    for the current user.
+    This endpoint returns the pending traffic records (uploaded but not yet submitted)
+    for the current user, one page at a time. Pass the X-Next-Cursor header of a
+    response as ``cursor`` to get the next page.
     """
     traffic_interface = TrafficInterface(current_user=current_user)
-    return await traffic_interface.get_records()
+    records = await traffic_interface.get_records(limit=limit, after_id=after_id)
+    set_next_cursor(response, records, limit)
+    return records
 
 @router.get("/record/{record_id}", response_model=InvoiceRecordResponse)
 async def get_record(
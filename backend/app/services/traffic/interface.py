@@ -33,9 +33,9 @@ class TrafficInterface:
         """Consolidate multiple invoices into one."""
         return await self.service.consolidate_invoices(request)
     
-    async def get_records(self) -> List[InvoiceRecordResponse]:
-        """Get all pending invoice records."""
-        return await self.service.get_records()
+    async def get_records(self, limit: int = 100, after_id: Optional[int] = None) -> List[InvoiceRecordResponse]:
+        """Get a page of pending invoice records."""
+        return await self.service.get_records(limit=limit, after_id=after_id)
     
     async def get_record(self, record_id: int) -> InvoiceRecordResponse:
         """Get a specific invoice record by ID."""
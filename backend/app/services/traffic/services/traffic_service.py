@@ -2,6 +2,7 @@ from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
 import json
 import logging
+from itertools import islice
 
 from fastapi import HTTPException, status
 
@@ -41,7 +42,6 @@ class TrafficService:
             List of validated invoice records
         """
         try:
-            invoice_records = []
             validation_errors = {}
             
             if "invoices" in data:
@@ -49,15 +49,15 @@ class TrafficService:
             else:
                 invoice_data_list = [data]
             
-            for invoice_data in invoice_data_list:
-                record = self._process_invoice(invoice_data)
-                saved_record = invoice_records_db.create(obj_in=record)
-                
+            records = [self._process_invoice(invoice_data) for invoice_data in invoice_data_list]
+            invoice_records = invoice_records_db.create_many(objs_in=records)
+            
+            items = []
+            for record, saved_record in zip(records, invoice_records):
                 for item in record.items:
                     item.invoice_id = saved_record.id
-                    invoice_items_db.create(obj_in=item)
-                
-                invoice_records.append(saved_record)
+                    items.append(item)
+            invoice_items_db.create_many(objs_in=items)
             
             await self._get_ai_suggestions(invoice_records)
             
@@ -246,13 +246,9 @@ class TrafficService:
             
             saved_record = invoice_records_db.create(obj_in=consolidated_record)
             
-            all_items = []
+            new_items = []
             for record in invoice_records:
-                record_items = []
-                for item_filter in invoice_items_db.get_multi(filters={"invoice_id": record.id}):
-                    record_items.append(item_filter)
-                
-                for item in record_items:
+                for item in invoice_items_db.iter_multi(filters={"invoice_id": record.id}):
                     new_item = InvoiceItem(
                         id=0,  # Will be set by InMemoryDB
                         invoice_id=saved_record.id,
@@ -264,13 +260,13 @@ class TrafficService:
                         value=item.value,
                         volume=item.volume
                     )
-                    saved_item = invoice_items_db.create(obj_in=new_item)
-                    all_items.append(saved_item)
+                    new_items.append(new_item)
+            invoice_items_db.create_many(objs_in=new_items)
             
             for record in invoice_records:
                 record.status = "Consolidated"
                 record.consolidated_into_id = saved_record.id
-                invoice_records_db.update(id=record.id, obj_in=record)
+            invoice_records_db.update_many(objs_in={record.id: record for record in invoice_records})
             
             # Get AI suggestions for the consolidated record
             await self._get_ai_suggestions([saved_record])
@@ -292,26 +288,24 @@ class TrafficService:
                 detail=f"Error consolidating invoices: {str(e)}"
             )
     
-    async def get_records(self) -> List[InvoiceRecordResponse]:
+    async def get_records(self, limit: int = 100, after_id: Optional[int] = None) -> List[InvoiceRecordResponse]:
         """
-        Get all pending invoice records for the current user.
+        Get pending invoice records for the current user.
         
+        Args:
+            limit: Maximum number of records to return
+            after_id: Only return records with a higher ID (next page)
+            
         Returns:
-            List of invoice records
+            List of invoice records, in ID order
         """
         try:
-            all_records = invoice_records_db.get_multi()
-            
-            if self.user_id:
-                records = [
-                    record for record in all_records 
-                    if record.user_id == self.user_id and record.status in ["Validated", "Error"]
-                ]
-            else:
-                records = [
-                    record for record in all_records 
-                    if record.status in ["Validated", "Error"]
-                ]
+            filters = {"user_id": self.user_id} if self.user_id else None
+            pending = (
+                record for record in invoice_records_db.iter_multi(filters=filters, after_id=after_id)
+                if record.status in ["Validated", "Error"]
+            )
+            records = list(islice(pending, limit))
             
             return [InvoiceRecordResponse.model_validate(record.model_dump()) for record in records]
             
@@ -354,7 +348,7 @@ class TrafficService:
                     detail=f"Invoice record with ID {record_id} not found"
                 )
             
-            items = invoice_items_db.get_multi(filters={"invoice_id": record_id})
+            items = list(invoice_items_db.iter_multi(filters={"invoice_id": record_id}))
             logger.info(f"Found {len(items)} items for record {record_id}")
             
             # Attach items to record
@@ -384,18 +378,14 @@ class TrafficService:
         try:
             record_id = request.record_id
             
-            all_records = invoice_records_db.get_multi()
-            
-            matching_records = [r for r in all_records if r.id == record_id]
+            record = invoice_records_db.get(record_id)
             
-            if not matching_records:
+            if not record:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail=f"Invoice record with ID {record_id} not found"
                 )
             
-            record = matching_records[0]
-            
             if self.user_id and record.user_id != self.user_id:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
@@ -415,7 +405,7 @@ class TrafficService:
                 )
             
             items = []
-            for item in invoice_items_db.get_multi(filters={"invoice_id": record_id}):
+            for item in invoice_items_db.iter_multi(filters={"invoice_id": record_id}):
                 items.append(item)
             
             submission = TrafficSubmission(
@@ -474,15 +464,8 @@ class TrafficService:
             List of submission logs
         """
         try:
-            all_submissions = traffic_submissions_db.get_multi()
-            
-            if self.user_id:
-                submissions = [
-                    submission for submission in all_submissions 
-                    if submission.user_id == self.user_id
-                ]
-            else:
-                submissions = all_submissions
+            filters = {"user_id": self.user_id} if self.user_id else None
+            submissions = list(traffic_submissions_db.iter_multi(filters=filters))
             
             submissions.sort(key=lambda x: x.submission_date, reverse=True)
             
@@ -506,18 +489,14 @@ class TrafficService:
             Detailed submission log
         """
         try:
-            all_submissions = traffic_submissions_db.get_multi()
+            submission = traffic_submissions_db.get(submission_id)
             
-            matching_submissions = [s for s in all_submissions if s.id == submission_id]
-            
-            if not matching_submissions:
+            if not submission:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail=f"Submission with ID {submission_id} not found"
                 )
             
-            submission = matching_submissions[0]
-            
             if self.user_id and submission.user_id != self.user_id:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
@@ -526,7 +505,7 @@ class TrafficService:
             
             # Get related invoice records
             invoice_records = []
-            for record in invoice_records_db.get_multi(filters={"submission_id": submission_id}):
+            for record in invoice_records_db.iter_multi(filters={"submission_id": submission_id}):
                 invoice_records.append(record)
             
             # Attach invoice records to submission
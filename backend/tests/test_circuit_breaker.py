@@ -0,0 +1,73 @@
+from app.core.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, breaker_stats
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_breaker(clock):
+    return CircuitBreaker(
+        "test_breaker", failure_rate=0.5, window_seconds=10, min_calls=4,
+        open_seconds=5, half_open_probes=1, clock=clock,
+    )
+
+
+def test_opens_once_the_failure_rate_over_the_window_is_reached():
+    clock = Clock()
+    breaker = make_breaker(clock)
+    for _ in range(3):
+        breaker.record_failure()
+    # Too few calls in the window to judge.
+    assert breaker.state == CLOSED
+
+    clock.now += 11
+    breaker.record_success()
+    breaker.record_success()
+    breaker.record_failure()
+    # The old failures left the window: 1 of 3 calls failed.
+    assert breaker.state == CLOSED
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.seconds_until_probe() == 5
+    assert breaker_stats()["test_breaker"]["state"] == OPEN
+
+
+def test_half_open_probe_closes_or_reopens_the_circuit():
+    clock = Clock()
+    breaker = make_breaker(clock)
+    for _ in range(4):
+        breaker.record_failure()
+    assert not breaker.try_probe()
+
+    clock.now += 5
+    assert breaker.state == HALF_OPEN
+    assert breaker.try_probe()
+    assert not breaker.try_probe()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+    clock.now += 5
+    assert breaker.try_probe()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.stats()["opened"] == 2
+    # Back to a fresh window.
+    for _ in range(3):
+        breaker.record_failure()
+    assert breaker.state == CLOSED
+
+
+def test_released_probe_can_be_claimed_again():
+    clock = Clock()
+    breaker = make_breaker(clock)
+    for _ in range(4):
+        breaker.record_failure()
+    clock.now += 5
+    assert breaker.try_probe()
+    breaker.release_probe()
+    assert breaker.state == HALF_OPEN
+    assert breaker.try_probe()
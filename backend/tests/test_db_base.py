@@ -0,0 +1,385 @@
+import asyncio
+import threading
+from datetime import date, datetime, timedelta
+from enum import Enum
+from typing import List, Optional
+
+import pytest
+from pydantic import BaseModel, field_validator
+
+from app.core.config import settings
+from app.db.aggregates import Aggregate
+from app.db.base import InMemoryDB
+from app.db.events import ChangeType
+from app.db.query import Field
+
+
+class Status(str, Enum):
+    PENDING = "pending"
+    PAID = "paid"
+
+
+class Item(BaseModel):
+    id: Optional[int] = None
+    invoice_id: int
+    status: Status = Status.PENDING
+    description: str = ""
+
+
+@pytest.fixture(autouse=True)
+def memory_engine(monkeypatch):
+    monkeypatch.setattr(settings, "DB_ENGINE", "memory")
+
+
+def make_db() -> InMemoryDB[Item]:
+    db = InMemoryDB[Item](Item, indexes=["invoice_id", "status"])
+    for n in range(10):
+        db.create(obj_in=Item(invoice_id=n % 3, description=f"item {n}"))
+    return db
+
+
+def test_unknown_index_field_is_rejected():
+    with pytest.raises(ValueError):
+        InMemoryDB[Item](Item, indexes=["missing"])
+
+
+def test_filters_resolve_through_index():
+    db = make_db()
+    items = db.get_multi(filters={"invoice_id": 1})
+    assert [item.id for item in items] == [2, 5, 8]
+    assert db.indexes["invoice_id"].lookup(1) == {2: None, 5: None, 8: None}
+
+
+def test_filters_combine_index_and_scan():
+    db = make_db()
+    db.update(id=5, obj_in={"status": Status.PAID})
+    assert [i.id for i in db.get_multi(filters={"invoice_id": 1, "status": "paid"})] == [5]
+    assert [i.id for i in db.get_multi(filters={"invoice_id": 1, "description": "item 6"})] == []
+    assert [i.id for i in db.get_multi(filters={"id": 4, "invoice_id": 0})] == [4]
+
+
+def test_index_follows_update_and_remove():
+    db = make_db()
+    db.update(id=2, obj_in={"invoice_id": 0})
+    db.remove(id=5)
+    assert [i.id for i in db.get_multi(filters={"invoice_id": 1})] == [8]
+    assert 2 in db.indexes["invoice_id"].lookup(0)
+    assert 5 not in db.indexes["invoice_id"].keys
+
+
+def test_index_follows_direct_data_writes():
+    db = make_db()
+    db.data.clear()
+    assert db.get_multi(filters={"invoice_id": 1}) == []
+
+    db.data[42] = Item(id=42, invoice_id=1)
+    assert [i.id for i in db.get_multi(filters={"invoice_id": 1})] == [42]
+
+    db.data = {7: Item(id=7, invoice_id=1)}
+    assert [i.id for i in db.get_multi(filters={"invoice_id": 1})] == [7]
+
+
+def test_shared_data_keeps_both_stores_indexed():
+    source = make_db()
+    mirror = InMemoryDB[Item](Item, indexes=["invoice_id"], snapshot_name="mirror_items")
+    mirror.data = source.data
+    source.create(obj_in=Item(invoice_id=1))
+    assert [i.id for i in mirror.get_multi(filters={"invoice_id": 1})] == [2, 5, 8, 11]
+
+
+def test_pagination_over_filtered_results():
+    db = make_db()
+    assert [i.id for i in db.get_multi(skip=1, limit=1, filters={"invoice_id": 0})] == [4]
+    assert [i.id for i in db.get_multi(skip=8, limit=5)] == [9, 10]
+
+
+def test_page_walks_the_table_by_cursor():
+    db = make_db()
+    first = db.page(limit=4)
+    second = db.page(after_id=first[-1].id, limit=4)
+    last = db.get_multi(after_id=second[-1].id, limit=4)
+    assert [i.id for i in first + second + last] == list(range(1, 11))
+    assert [i.id for i in db.page(after_id=2, limit=2, filters={"invoice_id": 1})] == [5, 8]
+
+
+def test_iter_multi_tolerates_writes_between_items():
+    db = make_db()
+    seen = []
+    for item in db.iter_multi(after_id=3):
+        seen.append(item.id)
+        if item.id == 4:
+            db.remove(id=5)
+            db.create(obj_in=Item(invoice_id=0))
+    assert seen == [4, 6, 7, 8, 9, 10, 11]
+
+
+class Event(BaseModel):
+    id: Optional[int] = None
+    kind: str
+    due: Optional[datetime] = None
+
+
+def make_events(sorted_indexes=("due",)) -> InMemoryDB[Event]:
+    db = InMemoryDB[Event](Event, sorted_indexes=list(sorted_indexes))
+    start = datetime(2024, 1, 1)
+    for n in (5, 1, 3, 1, 8):
+        db.create(obj_in=Event(kind="a" if n % 2 else "b", due=start + timedelta(days=n)))
+    db.create(obj_in=Event(kind="a"))
+    return db
+
+
+@pytest.mark.parametrize("sorted_indexes", [("due",), ()])
+def test_get_range_is_ordered_by_field(sorted_indexes):
+    db = make_events(sorted_indexes)
+    assert [e.id for e in db.get_range("due")] == [2, 4, 3, 1, 5]
+    assert [e.id for e in db.get_range("due", date(2024, 1, 2), date(2024, 1, 4))] == [2, 4, 3]
+    assert [e.id for e in db.get_range("due", end=date(2024, 1, 4), end_inclusive=False)] == [2, 4]
+    assert [e.id for e in db.get_range("due", date(2024, 1, 3), descending=True)] == [5, 1, 3]
+    assert [e.id for e in db.get_range("due", filters={"kind": "b"})] == [5]
+    assert [e.id for e in db.get_range("due", filters={"kind": "a"}, skip=1, limit=2)] == [4, 3]
+
+
+def test_sorted_index_follows_writes():
+    db = make_events()
+    db.update(id=5, obj_in={"due": datetime(2023, 12, 31)})
+    db.remove(id=2)
+    db.data[7] = Event(id=7, kind="b", due=datetime(2024, 1, 4, 12))
+    assert [e.id for e in db.get_range("due")] == [5, 4, 3, 7, 1]
+    assert [e.id for e in db.get_multi(filters={"due": datetime(2024, 1, 2)})] == [4]
+
+    db.data.clear()
+    assert db.get_range("due") == []
+
+
+def test_bulk_create_update_remove_keep_indexes():
+    db = make_db()
+    created = db.create_many(objs_in=[Item(invoice_id=7, description=f"bulk {n}") for n in range(3)])
+    assert [item.id for item in created] == [11, 12, 13]
+    assert db.counter == 14
+    assert [i.id for i in db.get_multi(filters={"invoice_id": 7})] == [11, 12, 13]
+
+    updated = db.update_many(objs_in={11: {"invoice_id": 8}, 12: {"status": Status.PAID}, 99: {"invoice_id": 8}})
+    assert [item.id for item in updated] == [11, 12]
+    assert [i.id for i in db.get_multi(filters={"invoice_id": 8})] == [11]
+    assert [i.id for i in db.get_multi(filters={"status": "paid"})] == [12]
+
+    removed = db.remove_many(ids=[12, 13, 99])
+    assert [item.id for item in removed] == [12, 13]
+    assert db.get_multi(filters={"invoice_id": 7}) == []
+    assert [i.id for i in db.page(after_id=9)] == [10, 11]
+
+
+def test_bulk_writes_keep_sorted_index_ordered():
+    db = make_events()
+    db.create_many(objs_in=[Event(kind="c", due=datetime(2024, 1, 2, 12)), Event(kind="c", due=datetime(2023, 1, 1))])
+    db.update_many(objs_in={1: {"due": datetime(2025, 1, 1)}})
+    db.remove_many(ids=[4])
+    assert [e.id for e in db.get_range("due")] == [8, 2, 7, 3, 5, 1]
+
+
+class Counted(BaseModel):
+    id: Optional[int] = None
+    name: str
+    tags: List[str] = []
+
+    @field_validator("name")
+    @classmethod
+    def count_validation(cls, value):
+        VALIDATIONS.append(value)
+        return value
+
+
+VALIDATIONS: List[str] = []
+
+
+def test_model_instances_are_stored_without_revalidation():
+    db = InMemoryDB[Counted](Counted)
+    obj = Counted(name="a")
+    VALIDATIONS.clear()
+
+    stored = db.create(obj_in=obj)
+    db.create_many(objs_in=[Counted.model_construct(name="b")])
+    assert VALIDATIONS == []
+    assert stored is not obj and obj.id is None
+    assert stored.model_dump(exclude_unset=True) == {"id": 1, "name": "a", "tags": []}
+
+    db.update(id=1, obj_in=Counted.model_construct(name="renamed"))
+    assert db.get(1).name == "renamed" and db.get(1).id == 1
+    assert VALIDATIONS == []
+
+
+def test_update_diff_is_applied_in_one_step():
+    db = make_db()
+    item = db.update(id=2, obj_in={"description": "changed", "status": Status.PAID})
+    assert item.description == "changed"
+    assert {"description", "status"} <= item.model_fields_set
+    assert [i.id for i in db.get_multi(filters={"status": "paid"})] == [2]
+
+    with pytest.raises(ValueError):
+        db.update(id=2, obj_in={"missing": 1})
+
+
+def test_changes_are_published_with_old_and_new_values():
+    async def run():
+        db = make_db()
+        async with db.changes.subscribe() as changes:
+            created = db.create(obj_in=Item(invoice_id=5))
+            db.update(id=created.id, obj_in={"status": Status.PAID})
+            db.update_many(objs_in={1: {"description": "first"}})
+            db.remove(id=created.id)
+            db.data.clear()
+            return [await changes.get() for _ in range(5)]
+
+    insert, update, bulk_update, delete, reset = asyncio.run(run())
+    assert (insert.type, insert.id, insert.old) == (ChangeType.INSERT, 11, None)
+    assert (update.type, update.old.status, update.new.status) == (ChangeType.UPDATE, Status.PENDING, Status.PAID)
+    assert (bulk_update.old.description, bulk_update.new.description) == ("item 0", "first")
+    assert (delete.type, delete.old.id, delete.new) == (ChangeType.DELETE, 11, None)
+    assert reset.type == ChangeType.RESET
+    assert [e.seq for e in (insert, update, bulk_update, delete, reset)] == [1, 2, 3, 4, 5]
+
+
+def test_slow_subscriber_is_reset_instead_of_blocking_writers():
+    async def run():
+        db = make_db()
+        changes = db.changes.subscribe(maxsize=2)
+        db.create_many(objs_in=[Item(invoice_id=7) for _ in range(5)])
+        events = [await changes.get() for _ in range(3)]
+        changes.close()
+        db.create(obj_in=Item(invoice_id=7))
+        return events, changes, db
+
+    events, changes, db = asyncio.run(run())
+    assert [e.type for e in events] == [ChangeType.INSERT, ChangeType.INSERT, ChangeType.RESET]
+    assert changes.queue.empty()
+    assert not db.changes.active
+
+
+def test_concurrent_creates_get_distinct_ids():
+    db = InMemoryDB[Item](Item)
+
+    def create_items():
+        for _ in range(200):
+            db.create(obj_in=Item(invoice_id=1))
+        db.create_many(objs_in=[Item(invoice_id=2) for _ in range(50)])
+
+    threads = [threading.Thread(target=create_items) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(db.data) == list(range(1, 8 * 250 + 1))
+    assert all(id == item.id for id, item in db.data.items())
+    assert db.counter == 8 * 250 + 1
+
+
+def test_scan_is_a_point_in_time_view():
+    db = make_db()
+    rows = db.scan()
+    assert db.scan() is rows
+    db.create(obj_in=Item(invoice_id=1))
+    assert len(rows) == 10
+    assert len(db.scan()) == 11
+
+
+def test_copy_on_write_never_changes_objects_readers_hold():
+    db = InMemoryDB[Item](Item, indexes=["status"], copy_on_write=True)
+    created = db.create(obj_in=Item(invoice_id=1))
+    rows = db.scan()
+
+    updated = db.update(id=created.id, obj_in={"status": Status.PAID})
+    assert updated is not created
+    assert created.status == rows[0].status == Status.PENDING
+    assert db.get(created.id) is updated
+    assert db.get_multi(filters={"status": "paid"}) == [updated]
+
+
+def make_query_db(**indexes) -> InMemoryDB[Item]:
+    db = InMemoryDB[Item](Item, **indexes)
+    db.create_many(objs_in=[
+        Item(invoice_id=n, status=Status.PAID if n % 4 == 0 else Status.PENDING, description=f"Item {n:02}")
+        for n in range(20)
+    ])
+    return db
+
+
+@pytest.mark.parametrize("indexes", [{}, {"indexes": ["status"], "sorted_indexes": ["invoice_id", "description"]}])
+def test_query_operators(indexes):
+    db = make_query_db(**indexes)
+
+    def ids(where, **kwargs):
+        return [item.id for item in db.query(where, **kwargs)]
+
+    assert ids(Field("status").eq("paid")) == [1, 5, 9, 13, 17]
+    assert ids(Field("invoice_id").in_([3, 4, 99])) == [4, 5]
+    assert ids(Field("invoice_id").gt(17)) == [19, 20]
+    assert ids(Field("invoice_id").between(2, 4) | Field("invoice_id").le(0)) == [1, 3, 4, 5]
+    assert ids(Field("description").prefix("Item 1")) == list(range(11, 21))
+    assert ids(Field("description").contains("ITEM 0") & ~Field("status").eq("paid")) == [2, 3, 4, 6, 7, 8, 10]
+    assert ids(Field("invoice_id").ge(10), order_by="invoice_id", descending=True, skip=1, limit=2) == [19, 18]
+    assert db.count(Field("status").in_(["paid", "pending"])) == 20
+
+
+def test_query_planner_uses_the_most_selective_index():
+    db = make_query_db(indexes=["status"], sorted_indexes=["invoice_id", "description"])
+    assert db.explain(Field("status").eq("pending") & Field("invoice_id").between(3, 5)) == (
+        "sorted index range on invoice_id (3 candidates)"
+    )
+    assert db.explain(Field("status").eq("paid") & Field("description").prefix("Item")) == (
+        "hash index on status (5 candidates)"
+    )
+    assert db.explain(Field("id").in_([1, 2, 50])) == "id lookup (2 candidates)"
+    assert db.explain(Field("description").contains("7")) == "full scan of 20 rows"
+    assert db.explain(Field("status").eq("paid") | Field("description").contains("7")) == "full scan of 20 rows"
+
+
+def test_values_of_another_type_than_a_sorted_index_fall_back_to_a_scan():
+    db = make_query_db(sorted_indexes=["invoice_id"])
+    assert db.query(Field("invoice_id").eq("3")) == []
+    assert [item.id for item in db.query(Field("invoice_id").in_([3, "4"]))] == [4]
+    assert db.explain(Field("invoice_id").eq("3")) == "full scan of 20 rows"
+    assert db.get_multi(filters={"invoice_id": "3"}) == []
+
+
+def test_aggregates_follow_writes():
+    db = InMemoryDB[Item](
+        Item,
+        aggregates={
+            "status": Aggregate(group_by="status"),
+            "invoices": Aggregate(group_by="status", sum="invoice_id", where=Field("invoice_id").gt(0)),
+        },
+    )
+
+    def expected():
+        counts, sums = {}, {}
+        for item in db.data.values():
+            status = Status(item.status).value
+            counts[status] = counts.get(status, 0) + 1
+            if item.invoice_id > 0:
+                sums[status] = sums.get(status, 0) + item.invoice_id
+        return counts, sums
+
+    def check():
+        counts, sums = expected()
+        assert db.aggregate("status").counts() == counts
+        assert db.aggregate("invoices").sums() == sums
+        assert db.aggregate("status").count() == len(db.data)
+
+    db.create_many(objs_in=[Item(invoice_id=n % 4) for n in range(12)])
+    check()
+    db.update(id=1, obj_in={"status": Status.PAID})
+    db.update_many(objs_in={2: {"status": "paid", "invoice_id": 7}, 3: {"invoice_id": 0}})
+    check()
+    assert db.aggregate("status").count(Status.PAID) == db.aggregate("status").count("paid") == 2
+    assert db.aggregate("invoices").sum("paid") == 7
+
+    db.remove(id=2)
+    db.remove_many(ids=[4, 5])
+    del db.data[6]
+    check()
+    db.data[1] = Item(id=1, invoice_id=3)
+    check()
+    db.data.clear()
+    check()
+    assert db.aggregate("status").groups() == 0
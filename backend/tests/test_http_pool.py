@@ -0,0 +1,67 @@
+import asyncio
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from app.core.http import ConnectionPool
+
+
+def test_requests_reuse_keep_alive_connections():
+    peers = []
+
+    async def handler(request):
+        peers.append(request.transport.get_extra_info("peername"))
+        return web.json_response({"authorization": request.headers.get("Authorization")})
+
+    async def run():
+        app = web.Application()
+        app.router.add_get("/", handler)
+        pool = ConnectionPool(limit=10, limit_per_host=2, dns_ttl_seconds=60, keepalive_seconds=30)
+        async with TestServer(app) as server:
+            session = pool.session()
+            assert pool.session() is session
+            connector = session.connector
+            assert (connector.limit, connector.limit_per_host) == (10, 2)
+            answers = []
+            for token in ("a", "b", "c"):
+                async with session.get(server.make_url("/"), headers={"Authorization": token}) as response:
+                    answers.append((await response.json())["authorization"])
+            await pool.close()
+            assert session.closed
+            assert pool.session() is not session
+            await pool.close()
+        return answers
+
+    assert asyncio.run(run()) == ["a", "b", "c"]
+    # Sequential requests went over one connection.
+    assert len(set(peers)) == 1
+
+
+def test_connections_per_host_are_capped():
+    active = []
+    peak = []
+
+    async def handler(request):
+        active.append(1)
+        peak.append(len(active))
+        await asyncio.sleep(0.02)
+        active.pop()
+        return web.Response(text="ok")
+
+    async def run():
+        app = web.Application()
+        app.router.add_get("/", handler)
+        pool = ConnectionPool(limit=10, limit_per_host=2)
+        async with TestServer(app) as server:
+            session = pool.session()
+
+            async def fetch():
+                async with session.get(server.make_url("/")) as response:
+                    return await response.text()
+
+            results = await asyncio.gather(*(fetch() for _ in range(6)))
+            await pool.close()
+        return results
+
+    assert asyncio.run(run()) == ["ok"] * 6
+    assert max(peak) == 2
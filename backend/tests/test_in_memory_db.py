@@ -0,0 +1,240 @@
+import asyncio
+import os
+import pickle
+import time
+import zlib
+from datetime import date
+from typing import Optional
+
+import pytest
+from pydantic import BaseModel
+
+from app.db import in_memory
+from app.db.aggregates import Aggregate
+from app.db.events import ChangeType
+from app.db.in_memory import InMemoryDB
+
+
+class Document(BaseModel):
+    id: Optional[int] = None
+    expiry_date: Optional[date] = None
+
+
+@pytest.fixture(autouse=True)
+def data_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(in_memory, "DATA_DIR", str(tmp_path))
+    return tmp_path
+
+
+def test_wal_mode_appends_instead_of_rewriting_snapshot():
+    db = InMemoryDB("screenings", persistence="wal")
+    db.create({"name": "Jane Doe"})
+    db.create({"name": "John Doe"})
+
+    assert not os.path.exists(db.db_file)
+    assert os.path.getsize(db.wal_file) > 0
+
+
+def test_wal_is_replayed_on_startup():
+    db = InMemoryDB("screenings", persistence="wal")
+    first = db.create({"name": "Jane Doe"})
+    second = db.create({"name": "John Doe"})
+    db.update(first, {"name": "Jane Roe"})
+    db.delete(second)
+
+    reloaded = InMemoryDB("screenings", persistence="wal")
+    assert reloaded.get_all() == [{"name": "Jane Roe", "id": first}]
+    assert reloaded.next_id == 3
+    assert os.path.exists(reloaded.db_file)
+    assert not os.path.exists(reloaded.wal_file)
+
+
+def test_torn_wal_tail_is_ignored():
+    db = InMemoryDB("screenings", persistence="wal")
+    db.create({"name": "Jane Doe"})
+    db.create({"name": "John Doe"})
+    db._wal.close()
+    with open(db.wal_file, "r+b") as f:
+        f.truncate(os.path.getsize(db.wal_file) - 3)
+
+    reloaded = InMemoryDB("screenings", persistence="wal")
+    assert [r["name"] for r in reloaded.get_all()] == ["Jane Doe"]
+
+
+def test_logs_are_kept_when_a_record_cannot_be_replayed():
+    db = InMemoryDB("screenings", persistence="wal")
+    db.create({"name": "Jane Doe"})
+    db._wal.close()
+    payload = b"not a pickle"
+    with open(db.wal_file, "ab") as f:
+        f.write(in_memory._WAL_FRAME.pack(len(payload), zlib.crc32(payload)) + payload)
+    logged = open(db.wal_file, "rb").read()
+
+    reloaded = InMemoryDB("screenings", persistence="wal")
+    assert [r["name"] for r in reloaded.get_all()] == ["Jane Doe"]
+    assert not os.path.exists(reloaded.db_file)
+    assert open(reloaded.wal_file, "rb").read().startswith(logged)
+
+
+def test_logs_are_kept_when_the_snapshot_cannot_be_loaded():
+    db = InMemoryDB("screenings", persistence="wal")
+    db.create({"name": "Jane Doe"})
+    db.compact()
+    db.create({"name": "John Doe"})
+    db._wal.close()
+    with open(db.db_file, "wb") as f:
+        f.write(b"truncated")
+
+    InMemoryDB("screenings", persistence="wal")
+    assert os.path.getsize(db.wal_file) > 0
+    with open(db.db_file, "rb") as f:
+        assert f.read() == b"truncated"
+
+
+def test_compaction_folds_log_into_snapshot():
+    db = InMemoryDB("screenings", persistence="wal", wal_compact_bytes=256)
+    for n in range(50):
+        db.create({"name": f"Client {n}"})
+    db.compact()
+    db.create({"name": "After compaction"})
+
+    with open(db.db_file, "rb") as f:
+        snapshot = pickle.load(f)
+    assert len(snapshot["data"]) >= 50
+    assert not os.path.exists(db.compacting_file)
+
+    reloaded = InMemoryDB("screenings", persistence="wal")
+    assert len(reloaded.get_all()) == 51
+    assert reloaded.get(51) == {"name": "After compaction", "id": 51}
+
+
+def test_snapshot_mode_picks_up_existing_wal():
+    db = InMemoryDB("screenings", persistence="wal")
+    db.create({"name": "Jane Doe"})
+
+    snapshot_db = InMemoryDB("screenings", persistence="snapshot")
+    snapshot_db.create({"name": "John Doe"})
+
+    reloaded = InMemoryDB("screenings", persistence="snapshot")
+    assert [r["name"] for r in reloaded.get_all()] == ["Jane Doe", "John Doe"]
+
+
+def test_unknown_persistence_mode_is_rejected():
+    with pytest.raises(ValueError):
+        InMemoryDB("screenings", persistence="s3")
+
+
+def test_group_commit_batches_writes_until_flush():
+    db = InMemoryDB("screenings", persistence="wal", group_commit_ms=60_000)
+    for n in range(20):
+        db.create({"name": f"Client {n}"})
+
+    assert not os.path.exists(db.wal_file)
+    assert len(db._pending) == 20
+
+    asyncio.run(db.flush())
+
+    assert db._pending == []
+    reloaded = InMemoryDB("screenings", persistence="wal")
+    assert len(reloaded.get_all()) == 20
+
+
+def test_group_commit_flushes_in_background():
+    db = InMemoryDB("screenings", persistence="snapshot", group_commit_ms=10)
+    db.create({"name": "Jane Doe"})
+
+    deadline = time.monotonic() + 5
+    while db._pending and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    with db._flush_lock:
+        reloaded = InMemoryDB("screenings", persistence="snapshot")
+    assert [r["name"] for r in reloaded.get_all()] == ["Jane Doe"]
+
+
+def test_group_commit_flushes_when_enough_writes_are_pending():
+    db = InMemoryDB("screenings", persistence="wal", group_commit_ms=60_000, group_commit_max_pending=5)
+    for n in range(5):
+        db.create({"name": f"Client {n}"})
+
+    deadline = time.monotonic() + 5
+    while db._pending and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert db._pending == []
+
+
+def test_page_follows_id_order():
+    db = InMemoryDB("screenings", persistence="wal")
+    for n in range(5):
+        db.create({"name": f"Client {n}", "risk": "high" if n % 2 else "low"})
+    db.delete(3)
+
+    assert [r["id"] for r in db.page(limit=2)] == [1, 2]
+    assert [r["id"] for r in db.page(after_id=2)] == [4, 5]
+    reloaded = InMemoryDB("screenings", persistence="wal")
+    assert [r["id"] for r in reloaded.iter_multi(after_id=1)] == [2, 4, 5]
+
+
+def test_get_range_uses_sorted_index():
+    db = InMemoryDB("documents", persistence="wal", sorted_indexes=["expiry_date"])
+    for day in (20, 5, 12):
+        db.create(Document(expiry_date=date(2024, 1, day)))
+    db.create(Document())
+    db.delete(3)
+
+    reloaded = InMemoryDB("documents", persistence="wal", sorted_indexes=["expiry_date"])
+    for store in (db, reloaded):
+        assert [d.id for d in store.get_range("expiry_date", date(2024, 1, 1), date(2024, 1, 31))] == [2, 1]
+
+
+def test_bulk_writes_are_logged_in_one_append():
+    db = InMemoryDB("screenings", persistence="wal")
+    writes = []
+    write_wal = db._write_wal
+    db._write_wal = lambda batch, fsync=False: (writes.append(len(batch)), write_wal(batch, fsync))
+
+    assert db.create_many([{"name": f"Client {n}"} for n in range(5)]) == [1, 2, 3, 4, 5]
+    assert db.update_many({2: {"name": "Renamed"}, 9: {"name": "Missing"}}) == [2]
+    assert db.delete_many([1, 3, 9]) == [1, 3]
+    assert writes == [5, 1, 2]
+
+    reloaded = InMemoryDB("screenings", persistence="wal")
+    assert [r["name"] for r in reloaded.get_all()] == ["Renamed", "Client 3", "Client 4"]
+    assert reloaded.next_id == 6
+
+
+def test_changes_are_delivered_across_threads():
+    async def run():
+        db = InMemoryDB("screenings", persistence="wal")
+        async with db.changes.subscribe() as changes:
+            record_id = await asyncio.to_thread(db.create, {"name": "Jane Doe"})
+            await asyncio.to_thread(db.update, record_id, {"name": "Jane Roe"})
+            await asyncio.to_thread(db.delete_many, [record_id])
+            return [await changes.get() for _ in range(3)]
+
+    insert, update, delete = asyncio.run(run())
+    assert (insert.type, insert.store, insert.new) == (ChangeType.INSERT, "screenings", {"name": "Jane Doe", "id": 1})
+    assert (update.old["name"], update.new["name"]) == ("Jane Doe", "Jane Roe")
+    assert (delete.type, delete.old["name"]) == (ChangeType.DELETE, "Jane Roe")
+
+
+class Screening(BaseModel):
+    id: Optional[int] = None
+    match_status: str = "no_match"
+
+
+def test_aggregates_follow_writes_and_reloads():
+    def open_db():
+        return InMemoryDB(
+            "screenings", persistence="wal", aggregates={"match_status": Aggregate(group_by="match_status")}
+        )
+
+    db = open_db()
+    db.create_many([Screening(), Screening(match_status="potential_match"), Screening()])
+    screening = db.get(1)
+    screening.match_status = "confirmed_match"
+    db.update(1, screening)
+    db.delete(3)
+    assert db.aggregate("match_status").counts() == {"confirmed_match": 1, "potential_match": 1}
+
+    assert open_db().aggregate("match_status").counts() == {"confirmed_match": 1, "potential_match": 1}
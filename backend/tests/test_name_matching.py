@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from app.services.compliance.utils.name_matching import (
+    fold_name,
+    jaro_winkler_pairs,
+    score_batch,
+    score_names,
+    score_pairs,
+)
+
+
+def test_fold_name_strips_accents_and_transliterates():
+    assert fold_name("  Nicolás  MADURO-Moros ") == "nicolas maduro moros"
+    assert fold_name("Николас Мадуро") == "nikolas maduro"
+    assert fold_name("Straße Ørsted") == "strasse orsted"
+
+
+def test_jaro_winkler_matches_reference_values():
+    scores = jaro_winkler_pairs(["martha", "dixon", "jellyfish", "", "abc"], ["marhta", "dicksonx", "smellyfish", "x", "abc"])
+    assert scores == pytest.approx([0.9611, 0.8133, 0.8963, 0.0, 1.0], abs=1e-4)
+
+
+def test_scores_separate_strong_and_weak_matches():
+    candidates = ["Nicolás MADURO Moros", "Nicolas Madura", "N. Maduro", "Nicolas Sarkozy", "Juan Perez"]
+    scores = score_names("Nicolas Maduro", candidates)
+    assert scores[1] > 0.9 and scores[2] > 0.9
+    assert scores[0] > 0.85
+    assert scores[3] <= 0.5 and scores[4] == 0.0
+
+
+def test_token_order_and_spacing_do_not_matter():
+    assert score_pairs(["Maduro Moros Nicolas", "MohammedAli"], ["Nicolas Maduro Moros", "Mohammed Ali"]).tolist() == [1.0, 1.0]
+
+
+def test_shared_first_name_alone_is_weak():
+    assert score_pairs(["Juan Perez"], ["Juan Sanchez"])[0] < 0.6
+
+
+def test_score_batch_matches_pairwise_scores():
+    queries = ["Nicolas Maduro", "Juan Perez", ""]
+    candidates = ["Nicolas Maduro Moros", "Juan Pérez", "Someone Else"]
+    matrix = score_batch(queries, candidates)
+    assert matrix.shape == (3, 3)
+    for row, query in enumerate(queries):
+        assert np.array_equal(matrix[row], score_names(query, candidates))
+    assert matrix[1, 1] == 1.0
+    assert not matrix[2].any()
@@ -0,0 +1,204 @@
+import asyncio
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from app.core.cache import ResponseCache, SingleFlight
+from app.core.http import http_pool
+from app.services.compliance.utils import open_sanctions
+from app.services.compliance.utils.open_sanctions import OpenSanctionsClient
+
+
+def person(entity_id, birth_date):
+    return {"id": entity_id, "properties": {"birthDate": [{"value": birth_date}]}}
+
+
+UPSTREAM = {"total": 2, "results": [person("p1", "1960-01-01"), person("p2", "1970-01-01")]}
+
+
+def make_client(tmp_path, monkeypatch):
+    monkeypatch.setattr(open_sanctions, "response_cache", ResponseCache("test_opensanctions", tmp_path))
+    monkeypatch.setattr(open_sanctions, "in_flight", SingleFlight())
+    client = OpenSanctionsClient(api_key="key", api_url="http://opensanctions.invalid")
+    fetched = []
+
+    async def fetch(endpoint, params, cache_key, use_cache, what):
+        fetched.append(params)
+        await asyncio.sleep(0.01)
+        result = {"total": UPSTREAM["total"], "results": list(UPSTREAM["results"])}
+        if use_cache:
+            await client._cache_response(cache_key, result)
+        return result
+
+    monkeypatch.setattr(client, "_fetch_search", fetch)
+    return client, fetched
+
+
+def test_concurrent_identical_searches_share_one_request(tmp_path, monkeypatch):
+    client, fetched = make_client(tmp_path, monkeypatch)
+
+    async def run():
+        return await asyncio.gather(
+            client.search_pep("Jane Doe", country="PA"),
+            client.search_pep("Jane Doe", country="PA", birth_date="1970-01-01"),
+            client.search_pep("Jane Doe", country="PA"),
+            client.search_sanctions("Jane Doe", country="PA"),
+        )
+
+    plain, filtered, again, sanctions = asyncio.run(run())
+    # Three PEP searches coalesce; the sanctions search has other parameters.
+    assert len(fetched) == 2
+    assert open_sanctions.in_flight.counters == {"calls": 2, "coalesced": 2}
+    assert plain == again == sanctions == UPSTREAM
+    # The birth date filter applies per caller, not to the shared response.
+    assert [entity["id"] for entity in filtered["results"]] == ["p2"]
+    assert filtered["total"] == 1
+
+
+def test_later_searches_are_served_from_the_unfiltered_cache(tmp_path, monkeypatch):
+    client, fetched = make_client(tmp_path, monkeypatch)
+
+    async def run():
+        first = await client.search_pep("Jane Doe", birth_date="1960-01-01")
+        second = await client.search_pep("Jane Doe", birth_date="1970-01-01")
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert len(fetched) == 1
+    assert [entity["id"] for entity in first["results"]] == ["p1"]
+    assert [entity["id"] for entity in second["results"]] == ["p2"]
+
+
+class StubMatchServer:
+    """
+    Answers POST /match/{dataset} like the OpenSanctions API. In bulk
+    requests, "Dropped" gets no response and "Rejected" fails the whole
+    request; "Broken" always gets an error status. A request with
+    "Overloaded" gets a 503.
+    """
+
+    def __init__(self, delay=0.0):
+        self.requests = []
+        self.delay = delay
+
+    async def match(self, request):
+        assert request.headers["Authorization"] == "ApiKey key"
+        await asyncio.sleep(self.delay)
+        body = await request.json()
+        queries = body["queries"]
+        names = {query_id: query["properties"]["name"][0] for query_id, query in queries.items()}
+        self.requests.append(sorted(names.values()))
+        bulk = len(queries) > 1
+        if "Overloaded" in names.values():
+            return web.json_response({"detail": "overloaded"}, status=503)
+        if bulk and "Rejected" in names.values():
+            return web.json_response({"detail": "invalid query"}, status=400)
+        responses = {}
+        for query_id, name in names.items():
+            if name == "Broken":
+                responses[query_id] = {"status": 500, "results": []}
+            elif not (bulk and name == "Dropped"):
+                result = {"id": name.lower(), "caption": name, "score": 0.9, "match": True}
+                responses[query_id] = {"status": 200, "results": [result], "total": {"value": 1}}
+        return web.json_response({"responses": responses})
+
+
+def stub_client(tmp_path, monkeypatch, server_url):
+    monkeypatch.setattr(open_sanctions, "response_cache", ResponseCache("test_opensanctions_match", tmp_path))
+    return OpenSanctionsClient(api_key="key", api_url=server_url)
+
+
+def run_with_stub(tmp_path, monkeypatch, scenario, delay=0.0):
+    stub = StubMatchServer(delay)
+
+    async def run():
+        app = web.Application()
+        app.router.add_post("/match/{dataset}", stub.match)
+        async with TestServer(app) as server:
+            client = stub_client(tmp_path, monkeypatch, str(server.make_url("")).rstrip("/"))
+            try:
+                return await scenario(client)
+            finally:
+                await http_pool.close()
+
+    return stub, asyncio.run(run())
+
+
+def captions(answers):
+    return [answer["results"][0]["caption"] if "results" in answer else answer["error"] for answer in answers]
+
+
+def test_match_entities_sends_bulk_requests_and_caches_answers(tmp_path, monkeypatch):
+    names = ["Ann", "Bob", "Cid", "Dan", "Eve"]
+
+    async def scenario(client):
+        queries = [client.entity_query(name, "natural", country="PA") for name in names]
+        first = await client.match_entities(queries, batch_size=2)
+        second = await client.match_entities(queries, batch_size=2)
+        return first, second
+
+    stub, (first, second) = run_with_stub(tmp_path, monkeypatch, scenario)
+    assert sorted(stub.requests) == [["Ann", "Bob"], ["Cid", "Dan"], ["Eve"]]
+    assert captions(first) == captions(second) == names
+
+
+def test_unanswered_and_rejected_entities_are_matched_one_by_one(tmp_path, monkeypatch):
+    names = ["Ann", "Dropped", "Broken", "Bob", "Rejected", "Cid"]
+
+    async def scenario(client):
+        return await client.match_entities([client.entity_query(name) for name in names], batch_size=3)
+
+    stub, answers = run_with_stub(tmp_path, monkeypatch, scenario)
+    assert captions(answers) == [
+        "Ann", "Dropped", "No match response for entity", "Bob", "Rejected", "Cid",
+    ]
+    # The first batch falls back for two entities, the rejected one for all three.
+    assert sorted(stub.requests) == sorted([
+        ["Ann", "Broken", "Dropped"], ["Broken"], ["Dropped"],
+        ["Bob", "Cid", "Rejected"], ["Bob"], ["Cid"], ["Rejected"],
+    ])
+
+
+def test_overloaded_upstream_fails_the_batch_without_retries(tmp_path, monkeypatch):
+    names = ["Ann", "Overloaded", "Bob"]
+
+    async def scenario(client):
+        return await client.match_entities([client.entity_query(name) for name in names], batch_size=3)
+
+    stub, answers = run_with_stub(tmp_path, monkeypatch, scenario)
+    assert stub.requests == [["Ann", "Bob", "Overloaded"]]
+    assert all(answer["error"].startswith("API error: 503") for answer in answers)
+
+
+def test_concurrent_match_entity_calls_share_a_bulk_request(tmp_path, monkeypatch):
+    monkeypatch.setattr(open_sanctions.settings, "OPENSANCTIONS_MATCH_BATCH_SIZE", 3)
+    monkeypatch.setattr(open_sanctions.settings, "OPENSANCTIONS_MATCH_WINDOW_MS", 50)
+    names = ["Ann", "Bob", "Cid", "Dan"]
+
+    async def scenario(client):
+        return await asyncio.gather(
+            *(client.match_entity(client.entity_query(name), dataset="peps") for name in names)
+        )
+
+    stub, answers = run_with_stub(tmp_path, monkeypatch, scenario)
+    # A full batch goes at once, the rest when the window closes.
+    assert stub.requests == [["Ann", "Bob", "Cid"], ["Dan"]]
+    assert captions(answers) == names
+
+
+def test_identical_match_queries_go_upstream_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(open_sanctions, "in_flight", SingleFlight())
+
+    async def scenario(client):
+        query = client.entity_query("Ann", "natural", country="PA")
+        # Two callers queued in the same batch, and a bulk call while that batch is in flight.
+        queued = asyncio.gather(client.match_entity(query), client.match_entity(query))
+        await asyncio.sleep(0.03)
+        bulk = await client.match_entities([query, client.entity_query("Bob")], use_cache=False)
+        return await queued, bulk
+
+    stub, (queued, bulk) = run_with_stub(tmp_path, monkeypatch, scenario, delay=0.1)
+    assert stub.requests == [["Ann"], ["Bob"]]
+    assert captions(queued) == ["Ann", "Ann"]
+    assert captions(bulk) == ["Ann", "Bob"]
+    assert open_sanctions.in_flight.counters == {"calls": 2, "coalesced": 2}
@@ -0,0 +1,40 @@
+import pytest
+from fastapi import HTTPException, Response
+
+from app.core.pagination import (
+    NEXT_CURSOR_HEADER,
+    cursor_after_id,
+    decode_cursor,
+    encode_cursor,
+    set_next_cursor,
+)
+
+
+class Row:
+    def __init__(self, id):
+        self.id = id
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor(42)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == 42
+    assert cursor_after_id(cursor) == 42
+    assert cursor_after_id(None) is None
+
+
+def test_invalid_cursor_is_a_bad_request():
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+    with pytest.raises(HTTPException) as exc:
+        cursor_after_id(encode_cursor(1)[:-2])
+    assert exc.value.status_code == 400
+
+
+def test_next_cursor_only_on_full_pages():
+    response = Response()
+    set_next_cursor(response, [Row(1), Row(2)], limit=3)
+    assert NEXT_CURSOR_HEADER not in response.headers
+
+    set_next_cursor(response, [Row(1), Row(2)], limit=2)
+    assert decode_cursor(response.headers[NEXT_CURSOR_HEADER]) == 2
@@ -0,0 +1,111 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.db import in_memory
+from app.services.compliance.models.models import CustomerVerifyRequest, Entity
+from app.services.compliance.services import rescreening
+from app.services.compliance.services.sanctions_engine import SanctionsEngine
+
+NOW = datetime(2026, 6, 1, 12, 0)
+
+
+def write_list(directory, names, source="ofac"):
+    path = directory / f"{source}_cached.json"
+    path.write_text(json.dumps({"entries": [{"name": name, "country": "VE"} for name in names]}))
+
+
+def request(name, directors=()):
+    return CustomerVerifyRequest(
+        customer=Entity(name=name, country="PA", type="natural"),
+        directors=[Entity(name=director, country="PA", type="natural") for director in directors],
+    )
+
+
+@pytest.fixture
+def lists(tmp_path, monkeypatch):
+    lists_dir = tmp_path / "lists"
+    lists_dir.mkdir()
+    write_list(lists_dir, ["Nicolas Maduro Moros"])
+    monkeypatch.setattr(rescreening, "sanctions_engine", SanctionsEngine(lists_dir, check_interval=0))
+    monkeypatch.setattr(in_memory, "DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(
+        rescreening, "screening_states_db", in_memory.InMemoryDB("states", sorted_indexes=["client_id"])
+    )
+    return lists_dir
+
+
+def screen_all(requests, now=NOW):
+    """One daily run: the due clients are verified and recorded."""
+    due = rescreening.clients_to_rescreen(requests, now=now)
+    for client_id in due:
+        state = rescreening.snapshot(client_id, requests[client_id])
+        rescreening.record(state.model_copy(update={"screened_at": now}))
+    return due
+
+
+def test_only_new_and_changed_clients_are_due(lists):
+    requests = {1: request("Ana Lopez"), 2: request("Banco Uno", directors=["Juan Perez"])}
+    assert screen_all(requests) == {1, 2}
+    assert screen_all(requests) == set()
+
+    requests[2] = request("Banco Uno", directors=["Juan Perez", "Maria Gomez"])
+    requests[3] = request("Carlos Ruiz")
+    assert screen_all(requests) == {2, 3}
+
+    # Case, accents and director order do not count as changes.
+    requests[2] = request("BANCO UNO", directors=["María Gómez", "Juan Pérez"])
+    assert screen_all(requests) == set()
+
+
+def test_list_change_rescreens_only_affected_clients(lists):
+    requests = {1: request("Ana Lopez"), 2: request("Banco Uno", directors=["Pedro Sanchez"])}
+    screen_all(requests)
+
+    write_list(lists, ["Nicolas Maduro Moros", "Pedro Sanchez"])
+    assert screen_all(requests) == {2}
+    assert screen_all(requests) == set()
+
+    write_list(lists, ["Nicolas Maduro Moros", "Pedro Sanchez", "Someone Else"])
+    assert screen_all(requests) == set()
+    versions = rescreening.sanctions_engine.list_versions()
+    assert rescreening.get_state(1).list_versions == versions
+
+
+def test_stale_screenings_are_due(lists, monkeypatch):
+    monkeypatch.setattr(rescreening.settings, "COMPLIANCE_RESCREEN_MAX_AGE_DAYS", 30)
+    requests = {1: request("Ana Lopez")}
+    screen_all(requests)
+    assert rescreening.clients_to_rescreen(requests, now=NOW + timedelta(days=29)) == set()
+    assert rescreening.clients_to_rescreen(requests, now=NOW + timedelta(days=31)) == {1}
+
+
+def test_failed_verification_is_retried(lists):
+    requests = {1: request("Ana Lopez")}
+    assert rescreening.clients_to_rescreen(requests, now=NOW) == {1}
+    # Not recorded, as if verify_customer() had raised.
+    assert rescreening.clients_to_rescreen(requests, now=NOW) == {1}
+
+
+def test_verification_with_unavailable_sources_is_retried(lists):
+    requests = {1: request("Banco Uno", directors=["Juan Perez"])}
+    answered = {"timed_out_sources": [], "stale_sources": []}
+    result = {
+        "customer": answered,
+        "directors": [{"timed_out_sources": ["opensanctions"], "stale_sources": []}],
+        "ubos": [],
+    }
+
+    def run(result):
+        due = rescreening.clients_to_rescreen(requests, now=NOW)
+        for client_id in due:
+            state = rescreening.snapshot(client_id, requests[client_id])
+            if rescreening.fully_answered(result):
+                rescreening.record(state.model_copy(update={"screened_at": NOW}))
+        return due
+
+    assert run(result) == {1}
+    assert run({**result, "directors": [{**answered, "stale_sources": ["pep"]}]}) == {1}
+    assert run({**result, "directors": [answered]}) == {1}
+    assert run({**result, "directors": [answered]}) == set()
@@ -0,0 +1,126 @@
+import asyncio
+import os
+
+from app.core import cache as cache_module
+from app.core.cache import ResponseCache, SingleFlight, cache_stats
+
+
+def files_in(directory):
+    return sorted(
+        name[: -len(".json")] for _, _, names in os.walk(directory) for name in names if name.endswith(".json")
+    )
+
+
+def test_values_survive_a_restart_through_the_disk_store(tmp_path):
+    async def run():
+        first = ResponseCache("test_restart", tmp_path)
+        await first.set("k1", {"results": [1, 2]}, ttl_seconds=60)
+        assert await first.get("k1") == {"results": [1, 2]}
+
+        second = ResponseCache("test_restart", tmp_path)
+        assert await second.get("k1") == {"results": [1, 2]}
+        assert await second.get("k1") == {"results": [1, 2]}
+        assert await second.get("missing") is None
+        return first.stats(), second.stats()
+
+    first, second = asyncio.run(run())
+    assert (first["memory_hits"], first["writes"]) == (1, 1)
+    assert (second["disk_hits"], second["memory_hits"], second["misses"]) == (1, 1, 1)
+    assert second["hit_ratio"] == round(2 / 3, 4)
+    assert second["avg_get_ms"] is not None
+    # Entries live in shard directories under the cache directory.
+    assert not any(name.endswith(".json") for name in os.listdir(tmp_path))
+
+
+def test_returned_values_are_copies(tmp_path):
+    async def run():
+        cache = ResponseCache("test_copies", tmp_path)
+        await cache.set("k", {"results": []}, ttl_seconds=60)
+        (await cache.get("k"))["results"].append("changed")
+        return await cache.get("k")
+
+    assert asyncio.run(run()) == {"results": []}
+
+
+def test_entries_expire_per_entry(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "time", lambda: now[0])
+
+    async def run():
+        cache = ResponseCache("test_ttl", tmp_path, memory_entries=0)
+        await cache.set("short", {"v": 1}, ttl_seconds=10)
+        await cache.set("long", {"v": 2}, ttl_seconds=100)
+        now[0] += 50
+        return cache, await cache.get("short"), await cache.get("long")
+
+    cache, short, long = asyncio.run(run())
+    assert (short, long) == (None, {"v": 2})
+    assert cache.stats()["expired"] == 1
+    assert files_in(tmp_path) == ["long"]
+
+
+def test_disk_store_evicts_least_recently_used(tmp_path):
+    payload = {"blob": "x" * 1000}
+
+    async def run():
+        cache = ResponseCache("test_evict", tmp_path, memory_entries=0, max_bytes=3500)
+        for key in ("a", "b", "c"):
+            await cache.set(key, payload, ttl_seconds=60)
+        assert await cache.get("a") == payload
+        await cache.set("d", payload, ttl_seconds=60)
+        return cache
+
+    cache = asyncio.run(run())
+    assert files_in(tmp_path) == ["a", "c", "d"]
+    stats = cache.stats()
+    assert stats["evictions"] == 1 and stats["disk_bytes"] <= 3500
+    assert "test_evict" in cache_stats()
+
+
+def test_single_flight_coalesces_concurrent_calls():
+    flight = SingleFlight()
+    started = []
+
+    async def call():
+        started.append(1)
+        await asyncio.sleep(0.01)
+        return {"results": ["a"]}
+
+    async def run():
+        first, second, other = await asyncio.gather(
+            flight.do("k", call), flight.do("k", call), flight.do("other", call)
+        )
+        first["results"].append("changed")
+        # The entry is gone once the call completes.
+        third = await flight.do("k", call)
+        return first, second, other, third
+
+    first, second, other, third = asyncio.run(run())
+    assert second == other == third == {"results": ["a"]}
+    assert first == {"results": ["a", "changed"]}
+    assert len(started) == 3
+    assert flight.counters == {"calls": 3, "coalesced": 1}
+
+
+def test_single_flight_shares_errors_and_survives_a_cancelled_waiter():
+    flight = SingleFlight()
+
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise ValueError("upstream down")
+
+    async def slow():
+        await asyncio.sleep(0.02)
+        return {"ok": True}
+
+    async def run():
+        errors = await asyncio.gather(flight.do("k", failing), flight.do("k", failing), return_exceptions=True)
+        cancelled = asyncio.ensure_future(flight.do("s", slow))
+        waiting = asyncio.ensure_future(flight.do("s", slow))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        return errors, await waiting
+
+    errors, result = asyncio.run(run())
+    assert [str(error) for error in errors] == ["upstream down", "upstream down"]
+    assert result == {"ok": True}
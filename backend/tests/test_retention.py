@@ -0,0 +1,106 @@
+import weakref
+from datetime import datetime, timedelta
+from typing import Optional
+
+import pytest
+from pydantic import BaseModel
+
+from app.core.config import settings
+from app.db import in_memory, retention
+from app.db.base import InMemoryDB
+from app.db.query import Field
+from app.db.retention import RetentionPolicy
+
+NOW = datetime(2026, 6, 1, 12, 0)
+
+
+class Event(BaseModel):
+    id: Optional[int] = None
+    kind: str
+    created_at: datetime
+
+
+@pytest.fixture(autouse=True)
+def archive_dir(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "DB_ENGINE", "memory")
+    monkeypatch.setattr(in_memory, "DATA_DIR", str(tmp_path))
+    # apply_all() must only reach the stores of the test, not the application's.
+    monkeypatch.setattr(retention, "_stores", weakref.WeakSet())
+    monkeypatch.setattr(settings, "DB_ARCHIVE_DIR", str(tmp_path / "archive"))
+    return tmp_path / "archive"
+
+
+def make_db(policy: RetentionPolicy) -> InMemoryDB[Event]:
+    db = InMemoryDB[Event](Event, sorted_indexes=["created_at"], retention=policy)
+    db.create_many(objs_in=[
+        Event(kind="old" if days > 30 else "new", created_at=NOW - timedelta(days=days))
+        for days in (40, 35, 20, 10, 5, 1)
+    ])
+    return db
+
+
+def test_rows_past_max_age_are_archived_and_evicted():
+    db = make_db(RetentionPolicy(max_age_days=30))
+    assert db.apply_retention(NOW) == 2
+    assert sorted(db.data) == [3, 4, 5, 6]
+    assert db.apply_retention(NOW) == 0
+
+    archived = list(retention.query_archive(db.archive_name, model_class=Event))
+    assert [(e.id, e.kind) for e in archived] == [(1, "old"), (2, "old")]
+    assert archived[0].created_at == NOW - timedelta(days=40)
+
+
+def test_max_rows_evicts_the_oldest_ids():
+    db = make_db(RetentionPolicy(max_age_days=30, max_rows=3))
+    assert db.apply_retention(NOW) == 3
+    assert sorted(db.data) == [4, 5, 6]
+    assert [row["id"] for row in retention.query_archive(db.archive_name)] == [1, 2, 3]
+
+
+def test_archive_batches_can_be_queried_offline():
+    db = make_db(RetentionPolicy(max_rows=4))
+    db.apply_retention(NOW)
+    db.create(obj_in=Event(kind="new", created_at=NOW))
+    db.apply_retention(NOW)
+
+    assert len(retention.archive_files(db.archive_name)) == 1
+    assert [row["id"] for row in retention.query_archive(db.archive_name)] == [1, 2, 3]
+    recent = Field("created_at").ge(NOW - timedelta(days=30))
+    assert [e.id for e in retention.query_archive(db.archive_name, recent, model_class=Event)] == [3]
+
+
+def test_torn_archive_tail_is_ignored():
+    db = make_db(RetentionPolicy(max_rows=5))
+    db.apply_retention(NOW)
+    path = retention.archive_files(db.archive_name)[0]
+    with open(path, "ab") as f:
+        f.write(b"\x1f\x8b\x08\x00partial")
+    assert [row["id"] for row in retention.read_archive(path)] == [1]
+
+
+def test_archive_can_be_disabled(archive_dir):
+    db = make_db(RetentionPolicy(max_age_days=30, archive=False))
+    assert db.apply_retention(NOW) == 2
+    assert not archive_dir.exists()
+
+
+def test_apply_all_covers_registered_stores():
+    db = make_db(RetentionPolicy(max_age_days=30))
+    plain = InMemoryDB[Event](Event, snapshot_name="plain_events")
+    plain.create(obj_in=Event(kind="old", created_at=NOW - timedelta(days=400)))
+    retention.apply_all(NOW)
+    assert sorted(db.data) == [3, 4, 5, 6]
+    assert len(plain.data) == 1
+
+
+def test_compliance_store_evicts_dict_records():
+    db = in_memory.InMemoryDB(
+        "retention_updates", persistence="wal", retention=RetentionPolicy(max_age_days=30, age_field="update_date")
+    )
+    db.create_many([{"list_name": "OFAC", "update_date": NOW - timedelta(days=days)} for days in (60, 2)])
+    assert db.apply_retention(NOW) == 1
+    assert list(db.data) == [2]
+
+    reloaded = in_memory.InMemoryDB("retention_updates", persistence="wal")
+    assert list(reloaded.data) == [2]
+    assert [row["list_name"] for row in retention.query_archive("retention_updates")] == ["OFAC"]
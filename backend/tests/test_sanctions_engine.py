@@ -0,0 +1,82 @@
+import json
+import os
+
+import pytest
+
+from app.services.compliance.services.sanctions_engine import SanctionsEngine
+
+
+def write_list(directory, entries, name="ofac_cached.json"):
+    path = directory / name
+    path.write_text(json.dumps({"entries": entries}))
+    return path
+
+
+@pytest.fixture
+def engine(tmp_path):
+    write_list(tmp_path, [
+        {"name": "Nicolás MADURO Moros", "country": "VE", "aliases": ["Nicolas Maduro"]},
+        {"name": "Nicolas Sarkozy", "country": "FR"},
+        {"name": "Banco Ejemplo S.A.", "country": "VE"},
+    ])
+    return SanctionsEngine(tmp_path, check_interval=0)
+
+
+def test_screen_matches_names_and_aliases(engine):
+    matches = engine.screen("ofac", "Nicolas Maduro", "VE")
+    assert [m["name"] for m in matches] == ["Nicolás MADURO Moros"]
+    assert matches[0]["score"] == 1.0
+    assert matches[0]["source"] == "OFAC (Cached)"
+    assert matches[0]["details"]["matched_name"] == "Nicolas Maduro"
+    assert matches[0]["details"]["country_match"]
+
+    partial = engine.screen("ofac", "maduro")
+    assert [m["name"] for m in partial] == ["Nicolás MADURO Moros"]
+    assert partial[0]["score"] < 1.0
+
+    assert engine.screen("ofac", "Nicolas Madura")[0]["score"] > 0.9
+
+
+def test_screen_many_answers_each_name(engine):
+    results = engine.screen_many("ofac", ["Banco Ejemplo", "Nobody Here", "N. Maduro"], ["VE", None, None])
+    assert [[m["name"] for m in matches] for matches in results] == [
+        ["Banco Ejemplo S.A."],
+        [],
+        ["Nicolás MADURO Moros"],
+    ]
+    assert results[0][0]["details"]["country_match"]
+
+
+def test_country_alone_and_shared_first_names_do_not_match(engine):
+    assert engine.screen("ofac", "Juan Perez", "VE") == []
+    assert engine.screen("ofac", "Nicolas Perez") == []
+
+
+def test_list_is_reloaded_when_the_file_changes(engine, tmp_path):
+    assert engine.screen("ofac", "John Smith") == []
+    path = write_list(tmp_path, [{"name": "John Smith", "country": "US"}])
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert [m["name"] for m in engine.screen("ofac", "John Smith")] == ["John Smith"]
+
+
+def test_missing_or_broken_lists(engine, tmp_path):
+    assert engine.screen("un", "Nicolas Maduro") == []
+    before = engine.refresh("ofac")
+    path = tmp_path / "ofac_cached.json"
+    path.write_text("{not json")
+    assert engine.refresh("ofac", force=True) is before
+
+
+def test_spelling_variants_without_a_shared_token_are_candidates(tmp_path):
+    write_list(tmp_path, [
+        {"name": "Muammar Gaddafi", "country": "LY"},
+        {"name": "Gazprombank", "country": "RU"},
+        {"name": "Rosneft Oil Company", "country": "RU"},
+    ])
+    engine = SanctionsEngine(tmp_path, check_interval=0)
+    # Transliteration variant: no token in common.
+    assert [m["name"] for m in engine.screen("ofac", "Moammar Qaddafi")] == ["Muammar Gaddafi"]
+    # Split and joined tokens.
+    assert [m["name"] for m in engine.screen("ofac", "Gazprom Bank")] == ["Gazprombank"]
+    assert [m["name"] for m in engine.screen("ofac", "RosneftOil Company")] == ["Rosneft Oil Company"]
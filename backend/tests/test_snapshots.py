@@ -0,0 +1,89 @@
+import gc
+from typing import Optional
+
+import pytest
+from pydantic import BaseModel
+
+from app.core.config import settings
+from app.db import snapshots
+from app.db.base import InMemoryDB
+
+
+class Note(BaseModel):
+    id: Optional[int] = None
+    text: str
+
+
+@pytest.fixture(autouse=True)
+def memory_engine(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "DB_ENGINE", "memory")
+    monkeypatch.setattr(settings, "DB_SNAPSHOT_DIR", str(tmp_path))
+
+
+def make_db() -> InMemoryDB[Note]:
+    db = InMemoryDB[Note](Note, indexes=["text"])
+    db.create_many(objs_in=[Note(text=f"note {n}") for n in range(5)])
+    db.remove(id=2)
+    return db
+
+
+def test_snapshot_round_trip(tmp_path):
+    db = make_db()
+    path = str(tmp_path / "notes.snapshot")
+    assert db.snapshot(path)
+    assert not db.snapshot(path)  # unchanged
+
+    restored = InMemoryDB[Note](Note, indexes=["text"], snapshot_name="restored_notes")
+    assert restored.restore_from(path)
+    assert restored._restore_path == path  # nothing read yet
+    assert [n.id for n in restored.get_multi(filters={"text": "note 3"})] == [4]
+    assert sorted(restored.data) == [1, 3, 4, 5]
+    assert restored.create(obj_in=Note(text="new")).id == 6
+
+
+def test_only_empty_stores_are_restored(tmp_path):
+    path = str(tmp_path / "notes.snapshot")
+    make_db().snapshot(path)
+    db = make_db()
+    assert not db.restore_from(path)
+
+
+def test_snapshot_all_and_restore_all_use_registered_names():
+    class Memo(BaseModel):
+        id: Optional[int] = None
+        text: str
+
+    db = InMemoryDB[Memo](Memo)
+    other = InMemoryDB[Memo](Memo, snapshot_name="other_memos")
+    db.create(obj_in=Memo(text="kept"))
+    other.create(obj_in=Memo(text="other"))
+    assert (db.snapshot_name, other.snapshot_name) == (snapshots.store_name(Memo), "other_memos")
+    with pytest.raises(ValueError):
+        InMemoryDB[Memo](Memo)
+    with pytest.raises(ValueError):
+        InMemoryDB[Memo](Memo, snapshot_name="other_memos")
+    assert snapshots.snapshot_all() >= 2
+    assert snapshots.snapshot_all() == 0
+
+    del db, other
+    gc.collect()
+    # Each store gets its own file back, whatever order they are created in.
+    other = InMemoryDB[Memo](Memo, snapshot_name="other_memos")
+    restored = InMemoryDB[Memo](Memo)
+    assert restored.snapshot_name == snapshots.store_name(Memo)
+    assert snapshots.restore_all() >= 2
+    assert [m.text for m in other.data.values()] == ["other"]
+    # A store that was never loaded does not overwrite its snapshot.
+    assert restored.snapshot(snapshots.snapshot_path(restored.snapshot_name)) is False
+    assert [m.text for m in restored.data.values()] == ["kept"]
+
+
+def test_truncated_snapshot_is_rejected(tmp_path):
+    path = str(tmp_path / "notes.snapshot")
+    make_db().snapshot(path)
+    with open(path, "rb") as f:
+        content = f.read()
+    with open(path, "wb") as f:
+        f.write(content[:-20])
+    with pytest.raises(ValueError):
+        snapshots.read_snapshot(path, Note)
@@ -0,0 +1,196 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from enum import Enum
+from typing import List, Optional
+
+import pytest
+from pydantic import BaseModel
+
+from app.core.config import settings
+from app.db.aggregates import Aggregate
+from app.db import sqlite
+from app.db.base import InMemoryDB
+from app.db.events import ChangeType
+from app.db.query import Field
+from app.db.sqlite import SQLiteDB
+
+
+class Status(str, Enum):
+    PENDING = "pending"
+    PAID = "paid"
+
+
+class Item(BaseModel):
+    id: Optional[int] = None
+    invoice_id: int
+    status: Status = Status.PENDING
+    tags: List[str] = []
+
+
+class Event(BaseModel):
+    id: Optional[int] = None
+    due: Optional[datetime] = None
+    day: Optional[date] = None
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "store.sqlite3")
+
+
+@pytest.fixture
+def db(db_path):
+    db = SQLiteDB[Item](Item, indexes=["invoice_id"], path=db_path)
+    for n in range(10):
+        db.create(obj_in=Item(invoice_id=n % 3))
+    return db
+
+
+def test_engine_is_selected_by_setting(monkeypatch, db_path):
+    monkeypatch.setattr(settings, "DB_ENGINE", "sqlite")
+    monkeypatch.setattr(settings, "SQLITE_DB_PATH", db_path)
+    store = InMemoryDB[Item](Item)
+    assert isinstance(store, SQLiteDB)
+    assert store.path == db_path
+
+
+def test_data_survives_reopening(db, db_path):
+    reopened = SQLiteDB[Item](Item, indexes=["invoice_id"], path=db_path)
+    assert len(reopened.data) == 10
+    assert reopened.counter == 11
+    assert reopened.get(3).invoice_id == 2
+
+
+def test_filters_skip_and_limit_are_pushed_down(db):
+    db.update(id=5, obj_in={"status": Status.PAID})
+    assert [i.id for i in db.get_multi(filters={"invoice_id": 1})] == [2, 5, 8]
+    assert [i.id for i in db.get_multi(filters={"invoice_id": 1, "status": "paid"})] == [5]
+    assert [i.id for i in db.get_multi(skip=1, limit=1, filters={"invoice_id": 1})] == [5]
+    assert [i.id for i in db.get_multi(filters={"id": 4})] == [4]
+    assert db.get_multi(filters={"invoice_id": None}) == []
+
+
+def test_non_scalar_filters_are_applied_after_the_query(db):
+    db.update(id=4, obj_in={"tags": ["urgent"]})
+    assert [i.id for i in db.get_multi(filters={"invoice_id": 0, "tags": ["urgent"]})] == [4]
+
+
+def test_declared_indexes_exist(db, db_path):
+    rows = db._execute("SELECT name FROM sqlite_master WHERE type = 'index'").fetchall()
+    assert ("ix_" + db.table + "_invoice_id",) in rows
+
+
+def test_remove_and_data_mapping(db):
+    removed = db.remove(id=2)
+    assert removed.id == 2
+    assert db.remove(id=2) is None
+    assert 2 not in db.data
+
+    db.data[99] = Item(id=99, invoice_id=7)
+    assert db.get_multi(filters={"invoice_id": 7})[0].id == 99
+
+    db.data.clear()
+    db.counter = 1
+    assert db.get_multi() == []
+    assert db.create(obj_in=Item(invoice_id=1)).id == 1
+
+
+def test_page_and_iter_multi(db):
+    assert [i.id for i in db.page(after_id=8)] == [9, 10]
+    assert [i.id for i in db.get_multi(after_id=2, limit=2, filters={"invoice_id": 1})] == [5, 8]
+    assert [i.id for i in db.iter_multi(filters={"invoice_id": 0})] == [1, 4, 7, 10]
+
+
+def test_get_range_is_pushed_down(db_path):
+    db = SQLiteDB[Event](Event, sorted_indexes=["due", "day"], path=db_path)
+    for n in (5, 1, 3):
+        db.create(obj_in=Event(due=datetime(2024, 1, 1, 12) + timedelta(days=n), day=date(2024, 1, 1 + n)))
+    db.create(obj_in=Event())
+
+    assert [e.id for e in db.get_range("due", date(2024, 1, 2), date(2024, 1, 5))] == [2, 3]
+    assert [e.id for e in db.get_range("day", date(2024, 1, 4), descending=True)] == [1, 3]
+    assert [e.id for e in db.get_range("day", end=date(2024, 1, 4), end_inclusive=False)] == [2]
+    assert [e.id for e in db.get_range("day", end=datetime(2024, 1, 4, 9))] == [2, 3]
+
+
+def test_bulk_writes(db):
+    created = db.create_many(objs_in=[Item(invoice_id=7), Item(invoice_id=7)])
+    assert [item.id for item in created] == [11, 12]
+    assert db.counter == 13
+
+    assert [i.id for i in db.update_many(objs_in={11: {"status": Status.PAID}, 99: {"invoice_id": 1}})] == [11]
+    assert [i.id for i in db.get_multi(filters={"invoice_id": 7, "status": "paid"})] == [11]
+
+    assert [i.id for i in db.remove_many(ids=[12, 99])] == [12]
+    assert [i.id for i in db.get_multi(filters={"invoice_id": 7})] == [11]
+
+
+def test_changes_are_published_after_commit(db):
+    async def run():
+        async with db.changes.subscribe() as changes:
+            db.update(id=1, obj_in={"status": Status.PAID})
+            db.remove_many(ids=[1])
+            return [await changes.get() for _ in range(2)]
+
+    update, delete = asyncio.run(run())
+    assert (update.type, update.old.status, update.new.status) == (ChangeType.UPDATE, Status.PENDING, Status.PAID)
+    assert (delete.type, delete.id, delete.old.status) == (ChangeType.DELETE, 1, Status.PAID)
+
+
+def test_writes_of_other_processes_are_published(tmp_path, monkeypatch):
+    # Poll by hand, from another thread (so another connection) than the
+    # writer. Always the same thread: data_version is per connection.
+    monkeypatch.setattr(settings, "SQLITE_CHANGE_POLL_MS", 3_600_000)
+    path = str(tmp_path / "shared.sqlite3")
+    db = SQLiteDB[Item](Item, path=path)
+    db.create_many(objs_in=[Item(invoice_id=n) for n in range(3)])
+    poller = sqlite._pollers[path]
+    polling_thread = ThreadPoolExecutor(max_workers=1)
+
+    async def poll():
+        await asyncio.get_running_loop().run_in_executor(polling_thread, poller.poll)
+
+    async def run():
+        await poll()
+        async with db.changes.subscribe() as changes:
+            with monkeypatch.context() as m:
+                m.setattr(sqlite, "_origin", lambda: "another-worker")
+                db.update(id=2, obj_in={"status": Status.PAID})
+                db.remove(id=3)
+            assert [(await changes.get()).type for _ in range(2)] == [ChangeType.UPDATE, ChangeType.DELETE]
+            await poll()
+            return [await changes.get() for _ in range(2)]
+
+    update, delete = asyncio.run(run())
+    polling_thread.shutdown()
+    assert (update.type, update.id, update.old, update.new.status) == (ChangeType.UPDATE, 2, None, Status.PAID)
+    assert (delete.type, delete.id) == (ChangeType.DELETE, 3)
+
+
+def test_process_lock_is_exclusive(db_path):
+    with sqlite.process_lock(db_path, "init"):
+        assert os.path.exists(f"{db_path}.init.lock")
+
+
+def test_query_is_pushed_down(db):
+    db.update(id=5, obj_in={"status": Status.PAID, "tags": ["urgent"]})
+    where = Field("invoice_id").in_([1, 2]) & Field("status").eq("paid")
+    assert [i.id for i in db.query(where)] == [5]
+    assert "ix_" in db.explain(where) and "filter" not in db.explain(where)
+
+    residual = Field("invoice_id").ge(1) & Field("tags").contains("urgent")
+    assert [i.id for i in db.query(residual)] == [5]
+    assert db.explain(residual).endswith("then filter tags contains 'urgent'")
+    assert [i.id for i in db.query(Field("invoice_id").ge(1), order_by="invoice_id", descending=True, limit=2)] == [9, 6]
+    assert db.count(Field("invoice_id").eq(0) | Field("id").eq(2)) == 5
+
+
+def test_aggregates_are_computed_from_the_table(db_path):
+    db = SQLiteDB[Item](Item, aggregates={"status": Aggregate(group_by="status")}, path=db_path)
+    db.create_many(objs_in=[Item(invoice_id=n) for n in range(5)])
+    db.update(id=2, obj_in={"status": "paid"})
+
+    assert db.aggregate("status").counts() == {"pending": 4, "paid": 1}
+    assert db.aggregate("status").count("paid") == 1
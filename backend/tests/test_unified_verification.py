@@ -0,0 +1,173 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from app.core.cache import ResponseCache
+from app.core.config import settings
+from app.services.compliance.services import unified_verification_service
+from app.services.compliance.services.sanctions_engine import SanctionsEngine
+from app.services.compliance.services.unified_verification_service import (
+    SourceUnavailable,
+    UnifiedVerificationService,
+)
+
+SOURCES = ("pep", "open_sanctions", "ofac", "un", "eu")
+
+
+@pytest.fixture
+def service(monkeypatch, tmp_path):
+    service = UnifiedVerificationService()
+    service.last_good = ResponseCache("test_last_good", tmp_path)
+    state = {"running": 0, "peak": 0, "calls": []}
+
+    def fake_check(source, delay):
+        async def check(entity):
+            state["calls"].append(source)
+            state["running"] += 1
+            state["peak"] = max(state["peak"], state["running"])
+            try:
+                await asyncio.sleep(entity.get("delays", {}).get(source, delay))
+            finally:
+                state["running"] -= 1
+            if source in entity.get("down", ()):
+                raise SourceUnavailable(f"{source} is down")
+            return [{"source": source, "name": entity["name"], "score": 0.9}] if source in entity.get("hits", ()) else []
+        return check
+
+    for source in SOURCES:
+        monkeypatch.setattr(service, f"_check_{source}", fake_check(source, 0.05))
+    service.state = state
+    return service
+
+
+def test_source_checks_of_all_entities_run_concurrently(service, monkeypatch):
+    monkeypatch.setattr(settings, "COMPLIANCE_VERIFY_CONCURRENCY", 100)
+    entities = [{"name": f"Entity {i}", "country": "PA"} for i in range(4)]
+
+    async def run():
+        started = time.perf_counter()
+        results = await asyncio.gather(*(service._enrich_and_verify(entity) for entity in entities))
+        return results, time.perf_counter() - started
+
+    results, elapsed = asyncio.run(run())
+    assert [r["name"] for r in results] == [e["name"] for e in entities]
+    assert service.state["peak"] == 4 * len(SOURCES)
+    assert elapsed < 0.5
+
+
+def test_concurrency_is_bounded(service, monkeypatch):
+    monkeypatch.setattr(settings, "COMPLIANCE_VERIFY_CONCURRENCY", 3)
+    entities = [{"name": f"Entity {i}", "country": "PA", "hits": ("pep", "ofac")} for i in range(3)]
+
+    async def run():
+        return await asyncio.gather(*(service._enrich_and_verify(entity) for entity in entities))
+
+    results = asyncio.run(run())
+    assert service.state["peak"] == 3
+    for result in results:
+        assert [m["source"] for m in result["pep_matches"]] == ["pep"]
+        assert [m["source"] for m in result["sanctions_matches"]] == ["ofac"]
+        assert result["timed_out_sources"] == []
+
+
+def test_slow_source_times_out_without_blocking_the_others(service, monkeypatch):
+    monkeypatch.setattr(settings, "COMPLIANCE_VERIFY_CONCURRENCY", 10)
+    monkeypatch.setattr(settings, "COMPLIANCE_SOURCE_TIMEOUTS", {"un": 0.1})
+    monkeypatch.setattr(settings, "COMPLIANCE_SOURCE_TIMEOUT_SECONDS", 5.0)
+    entity = {"name": "Slow", "country": "PA", "delays": {"un": 10}, "hits": ("un", "eu")}
+
+    started = time.perf_counter()
+    result = asyncio.run(service._verify_entity(entity))
+    assert time.perf_counter() - started < 1
+    assert result["timed_out_sources"] == ["un"]
+    assert [m["source"] for m in result["sanctions_matches"]] == ["eu"]
+
+
+def test_open_circuit_answers_from_the_last_good_data_and_refreshes_it(service, monkeypatch):
+    monkeypatch.setattr(settings, "CIRCUIT_BREAKER_MIN_CALLS", 2)
+    monkeypatch.setattr(settings, "CIRCUIT_BREAKER_FAILURE_RATE", 0.5)
+    monkeypatch.setattr(settings, "CIRCUIT_BREAKER_OPEN_SECONDS", 0.2)
+    monkeypatch.setattr(settings, "COMPLIANCE_SOURCE_TIMEOUTS", {})
+    quick = {source: 0 for source in SOURCES}
+    healthy = {"name": "Jane Doe", "country": "PA", "hits": ("ofac",), "delays": quick}
+    # Down, the source fails after 0.1s.
+    down = {**healthy, "down": ("ofac",), "delays": {**quick, "ofac": 0.1}}
+
+    async def run():
+        first = await service._verify_entity(healthy)
+        # Failures trip the circuit, and the last good answer stands in.
+        failed = [await service._verify_entity(down) for _ in range(2)]
+        assert service._breaker("ofac").state == "open"
+        calls = service.state["calls"].count("ofac")
+
+        started = time.perf_counter()
+        while_open = await service._verify_entity(down)
+        elapsed = time.perf_counter() - started
+        assert service.state["calls"].count("ofac") == calls
+
+        # The background refresh probes the source once the circuit half-opens.
+        await asyncio.sleep(0.3)
+        return first, failed, while_open, elapsed
+
+    first, failed, while_open, elapsed = asyncio.run(run())
+    assert first["stale_sources"] == []
+    for result in failed + [while_open]:
+        assert result["stale_sources"] == ["ofac"]
+        assert result["timed_out_sources"] == []
+        assert [m["source"] for m in result["sanctions_matches"]] == ["ofac"]
+    assert elapsed < 0.05
+    # The probe failed too (the source is still down), so the circuit reopened.
+    assert service._breaker("ofac").state == "open"
+    assert service._breaker("ofac").stats()["opened"] == 2
+
+
+def test_failed_source_without_last_good_data_uses_its_cached_list(service, monkeypatch):
+    async def cached_open_sanctions(entity):
+        return [{"source": "OpenSanctions (Cached)", "name": entity["name"], "score": 0.8}]
+
+    monkeypatch.setattr(service, "_cached_open_sanctions", cached_open_sanctions)
+    entity = {"name": "Jane Doe", "country": "PA", "down": ("open_sanctions", "un")}
+
+    result = asyncio.run(service._verify_entity(entity))
+    assert result["stale_sources"] == ["opensanctions"]
+    # UN has no cached check apart from the live one.
+    assert result["timed_out_sources"] == ["un"]
+    assert [m["source"] for m in result["sanctions_matches"]] == ["OpenSanctions (Cached)"]
+
+
+def test_cancelled_checks_are_not_source_failures(service, monkeypatch):
+    monkeypatch.setattr(settings, "CIRCUIT_BREAKER_MIN_CALLS", 2)
+    monkeypatch.setattr(settings, "COMPLIANCE_SOURCE_TIMEOUTS", {})
+    entity = {"name": "Jane Doe", "country": "PA", "delays": {"ofac": 1}}
+
+    async def run():
+        for _ in range(3):
+            call = asyncio.ensure_future(service._call_source("ofac", service._check_ofac, entity))
+            await asyncio.sleep(0.01)
+            call.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await call
+
+    asyncio.run(run())
+    breaker = service._breaker("ofac")
+    assert breaker.state == "closed"
+    assert breaker.stats()["failures"] == 0
+
+
+def test_cached_pep_matches_weigh_country_and_birth_date(monkeypatch, tmp_path):
+    (tmp_path / "pep_cached.json").write_text(json.dumps({"entries": [
+        {"name": "Nicolás Maduro Moros", "country": "VE", "birth_date": "1962-11-23"},
+        {"name": "Nicolas Sarkozy", "country": "FR", "birth_date": "1955-01-28"},
+    ]}))
+    monkeypatch.setattr(unified_verification_service, "sanctions_engine", SanctionsEngine(tmp_path, check_interval=0))
+    service = UnifiedVerificationService()
+
+    matches = service._match_cached_pep("Nicolas Maduro Moros", "VE", "1962-11-23")
+    assert [m["name"] for m in matches] == ["Nicolás Maduro Moros"]
+    assert matches[0]["score"] == 1.0
+    assert matches[0]["source"] == "OpenSanctions PEP (Cached)"
+    # A close name alone is not enough, and a name is needed besides the country.
+    assert service._match_cached_pep("Nicolas Maduro Moros", "", "") == []
+    assert service._match_cached_pep("Jane Doe", "VE", "1962-11-23") == []
@@ -0,0 +1,161 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.db import in_memory
+from app.db.aggregates import Aggregate
+from app.services.compliance.services.verification_jobs import VerificationJobManager
+
+
+@pytest.fixture
+def stores(tmp_path, monkeypatch):
+    monkeypatch.setattr(in_memory, "DATA_DIR", str(tmp_path))
+
+    def open_stores():
+        return (
+            in_memory.InMemoryDB("jobs", persistence="wal"),
+            in_memory.InMemoryDB(
+                "job_results",
+                persistence="wal",
+                aggregates={"job_status": Aggregate(group_by=in_memory.job_result_status)},
+            ),
+        )
+
+    return open_stores
+
+
+def make_clients(count):
+    return [SimpleNamespace(id=i, name=f"Client {i}", country="PA") for i in range(1, count + 1)]
+
+
+def make_manager(jobs_db, results_db, clients, verify, workers=4):
+    return VerificationJobManager(
+        jobs_db,
+        results_db,
+        workers=workers,
+        clients=lambda: iter(clients),
+        count_clients=lambda: len(clients),
+        verify=verify,
+    )
+
+
+def test_job_screens_every_client_and_checkpoints_errors(stores):
+    clients = make_clients(1500)
+    seen = []
+
+    async def verify(client):
+        seen.append(client.id)
+        if client.id % 100 == 0:
+            raise RuntimeError("source down")
+        return {"customer": {"name": client.name}}
+
+    async def run():
+        manager = make_manager(*stores(), clients, verify)
+        job = manager.submit()
+        assert job["status"] == "queued" and job["total_clients"] == 1500
+        await asyncio.gather(*manager._tasks.values())
+        return manager, job["job_id"]
+
+    manager, job_id = asyncio.run(run())
+    assert sorted(seen) == list(range(1, 1501))
+    progress = manager.progress(job_id)
+    assert progress["status"] == "completed"
+    assert (progress["processed"], progress["verified_count"], progress["error_count"]) == (1500, 1485, 15)
+
+    page = manager.results(job_id, after_client_id=99, limit=2)
+    assert [(r["client_id"], r["status"], r.get("error")) for r in page] == [
+        (100, "error", "source down"),
+        (101, "verified", None),
+    ]
+
+
+def test_submit_returns_the_active_job_instead_of_starting_another(stores):
+    clients = make_clients(20)
+    release = asyncio.Event()
+
+    async def verify(client):
+        await release.wait()
+        return {"customer": {"name": client.name}}
+
+    async def run():
+        manager = make_manager(*stores(), clients, verify)
+        first = manager.submit()
+        await asyncio.sleep(0)
+        second = manager.submit()
+        release.set()
+        await asyncio.gather(*manager._tasks.values())
+        third = manager.submit()
+        await asyncio.gather(*manager._tasks.values())
+        return manager, first, second, third
+
+    manager, first, second, third = asyncio.run(run())
+    assert second["job_id"] == first["job_id"]
+    assert second["status"] == "running"
+    assert len(manager.jobs_db.get_all()) == 2
+    assert third["job_id"] != first["job_id"]
+    assert manager.progress(first["job_id"])["processed"] == 20
+
+
+def test_interrupted_job_resumes_without_rescreening(stores):
+    clients = make_clients(40)
+    calls = []
+
+    async def interrupted_run():
+        started = asyncio.Event()
+
+        async def verify(client):
+            calls.append(client.id)
+            if len(calls) >= 10:
+                started.set()
+                await asyncio.sleep(3600)
+            return {}
+
+        manager = make_manager(*stores(), clients, verify, workers=2)
+        job_id = manager.submit()["job_id"]
+        await started.wait()
+        await manager.shutdown()
+        return job_id
+
+    job_id = asyncio.run(interrupted_run())
+    jobs_db, results_db = stores()
+    checkpointed = {r["client_id"] for r in results_db.get_all()}
+    assert jobs_db.get(job_id)["status"] == "running"
+    assert 0 < len(checkpointed) < 40
+
+    resumed_calls = []
+
+    async def resumed_run():
+        async def verify(client):
+            resumed_calls.append(client.id)
+            return {}
+
+        manager = make_manager(jobs_db, results_db, clients, verify)
+        assert manager.resume_jobs() == [job_id]
+        await asyncio.gather(*manager._tasks.values())
+        return manager
+
+    manager = asyncio.run(resumed_run())
+    assert not checkpointed & set(resumed_calls)
+    assert sorted(checkpointed | set(resumed_calls)) == list(range(1, 41))
+    progress = manager.progress(job_id)
+    assert progress["status"] == "completed" and progress["processed"] == 40
+
+
+def test_watch_streams_progress_until_completion(stores):
+    clients = make_clients(20)
+
+    async def verify(client):
+        await asyncio.sleep(0.001)
+        return {}
+
+    async def run():
+        manager = make_manager(*stores(), clients, verify, workers=2)
+        job_id = manager.submit()["job_id"]
+        return [progress async for progress in manager.watch(job_id, heartbeat=1)]
+
+    updates = asyncio.run(run())
+    processed = [update["processed"] for update in updates]
+    assert processed == sorted(processed)
+    assert len(updates) > 2
+    assert updates[-1]["status"] == "completed" and updates[-1]["processed"] == 20